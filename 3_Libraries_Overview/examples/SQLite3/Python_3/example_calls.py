@@ -64,8 +64,11 @@
 #------------------------------------------------------------------------------
 
 #import ctypes, sys, os
-#import ozz_sql3
+import os, sys, time, csv, subprocess, tempfile, tracemalloc, threading, random
+import asyncio, logging
+import ozz_sql3
 import example_sql3
+import ozz_sql3_aio
 
 ## ====>> Error Constants
 # Beware of name conflicts!
@@ -85,6 +88,10 @@ def main():
     char_want_version = "3.34.1"
     int_want_version = 3034001
 
+    # Show the messages of the example_sql3 functions on the console (stderr).
+    # They are off by default, see example_sql3.db_report_enable().
+    example_sql3.db_report_enable()
+
 
     """
     ## Basic hello world ===================================================>>
@@ -124,11 +131,11 @@ def main():
 
     p_stmt = ozz_sql3.p_sqlite3_stmt()  # Get the sqlite_stmt structure.
 
-    # This ctypes prototype must be provided at the start of any python
-    # function retreiving error messages.
+    # The ctypes prototype for sqlite3_errmsg() (and every other function in
+    # ozz_sql3.SQL3_PROTOTYPES) is applied by the library from load_libsql3()
+    # when the function is first used, so the functions can be called
+    # directly from id_lib_sql3.
     # const char *sqlite3_errmsg(sqlite3*);
-    id_lib_sql3.sqlite3_errmsg.argtypes = [ctypes.c_void_p]
-    id_lib_sql3.sqlite3_errmsg.restype = ctypes.c_char_p
 
     db_filename_ram = ":memory:"  # Using a temporary "In RAM" database.
 
@@ -1618,10 +1625,1213 @@ def main():
     """
 
 
+    """
+    ## Benchmarks ==========================================================>>
+    # These create their own database file and can take some time to run.
+    # The db_* messages are not reported so that only the database work is timed.
+    example_sql3.db_report_disable()
+
+    # ctypes prototypes bound once vs re-bound on every call.
+    Benchmark_Prototype_Binding("Benchmark_DB.db", 1000000)
+    print("===========================================")
+
+    # Open/close per call vs a single Database session.
+    Benchmark_Database_Session("Benchmark_DB.db", 10000)
+    print("===========================================")
+
+    # Insert at rowid with and without the prepared statement cache.
+    Benchmark_Stmt_Cache("Benchmark_DB.db", 2000)
+    print("===========================================")
+
+    # Row look-ups with values concatenated into the SQL vs bound parameters.
+    Benchmark_Bind_Lookup("Benchmark_DB.db", 10000)
+    print("===========================================")
+
+    # Bulk insert throughput (rows/sec) vs transaction batch size.
+    Benchmark_Bulk_Insert("Benchmark_DB.db", 100000)
+    print("===========================================")
+
+    # Insert at rowid, row by row shift vs set based UPDATE shift.
+    Benchmark_Insert_Rowid_Shift("Benchmark_DB.db", (1000, 10000, 100000))
+    print("===========================================")
+
+    # Whole table list vs streaming row iterator: first row time and memory.
+    Benchmark_Iter_Rows("Benchmark_DB.db", 200000)
+    print("===========================================")
+
+    # Row decoding: per cell string concatenation vs RowDecoder.
+    Benchmark_Row_Decode("Benchmark_DB.db", 20000, 30)
+    print("===========================================")
+
+    # Numeric columns, per row typed tuples vs columnar fetch_columns().
+    Benchmark_Fetch_Columns("Benchmark_DB.db", 500000)
+    print("===========================================")
+
+    # Large BLOB, whole value bind/column_blob vs incremental BLOB I/O.
+    Benchmark_Blob_Stream("Benchmark_DB.db", 64 * 1048576)
+    print("===========================================")
+
+    # Reader throughput with an active writer, rollback journal vs WAL pool.
+    Benchmark_Connection_Pool("Benchmark_Pool.db", 10000, 4, 3.0)
+    print("===========================================")
+
+    # Event loop tick latency during a long scan, blocking call vs ozz_sql3_aio.
+    Benchmark_Aio_Latency("Benchmark_DB.db", 200000)
+    print("===========================================")
+
+    # Table scan and search, 1 process vs a process pool over rowid ranges.
+    Benchmark_Parallel_Scan("Benchmark_DB.db", 1000000)
+    print("===========================================")
+
+    # Table/column introspection, query per call vs the session schema cache.
+    Benchmark_Schema_Cache("Benchmark_DB.db", 2000)
+    print("===========================================")
+
+    # Row count of a large table, COUNT(*) vs maintained vs ANALYZE estimate.
+    Benchmark_Row_Count("Benchmark_DB.db", 1000000, 100)
+    print("===========================================")
+
+    # Mixed type table, dict per cell (db_list_table_all_types) vs VariantTable.
+    Benchmark_Variant_Table("Benchmark_DB.db", 100000)
+    print("===========================================")
+
+    # CSV import, INSERT string per line vs import_csv(); export_csv().
+    Benchmark_CSV("Benchmark_DB.db", "Benchmark.csv", 200000, 2000)
+    print("===========================================")
+
+    # Query profiling overhead, off vs on, and the slowest statements report.
+    Benchmark_Query_Profiling("Benchmark_DB.db", 20000, 20)
+    print("===========================================")
+
+    # Search by field latency, full table scan vs advised index.
+    Benchmark_Index_Advisor("Benchmark_DB.db", 1000000, 20)
+    print("===========================================")
+
+    # Process start up, import ozz_sql3 + load library + first query.
+    Benchmark_Startup(10)
+    print("===========================================")
+
+    # Success path with the messages reported (to os.devnull) vs not reported.
+    Benchmark_Reporting("Benchmark_DB.db", 1000000)
+    print("===========================================")
+
+    # Read latency, disk file vs in-memory snapshot, and a background save.
+    Benchmark_Memory_Snapshot("Benchmark_DB.db", 200000, 2000)
+    print("===========================================")
+
+    # Repeated reads by file name, without vs with the result cache.
+    Benchmark_Result_Cache("Benchmark_DB.db", 1000, 20000, 1000)
+    print("===========================================")
+
+    # Sync changed rows, one REPLACE per call vs one batched upsert.
+    Benchmark_Upsert("Benchmark_DB.db", 100000, 20000, 500)
+    print("===========================================")
+    """
+
+
     return None
 ## END main
 
 
+## ====>> Benchmarks
+
+# Emulates the old ozz_sql3 behaviour of re-assigning .argtypes and .restype
+# on the C function every time a wrapper function is called. Each attribute
+# look-up applies the prototype again before returning the function.
+class Legacy_Prototype_Library:
+    def __init__(self, id_lib_sql3):
+        self.id_lib_sql3 = id_lib_sql3
+
+    def __getattr__(self, func_name):
+        c_function = getattr(self.id_lib_sql3, func_name)
+        argtypes, restype = ozz_sql3.SQL3_PROTOTYPES[func_name]
+        c_function.argtypes = argtypes
+        c_function.restype = restype
+        return c_function
+
+
+# Step number_rows through example_sql3.db_list_table_rows_data() with the
+# ctypes prototypes re-bound on each call (before) and bound once on first
+# use by ozz_sql3.SQLite3Library (after).
+def Benchmark_Prototype_Binding(db_file_name, number_rows):
+    db_tbl_rowdata = []
+    number_columns = 3
+
+    example_sql3.db_file_create(db_file_name)
+    example_sql3.db_table_delete(db_file_name, "DROP TABLE IF EXISTS Bench_Rows;")
+    example_sql3.db_table_create(db_file_name, "CREATE TABLE IF NOT EXISTS Bench_Rows(Item TEXT, Quantity TEXT, Price TEXT);")
+    # Generate number_rows of data with a single recursive INSERT.
+    example_sql3.db_insert_table_rowdata(db_file_name, \
+        "WITH RECURSIVE cnt(x) AS (SELECT 1 UNION ALL SELECT x+1 FROM cnt WHERE x < " + str(number_rows) + ") " \
+        "INSERT INTO Bench_Rows(Item, Quantity, Price) SELECT 'Item ' || x, x % 100, x * 0.25 FROM cnt;")
+
+    # Before: swap load_libsql3() for one returning the per call re-binding library.
+    load_libsql3 = ozz_sql3.load_libsql3
+    ozz_sql3.load_libsql3 = lambda f_library_sql3: Legacy_Prototype_Library(load_libsql3(f_library_sql3))
+    try:
+        t_start = time.perf_counter()
+        example_sql3.db_list_table_rows_data(db_file_name, "Bench_Rows", db_tbl_rowdata, number_columns)
+        t_before = time.perf_counter() - t_start
+    finally:
+        ozz_sql3.load_libsql3 = load_libsql3
+    db_tbl_rowdata.clear()
+
+    # After: prototypes bound once, on first use of each function.
+    t_start = time.perf_counter()
+    example_sql3.db_list_table_rows_data(db_file_name, "Bench_Rows", db_tbl_rowdata, number_columns)
+    t_after = time.perf_counter() - t_start
+
+    print("Rows stepped: " + str(len(db_tbl_rowdata)))
+    print("Prototypes bound per call: " + "{:.3f}".format(t_before) + " s")
+    print("Prototypes bound once    : " + "{:.3f}".format(t_after) + " s")
+    print("Speed up: " + "{:.2f}".format(t_before / t_after) + "x")
+
+    return None
+## END Function
+
+
+# Compare calling the example_sql3 functions with a database file name
+# (load library, open and close the database on every call) against one
+# Database session shared by every call, for an insert loop and a rowid
+# lookup loop of number_rows.
+def Benchmark_Database_Session(db_file_name, number_rows):
+    ret_exists = 0
+
+    example_sql3.db_file_create(db_file_name)
+    example_sql3.db_table_delete(db_file_name, "DROP TABLE IF EXISTS Bench_Session;")
+    example_sql3.db_table_create(db_file_name, "CREATE TABLE IF NOT EXISTS Bench_Session(Name TEXT, Value TEXT);")
+
+    # Insert loop, open/close per call.
+    t_start = time.perf_counter()
+    for i in range(number_rows):
+        example_sql3.db_insert_table_rowdata(db_file_name, "INSERT INTO Bench_Session VALUES('Name " + str(i) + "', '" + str(i) + "');")
+    t_insert_file = time.perf_counter() - t_start
+
+    # Lookup loop, open/close per call.
+    t_start = time.perf_counter()
+    for i in range(1, number_rows +1):
+        ret_exists = example_sql3.db_table_rowid_exists(db_file_name, "Bench_Session", i)
+    t_lookup_file = time.perf_counter() - t_start
+
+    with example_sql3.Database(db_file_name) as db:
+        # Insert loop, single session.
+        t_start = time.perf_counter()
+        for i in range(number_rows):
+            example_sql3.db_insert_table_rowdata(db, "INSERT INTO Bench_Session VALUES('Name " + str(i) + "', '" + str(i) + "');")
+        t_insert_session = time.perf_counter() - t_start
+
+        # Lookup loop, single session.
+        t_start = time.perf_counter()
+        for i in range(1, number_rows +1):
+            ret_exists = example_sql3.db_table_rowid_exists(db, "Bench_Session", i)
+        t_lookup_session = time.perf_counter() - t_start
+
+    print("Rows: " + str(number_rows) + " (last lookup = " + str(ret_exists) + ")")
+    print("Insert, open per call: " + "{:.3f}".format(t_insert_file) + " s")
+    print("Insert, session      : " + "{:.3f}".format(t_insert_session) + " s")
+    print("Lookup, open per call: " + "{:.3f}".format(t_lookup_file) + " s")
+    print("Lookup, session      : " + "{:.3f}".format(t_lookup_session) + " s")
+
+    return None
+## END Function
+
+
+# Run db_insert_table_rowdata_rowid() (a SELECT plus a REPLACE per row moved)
+# on a table of number_rows with the session statement cache disabled
+# (stmt_cache_size=0, every statement prepared and finalized) and enabled.
+def Benchmark_Stmt_Cache(db_file_name, number_rows):
+    db_field_names = "Item, Quantity"
+    db_field_values = "\"New Item\", \"0\""
+    t_results = []
+
+    example_sql3.db_file_create(db_file_name)
+    for stmt_cache_size in (0, 32):
+        example_sql3.db_table_delete(db_file_name, "DROP TABLE IF EXISTS Bench_Cache;")
+        example_sql3.db_table_create(db_file_name, "CREATE TABLE IF NOT EXISTS Bench_Cache(Item TEXT, Quantity TEXT);")
+        example_sql3.db_insert_table_rowdata(db_file_name, \
+            "WITH RECURSIVE cnt(x) AS (SELECT 1 UNION ALL SELECT x+1 FROM cnt WHERE x < " + str(number_rows) + ") " \
+            "INSERT INTO Bench_Cache(Item, Quantity) SELECT 'Item ' || x, x FROM cnt;")
+
+        with example_sql3.Database(db_file_name, stmt_cache_size=stmt_cache_size) as db:
+            t_start = time.perf_counter()
+            example_sql3.db_insert_table_rowdata_rowid(db, "Bench_Cache", 1, db_field_names, db_field_values, 2, number_rows)
+            t_results.append(time.perf_counter() - t_start)
+            print("stmt_cache_size=" + str(stmt_cache_size) + " stats: " + str(db.stmt_cache.stats()))
+
+    print("Rows moved: " + str(number_rows))
+    print("Insert at rowid, no statement cache: " + "{:.3f}".format(t_results[0]) + " s")
+    print("Insert at rowid, statement cache   : " + "{:.3f}".format(t_results[1]) + " s")
+
+    return None
+## END Function
+
+
+# Look up every rowid of a number_rows table on a single Database session with
+# the value concatenated into the SQL text (a new statement for each rowid)
+# and with the _bind versions (one cached statement with a bound rowid).
+def Benchmark_Bind_Lookup(db_file_name, number_rows):
+    t_results = []
+
+    example_sql3.db_file_create(db_file_name)
+    example_sql3.db_table_delete(db_file_name, "DROP TABLE IF EXISTS Bench_Bind;")
+    example_sql3.db_table_create(db_file_name, "CREATE TABLE IF NOT EXISTS Bench_Bind(Item TEXT, Quantity TEXT);")
+    example_sql3.db_insert_table_rowdata(db_file_name, \
+        "WITH RECURSIVE cnt(x) AS (SELECT 1 UNION ALL SELECT x+1 FROM cnt WHERE x < " + str(number_rows) + ") " \
+        "INSERT INTO Bench_Bind(Item, Quantity) SELECT 'Item ' || x, x FROM cnt;")
+
+    with example_sql3.Database(db_file_name) as db:
+        t_start = time.perf_counter()
+        for rowid in range(1, number_rows + 1):
+            example_sql3.db_table_rowid_exists(db, "Bench_Bind", rowid)
+            example_sql3.db_read_table_rowdata_rowid(db, "Bench_Bind", rowid, [], 2)
+        t_results.append(time.perf_counter() - t_start)
+
+        t_start = time.perf_counter()
+        for rowid in range(1, number_rows + 1):
+            example_sql3.db_table_rowid_exists_bind(db, "Bench_Bind", rowid)
+            example_sql3.db_read_table_rowdata_rowid_bind(db, "Bench_Bind", rowid, [], 2)
+        t_results.append(time.perf_counter() - t_start)
+        print("Statement cache stats: " + str(db.stmt_cache.stats()))
+
+    print("Rows looked up: " + str(number_rows))
+    print("Concatenated SQL : " + "{:.3f}".format(t_results[0]) + " s")
+    print("Bound parameters : " + "{:.3f}".format(t_results[1]) + " s")
+
+    return None
+## END Function
+
+
+# Insert rows one INSERT per call in autocommit mode (each row is its own
+# transaction and file sync), then with db_insert_table_rows_bulk() for a
+# range of batch sizes. Prints rows/sec for each.
+def Benchmark_Bulk_Insert(db_file_name, number_rows):
+    db_rows = [("Item " + str(x), x) for x in range(number_rows)]
+    number_rows_single = min(number_rows, 500)  # Autocommit per row is slow!
+
+    example_sql3.db_file_create(db_file_name)
+
+    with example_sql3.Database(db_file_name) as db:
+        example_sql3.db_table_delete(db, "DROP TABLE IF EXISTS Bench_Bulk;")
+        example_sql3.db_table_create(db, "CREATE TABLE IF NOT EXISTS Bench_Bulk(Item TEXT, Quantity INTEGER);")
+
+        t_start = time.perf_counter()
+        for x in range(number_rows_single):
+            example_sql3.db_insert_table_rowdata(db, "INSERT INTO Bench_Bulk(Item, Quantity) VALUES(\"Item " + str(x) + "\", " + str(x) + ");")
+        t_total = time.perf_counter() - t_start
+        print("Autocommit, one INSERT per row : " + "{:12.0f}".format(number_rows_single / t_total) + " rows/sec")
+
+        for batch_size in (1, 10, 100, 1000, 10000, number_rows):
+            example_sql3.db_table_delete(db, "DELETE FROM Bench_Bulk;")
+            number_rows_ret = []
+            t_start = time.perf_counter()
+            example_sql3.db_insert_table_rows_bulk(db, "Bench_Bulk", "Item, Quantity", db_rows[:number_rows_single] if batch_size == 1 else db_rows, batch_size, number_rows_ret)
+            t_total = time.perf_counter() - t_start
+            print("Bulk insert, batch_size " + "{:<7}".format(batch_size) + ": " + "{:12.0f}".format(number_rows_ret[0] / t_total) + " rows/sec")
+
+    return None
+## END Function
+
+
+# Insert one row at the middle rowid of tables of each size in table_sizes,
+# with the row by row db_insert_table_rowdata_rowid() and the set based
+# db_insert_table_rowdata_rowid_shift(). The row by row version is skipped
+# above 10000 rows as it takes too long.
+def Benchmark_Insert_Rowid_Shift(db_file_name, table_sizes):
+    example_sql3.db_file_create(db_file_name)
+
+    with example_sql3.Database(db_file_name) as db:
+        for number_rows in table_sizes:
+            db_rows = [("Item " + str(x), str(x)) for x in range(number_rows)]
+            t_results = []
+            for version in (0, 1):
+                if version == 0 and number_rows > 10000:
+                    t_results.append(None)
+                    continue
+                example_sql3.db_table_delete(db, "DROP TABLE IF EXISTS Bench_Shift;")
+                example_sql3.db_table_create(db, "CREATE TABLE IF NOT EXISTS Bench_Shift(Item TEXT, Quantity TEXT);")
+                example_sql3.db_insert_table_rows_bulk(db, "Bench_Shift", "Item, Quantity", db_rows, 10000)
+                t_start = time.perf_counter()
+                if version == 0:
+                    example_sql3.db_insert_table_rowdata_rowid(db, "Bench_Shift", number_rows // 2, "Item, Quantity", "\"New Item\", \"0\"", 2, number_rows)
+                else:
+                    example_sql3.db_insert_table_rowdata_rowid_shift(db, "Bench_Shift", number_rows // 2, "Item, Quantity", ("New Item", "0"))
+                t_results.append(time.perf_counter() - t_start)
+
+            print("Insert at rowid " + str(number_rows // 2) + " of " + str(number_rows) + " rows:")
+            if t_results[0] is None:
+                print("  Row by row shift: (skipped)")
+            else:
+                print("  Row by row shift: " + "{:.4f}".format(t_results[0]) + " s")
+            print("  Set based shift : " + "{:.4f}".format(t_results[1]) + " s")
+
+    return None
+## END Function
+
+
+# Read a number_rows table with db_list_table_rows_data() (whole table into a
+# list) and with example_sql3.iter_table_rows() (one row at a time). Prints the
+# time to the first row and total time, then the peak Python memory from a
+# second run with tracemalloc (which slows the run down, so is not timed).
+def Benchmark_Iter_Rows(db_file_name, number_rows):
+    db_rows = [("Item " + str(x), str(x)) for x in range(number_rows)]
+
+    example_sql3.db_file_create(db_file_name)
+    with example_sql3.Database(db_file_name) as db:
+        example_sql3.db_table_delete(db, "DROP TABLE IF EXISTS Bench_Iter;")
+        example_sql3.db_table_create(db, "CREATE TABLE IF NOT EXISTS Bench_Iter(Item TEXT, Quantity TEXT);")
+        example_sql3.db_insert_table_rows_bulk(db, "Bench_Iter", "Item, Quantity", db_rows, 10000)
+        db_rows = None
+
+        for version in ("List   ", "Iterate"):
+            t_results = []
+            for trace in (False, True):
+                if trace == True:
+                    tracemalloc.start()
+                t_first = None
+                t_start = time.perf_counter()
+                if version == "List   ":
+                    db_tbl_rowdata = []
+                    example_sql3.db_list_table_rows_data(db, "Bench_Iter", db_tbl_rowdata, 2)
+                    t_first = time.perf_counter() - t_start  # The first row is only ready at the end.
+                    db_tbl_rowdata = None
+                else:
+                    for row in example_sql3.iter_table_rows(db, "Bench_Iter"):
+                        if t_first is None:
+                            t_first = time.perf_counter() - t_start
+                t_results.append((t_first, time.perf_counter() - t_start))
+                if trace == True:
+                    t_peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+            print(version + ": first row " + "{:.4f}".format(t_results[0][0]) + " s, total " + "{:.3f}".format(t_results[0][1]) + " s, peak " + str(t_peak // 1024) + " KiB")
+
+    return None
+## END Function
+
+
+# Read a number_rows x number_columns table with the old per cell string
+# concatenation (buffer = buffer + text + ","), RowDecoder.decode_csv() and
+# RowDecoder.decode() (typed tuples).
+def Benchmark_Row_Decode(db_file_name, number_rows, number_columns):
+    id_lib_sql3 = ozz_sql3.load_libsql3(ozz_sql3.get_libsql3_path())
+    col_names = ", ".join(["c" + str(i) for i in range(number_columns)])
+    db_rows = [tuple(["v" + str(x) + "_" + str(i) for i in range(number_columns)]) for x in range(number_rows)]
+
+    example_sql3.db_file_create(db_file_name)
+    with example_sql3.Database(db_file_name, id_lib_sql3=id_lib_sql3) as db:
+        example_sql3.db_table_delete(db, "DROP TABLE IF EXISTS Bench_Decode;")
+        example_sql3.db_table_create(db, "CREATE TABLE IF NOT EXISTS Bench_Decode(" + col_names + ");")
+        example_sql3.db_insert_table_rows_bulk(db, "Bench_Decode", col_names, db_rows, 10000)
+        db_rows = None
+
+        for version in ("String concatenation", "RowDecoder.decode_csv", "RowDecoder.decode"):
+            return_code, p_stmt = db.stmt_cache.prepare("SELECT * FROM Bench_Decode;")
+            row_decoder = ozz_sql3.RowDecoder(id_lib_sql3, p_stmt)
+            t_start = time.perf_counter()
+            while ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt) == ozz_sql3.SQLITE_ROW:
+                if version == "String concatenation":
+                    buffer = ""
+                    for i in range(number_columns):
+                        buffer = buffer + ozz_sql3.sqlite3_column_text(id_lib_sql3, p_stmt, i)
+                        if i < number_columns -1:
+                            buffer = buffer + ","
+                elif version == "RowDecoder.decode_csv":
+                    buffer = row_decoder.decode_csv()
+                else:
+                    row = row_decoder.decode()
+            t_total = time.perf_counter() - t_start
+            db.stmt_cache.release(p_stmt)
+            print("{:<22}".format(version) + ": " + "{:.3f}".format(t_total) + " s (" + str(number_rows) + " rows x " + str(number_columns) + " columns)")
+
+    return None
+## END Function
+
+
+# Read two numeric columns of a number_rows table as typed row tuples with
+# iter_table_rows() (then split into lists), and with fetch_columns().
+def Benchmark_Fetch_Columns(db_file_name, number_rows):
+    example_sql3.db_file_create(db_file_name)
+    with example_sql3.Database(db_file_name) as db:
+        example_sql3.db_table_delete(db, "DROP TABLE IF EXISTS Bench_Columns;")
+        example_sql3.db_table_create(db, "CREATE TABLE IF NOT EXISTS Bench_Columns(Week INTEGER, Hours REAL);")
+        example_sql3.db_insert_table_rowdata(db, \
+            "WITH RECURSIVE cnt(x) AS (SELECT 1 UNION ALL SELECT x+1 FROM cnt WHERE x < " + str(number_rows) + ") " \
+            "INSERT INTO Bench_Columns(Week, Hours) SELECT x % 52, x * 0.25 FROM cnt;")
+
+        t_start = time.perf_counter()
+        week = []
+        hours = []
+        for row in example_sql3.iter_table_rows(db, "Bench_Columns", 65536):
+            week.append(row[1])
+            hours.append(row[2])
+        t_rows = time.perf_counter() - t_start
+
+        t_start = time.perf_counter()
+        columns = example_sql3.fetch_columns(db, "SELECT Week, Hours FROM Bench_Columns;", "qd")
+        t_columns = time.perf_counter() - t_start
+
+    print("Rows: " + str(len(columns[0])) + ", sum(Hours) " + str(sum(hours)) + " / " + str(sum(columns[1])))
+    print("Typed row tuples : " + "{:.3f}".format(t_rows) + " s")
+    print("fetch_columns()  : " + "{:.3f}".format(t_columns) + " s")
+
+    return None
+## END Function
+
+
+# Store and read back a blob_size byte file as one bytes value (bound with
+# sqlite3_bind_blob, read with sqlite3_column_blob) and streamed with
+# db_insert_table_blob_stream() / db_read_table_blob_stream(). Prints the time
+# and the peak Python memory (tracemalloc) of each.
+def Benchmark_Blob_Stream(db_file_name, blob_size):
+    f_source_name = "Benchmark_Blob.bin"
+    f_dest_name = "Benchmark_Blob_Out.bin"
+    with open(f_source_name, "wb") as f_source:
+        for i in range(0, blob_size, 1048576):
+            f_source.write(os.urandom(min(1048576, blob_size - i)))
+
+    example_sql3.db_file_create(db_file_name)
+    with example_sql3.Database(db_file_name) as db:
+        example_sql3.db_table_delete(db, "DROP TABLE IF EXISTS Bench_Blob;")
+        example_sql3.db_table_create(db, "CREATE TABLE IF NOT EXISTS Bench_Blob(Name TEXT, Data BLOB);")
+
+        for version in ("Whole value", "Streamed   "):
+            tracemalloc.start()
+            t_start = time.perf_counter()
+            if version == "Whole value":
+                with open(f_source_name, "rb") as f_source:
+                    example_sql3.db_insert_table_rows_bulk(db, "Bench_Blob", "Name, Data", [("Whole", f_source.read())])
+                db_tbl_rowid_data = []
+                example_sql3.db_read_table_rowdata_rowid(db, "Bench_Blob", 1, db_tbl_rowid_data, 2, True)
+                with open(f_dest_name, "wb") as f_dest:
+                    f_dest.write(db_tbl_rowid_data[0][1])
+                db_tbl_rowid_data = None
+            else:
+                with open(f_source_name, "rb") as f_source:
+                    example_sql3.db_insert_table_blob_stream(db, "Bench_Blob", "Name", ("Streamed",), "Data", f_source, blob_size)
+                with open(f_dest_name, "wb") as f_dest:
+                    example_sql3.db_read_table_blob_stream(db, "Bench_Blob", "Data", 2, f_dest)
+            t_total = time.perf_counter() - t_start
+            t_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(version + ": " + "{:.3f}".format(t_total) + " s, peak " + str(t_peak // 1048576) + " MiB (" + str(blob_size // 1048576) + " MiB BLOB)")
+
+    os.remove(f_source_name)
+    os.remove(f_dest_name)
+
+    return None
+## END Function
+
+
+# number_readers threads look up random rows through their pool.reader()
+# session while one thread inserts rows in 100 row transactions through
+# pool.writer(), for duration seconds. Run with the default rollback journal
+# (journal_mode = DELETE) and with WAL. Prints rows read and written per second.
+def Benchmark_Connection_Pool(db_file_name, number_rows, number_readers, duration):
+    db_rows = [("Item " + str(x), str(x)) for x in range(number_rows)]
+
+    for journal_mode in ("DELETE", "WAL"):
+        for f_name in (db_file_name, db_file_name + "-wal", db_file_name + "-shm"):
+            if os.path.exists(f_name):
+                os.remove(f_name)
+
+        pool = example_sql3.ConnectionPool(db_file_name, journal_mode=journal_mode)
+        with pool.writer() as db:
+            example_sql3.db_table_create(db, "CREATE TABLE IF NOT EXISTS Bench_Pool(Item TEXT, Quantity TEXT);")
+            example_sql3.db_insert_table_rows_bulk(db, "Bench_Pool", "Item, Quantity", db_rows, 10000)
+
+        stop_event = threading.Event()
+        counts = {"read" : 0, "read_fail" : 0, "write" : 0}
+        counts_lock = threading.Lock()
+
+        def Reader_Thread(seed):
+            rnd = random.Random(seed)
+            db = pool.reader()
+            cnt_read = 0
+            cnt_fail = 0
+            while not stop_event.is_set():
+                db_tbl_rowid_data = []
+                example_sql3.db_read_table_rowdata_rowid_bind(db, "Bench_Pool", rnd.randint(1, number_rows), db_tbl_rowid_data, 2)
+                if len(db_tbl_rowid_data) == 1:
+                    cnt_read += 1
+                else:  # SQLITE_BUSY
+                    cnt_fail += 1
+            with counts_lock:
+                counts["read"] += cnt_read
+                counts["read_fail"] += cnt_fail
+
+        def Writer_Thread():
+            cnt_write = 0
+            while not stop_event.is_set():
+                with pool.writer() as db:
+                    number_rows_ret = []
+                    example_sql3.db_insert_table_rows_bulk(db, "Bench_Pool", "Item, Quantity", db_rows[:100], 100, number_rows_ret)
+                    if len(number_rows_ret) > 0:
+                        cnt_write += number_rows_ret[0]
+            with counts_lock:
+                counts["write"] += cnt_write
+
+        threads = [threading.Thread(target=Reader_Thread, args=(i,)) for i in range(number_readers)]
+        threads.append(threading.Thread(target=Writer_Thread))
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop_event.set()
+        for thread in threads:
+            thread.join()
+        pool.close()
+
+        print("journal_mode " + "{:<6}".format(journal_mode) + ": " + str(number_readers) + " readers " \
+            + "{:9.0f}".format(counts["read"] / duration) + " rows/s (" + str(counts["read_fail"]) + " busy), writer " \
+            + "{:8.0f}".format(counts["write"] / duration) + " rows/s")
+
+    for f_name in (db_file_name, db_file_name + "-wal", db_file_name + "-shm"):
+        if os.path.exists(f_name):
+            os.remove(f_name)
+
+    return None
+## END Function
+
+
+# A coroutine that sleeps for 1 ms at a time while a scan of number_rows rows
+# runs and records how late each wake up is. The scan is run with a blocking
+# example_sql3.iter_table_rows() call in the event loop (before), and with
+# ozz_sql3_aio fetch_iter() and execute() on the connection worker thread
+# (after). Then a long query is cancelled to time the sqlite3_interrupt().
+def Benchmark_Aio_Latency(db_file_name, number_rows):
+    db_rows = [("Item " + str(x), str(x)) for x in range(number_rows)]
+
+    example_sql3.db_file_create(db_file_name)
+    with example_sql3.Database(db_file_name) as db:
+        example_sql3.db_table_delete(db, "DROP TABLE IF EXISTS Bench_Aio;")
+        example_sql3.db_table_create(db, "CREATE TABLE IF NOT EXISTS Bench_Aio(Item TEXT, Quantity TEXT);")
+        example_sql3.db_insert_table_rows_bulk(db, "Bench_Aio", "Item, Quantity", db_rows, 10000)
+    db_rows = None
+
+    async def Ticker(stop_event, lags):
+        while not stop_event.is_set():
+            t_start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - t_start - 0.001)
+
+    async def Scan(conn, version):
+        cnt_row = 0
+        if version == "Blocking  ":
+            for row in example_sql3.iter_table_rows(db_file_name, "Bench_Aio"):
+                cnt_row += 1
+        elif version == "fetch_iter":
+            async for row in conn.fetch_iter("SELECT rowid, * FROM Bench_Aio;"):
+                cnt_row += 1
+        else:
+            return_code, rows = await conn.execute("SELECT rowid, * FROM Bench_Aio;")
+            cnt_row = len(rows)
+        return cnt_row
+
+    async def Run_Version(version):
+        async with ozz_sql3_aio.AsyncConnection(db_file_name) as conn:
+            stop_event = asyncio.Event()
+            lags = []
+            ticker = asyncio.create_task(Ticker(stop_event, lags))
+            await asyncio.sleep(0.01)
+            t_start = time.perf_counter()
+            cnt_row = await Scan(conn, version)
+            t_scan = time.perf_counter() - t_start
+            stop_event.set()
+            await ticker
+        lags.sort()
+        print(version + ": " + str(cnt_row) + " rows " + "{:.3f}".format(t_scan) + " s, tick lag p50 " \
+            + "{:.2f}".format(lags[len(lags) // 2] * 1000) + " ms, p99 " + "{:.2f}".format(lags[len(lags) * 99 // 100] * 1000) \
+            + " ms, max " + "{:.2f}".format(lags[-1] * 1000) + " ms")
+
+    async def Run_Cancel():
+        async with ozz_sql3_aio.AsyncConnection(db_file_name) as conn:
+            task = asyncio.create_task(conn.execute("SELECT count(*) FROM Bench_Aio AS a, Bench_Aio AS b WHERE a.Item < b.Item;"))
+            await asyncio.sleep(0.1)
+            t_start = time.perf_counter()
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            # The next request runs once the interrupted query has stopped.
+            return_code, rows = await conn.execute("SELECT count(*) FROM Bench_Aio;")
+            t_cancel = time.perf_counter() - t_start
+        print("Cancel    : long query interrupted, next request done in " + "{:.2f}".format(t_cancel * 1000) + " ms " + str(rows))
+
+    for version in ("Blocking  ", "fetch_iter", "execute   "):
+        asyncio.run(Run_Version(version))
+    asyncio.run(Run_Cancel())
+
+    return None
+## END Function
+
+
+# Scan a number_rows table with example_sql3.db_parallel_scan() with 1 worker
+# (in process, before) and with 2, 4 ... os.cpu_count() worker processes
+# (after). "Search" uses a LIKE condition (most of the work is in SQLite and
+# few rows are returned), "Scan" returns every row to this process.
+def Benchmark_Parallel_Scan(db_file_name, number_rows):
+    db_rows = [("Item " + str(x), str(x)) for x in range(number_rows)]
+
+    example_sql3.db_file_create(db_file_name)
+    with example_sql3.Database(db_file_name) as db:
+        example_sql3.db_table_delete(db, "DROP TABLE IF EXISTS Bench_Parallel;")
+        example_sql3.db_table_create(db, "CREATE TABLE IF NOT EXISTS Bench_Parallel(Item TEXT, Quantity TEXT);")
+        example_sql3.db_insert_table_rows_bulk(db, "Bench_Parallel", "Item, Quantity", db_rows, 10000)
+    db_rows = None
+
+    worker_counts = sorted(set([1, 2, 4, os.cpu_count() or 1]))
+    print("CPU cores: " + str(os.cpu_count()))
+    for version, db_where, params in (("Search", "Item LIKE ?", ("%77%",)), ("Scan  ", None, ())):
+        t_single = None
+        for workers in worker_counts:
+            cnt_row = 0
+            t_start = time.perf_counter()
+            for row in example_sql3.db_parallel_scan(db_file_name, "Bench_Parallel", db_where, params, workers, number_rows // 32, False):
+                cnt_row += 1
+            t_scan = time.perf_counter() - t_start
+            if t_single is None:
+                t_single = t_scan
+            print(version + " " + str(workers) + " worker(s): " + str(cnt_row) + " rows " + "{:.3f}".format(t_scan) \
+                + " s, speed up " + "{:.2f}".format(t_single / t_scan) + "x")
+
+    return None
+## END Function
+
+
+# Call the chain of introspection functions used by the examples
+# (db_table_exists, db_get_number_tables, db_get_tablenames,
+# db_get_table_number_cols, db_get_table_colnames) number_calls times:
+# with a database file name (open/close per call), on a session with the
+# schema cache emptied before each call (a query per call, before) and on a
+# session with the schema cache kept (after).
+def Benchmark_Schema_Cache(db_file_name, number_calls):
+    example_sql3.db_file_create(db_file_name)
+    with example_sql3.Database(db_file_name) as db:
+        for i in range(20):
+            example_sql3.db_table_create(db, "CREATE TABLE IF NOT EXISTS Bench_Schema_" + str(i) + "(Item TEXT, Quantity TEXT, Price REAL, Notes TEXT);")
+
+    def Introspect(db, clear_cache):
+        for db_function, args in ((example_sql3.db_table_exists, ("Bench_Schema_7",)), \
+                (example_sql3.db_get_number_tables, ([],)), \
+                (example_sql3.db_get_tablenames, ([],)), \
+                (example_sql3.db_get_table_number_cols, ("Bench_Schema_7", [])), \
+                (example_sql3.db_get_table_colnames, ("Bench_Schema_7", []))):
+            if clear_cache == True:
+                db.schema_cache.clear()
+            db_function(db, *args)
+
+    for version in ("File name   ", "Session     ", "Schema cache"):
+        with example_sql3.Database(db_file_name) as db:
+            t_start = time.perf_counter()
+            for i in range(number_calls):
+                if version == "File name   ":
+                    Introspect(db_file_name, False)
+                else:
+                    Introspect(db, version == "Session     ")
+            t_total = time.perf_counter() - t_start
+            cache_stats = db.schema_cache.stats()
+        print(version + ": " + "{:.3f}".format(t_total) + " s, " + "{:.1f}".format(t_total / number_calls * 1000000) + " us per chain, " \
+            + str(cache_stats["loads"]) + " schema loads")
+
+    # A schema change on another connection is seen by the next look-up.
+    with example_sql3.Database(db_file_name) as db:
+        number_tables_ret = []
+        example_sql3.db_get_number_tables(db, number_tables_ret)
+        example_sql3.db_table_create(db_file_name, "CREATE TABLE IF NOT EXISTS Bench_Schema_New(Item TEXT);")
+        example_sql3.db_get_number_tables(db, number_tables_ret)
+        example_sql3.db_table_delete(db_file_name, "DROP TABLE IF EXISTS Bench_Schema_New;")
+        print("Tables before/after CREATE on another connection: " + str(number_tables_ret[1]) + "/" + str(number_tables_ret[0]) \
+            + ", invalidations " + str(db.schema_cache.stats()["invalidations"]))
+
+    return None
+## END Function
+
+
+# Poll the row count of a number_rows table number_calls times with each
+# db_count_rows() mode: ROW_COUNT_EXACT (SELECT COUNT(*), before),
+# ROW_COUNT_MAINTAINED and ROW_COUNT_ESTIMATE (after). Also times a bulk insert
+# with and without the row count triggers, and checks the maintained count
+# after INSERT, REPLACE and DELETE.
+def Benchmark_Row_Count(db_file_name, number_rows, number_calls):
+    db_rows = [("Item " + str(x), str(x)) for x in range(number_rows)]
+
+    example_sql3.db_file_create(db_file_name)
+    with example_sql3.Database(db_file_name) as db:
+        example_sql3.db_table_delete(db, "DROP TABLE IF EXISTS Bench_Count;")
+        example_sql3.db_table_create(db, "CREATE TABLE IF NOT EXISTS Bench_Count(Item TEXT, Quantity TEXT);")
+        t_start = time.perf_counter()
+        example_sql3.db_insert_table_rows_bulk(db, "Bench_Count", "Item, Quantity", db_rows, 10000)
+        t_plain = time.perf_counter() - t_start
+        example_sql3.db_execute(db, "DELETE FROM Bench_Count;")
+        example_sql3.db_row_count_maintain(db, "Bench_Count")
+        t_start = time.perf_counter()
+        example_sql3.db_insert_table_rows_bulk(db, "Bench_Count", "Item, Quantity", db_rows, 10000)
+        t_trigger = time.perf_counter() - t_start
+        example_sql3.db_analyze(db, "Bench_Count")
+        print("Bulk insert " + str(number_rows) + " rows: " + "{:.3f}".format(t_plain) + " s, with count triggers " + "{:.3f}".format(t_trigger) + " s")
+
+        for version, count_mode in (("Exact     ", example_sql3.ROW_COUNT_EXACT), ("Maintained", example_sql3.ROW_COUNT_MAINTAINED), ("Estimate  ", example_sql3.ROW_COUNT_ESTIMATE)):
+            number_rows_ret = []
+            t_start = time.perf_counter()
+            for i in range(number_calls):
+                example_sql3.db_count_rows(db, "Bench_Count", number_rows_ret, count_mode)
+            t_total = time.perf_counter() - t_start
+            print(version + ": " + str(number_rows_ret[0]) + " rows, " + "{:.1f}".format(t_total / number_calls * 1000000) + " us per call")
+
+        # INSERT 10, REPLACE 5 existing rowids, DELETE 20. The DELETE trigger
+        # only runs for the rows removed by REPLACE with recursive_triggers on.
+        example_sql3.db_execute(db, "PRAGMA recursive_triggers = ON;")
+        example_sql3.db_insert_table_rows_bulk(db, "Bench_Count", "Item, Quantity", db_rows[:10], 10)
+        example_sql3.db_execute(db, "REPLACE INTO Bench_Count(rowid, Item, Quantity) SELECT rowid, Item, 'x' FROM Bench_Count WHERE rowid <= 5;")
+        example_sql3.db_execute(db, "DELETE FROM Bench_Count WHERE rowid > 100 AND rowid <= 120;")
+        exact_ret = []
+        maintained_ret = []
+        example_sql3.db_count_rows(db, "Bench_Count", exact_ret, example_sql3.ROW_COUNT_EXACT)
+        example_sql3.db_count_rows(db, "Bench_Count", maintained_ret, example_sql3.ROW_COUNT_MAINTAINED)
+        print("After INSERT/REPLACE/DELETE: exact " + str(exact_ret[0]) + ", maintained " + str(maintained_ret[0]))
+
+    return None
+## END Function
+
+
+# Read a number_rows table of rowid + 9 mixed type columns (INTEGER, REAL,
+# TEXT, NULL, BLOB), number_rows * 10 cells, with db_list_table_all_types()
+# into the preallocated dict per cell list (before) and with
+# db_list_table_variant() into an ozz_sql3.VariantTable (after).
+# Memory is the traced Python memory held by the result.
+def Benchmark_Variant_Table(db_file_name, number_rows):
+    db_rows = [(x, x * 0.5, "Item " + str(x), None, bytes([x % 256]) * 16, x * 3, x / 7.0, "Name " + str(x % 1000), None) for x in range(number_rows)]
+    number_columns = 10  # rowid + 9
+
+    example_sql3.db_file_create(db_file_name)
+    with example_sql3.Database(db_file_name) as db:
+        example_sql3.db_table_delete(db, "DROP TABLE IF EXISTS Bench_Variant;")
+        example_sql3.db_table_create(db, "CREATE TABLE IF NOT EXISTS Bench_Variant(C1 INTEGER, C2 REAL, C3 TEXT, C4 TEXT, C5 BLOB, C6 INTEGER, C7 REAL, C8 TEXT, C9 TEXT);")
+        example_sql3.db_insert_table_rows_bulk(db, "Bench_Variant", "C1, C2, C3, C4, C5, C6, C7, C8, C9", db_rows, 10000)
+        db_rows = None
+
+        for version in ("Dict per cell", "VariantTable "):
+            t_results = []
+            for trace in (False, True):
+                if trace == True:
+                    tracemalloc.start()
+                t_start = time.perf_counter()
+                if version == "Dict per cell":
+                    variant_result = []
+                    for i in range(number_rows):
+                        variant_result.insert(i, [])
+                        for j in range(number_columns):
+                            variant_result[i].insert(j, {'typeof': None, 'data': None, 'length': 0})
+                    example_sql3.db_list_table_all_types(db, "Bench_Variant", variant_result, number_columns, number_rows, [], [])
+                    cell_value = variant_result[number_rows // 2][2]['data']
+                else:
+                    variant_table_ret = []
+                    example_sql3.db_list_table_variant(db, "Bench_Variant", variant_table_ret)
+                    variant_result = variant_table_ret[0]
+                    cell_value = variant_result[number_rows // 2, 2]
+                t_results.append(time.perf_counter() - t_start)
+                if trace == True:
+                    t_current = tracemalloc.get_traced_memory()[0]
+                    tracemalloc.stop()
+                variant_result = None
+            print(version + ": " + str(number_rows * number_columns) + " cells " + "{:.3f}".format(t_results[0]) + " s, " \
+                + "{:.1f}".format(t_current / 1048576) + " MiB (" + "{:.1f}".format(t_current / (number_rows * number_columns)) + " bytes per cell), cell [" \
+                + str(number_rows // 2) + ", 2] = " + str(cell_value))
+
+    return None
+## END Function
+
+
+# Export a number_rows Hrs_worked_Tracker style table with export_csv(), then
+# import the CSV file line by line with an INSERT string and
+# db_insert_table_rowdata() for the first number_rows_legacy lines (before)
+# and the whole file with import_csv() (after). Peak memory is the traced
+# Python memory during a second import_csv() of the same file.
+def Benchmark_CSV(db_file_name, csv_file_name, number_rows, number_rows_legacy):
+    db_rows = [(str(x // 100), str(x % 100), "Name " + str(x), "7", "5", "8", "7", "9") for x in range(number_rows)]
+    db_field_names = "Week, Employee_ID, Name, Monday, Tuesday, Wednesday, Thursday, Friday"
+
+    example_sql3.db_file_create(db_file_name)
+    with example_sql3.Database(db_file_name) as db:
+        for db_table_name in ("Bench_CSV", "Bench_CSV_Legacy", "Bench_CSV_Import"):
+            example_sql3.db_table_delete(db, "DROP TABLE IF EXISTS " + db_table_name + ";")
+        example_sql3.db_table_create(db, "CREATE TABLE IF NOT EXISTS Bench_CSV(" + db_field_names + ");")
+        example_sql3.db_table_create(db, "CREATE TABLE IF NOT EXISTS Bench_CSV_Legacy(" + db_field_names + ");")
+        example_sql3.db_insert_table_rows_bulk(db, "Bench_CSV", db_field_names, db_rows, 10000)
+        db_rows = None
+
+        number_rows_ret = []
+        t_start = time.perf_counter()
+        example_sql3.export_csv(db, "Bench_CSV", csv_file_name, False, 10000, number_rows_ret)
+        t_total = time.perf_counter() - t_start
+        print("export_csv      : " + str(number_rows_ret[0]) + " rows " + "{:.3f}".format(t_total) + " s, " \
+            + "{:.0f}".format(number_rows_ret[0] / t_total) + " rows/s, " + str(os.path.getsize(csv_file_name) // 1024) + " KiB")
+
+        t_start = time.perf_counter()
+        with open(csv_file_name, "r", newline="") as f_csv:
+            csv_reader = csv.reader(f_csv)
+            next(csv_reader)  # Field names.
+            for i in range(number_rows_legacy):
+                row = next(csv_reader)
+                example_sql3.db_insert_table_rowdata(db, "INSERT INTO Bench_CSV_Legacy VALUES('" + "', '".join(row) + "');")
+        t_total = time.perf_counter() - t_start
+        print("INSERT per line : " + str(number_rows_legacy) + " rows " + "{:.3f}".format(t_total) + " s, " \
+            + "{:.0f}".format(number_rows_legacy / t_total) + " rows/s")
+
+        number_rows_ret = []
+        t_start = time.perf_counter()
+        example_sql3.import_csv(db, "Bench_CSV_Import", csv_file_name, True, number_rows_ret)
+        t_total = time.perf_counter() - t_start
+        print("import_csv      : " + str(number_rows_ret[0]) + " rows " + "{:.3f}".format(t_total) + " s, " \
+            + "{:.0f}".format(number_rows_ret[0] / t_total) + " rows/s")
+
+        # Separate pass for the memory, as tracemalloc slows the import.
+        # The import streams the file, so the peak does not grow with the rows.
+        example_sql3.db_table_delete(db, "DROP TABLE IF EXISTS Bench_CSV_Import;")
+        example_sql3.export_csv(db, "Bench_CSV", csv_file_name, False, 10000)
+        tracemalloc.start()
+        example_sql3.import_csv(db, "Bench_CSV_Import", csv_file_name, True)
+        t_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print("import_csv peak : " + str(t_peak // 1024) + " KiB traced for a " + str(os.path.getsize(csv_file_name) // 1024) + " KiB file")
+
+    os.remove(csv_file_name)
+    return None
+## END Function
+
+
+# Run the same mix of calls (number_loops row by row SELECTs of a number_rows
+# table, row counts and single row inserts) with profiling never enabled,
+# enabled, and disabled again, then print the slowest statements report.
+def Benchmark_Query_Profiling(db_file_name, number_rows, number_loops):
+    db_rows = [(x, "Name " + str(x)) for x in range(number_rows)]
+
+    def query_mix(db):
+        number_rows_ret = []
+        for i in range(number_loops):
+            for db_row in example_sql3.iter_table_rows(db, "Bench_Profile"):
+                pass
+            example_sql3.db_get_table_number_rows(db, "Bench_Profile", number_rows_ret)
+            example_sql3.db_insert_table_rowdata(db, "INSERT INTO Bench_Profile VALUES(" + str(i) + ", 'Loop');")
+        return None
+
+    example_sql3.db_file_create(db_file_name)
+    with example_sql3.Database(db_file_name) as db:
+        example_sql3.db_table_delete(db, "DROP TABLE IF EXISTS Bench_Profile;")
+        example_sql3.db_table_create(db, "CREATE TABLE IF NOT EXISTS Bench_Profile(Employee_ID, Name);")
+        example_sql3.db_insert_table_rows_bulk(db, "Bench_Profile", "Employee_ID, Name", db_rows, 10000)
+        db_rows = None
+
+        for profile_pass in ("Profiling off", "Profiling on", "Profiling off"):
+            if profile_pass == "Profiling on":
+                ozz_sql3.profiling_enable()
+                ozz_sql3.profiling_attach(db.id_lib_sql3, db.p_db)  # Opened before enable.
+            t_start = time.perf_counter()
+            query_mix(db)
+            t_total = time.perf_counter() - t_start
+            ozz_sql3.profiling_disable()
+            print(profile_pass.ljust(15) + ": " + "{:.3f}".format(t_total) + " s")
+
+    ozz_sql3.query_stats_report(5)
+    ozz_sql3.query_stats_reset()
+    return None
+## END Function
+
+
+# Search a number_rows table by Name and by Employee_ID with
+# db_search_table_rowdata_byfield_bind() number_searches times each with no
+# index (each search scans the table), then let db_index_recommend() create
+# the indexes for the logged searches and repeat the searches.
+def Benchmark_Index_Advisor(db_file_name, number_rows, number_searches):
+    db_rows = [(x // 1000, x, "Name " + str(x), "7") for x in range(number_rows)]
+    search_keys = [random.randrange(number_rows) for i in range(number_searches)]
+
+    def search_pass(db):
+        db_tbl_row_search = []
+        ret_array_length = []
+        t_start = time.perf_counter()
+        for x in search_keys:
+            example_sql3.db_search_table_rowdata_byfield_bind(db, "Bench_Search", db_tbl_row_search, "Name", "Name " + str(x), 5, ret_array_length)
+            example_sql3.db_search_table_rowdata_byfield_bind(db, "Bench_Search", db_tbl_row_search, "Employee_ID", x, 5, ret_array_length)
+        return (time.perf_counter() - t_start) / (len(search_keys) * 2)
+
+    example_sql3.db_file_create(db_file_name)
+    with example_sql3.Database(db_file_name) as db:
+        example_sql3.db_table_delete(db, "DROP TABLE IF EXISTS Bench_Search;")
+        example_sql3.db_table_create(db, "CREATE TABLE IF NOT EXISTS Bench_Search(Week, Employee_ID, Name, Monday);")
+        example_sql3.db_insert_table_rows_bulk(db, "Bench_Search", "Week, Employee_ID, Name, Monday", db_rows, 10000)
+        db_rows = None
+
+        t_search = search_pass(db)
+        print("No index     : " + "{:.3f}".format(t_search * 1000) + " ms per search")
+
+        index_sql = []
+        t_start = time.perf_counter()
+        example_sql3.db_index_recommend(db, index_sql, 1, True)
+        t_create = time.perf_counter() - t_start
+        for sql_query in index_sql:
+            print(sql_query)
+        print("Create index : " + "{:.3f}".format(t_create) + " s")
+
+        t_search = search_pass(db)
+        print("Index        : " + "{:.3f}".format(t_search * 1000) + " ms per search")
+
+        query_plan = []
+        example_sql3.db_explain_query_plan(db, "SELECT rowid, * FROM Bench_Search WHERE Name = ?;", query_plan)
+        print("Query plan   : " + query_plan[0][2])
+        example_sql3.search_predicates.clear()
+    return None
+## END Function
+
+
+# Timed in a new Python process: import ozz_sql3, find and load the library
+# (with prototypes applied on first use), and open ":memory:" to run a first
+# query. Then the old load time work of binding every SQL3_PROTOTYPES function.
+# Times are in seconds.
+STARTUP_SCRIPT = """
+import time
+t_0 = time.perf_counter()
+import ozz_sql3
+t_1 = time.perf_counter()
+id_lib_sql3 = ozz_sql3.load_libsql3(ozz_sql3.get_libsql3_path())
+t_2 = time.perf_counter()
+p_db = ozz_sql3.p_sqlite3()
+p_stmt = ozz_sql3.p_sqlite3_stmt()
+ozz_sql3.sqlite3_open(id_lib_sql3, ":memory:", p_db)
+ozz_sql3.sqlite3_prepare_v2(id_lib_sql3, p_db, "SELECT sqlite_version();", -1, p_stmt, None)
+ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)
+ozz_sql3.sqlite3_column_text(id_lib_sql3, p_stmt, 0)
+ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt)
+ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+t_3 = time.perf_counter()
+for func_name in ozz_sql3.SQL3_PROTOTYPES:
+    getattr(id_lib_sql3, func_name)
+t_4 = time.perf_counter()
+print(t_1 - t_0, t_2 - t_1, t_3 - t_2, t_4 - t_3)
+"""
+
+# Launch STARTUP_SCRIPT in a new Python process once cold (no compiled .pyc
+# files, every module imported is compiled, as on the first run after an
+# install) and number_launches times warm (the .pyc files written by the cold
+# launch are used) and print the times in milliseconds (the best warm launch).
+# The .pyc files are kept in a temporary PYTHONPYCACHEPREFIX directory.
+def Benchmark_Startup(number_launches):
+    module_dir = os.path.dirname(os.path.abspath(ozz_sql3.__file__))
+    with tempfile.TemporaryDirectory() as pycache_dir:
+        env = dict(os.environ, PYTHONPATH=module_dir, PYTHONPYCACHEPREFIX=pycache_dir)
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        for launch_pass in ["Cold"] + ["Warm"] * number_launches:
+            t_start = time.perf_counter()
+            result = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], env=env, capture_output=True, text=True)
+            t_launch = time.perf_counter() - t_start
+            if result.returncode != 0:
+                print(result.stderr)
+                return None
+            t_times = [float(x) for x in result.stdout.split()]
+            if launch_pass == "Cold":
+                print("{:<6} {:>8} {:>8} {:>8} {:>8} {:>8}".format("", "process", "import", "load", "query", "bind all"))
+                t_cold = [t_launch] + t_times
+                t_warm = None
+            elif t_warm is None or t_launch < t_warm[0]:
+                t_warm = [t_launch] + t_times  # Best warm launch.
+        for launch_pass, t_times in (("Cold", t_cold), ("Warm", t_warm)):
+            print("{:<6} {:>8.2f} {:>8.2f} {:>8.2f} {:>8.2f} {:>8.2f}".format(launch_pass, *[t * 1000 for t in t_times]))
+    return None
+## END Function
+
+
+# Call db_search_table_rowdata_byfield_bind() (one row found) number_calls
+# times on a session with the example_sql3 messages reported to os.devnull
+# (before, as every call used to print) and with reporting off (after, the
+# default). The reporting from main() is restored at the end.
+def Benchmark_Reporting(db_file_name, number_calls):
+    example_sql3.db_file_create(db_file_name)
+    with example_sql3.Database(db_file_name) as db:
+        example_sql3.db_table_delete(db, "DROP TABLE IF EXISTS Bench_Report;")
+        example_sql3.db_table_create(db, "CREATE TABLE IF NOT EXISTS Bench_Report(Employee_ID, Name);")
+        example_sql3.db_insert_table_rows_bulk(db, "Bench_Report", "Employee_ID, Name", [(x, "Name " + str(x)) for x in range(100)], 100)
+
+        reporting = example_sql3.db_reporting
+        db_tbl_row_search = []
+        ret_array_length = []
+        with open(os.devnull, "w") as f_null:
+            for report_pass in ("Reporting on ", "Reporting off"):
+                example_sql3.db_report_disable()
+                if report_pass == "Reporting on ":
+                    handler = logging.StreamHandler(f_null)
+                    handler.setFormatter(logging.Formatter("%(message)s"))
+                    example_sql3.db_report_enable(logging.INFO, handler)
+                t_start = time.perf_counter()
+                for i in range(number_calls):
+                    example_sql3.db_search_table_rowdata_byfield_bind(db, "Bench_Report", db_tbl_row_search, "Employee_ID", i % 100, 3, ret_array_length)
+                    db_tbl_row_search.clear()
+                    ret_array_length.clear()
+                t_total = time.perf_counter() - t_start
+                print(report_pass + ": " + "{:.3f}".format(t_total) + " s, " + "{:.2f}".format(t_total / number_calls * 1000000) + " us per call")
+            example_sql3.db_report_disable()
+
+        if reporting == True:
+            example_sql3.db_report_enable()
+    return None
+## END Function
+
+
+# Point reads by rowid and scan reads (Name is not indexed) of a number_rows
+# table, number_reads times from the database file and then from an in-memory
+# snapshot loaded with db_snapshot_load(). Then a save back to the file with
+# all of the pages in one step and 100 pages per step, with reads of the
+# snapshot on this thread while a SnapshotCheckpoint saves on another.
+def Benchmark_Memory_Snapshot(db_file_name, number_rows, number_reads):
+    db_rows = [(x // 1000, x, "Name " + str(x), "7") for x in range(number_rows)]
+    read_keys = [random.randrange(1, number_rows + 1) for i in range(number_reads)]
+
+    # Per read latencies in seconds: rowid point reads, then Name (not
+    # indexed) scan reads on one in ten of the keys.
+    def read_pass(db):
+        db_tbl_rowid_data = []
+        db_tbl_row_search = []
+        ret_array_length = []
+        t_point = []
+        for x in read_keys:
+            t_start = time.perf_counter()
+            example_sql3.db_read_table_rowdata_rowid_bind(db, "Bench_Snapshot", x, db_tbl_rowid_data, 5)
+            t_point.append(time.perf_counter() - t_start)
+            db_tbl_rowid_data.clear()
+        t_scan = []
+        for x in read_keys[:number_reads // 10]:
+            t_start = time.perf_counter()
+            example_sql3.db_search_table_rowdata_byfield_bind(db, "Bench_Snapshot", db_tbl_row_search, "Name", "Name " + str(x - 1), 5, ret_array_length)
+            t_scan.append(time.perf_counter() - t_start)
+            db_tbl_row_search.clear()
+            ret_array_length.clear()
+        return t_point, t_scan
+
+    def print_latency(label, t_reads):
+        t_reads = sorted(t_reads)
+        print(label + ": " + "{:.1f}".format(sum(t_reads) / len(t_reads) * 1000000) + " us mean, " \
+            + "{:.1f}".format(t_reads[len(t_reads) * 99 // 100] * 1000000) + " us p99")
+
+    example_sql3.db_file_create(db_file_name)
+    with example_sql3.Database(db_file_name) as db:
+        example_sql3.db_table_delete(db, "DROP TABLE IF EXISTS Bench_Snapshot;")
+        example_sql3.db_table_create(db, "CREATE TABLE IF NOT EXISTS Bench_Snapshot(Week, Employee_ID, Name, Monday);")
+        example_sql3.db_insert_table_rows_bulk(db, "Bench_Snapshot", "Week, Employee_ID, Name, Monday", db_rows, 10000)
+        db_rows = None
+        read_pass(db)  # Warm the page cache.
+        t_point, t_scan = read_pass(db)
+        print_latency("Disk   point read", t_point)
+        print_latency("Disk   scan read ", t_scan)
+
+    db_mem_ret = []
+    t_start = time.perf_counter()
+    example_sql3.db_snapshot_load(db_file_name, db_mem_ret)
+    print("Load snapshot    : " + "{:.3f}".format(time.perf_counter() - t_start) + " s")
+    db_mem = db_mem_ret[0]
+    read_pass(db_mem)
+    t_point, t_scan = read_pass(db_mem)
+    print_latency("Memory point read", t_point)
+    print_latency("Memory scan read ", t_scan)
+
+    # Save on a thread while this thread keeps reading. Copying all of the
+    # pages in one step holds the memory connection for the whole copy.
+    for pages_per_step in (-1, 100):
+        example_sql3.db_execute(db_mem, "UPDATE Bench_Snapshot SET Monday = '" + str(pages_per_step) + "' WHERE rowid = 1;")
+        checkpoint = example_sql3.SnapshotCheckpoint(db_mem, db_file_name, 60.0, pages_per_step)
+        save_thread = threading.Thread(target=checkpoint.checkpoint)
+        db_tbl_rowid_data = []
+        t_reads = []
+        t_start = time.perf_counter()
+        save_thread.start()
+        while save_thread.is_alive():
+            t_read = time.perf_counter()
+            example_sql3.db_read_table_rowdata_rowid_bind(db_mem, "Bench_Snapshot", random.choice(read_keys), db_tbl_rowid_data, 5)
+            t_reads.append(time.perf_counter() - t_read)
+            db_tbl_rowid_data.clear()
+        save_thread.join()
+        t_save = time.perf_counter() - t_start
+        print("Save " + "{:>4}".format(pages_per_step) + " pages/step: " + "{:.3f}".format(t_save) + " s, " + str(len(t_reads)) \
+            + " reads, max read " + "{:.2f}".format(max(t_reads, default=0) * 1000) + " ms")
+    db_mem.close()
+    return None
+## END Function
+
+
+# Repeated reads (by database file name, so each uncached read also opens the
+# database) of a few hot rows, a full table listing one read in 100, and a
+# row replaced every write_interval reads, which drops the cached results.
+def Benchmark_Result_Cache(db_file_name, number_rows, number_reads, write_interval):
+    db_rows = [(x // 100, x, "Name " + str(x), "7") for x in range(number_rows)]
+    read_keys = [random.randrange(1, 51) for i in range(number_reads)]  # 50 hot rows.
+
+    def read_pass():
+        db_tbl_rowid_data = []
+        db_tbl_rowdata = []
+        t_start = time.perf_counter()
+        for i, x in enumerate(read_keys):
+            if i % write_interval == write_interval // 2:
+                example_sql3.db_replace_table_rowdata_rowid_bind(db_file_name, "Bench_Cache", x, "Monday", (str(i),))
+            if i % 100 == 99:
+                example_sql3.db_list_table_rows_data(db_file_name, "Bench_Cache", db_tbl_rowdata, 4)
+                db_tbl_rowdata.clear()
+            else:
+                example_sql3.db_read_table_rowdata_rowid(db_file_name, "Bench_Cache", x, db_tbl_rowid_data, 4)
+                db_tbl_rowid_data.clear()
+        return time.perf_counter() - t_start
+
+    example_sql3.db_file_create(db_file_name)
+    with example_sql3.Database(db_file_name) as db:
+        example_sql3.db_table_delete(db, "DROP TABLE IF EXISTS Bench_Cache;")
+        example_sql3.db_table_create(db, "CREATE TABLE IF NOT EXISTS Bench_Cache(Week, Employee_ID, Name, Monday);")
+        example_sql3.db_insert_table_rows_bulk(db, "Bench_Cache", "Week, Employee_ID, Name, Monday", db_rows, 10000)
+    db_rows = None
+
+    t_total = read_pass()
+    print("No cache    : " + "{:.3f}".format(t_total) + " s, " + "{:.1f}".format(t_total / number_reads * 1000000) + " us per read")
+
+    result_cache = example_sql3.db_result_cache_enable(db_file_name)
+    t_total = read_pass()
+    print("Result cache: " + "{:.3f}".format(t_total) + " s, " + "{:.1f}".format(t_total / number_reads * 1000000) + " us per read")
+    cache_stats = result_cache.stats()
+    print("Hit rate " + "{:.1%}".format(cache_stats["hit_rate"]) + ", " + str(cache_stats["size"]) + " results, " \
+        + "{:.1f}".format(cache_stats["bytes"] / 1024) + " KiB, " + str(cache_stats["invalidations"]) + " invalidations")
+    example_sql3.db_result_cache_disable(db_file_name)
+    return None
+## END Function
+
+
+# Write number_changes changed rows (every other one a new rowid) to a table
+# of number_rows rows: the per row path (one db_replace_table_rowdata_rowid()
+# call by file name, so one open/prepare/commit per row) on the first
+# number_rows_legacy changes, then all of the changes as one batched upsert.
+def Benchmark_Upsert(db_file_name, number_rows, number_changes, number_rows_legacy):
+    db_field_names = "Week, Employee_ID, Name, Monday"
+    db_rows = [(x // 1000, x, "Name " + str(x), "7") for x in range(number_rows)]
+    changes = []
+    for x in random.sample(range(1, number_rows * 2 + 1), number_changes):
+        changes.append((x, (str(x // 1000), str(x), "Name " + str(x), "8")))
+
+    example_sql3.db_file_create(db_file_name)
+    with example_sql3.Database(db_file_name) as db:
+        example_sql3.db_table_delete(db, "DROP TABLE IF EXISTS Bench_Upsert;")
+        example_sql3.db_table_create(db, "CREATE TABLE IF NOT EXISTS Bench_Upsert(Week, Employee_ID, Name, Monday);")
+        example_sql3.db_insert_table_rows_bulk(db, "Bench_Upsert", db_field_names, db_rows, 10000)
+    db_rows = None
+
+    t_start = time.perf_counter()
+    for sql_rowid, db_field_values in changes[:number_rows_legacy]:
+        example_sql3.db_replace_table_rowdata_rowid(db_file_name, "Bench_Upsert", sql_rowid, db_field_names, \
+            ", ".join(["\"" + value + "\"" for value in db_field_values]))
+    t_total = time.perf_counter() - t_start
+    print("Per row REPLACE: " + str(number_rows_legacy) + " rows in " + "{:.3f}".format(t_total) + " s, " + "{:.0f}".format(number_rows_legacy / t_total) + " rows/s")
+
+    number_rows_ret = []
+    t_start = time.perf_counter()
+    example_sql3.db_upsert_table_rows_rowid(db_file_name, "Bench_Upsert", db_field_names, changes, number_rows_ret)
+    t_total = time.perf_counter() - t_start
+    print("Batched upsert : " + str(number_rows_ret[0]) + " rows in " + "{:.3f}".format(t_total) + " s, " + "{:.0f}".format(number_rows_ret[0] / t_total) + " rows/s")
+    return None
+## END Function
+
+
 # Console Pause wrapper.
 def Con_Pause():
     dummy = ""
@@ -170,7 +170,7 @@
 # TODO:
 # Convenience wrapper functions for SQLite version 3 [Done]
 # Remove excess comments.[ Done]
-# Move sqlite open/close to main(). [?]
+# Move sqlite open/close to main(). [Done, see Database session]
 # Return sqlite errors to calling functions? [?]
 # alt change sqlite errors to better value set?
 #
@@ -188,7 +188,9 @@
 #------------------------------------------------------------------------------
 
 
-import sys, os
+import sys, os, time
+import array, contextlib, csv, logging, re, threading
+import collections, concurrent.futures
 import ozz_sql3
 
 ## ====>> Error Constants
@@ -196,6 +198,443 @@ import ozz_sql3
 from ozz_sql3_constants import  *
 
 
+## ====>> Database session (connection handle)
+# A Database session holds the loaded sqlite3 shared library and one open
+# database connection (sqlite3 *p_db). Every db_* function below accepts
+# either a Database session or a database file name as db_file_name. With a
+# session the library is loaded and the database file opened only once for
+# any number of calls, rather than a dlopen/open/close cycle per call.
+# With a file name a short lived (transient) session is opened and closed
+# inside that one call, the same as the original examples.
+#
+# The session is a context manager:
+# with example_sql3.Database("Example_DB.db") as db:
+#     example_sql3.db_insert_table_rowdata(db, "INSERT INTO ...")
+#     example_sql3.db_get_table_number_rows(db, "Hrs_worked_Tracker", ret)
+#
+# or open and close it directly:
+# db = example_sql3.Database("Example_DB.db", SQLITE_OPEN_READONLY)
+# if db.open() == SQLITE_OK: ... db.close()
+#
+# Each open session also has a prepared statement cache (db.stmt_cache, see
+# ozz_sql3.StmtCache) holding up to stmt_cache_size statements for reuse, and
+# a schema cache (db.schema_cache, see ozz_sql3.SchemaCache) of the table and
+# column names used by db_table_exists(), db_get_tablenames() etc.
+class Database:
+    def __init__(self, db_file_name, flags=SQLITE_OPEN_READWRITE | SQLITE_OPEN_CREATE, id_lib_sql3=None, transient=0, stmt_cache_size=32):
+        if id_lib_sql3 is None:
+            # Get the path to the SQLite3 shared library file (dll/so) and
+            # load the sqlite3 shared library.
+            id_lib_sql3 = ozz_sql3.load_libsql3(ozz_sql3.get_libsql3_path())
+        self.id_lib_sql3 = id_lib_sql3
+        self.file_name = db_file_name
+        self.flags = flags  # SQLITE_OPEN_READWRITE | SQLITE_OPEN_CREATE | SQLITE_OPEN_READONLY
+        self.transient = transient  # 1 == opened and closed by a single db_* call.
+        self.p_db = ozz_sql3.p_sqlite3()  # sqlite3 *p_db; database handle (structure).
+        self.is_open = 0
+        self.stmt_cache_size = stmt_cache_size
+        self.stmt_cache = None  # ozz_sql3.StmtCache once open.
+        self.schema_cache = None  # ozz_sql3.SchemaCache once open.
+
+    # Open the database connection. Returns the sqlite3 result code.
+    # An already open session returns SQLITE_OK.
+    def open(self, flags=None):
+        if self.is_open == 1:
+            return SQLITE_OK
+        if flags is None:
+            flags = self.flags
+        p_zVfs = None  # can use NULL = None
+        return_code = ozz_sql3.sqlite3_open_v2(self.id_lib_sql3, self.file_name, self.p_db, flags, p_zVfs)
+        if return_code == SQLITE_OK:
+            self.is_open = 1
+            self.stmt_cache = ozz_sql3.StmtCache(self.id_lib_sql3, self.p_db, self.stmt_cache_size)
+            self.schema_cache = ozz_sql3.SchemaCache(self.id_lib_sql3, self.p_db, self.stmt_cache)
+        return return_code
+
+    # Close the database connection. Returns the sqlite3 result code.
+    # The statements of the session statement cache are finalized. Statements
+    # that are still held by other code (ie. an unfinished iter_table_rows()
+    # generator) belong to that code, so sqlite3_close_v2() is used: the
+    # connection is closed by SQLite when the last of them is finalized.
+    def close(self):
+        if self.stmt_cache is not None:
+            self.stmt_cache.clear()
+        return_code = ozz_sql3.sqlite3_close_v2(self.id_lib_sql3, self.p_db)
+        if return_code == SQLITE_OK:
+            self.is_open = 0
+            self.p_db = ozz_sql3.p_sqlite3()  # Fresh handle for a re-open.
+            self.stmt_cache = None
+            self.schema_cache = None
+        return return_code
+
+    def __enter__(self):
+        return_code = self.open()
+        if return_code != SQLITE_OK:
+            db_error(self.id_lib_sql3, self.p_db, return_code, "Can't open database")  # DEBUG
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+## END Class
+
+
+## ====>> Connection pool
+# A thread safe pool of Database sessions for one database file, for
+# applications where several threads read while one (or more) threads write.
+# The database is put in WAL (write ahead log) journal mode, so readers see the
+# last committed data and are not blocked by a writer, and a writer is not
+# blocked by readers. Each connection is set up with:
+#   PRAGMA journal_mode = WAL;      (once, it is stored in the database file)
+#   PRAGMA synchronous = NORMAL;    (sync on checkpoint, not on every commit)
+#   PRAGMA busy_timeout = ms;       (wait for a lock rather than SQLITE_BUSY)
+#   PRAGMA mmap_size = bytes;       (memory mapped reads)
+#
+# Each thread gets its own read only session, opened on first use and kept
+# for the life of the pool. All writes go through the one writer session,
+# one thread at a time:
+#
+# pool = example_sql3.ConnectionPool("Example_DB.db")
+# # In any thread:
+# db = pool.reader()
+# example_sql3.db_read_table_rowdata_rowid_bind(db, "Table", 3, row, 8)
+# with pool.writer() as db:
+#     example_sql3.db_insert_table_rows_bulk(db, "Table", "Name, Age", rows)
+# ...
+# pool.close()  # After all threads have finished.
+#
+# A reader session must only be used by the thread that got it. All sessions
+# share one loaded sqlite3 library. journal_mode can be set to "DELETE" (the
+# sqlite3 default) to compare with the rollback journal.
+class ConnectionPool:
+    def __init__(self, db_file_name, busy_timeout=5000, mmap_size=268435456, synchronous="NORMAL", journal_mode="WAL", id_lib_sql3=None, stmt_cache_size=32):
+        if id_lib_sql3 is None:
+            id_lib_sql3 = ozz_sql3.load_libsql3(ozz_sql3.get_libsql3_path())
+        self.id_lib_sql3 = id_lib_sql3
+        self.file_name = db_file_name
+        self.busy_timeout = busy_timeout
+        self.mmap_size = mmap_size
+        self.synchronous = synchronous
+        self.journal_mode = journal_mode
+        self.stmt_cache_size = stmt_cache_size
+        self.local = threading.local()  # .reader, the session for each thread.
+        self.readers = []  # All reader sessions, to close.
+        self.readers_lock = threading.Lock()
+        self.writer_lock = threading.Lock()
+        # The writer is opened first so the database (and WAL) exists for readers.
+        self.db_writer = self.connect(SQLITE_OPEN_READWRITE | SQLITE_OPEN_CREATE)
+
+    # Open a session and apply the connection settings.
+    # Returns the Database or None on an error.
+    def connect(self, flags):
+        db = Database(self.file_name, flags, self.id_lib_sql3, 0, self.stmt_cache_size)
+        return_code = db.open()
+        if return_code != SQLITE_OK:
+            db_error(self.id_lib_sql3, db.p_db, return_code, "Can't open database")  # DEBUG
+            db.close()
+            return None
+        sql_concat = "PRAGMA busy_timeout = " + str(int(self.busy_timeout)) + "; " \
+            "PRAGMA mmap_size = " + str(int(self.mmap_size)) + "; "
+        if flags & SQLITE_OPEN_READWRITE:
+            sql_concat = sql_concat + "PRAGMA journal_mode = " + self.journal_mode + "; " \
+                "PRAGMA synchronous = " + self.synchronous + ";"
+        return_code = db_execute(db, sql_concat)
+        if return_code != SQLITE_OK:
+            db_error(self.id_lib_sql3, db.p_db, return_code, "Failed to set connection PRAGMAs")  # DEBUG
+            db.close()
+            return None
+        return db
+
+    # Return the read only session for the calling thread (None on an error).
+    def reader(self):
+        db = getattr(self.local, "reader", None)
+        if db is None:
+            db = self.connect(SQLITE_OPEN_READONLY)
+            if db is not None:
+                self.local.reader = db
+                with self.readers_lock:
+                    self.readers.append(db)
+        return db
+
+    # with pool.writer() as db: ...
+    # Holds the writer session for the calling thread until the with block ends.
+    @contextlib.contextmanager
+    def writer(self):
+        with self.writer_lock:
+            yield self.db_writer
+
+    # Close all sessions. Returns SQLITE_OK or the last error code.
+    def close(self):
+        return_code = SQLITE_OK
+        with self.readers_lock:
+            for db in self.readers:
+                if db.close() != SQLITE_OK:
+                    return_code = SQLITE_BUSY
+            self.readers = []
+        with self.writer_lock:
+            if self.db_writer is not None:
+                if self.db_writer.close() != SQLITE_OK:
+                    return_code = SQLITE_BUSY
+                self.db_writer = None
+        self.local = threading.local()
+        return return_code
+## END Class
+
+
+# Return the Database session for db_file_name. If db_file_name is already a
+# Database session it is returned as is, otherwise a transient session is
+# created for the database file name.
+def db_session(db_file_name):
+    if isinstance(db_file_name, Database):
+        return db_file_name
+    return Database(db_file_name, transient=1)
+
+# Open the session with the flags wanted by the calling db_* function.
+# A (non transient) session that is already open is left as it is.
+def db_session_open(db, flags):
+    if db.transient == 1:
+        return db.open(flags)
+    return db.open()
+
+# Close the session only if it was opened for a single db_* call.
+def db_session_close(db):
+    if db.transient == 1:
+        return db.close()
+    return SQLITE_OK
+
+# A db_* function that passes its session to other db_* functions keeps a
+# transient session open across those calls (they would close it on return):
+# with db_session_keep(db):
+#     db_insert_table_rows_bulk(db, ...)
+@contextlib.contextmanager
+def db_session_keep(db):
+    transient = db.transient
+    db.transient = 0
+    try:
+        yield db
+    finally:
+        db.transient = transient
+
+# Get the prepared statement for sql_query from the session statement cache
+# and bind the params tuple to its ? parameters (see ozz_sql3.sqlite3_bind_params).
+# Returns (return_code, p_stmt). On an error p_stmt is None.
+# Use db.stmt_cache.release(p_stmt) in place of sqlite3_finalize().
+def db_prepare_bind(db, sql_query, params):
+    return_code, p_stmt = db.stmt_cache.prepare(sql_query)
+    if return_code != SQLITE_OK:
+        return return_code, None
+    return_code = ozz_sql3.sqlite3_bind_params(db.id_lib_sql3, p_stmt, params)
+    if return_code != SQLITE_OK:
+        db.stmt_cache.release(p_stmt)
+        return return_code, None
+    return return_code, p_stmt
+
+# Run an SQL statement that returns no rows on the session, ie. "BEGIN;",
+# "COMMIT;" or "ROLLBACK;". Returns SQLITE_OK or the error code.
+def db_execute(db, sql_query):
+    return ozz_sql3.sqlite3_exec(db.id_lib_sql3, db.p_db, sql_query)
+
+
+## ====>> Error reporting
+# The db_* functions return 1 (success), 0 (failed) or -1 (error). The
+# messages about what happened are reported with the "example_sql3" logging
+# logger, which is off by default, so a call that succeeds does no message
+# formatting or console output. db_report_enable() writes the messages to
+# stderr (as the examples in example_calls.py do).
+#
+# A failed call is also kept as an ozz_sql3.Sql3Error (with the sqlite3 result
+# code and sqlite3_errmsg() of a failed SQLite call) for the thread, see
+# db_last_error(), and db_check() raises it for a failed return:
+# example_sql3.db_check(example_sql3.db_insert_table_rowdata(db, sql_query))
+
+db_log = logging.getLogger("example_sql3")
+db_log.addHandler(logging.NullHandler())
+db_reporting = False  # True between db_report_enable() and db_report_disable().
+db_report_handlers = []
+db_errors = threading.local()  # db_errors.error is the last error of the thread.
+
+# A logging handler that writes to the current sys.stderr, so it follows
+# contextlib.redirect_stderr() after it is created.
+class StderrHandler(logging.StreamHandler):
+    def __init__(self):
+        logging.Handler.__init__(self)
+
+    @property
+    def stream(self):
+        return sys.stderr
+## END Class
+
+# Report the messages at level and above (logging.INFO includes the
+# "Successfully ..." messages, logging.ERROR is only the failures) to stderr,
+# or to handler if given. Returns the handler.
+def db_report_enable(level=logging.INFO, handler=None):
+    global db_reporting
+    if handler is None:
+        handler = StderrHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+    db_log.addHandler(handler)
+    db_log.setLevel(level)
+    db_report_handlers.append(handler)
+    db_reporting = True
+    return handler
+
+# Stop reporting and remove the handlers added by db_report_enable().
+def db_report_disable():
+    global db_reporting
+    db_reporting = False
+    for handler in db_report_handlers:
+        db_log.removeHandler(handler)
+    db_report_handlers.clear()
+    return None
+
+# Keep a failed SQLite call as the last error of the thread and report it as
+# "message: sqlite3_errmsg() | result code". Returns the ozz_sql3.Sql3Error.
+def db_error(id_lib_sql3, p_db, result_code, message):
+    error = ozz_sql3.sql3_error(result_code, ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db), message)
+    db_errors.error = error
+    if db_reporting:
+        db_log.error(str(error))
+    return error
+
+# As db_error() for a failure that is not the error of a connection (ie. a
+# file that can't be opened). The error has the result code SQLITE_ERROR
+# unless result_code is given.
+def db_fail(message, result_code=SQLITE_ERROR):
+    error = ozz_sql3.sql3_error(result_code, "", message)
+    db_errors.error = error
+    if db_reporting:
+        db_log.error(message)
+    return error
+
+# As db_fail() for an ozz_sql3.Sql3Error raised by ozz_sql3 (ie. by BlobIO).
+def db_fail_raised(error):
+    db_errors.error = error
+    if db_reporting:
+        db_log.error(str(error))
+    return error
+
+# Returns the last Sql3Error of this thread, or None.
+def db_last_error():
+    return getattr(db_errors, "error", None)
+
+# Returns return_value if it is 1 (success), otherwise raises the last error
+# of the thread (or an Sql3Error if there is none). Only for the functions
+# that return 1 on success, ie. not the 1/0 answer of db_table_exists().
+def db_check(return_value):
+    if return_value == 1:
+        return return_value
+    error = db_last_error()
+    db_errors.error = None
+    if error is None:
+        error = ozz_sql3.Sql3Error(SQLITE_ERROR, "", "Failed with return " + str(return_value))
+    raise error
+
+
+## ====>> Query result cache
+# db_result_cache_enable() keeps the rows returned by db_list_table_rows_data(),
+# db_read_table_rowdata_rowid() and db_read_table_rowdata_rowid_bind() for a
+# database file in an ozz_sql3.ResultCache, so the same query on a table that
+# changes rarely is answered without opening the database or running the SQL.
+# The db_* functions that write to a table (db_insert_table_rowdata(),
+# db_delete_table_rowdata_rowid(), db_replace_table_rowdata_rowid(),
+# db_table_delete() etc.) drop the cached results of that table.
+#
+# result_cache = example_sql3.db_result_cache_enable("Example_DB.db")
+# ... db_read_table_rowdata_rowid("Example_DB.db", ...) ...
+# print(result_cache.stats())  # hits, misses, hit_rate, bytes ...
+# example_sql3.db_result_cache_disable("Example_DB.db")
+#
+# The cache is found by the database file name (of the session), and is
+# shared by all sessions and threads of this process that use the name.
+# Reads on a session inside a transaction (BEGIN) do not use the cache.
+# NOTE! Writes made another way (db_execute(), BlobIO, triggers, other
+# processes) are not seen, call db_result_cache_invalidate() after them. A
+# write inside a transaction begun by the caller drops the results when the
+# statement runs, not at the COMMIT.
+
+db_result_caches = {}  # database file name : ozz_sql3.ResultCache
+
+# The table names written to by INSERT, REPLACE, UPDATE, DELETE, DROP TABLE
+# and ALTER TABLE statements. A table name is optionally schema. and quoted
+# with "", [], `` or bare.
+sql_name = r"""((?:(?:"(?:[^"]|"")+"|\[[^\]]+\]|`[^`]+`|[\w$]+)\s*\.\s*)?(?:"(?:[^"]|"")+"|\[[^\]]+\]|`[^`]+`|[\w$]+))"""
+sql_write_tables = re.compile(r"\b(?:(?:INSERT|REPLACE)\s+(?:OR\s+\w+\s+)?INTO|UPDATE\s+(?:OR\s+\w+\s+)?|DELETE\s+FROM" \
+    r"|DROP\s+TABLE\s+(?:IF\s+EXISTS\s+)?|ALTER\s+TABLE)\s*" + sql_name, re.IGNORECASE)
+
+# Returns the database file name of a Database session or file name.
+def db_session_file_name(db_file_name):
+    if isinstance(db_file_name, Database):
+        return db_file_name.file_name
+    return db_file_name
+
+# Cache the results for a database file, in up to capacity results and
+# max_bytes bytes. Returns the ResultCache (the existing one if enabled) or
+# None for a ":memory:" or temporary ("") database, as those names are a
+# new database for each connection.
+def db_result_cache_enable(db_file_name, capacity=256, max_bytes=16777216):
+    file_name = db_session_file_name(db_file_name)
+    if file_name in (":memory:", ""):
+        db_fail("Results can't be cached for a " + file_name + " database")  # DEBUG
+        return None
+    result_cache = db_result_caches.get(file_name)
+    if result_cache is None:
+        result_cache = ozz_sql3.ResultCache(capacity, max_bytes)
+        db_result_caches[file_name] = result_cache
+    return result_cache
+
+# Stop caching results for a database file (the results are dropped).
+def db_result_cache_disable(db_file_name):
+    db_result_caches.pop(db_session_file_name(db_file_name), None)
+    return None
+
+# Returns the ResultCache of a database file, or None if not enabled.
+def db_result_cache(db_file_name):
+    if len(db_result_caches) == 0:
+        return None
+    return db_result_caches.get(db_session_file_name(db_file_name))
+
+# Returns the ResultCache to read through for a session, or None if not
+# enabled or if the session is inside a transaction (BEGIN), as the rows it
+# reads are not committed and may be rolled back.
+def db_result_cache_read(db_file_name):
+    result_cache = db_result_cache(db_file_name)
+    if result_cache is None:
+        return None
+    if isinstance(db_file_name, Database) and db_file_name.is_open == 1:
+        if ozz_sql3.sqlite3_get_autocommit(db_file_name.id_lib_sql3, db_file_name.p_db) == 0:
+            return None
+    return result_cache
+
+# Drop the cached results of a table, or of all tables if db_table_name is
+# None. Returns the number of results dropped (all with None is 0).
+def db_result_cache_invalidate(db_file_name, db_table_name=None):
+    result_cache = db_result_cache(db_file_name)
+    if result_cache is None:
+        return 0
+    if db_table_name is None:
+        result_cache.clear()
+        return 0
+    return result_cache.invalidate(db_table_name)
+
+# Drop the cached results of the tables written to by an SQL statement
+# (INSERT, REPLACE, UPDATE, DELETE, DROP TABLE or ALTER TABLE), or of all
+# tables if no table name is found in it.
+def db_result_cache_invalidate_sql(db_file_name, sql_query):
+    result_cache = db_result_cache(db_file_name)
+    if result_cache is None:
+        return 0
+    cnt_results = 0
+    table_names = sql_write_tables.findall(sql_query)
+    if len(table_names) == 0:
+        result_cache.clear()
+    for table_name in table_names:
+        table_name = table_name.rsplit(".", 1)[-1].strip()  # No schema name.
+        if table_name[:1] in ("\"", "[", "`"):
+            table_name = table_name[1:-1].replace('""', '"')
+        cnt_results += result_cache.invalidate(table_name)
+    return cnt_results
+
+
 #==============================================================================
 
 # Ensure that sqlite3.dll is in the system path or in the working directory
@@ -272,7 +711,7 @@ def sqlite3_get_version2(ret_version):
     # is returned.
     if return_code != SQLITE_OK:
         # This is error handling code for the sqlite3_prepare_v2 function call.
-        print("Cannot open database: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
+        db_error(id_lib_sql3, p_db, return_code, "Cannot open database")  # DEBUG
         ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
         return -1
 
@@ -298,7 +737,7 @@ def sqlite3_get_version2(ret_version):
     return_code = ozz_sql3.sqlite3_prepare_v2(id_lib_sql3, p_db, sql_query, -1, p_stmt, pzTail)
     if return_code != SQLITE_OK:
         # This is error handling code for the sqlite3_prepare_v2 function call.
-        print("Failed to prepare data: " + str(id_lib_sql3.sqlite3_errmsg(id_lib_sql3, p_db)), file=sys.stderr)  # DEBUG
+        db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
         ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
         return -1
 
@@ -308,7 +747,7 @@ def sqlite3_get_version2(ret_version):
     # of data, therefore, we call this function only once.
     return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)
     if return_code != SQLITE_ROW:
-        print("Step error: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
+        db_error(id_lib_sql3, p_db, return_code, "Step error")  # DEBUG
         ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
         return 0
 
@@ -324,14 +763,14 @@ def sqlite3_get_version2(ret_version):
     return_code = ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt)
     if return_code != SQLITE_OK:
         # This is error handling code.
-        print("Failed to finalize data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
+        db_error(id_lib_sql3, p_db, return_code, "Failed to finalize data")  # DEBUG
         id_lib_sql3.sqlite3_close(p_db)
         return -1
 
     return_code = ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
     if return_code != SQLITE_OK:
         # This is error handling code. NOTE! As p_db is closed the error code may not be available!
-        print("Failed to close database: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
         return -1
 
     return 1
@@ -348,7 +787,7 @@ def file_exists(file_name):
     try:
         fp = open(file_name, "r")
     except FileNotFoundError:
-        print("Cannot open file " + file_name, file=sys.stderr)  # DEBUG
+        db_fail("Cannot open file " + file_name)  # DEBUG
         return 0
 
     fp.close()
@@ -363,7 +802,7 @@ def db_file_exists(db_file_name):
     try:
         fp = open(db_file_name, "rb")  # Open as read binary.
     except FileNotFoundError:
-        print("Cannot open file " + db_file_name, file=sys.stderr)  # DEBUG
+        db_fail("Cannot open file " + db_file_name)  # DEBUG
         return 0
 
     # The SQLite 3 header is exactly 100 (0 - 99) bytes long immediately followed
@@ -380,7 +819,7 @@ def db_file_exists(db_file_name):
             cnt += 1
 
         if ( cnt_chr > 100):  # Check if we found more than 100 bytes?
-            print("Header too long. " + str(cnt_chr) + " chrs.", file=sys.stderr)  # DEBUG
+            db_fail("Header too long. " + str(cnt_chr) + " chrs.")  # DEBUG
             fp.close()  # close the file.
             return 0
         else:
@@ -394,7 +833,7 @@ def db_file_exists(db_file_name):
                 fp.close()  # close the file.
                 return 1
             else:
-                print("\"SQLite format 3\" Header not found!", file=sys.stderr)  # DEBUG
+                db_fail("\"SQLite format 3\" Header not found!")  # DEBUG
                 fp.close()  # close the file.
                 return 0
     except:
@@ -438,7 +877,7 @@ def db_file_create(db_file_name):
     # If the database name exists and is "SQLite format 3", don't try to create a new db.
     # Note: This function is part of the examples_sql3 and not part of ozz_sql3 binder.
     if 1 == db_file_exists(db_file_name):
-        print("Database: " + db_file_name + " already exists!", file=sys.stderr)  # DEBUG
+        db_fail("Database: " + db_file_name + " already exists!")  # DEBUG
         ## stderr occurs after the process closes, so can occurred later than expected.
         return 2  # error codes needs to be reviewed.
 
@@ -449,7 +888,7 @@ def db_file_create(db_file_name):
     return_code = ozz_sql3.sqlite3_open_v2( id_lib_sql3, db_file_name, p_db, SQLITE_OPEN_READWRITE | SQLITE_OPEN_CREATE, p_zVfs )
     if return_code != SQLITE_OK:
         # Note: these print returns can be commented out if only the Bool return 0; is required.
-        print("Can't open database: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
         ozz_sql3.sqlite3_close(id_lib_sql3, p_db )
         return -1
 
@@ -468,7 +907,7 @@ def db_file_create(db_file_name):
     # is returned.
     if return_code != SQLITE_OK:
         # This is error handling code for the sqlite3_prepare_v2 function call.
-        print("Failed to prepare data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
+        db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
         ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
         return -1
 
@@ -480,7 +919,7 @@ def db_file_create(db_file_name):
     return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt );  # run once for one statement
     #    while( sqlite3_step( stmt ) == SQLITE_ROW ) {;}
     if return_code != SQLITE_DONE:  # SQLITE_DONE==101, SQLITE_ROW==100
-        print("Step 1 failed: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
+        db_error(id_lib_sql3, p_db, return_code, "Step 1 failed")  # DEBUG
         ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
         return 0
 
@@ -492,7 +931,7 @@ def db_file_create(db_file_name):
     return_code = ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt )  # Commit to the database.
     if return_code != SQLITE_OK:  # SQLITE_OK==0
         # This is error handling code.
-        print("Failed to finalize data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
+        db_error(id_lib_sql3, p_db, return_code, "Failed to finalize data")  # DEBUG
         ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
         return -1
 
@@ -514,7 +953,7 @@ def db_file_create(db_file_name):
     # is returned.
     if return_code != SQLITE_OK:
         # This is error handling code for the sqlite3_prepare_v2 function call.
-        print("Failed to prepare data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
+        db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
         ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
         return -1
 
@@ -526,7 +965,7 @@ def db_file_create(db_file_name):
     return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt )
     #    while( sqlite3_step( stmt ) == SQLITE_ROW ) {;}
     if return_code != SQLITE_DONE:  # SQLITE_DONE==101, SQLITE_ROW==100
-        print("Step 2 failed: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
+        db_error(id_lib_sql3, p_db, return_code, "Step 2 failed")  # DEBUG
         ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
         return 0
 
@@ -537,7 +976,7 @@ def db_file_create(db_file_name):
     return_code = ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt )  # Commit to the database.
     if return_code != SQLITE_OK:  # SQLITE_OK==0
         # This is error handling code.
-        print("Failed to finalize data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
+        db_error(id_lib_sql3, p_db, return_code, "Failed to finalize data")  # DEBUG
         ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
         return -1
 
@@ -545,11 +984,12 @@ def db_file_create(db_file_name):
     return_code = ozz_sql3.sqlite3_close(id_lib_sql3, p_db)   # SQLITE_OK==0
     if return_code != SQLITE_OK:
         # This is error handling code. NOTE! As p_db is closed the error code may not be available!
-        print("Failed to close database: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
         ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
         return -1
 
-    print("Successfully created " + db_file_name + " SQLite3 database.", file=sys.stderr)  # DEBUG
+    if db_reporting:
+        db_log.info("Successfully created " + db_file_name + " SQLite3 database.")  # DEBUG
 
     return 1
 ## END Function
@@ -571,17 +1011,18 @@ def db_file_delete(db_file_name):
             try:
                 #os.chmod(filePath, 0777)
                 return_code = os.remove(db_file_name)
-                print("Successfully deleted " + db_file_name, file=sys.stderr)  # DEBUG
+                if db_reporting:
+                    db_log.info("Successfully deleted " + db_file_name)  # DEBUG
                 return 1
             except OSError:
-                print("Unable to delete or file not exists." + db_file_name, file=sys.stderr)  # DEBUG
+                db_fail("Unable to delete or file not exists." + db_file_name)  # DEBUG
                 return -1
         else:
-            print("File " + db_file_name + " does not exists.", file=sys.stderr)  # DEBUG
+            db_fail("File " + db_file_name + " does not exists.")  # DEBUG
             return -1
 
     else:  # any not 'y'
-        print("File " + db_file_name + " delete aborted by user." , file=sys.stderr)  # DEBUG
+        db_fail("File " + db_file_name + " delete aborted by user." )  # DEBUG
         return 0  # Aborted delete file.
 
     return 0
@@ -593,15 +1034,12 @@ def db_file_delete(db_file_name):
 # https://www.sqlite.org/c3ref/table_column_metadata.html
 def db_table_exists(db_file_name, db_table_name):
 
-    # Get the path to the SQLite3 shared library file (dll/so).
-    f_library_sql3 = ozz_sql3.get_libsql3_path()  # Get the path for sqlite.dll/so
-
-    # Load the sqlite3 shared library. The returned ID from loading the sqlite
-    # shared library must be passed to other functions.
-    id_lib_sql3  = ozz_sql3.load_libsql3(f_library_sql3)
-
-    # sqlite3 *p_db;  # database handle (structure).
-    p_db = ozz_sql3.p_sqlite3()  # Get the sqlite3 structure.
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given. The session holds the loaded sqlite3
+    # shared library and the sqlite3 *p_db database handle (structure).
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
 
     # sqlite3_stmt *p_stmt;  # structure represents a single SQL statement
     p_stmt = ozz_sql3.p_sqlite3_stmt()  # Get the sqlite3_stmt structure.
@@ -609,16 +1047,15 @@ def db_table_exists(db_file_name, db_table_name):
     return_code = 0
     err_ret = 0
 
-    p_zVfs = None  # can use NULL = None
     pzTail = None
     NULL = None
     #c_NULL = ctypes.POINTER(ctypes.c_char_p)()
 
-    return_code = ozz_sql3.sqlite3_open_v2( id_lib_sql3, db_file_name, p_db, SQLITE_OPEN_READONLY, p_zVfs )
+    return_code = db_session_open(db, SQLITE_OPEN_READONLY)
     if return_code != SQLITE_OK:
         # Note: these print returns can be commented out if only the Bool return 0; is required.
-        print("Can't open database: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
         return -1
 
 ## Alternative method.
@@ -644,23 +1081,28 @@ def db_table_exists(db_file_name, db_table_name):
     """
 
     #null_ptr = ctypes.POINTER(ctypes.c_int)()
-    # ##### This may need a loop!!!!
-    # Currently only tested with single table!!!
     # db_handle, db_name, db_table_name, col_name, NULL, ...
-    return_code = ozz_sql3.sqlite3_table_column_metadata(id_lib_sql3, p_db, NULL, db_table_name, NULL, NULL, NULL, NULL, NULL, NULL)
-    if return_code != SQLITE_OK:
-        print("Table did not exist: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        err_ret = 0
+    #return_code = ozz_sql3.sqlite3_table_column_metadata(id_lib_sql3, p_db, NULL, db_table_name, NULL, NULL, NULL, NULL, NULL, NULL)
+
+    # The table names are read from sqlite_schema once and kept in the session
+    # schema cache until the schema is changed (see ozz_sql3.SchemaCache), so
+    # repeated tests on an open Database session are a dictionary look-up.
+    err_ret = db.schema_cache.table_exists(db_table_name)
+    if err_ret == 1:
+        if db_reporting:
+            db_log.info("Table exists: " + db_table_name)  # DEBUG
+    elif err_ret == 0:
+        if db_reporting:
+            db_log.info("Table did not exist: " + db_table_name)  # DEBUG
     else:
-        print("Table exists: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        err_ret = 1
+        db_fail("Failed to read the schema: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db))  # DEBUG
 
-    # The sqlite3_close function closes the database connection.
-    return_code = ozz_sql3.sqlite3_close(id_lib_sql3, p_db);   # SQLITE_OK==0
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
     if return_code != SQLITE_OK:
         # This is error handling code. NOTE! As p_db is closed the error code may not be available!
-        print("Failed to close database: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
         return -1
 
     return err_ret  #Return this function error code.
@@ -670,15 +1112,12 @@ def db_table_exists(db_file_name, db_table_name):
 # Get the total number of tables in a named database file.
 def db_get_number_tables(db_file_name, number_tables_ret):
 
-    # Get the path to the SQLite3 shared library file (dll/so).
-    f_library_sql3 = ozz_sql3.get_libsql3_path()  # Get the path for sqlite.dll/so
-
-    # Load the sqlite3 shared library. The returned ID from loading the sqlite
-    # shared library must be passed to other functions.
-    id_lib_sql3  = ozz_sql3.load_libsql3(f_library_sql3)
-
-    # sqlite3 *p_db;  # database handle (structure).
-    p_db = ozz_sql3.p_sqlite3()  # Get the sqlite3 structure.
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given. The session holds the loaded sqlite3
+    # shared library and the sqlite3 *p_db database handle (structure).
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
 
     # sqlite3_stmt *p_stmt;  # structure represents a single SQL statement
     p_stmt = ozz_sql3.p_sqlite3_stmt()  # Get the sqlite3_stmt structure.
@@ -688,57 +1127,35 @@ def db_get_number_tables(db_file_name, number_tables_ret):
 
     table_count = 0
 
-    p_zVfs = None  # can use NULL = None
     pzTail = None
     NULL = None
 
-    return_code = ozz_sql3.sqlite3_open_v2( id_lib_sql3, db_file_name, p_db, SQLITE_OPEN_READONLY, p_zVfs )
+    return_code = db_session_open(db, SQLITE_OPEN_READONLY)
     if return_code != SQLITE_OK:
         # Note: these print returns can be commented out if only the Bool return 0; is required.
-        print("Can't open database: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
         return -1
 
-    sql_table_list = "SELECT * FROM sqlite_schema WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY 1;"  # sqlite_schema, sqlite_master
-
-    return_code = ozz_sql3.sqlite3_prepare_v2(id_lib_sql3, p_db, sql_table_list, -1, p_stmt, pzTail)
-    # On success, sqlite3_prepare_v2 returns SQLITE_OK; otherwise an error code
-    # is returned.
-    if return_code != SQLITE_OK:
-        # This is error handling code for the sqlite3_prepare_v2 function call.
-        print("Failed to prepare data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+    # sql_table_list = "SELECT * FROM sqlite_schema WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY 1;"  # sqlite_schema, sqlite_master
+    # The table names are read with the above query once and kept in the
+    # session schema cache until the schema is changed (see ozz_sql3.SchemaCache).
+    db_tablenames = db.schema_cache.table_names()
+    if db_tablenames is None:
+        db_fail("Failed to read the schema: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)))  # DEBUG
+        db_session_close(db)
         return -1
-
-    # The sqlite3_step runs the SQL statement. SQLITE_ROW return code indicates
-    # that there is another row ready. Our SQL statement returns only one row
-    # of data at a time.
-    # If we are writing or reading multiple lines of table then we will need to
-    # use sqlite3_step() in a loop until end of SQLITE_ROW or SQLITE_DONE.
-    while(ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt) == SQLITE_ROW):  # SQLITE_ROW
-        buffer = buffer + ozz_sql3.sqlite3_column_text(id_lib_sql3, p_stmt, 1)
-        table_count += 1  # Count the number of table names found.
+    table_count = len(db_tablenames)  # Count the number of table names found.
 
     # insert the return into element[0]
     number_tables_ret.insert(0, table_count)  # Our table count by reference.
 
-    #sqlite3_bind_*()  # After sqlit3_prepare_v2()
-    #sqlite3_clear_bindings(stmt);
-
-    # The sqlite3_finalize function destroys the prepared statement object.
-    return_code = ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt )  # Commit to the database.
-    if return_code != SQLITE_OK:  # SQLITE_OK==0
-        # This is error handling code.
-        print("Failed to finalize data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
-        return -1
-
-    # The sqlite3_close function closes the database connection.
-    return_code = ozz_sql3.sqlite3_close(id_lib_sql3, p_db)   # SQLITE_OK==0
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
     if return_code != SQLITE_OK:
         # This is error handling code. NOTE! As p_db is closed the error code may not be available!
-        print("Failed to close database: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
         return -1
 
     return 1  #Return this function error code.
@@ -749,15 +1166,12 @@ def db_get_number_tables(db_file_name, number_tables_ret):
 # in the database file.
 def db_get_tablenames(db_file_name, db_tablenames):
 
-    # Get the path to the SQLite3 shared library file (dll/so).
-    f_library_sql3 = ozz_sql3.get_libsql3_path()  # Get the path for sqlite.dll/so
-
-    # Load the sqlite3 shared library. The returned ID from loading the sqlite
-    # shared library must be passed to other functions.
-    id_lib_sql3  = ozz_sql3.load_libsql3(f_library_sql3)
-
-    # sqlite3 *p_db;  # database handle (structure).
-    p_db = ozz_sql3.p_sqlite3()  # Get the sqlite3 structure.
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given. The session holds the loaded sqlite3
+    # shared library and the sqlite3 *p_db database handle (structure).
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
 
     # sqlite3_stmt *p_stmt;  # structure represents a single SQL statement
     p_stmt = ozz_sql3.p_sqlite3_stmt()  # Get the sqlite3_stmt structure.
@@ -767,50 +1181,35 @@ def db_get_tablenames(db_file_name, db_tablenames):
 
     table_count = 0
 
-    p_zVfs = None  # can use NULL = None
     pzTail = None
     NULL = None
 
-    return_code = ozz_sql3.sqlite3_open_v2( id_lib_sql3, db_file_name, p_db, SQLITE_OPEN_READONLY, p_zVfs )
+    return_code = db_session_open(db, SQLITE_OPEN_READONLY)
     if return_code != SQLITE_OK:
         # Note: these print returns can be commented out if only the Bool return 0; is required.
-        print("Can't open database: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
         return -1
 
-    sql_table_list = "SELECT * FROM sqlite_schema WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY 1;"  # sqlite_schema, sqlite_master
-
-    return_code = ozz_sql3.sqlite3_prepare_v2(id_lib_sql3, p_db, sql_table_list, -1, p_stmt, pzTail)
-    # On success, sqlite3_prepare_v2 returns SQLITE_OK; otherwise an error code
-    # is returned.
-    if return_code != SQLITE_OK:
-        # This is error handling code for the sqlite3_prepare_v2 function call.
-        print("Failed to prepare data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+    # sql_table_list = "SELECT * FROM sqlite_schema WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY 1;"  # sqlite_schema, sqlite_master
+    # Read from the session schema cache (see ozz_sql3.SchemaCache).
+    db_schema_names = db.schema_cache.table_names()
+    if db_schema_names is None:
+        db_fail("Failed to read the schema: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)))  # DEBUG
+        db_session_close(db)
         return -1
 
     # Loop through all of the tables.
-    while ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt) == SQLITE_ROW:
-        db_tablenames.insert(table_count, ozz_sql3.sqlite3_column_text(id_lib_sql3, p_stmt, 1))
+    for table_name in db_schema_names:
+        db_tablenames.insert(table_count, table_name)
         table_count += 1  # Update the next array data element.
 
-    #sqlite3_bind_*()  # After sqlit3_prepare_v2()
-    #sqlite3_clear_bindings(stmt);
-
-    # The sqlite3_finalize function destroys the prepared statement object.
-    return_code = ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt )  # Commit to the database.
-    if return_code != SQLITE_OK:  # SQLITE_OK==0
-        # This is error handling code.
-        print("Failed to finalize data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
-        return -1
-
-    # The sqlite3_close function closes the database connection.
-    return_code = ozz_sql3.sqlite3_close(id_lib_sql3, p_db)   # SQLITE_OK==0
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
     if return_code != SQLITE_OK:
         # This is error handling code. NOTE! As p_db is closed the error code may not be available!
-        print("Failed to close database: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
         return -1
 
     return 1  #Return this function error code.
@@ -825,30 +1224,26 @@ def db_get_tablenames(db_file_name, db_tablenames):
 # I may need to create a test or modify this function for safety.
 def db_table_create(db_file_name, db_table):
 
-    # Get the path to the SQLite3 shared library file (dll/so).
-    f_library_sql3 = ozz_sql3.get_libsql3_path()  # Get the path for sqlite.dll/so
-
-    # Load the sqlite3 shared library. The returned ID from loading the sqlite
-    # shared library must be passed to other functions.
-    id_lib_sql3  = ozz_sql3.load_libsql3(f_library_sql3)
-
-    # sqlite3 *p_db;  # database handle (structure).
-    p_db = ozz_sql3.p_sqlite3()  # Get the sqlite3 structure.
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given. The session holds the loaded sqlite3
+    # shared library and the sqlite3 *p_db database handle (structure).
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
 
     # sqlite3_stmt *p_stmt;  # structure represents a single SQL statement
     p_stmt = ozz_sql3.p_sqlite3_stmt()  # Get the sqlite3_stmt structure.
 
     return_code = 0
 
-    p_zVfs = None  # can use NULL = None
     pzTail = None
     NULL = None
 
-    return_code = ozz_sql3.sqlite3_open_v2( id_lib_sql3, db_file_name, p_db, SQLITE_OPEN_READWRITE, p_zVfs )
+    return_code = db_session_open(db, SQLITE_OPEN_READWRITE)
     if return_code != SQLITE_OK:
         # Note: these print returns can be commented out if only the Bool return 0; is required.
-        print("Can't open database: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
         return -1
 
     # In this function I have formatted the entire query (statement) prior to
@@ -866,8 +1261,8 @@ def db_table_create(db_file_name, db_table):
     # is returned.
     if return_code != SQLITE_OK:
         # This is error handling code for the sqlite3_prepare_v2 function call.
-        print("Failed to prepare data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
+        db_session_close(db)
         return -1
 
     # The sqlite3_step runs the SQL statement. SQLITE_ROW return code indicates
@@ -878,8 +1273,9 @@ def db_table_create(db_file_name, db_table):
     return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt );  # run once for one statement
     #    while( sqlite3_step( p_stmt ) == SQLITE_ROW ) {;}
     if return_code != SQLITE_DONE:  # SQLITE_DONE==101, SQLITE_ROW==100
-        print("Step failed: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Step failed")  # DEBUG
+        ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt)
+        db_session_close(db)
         return 0
 
     #sqlite3_bind_*()  # After sqlit3_prepare_v2()
@@ -889,19 +1285,20 @@ def db_table_create(db_file_name, db_table):
     return_code = ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt )  # Commit to the database.
     if return_code != SQLITE_OK:  # SQLITE_OK==0
         # This is error handling code.
-        print("Failed to finalize data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to finalize data")  # DEBUG
+        db_session_close(db)
         return -1
 
-    # The sqlite3_close function closes the database connection.
-    return_code = ozz_sql3.sqlite3_close(id_lib_sql3, p_db)   # SQLITE_OK==0
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
     if return_code != SQLITE_OK:
         # This is error handling code. NOTE! As p_db is closed the error code may not be available!
-        print("Failed to close database: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
         return -1
 
-    print("Successfully created table in " + db_file_name, file=sys.stderr)  # DEBUG
+    if db_reporting:
+        db_log.info("Successfully created table in " + db.file_name)  # DEBUG
 
     return 1
 ## END Function
@@ -911,30 +1308,26 @@ def db_table_create(db_file_name, db_table):
 # Will return -1 if the database file does not exists.
 def db_table_delete(db_file_name, db_table_name):
 
-    # Get the path to the SQLite3 shared library file (dll/so).
-    f_library_sql3 = ozz_sql3.get_libsql3_path()  # Get the path for sqlite.dll/so
-
-    # Load the sqlite3 shared library. The returned ID from loading the sqlite
-    # shared library must be passed to other functions.
-    id_lib_sql3  = ozz_sql3.load_libsql3(f_library_sql3)
-
-    # sqlite3 *p_db;  # database handle (structure).
-    p_db = ozz_sql3.p_sqlite3()  # Get the sqlite3 structure.
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given. The session holds the loaded sqlite3
+    # shared library and the sqlite3 *p_db database handle (structure).
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
 
     # sqlite3_stmt *p_stmt;  # structure represents a single SQL statement
     p_stmt = ozz_sql3.p_sqlite3_stmt()  # Get the sqlite3_stmt structure.
 
     return_code = 0
 
-    p_zVfs = None  # can use NULL = None
     pzTail = None
     NULL = None
 
-    return_code = ozz_sql3.sqlite3_open_v2( id_lib_sql3, db_file_name, p_db, SQLITE_OPEN_READWRITE, p_zVfs )
+    return_code = db_session_open(db, SQLITE_OPEN_READWRITE)
     if return_code != SQLITE_OK:
         # Note: these print returns can be commented out if only the Bool return 0; is required.
-        print("Can't open database: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
         return -1
 
     # In this function I have formatted the entire query (statement) prior to
@@ -950,8 +1343,8 @@ def db_table_delete(db_file_name, db_table_name):
     # is returned.
     if return_code != SQLITE_OK:
         # This is error handling code for the sqlite3_prepare_v2 function call.
-        print("Failed to prepare data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
+        db_session_close(db)
         return -1
 
     # The sqlite3_step runs the SQL statement. SQLITE_ROW return code indicates
@@ -961,9 +1354,12 @@ def db_table_delete(db_file_name, db_table_name):
     # use sqlite3_step() in a loop until end of SQLITE_ROW or SQLITE_DONE.
     return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)  # run once for one statement
     #    while( sqlite3_step( stmt ) == SQLITE_ROW ) {;}
+    # Drop the cached results of the table (see db_result_cache_enable()).
+    db_result_cache_invalidate_sql(db, db_table_name)
     if return_code != SQLITE_DONE:  # SQLITE_DONE==101, SQLITE_ROW==100
-        print("Step failed: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Step failed")  # DEBUG
+        ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt)
+        db_session_close(db)
         return 0
 
     #sqlite3_bind_*()  # After sqlit3_prepare_v2()
@@ -973,19 +1369,20 @@ def db_table_delete(db_file_name, db_table_name):
     return_code = ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt )  # Commit to the database.
     if return_code != SQLITE_OK:  # SQLITE_OK==0
         # This is error handling code.
-        print("Failed to finalize data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to finalize data")  # DEBUG
+        db_session_close(db)
         return -1
 
-    # The sqlite3_close function closes the database connection.
-    return_code = ozz_sql3.sqlite3_close(id_lib_sql3, p_db)   # SQLITE_OK==0
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
     if return_code != SQLITE_OK:
         # This is error handling code. NOTE! As p_db is closed the error code may not be available!
-        print("Failed to close database: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
         return -1
 
-    print("Successfully deleted table in " + db_file_name, file=sys.stderr)  # DEBUG
+    if db_reporting:
+        db_log.info("Successfully deleted table in " + db.file_name)  # DEBUG
 
     return 1
 ## END Function
@@ -993,18 +1390,28 @@ def db_table_delete(db_file_name, db_table_name):
 
 #============================================================================>>
 
-# Get the number of rows from a table.
-def db_get_table_number_rows(db_file_name, db_table_name, number_rows_ret):
+# Row count modes of db_count_rows().
+ROW_COUNT_EXACT = 0  # SELECT COUNT(*), reads the whole table.
+ROW_COUNT_MAINTAINED = 1  # The trigger maintained count, see db_row_count_maintain().
+ROW_COUNT_ESTIMATE = 2  # The sqlite_stat1 row count from ANALYZE, see db_analyze().
 
-    # Get the path to the SQLite3 shared library file (dll/so).
-    f_library_sql3 = ozz_sql3.get_libsql3_path()  # Get the path for sqlite.dll/so
+# The side table of the counts kept by db_row_count_maintain().
+ROW_COUNT_TABLE = "ozz_row_counts"
 
-    # Load the sqlite3 shared library. The returned ID from loading the sqlite
-    # shared library must be passed to other functions.
-    id_lib_sql3  = ozz_sql3.load_libsql3(f_library_sql3)
+# Get the number of rows from a table.
+# SELECT COUNT(*) reads every row of the table. count_mode ROW_COUNT_MAINTAINED
+# or ROW_COUNT_ESTIMATE returns the count with db_count_rows() instead.
+def db_get_table_number_rows(db_file_name, db_table_name, number_rows_ret, count_mode=ROW_COUNT_EXACT):
 
-    # sqlite3 *p_db;  # database handle (structure).
-    p_db = ozz_sql3.p_sqlite3()  # Get the sqlite3 structure.
+    if count_mode != ROW_COUNT_EXACT:
+        return db_count_rows(db_file_name, db_table_name, number_rows_ret, count_mode)
+
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given. The session holds the loaded sqlite3
+    # shared library and the sqlite3 *p_db database handle (structure).
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
 
     # sqlite3_stmt *p_stmt;  # structure represents a single SQL statement
     p_stmt = ozz_sql3.p_sqlite3_stmt()  # Get the sqlite3_stmt structure.
@@ -1012,15 +1419,14 @@ def db_get_table_number_rows(db_file_name, db_table_name, number_rows_ret):
     return_code = 0
     row_cnt = 0
 
-    p_zVfs = None  # can use NULL = None
     pzTail = None
     NULL = None
 
-    return_code = ozz_sql3.sqlite3_open_v2( id_lib_sql3, db_file_name, p_db, SQLITE_OPEN_READONLY, p_zVfs )
+    return_code = db_session_open(db, SQLITE_OPEN_READONLY)
     if return_code != SQLITE_OK:
         # Note: these print returns can be commented out if only the Bool return 0; is required.
-        print("Can't open database: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
         return -1
 
     # Unlike previous functions, I am using a template to create the statement.
@@ -1039,8 +1445,8 @@ def db_get_table_number_rows(db_file_name, db_table_name, number_rows_ret):
     # is returned.
     if return_code != SQLITE_OK:
         # This is error handling code for the sqlite3_prepare_v2 function call.
-        print("Failed to prepare data: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
+        db_session_close(db)
         return -1
 
     # The sqlite3_step runs the SQL statement. SQLITE_ROW return code indicates
@@ -1050,8 +1456,9 @@ def db_get_table_number_rows(db_file_name, db_table_name, number_rows_ret):
     # use sqlite3_step() in a loop until end of SQLITE_ROW or SQLITE_DONE.
     return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)
     if return_code != SQLITE_ROW:
-        print("Step failed: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db);
+        db_error(id_lib_sql3, p_db, return_code, "Step failed")  # DEBUG
+        ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt)
+        db_session_close(db)
         return -1
 
     row_cnt = ozz_sql3.sqlite3_column_int(id_lib_sql3, p_stmt, 0)  # Retrieve the row count as int.
@@ -1065,188 +1472,769 @@ def db_get_table_number_rows(db_file_name, db_table_name, number_rows_ret):
     return_code = ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt )  # Commit to the database.
     if return_code != SQLITE_OK:  # SQLITE_OK==0
         # This is error handling code.
-        print("Failed to finalize data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to finalize data")  # DEBUG
+        db_session_close(db)
         return -1
 
-    # The sqlite3_close function closes the database connection.
-    return_code = ozz_sql3.sqlite3_close(id_lib_sql3, p_db)   # SQLITE_OK==0
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
     if return_code != SQLITE_OK:
         # This is error handling code. NOTE! As p_db is closed the error code may not be available!
-        print("Failed to close database: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
         return -1
 
-    print("Successfully retrieved table row number from " + db_file_name, file=sys.stderr)  # DEBUG
+    if db_reporting:
+        db_log.info("Successfully retrieved table row number from " + db.file_name)  # DEBUG
 
     return 1
 ## END Function
 
 
-# Get number of columns in a TableName.
-def db_get_table_number_cols(db_file_name, db_table_name, number_cols_ret):
+# Get the number of rows in a table with the chosen count_mode:
+# ROW_COUNT_EXACT runs SELECT COUNT(*), which steps through every row of the
+# table b-tree (slow for large tables).
+# ROW_COUNT_MAINTAINED reads the count kept up to date by the triggers of
+# db_row_count_maintain(), a single row look-up. Returns -1 if the table is not
+# maintained.
+# ROW_COUNT_ESTIMATE reads the row count saved by the last ANALYZE in
+# sqlite_stat1 (see db_analyze()). This is not updated by INSERT or DELETE until
+# the next ANALYZE. For a table that has not been analysed it is MAX(rowid),
+# which is exact until rows are deleted.
+# number_rows_ret returns byref the number of rows.
+# Returns 1 on success or -1 on an error.
+def db_count_rows(db_file_name, db_table_name, number_rows_ret, count_mode=ROW_COUNT_EXACT):
+
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given.
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
+
+    return_code = db_session_open(db, SQLITE_OPEN_READONLY)
+    if return_code != SQLITE_OK:
+        # Note: these print returns can be commented out if only the Bool return 0; is required.
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
+        return -1
 
-    # Get the path to the SQLite3 shared library file (dll/so).
-    f_library_sql3 = ozz_sql3.get_libsql3_path()  # Get the path for sqlite.dll/so
+    if count_mode == ROW_COUNT_MAINTAINED:
+        # The count is only used while the table triggers exist (a dropped and
+        # re-created table leaves an old count without the triggers).
+        count_queries = (("SELECT row_count FROM " + ROW_COUNT_TABLE + " WHERE tbl = ?1 " \
+            "AND EXISTS (SELECT 1 FROM sqlite_schema WHERE type = 'trigger' AND name = ?1 || '_count_ad');", (db_table_name,)),)
+    elif count_mode == ROW_COUNT_ESTIMATE:
+        # Fails to prepare if ANALYZE has never been run (no sqlite_stat1).
+        # The table row (idx NULL) is used if there is one, otherwise the most
+        # rows of an index that is not partial (a partial index has fewer).
+        count_queries = (("SELECT stat FROM sqlite_stat1 WHERE tbl = ?1 AND (idx IS NULL OR idx NOT IN " \
+            "(SELECT name FROM pragma_index_list(?1) WHERE partial = 1)) ORDER BY idx IS NOT NULL, CAST(stat AS INTEGER) DESC LIMIT 1;", (db_table_name,)), \
+            ("SELECT MAX(rowid) FROM " + db_table_name + ";", ()))
+    else:
+        count_queries = (("SELECT COUNT(*) FROM " + db_table_name + ";", ()),)
 
-    # Load the sqlite3 shared library. The returned ID from loading the sqlite
-    # shared library must be passed to other functions.
-    id_lib_sql3  = ozz_sql3.load_libsql3(f_library_sql3)
+    row_cnt = None
+    for sql_query, params in count_queries:
+        return_code, p_stmt = db_prepare_bind(db, sql_query, params)
+        if return_code != SQLITE_OK:
+            continue
+        return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)
+        if return_code == SQLITE_ROW:
+            # sqlite_stat1.stat is "rows rows_per_key ...", the first integer is
+            # the table rows. MAX(rowid) is NULL for an empty table.
+            row_cnt = ozz_sql3.sqlite3_column_py(id_lib_sql3, p_stmt, 0)
+            if isinstance(row_cnt, str):
+                row_cnt = int(row_cnt.split(" ")[0])
+            elif row_cnt is None and count_mode == ROW_COUNT_ESTIMATE:
+                row_cnt = 0
+        db.stmt_cache.release(p_stmt)
+        if row_cnt is not None:
+            break
+        ## END for count_queries
+
+    if row_cnt is None:
+        if count_mode == ROW_COUNT_MAINTAINED:
+            db_fail("Table row count is not maintained: " + db_table_name + " (see db_row_count_maintain())")  # DEBUG
+        else:
+            db_error(id_lib_sql3, p_db, return_code, "Failed to count rows")  # DEBUG
+        db_session_close(db)
+        return -1
 
-    # sqlite3 *p_db;  # database handle (structure).
-    p_db = ozz_sql3.p_sqlite3()  # Get the sqlite3 structure.
+    # insert the return into element[0]
+    number_rows_ret.insert(0, row_cnt)  # Our row count by reference.
 
-    # sqlite3_stmt *p_stmt;  # structure represents a single SQL statement
-    p_stmt = ozz_sql3.p_sqlite3_stmt()  # Get the sqlite3_stmt structure.
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
+    if return_code != SQLITE_OK:
+        # This is error handling code. NOTE! As p_db is closed the error code may not be available!
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        return -1
 
-    return_code = 0
-    col_cnt = 0
+    return 1
+## END Function
 
-    p_zVfs = None  # can use NULL = None
-    pzTail = None
-    NULL = None
 
-    return_code = ozz_sql3.sqlite3_open_v2( id_lib_sql3, db_file_name, p_db, SQLITE_OPEN_READONLY, p_zVfs )
+# Keep a row count of a table in the ROW_COUNT_TABLE side table for
+# db_count_rows(..., ROW_COUNT_MAINTAINED). The count is set with COUNT(*)
+# once, then the <table>_count_ai and <table>_count_ad triggers add 1 for
+# each row inserted and take 1 for each row deleted, in the same transaction
+# as the change. The AFTER INSERT trigger only runs for a row that was
+# inserted, so INSERT OR IGNORE and ON CONFLICT DO NOTHING are not counted.
+# Each INSERT and DELETE on the table does one more row update.
+# Safe to call again, the count is reset to COUNT(*).
+# NOTE! REPLACE INTO (ie. db_replace_table_rowdata_rowid()) removes the old
+# row of an existing rowid or UNIQUE value without running the DELETE trigger
+# unless the connection has "PRAGMA recursive_triggers = ON;", so with the
+# default the replaced row is counted as an added row. Call again to reset.
+# Returns 1 on success, 0 if the triggers could not be created or -1 on an error.
+def db_row_count_maintain(db_file_name, db_table_name):
+
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given.
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
+
+    return_code = db_session_open(db, SQLITE_OPEN_READWRITE)
     if return_code != SQLITE_OK:
         # Note: these print returns can be commented out if only the Bool return 0; is required.
-        print("Can't open database: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
         return -1
 
-    db_col_search = "SELECT COUNT(*) FROM pragma_table_info(\"" + db_table_name + "\");"  # Don't use long table name max[128 - 43]
+    # The table name is a string value in the side table, and a quoted
+    # identifier in the trigger and table names.
+    tbl_value = "'" + db_table_name.replace("'", "''") + "'"
+    tbl_ident = "\"" + db_table_name.replace("\"", "\"\"") + "\""
+    trigger_ident = "\"" + db_table_name.replace("\"", "\"\"") + "_count_"
+    count_update = "UPDATE " + ROW_COUNT_TABLE + " SET row_count = row_count "
+
+    # sqlite3_exec() runs all of the ; separated statements.
+    # The triggers are created again so an older version is replaced (the
+    # <table>_count_bi trigger of an older version is dropped).
+    sql_concat = "BEGIN IMMEDIATE; " \
+        "CREATE TABLE IF NOT EXISTS " + ROW_COUNT_TABLE + "(tbl TEXT PRIMARY KEY, row_count INTEGER NOT NULL); " \
+        "INSERT OR REPLACE INTO " + ROW_COUNT_TABLE + "(tbl, row_count) SELECT " + tbl_value + ", COUNT(*) FROM " + tbl_ident + "; " \
+        "DROP TRIGGER IF EXISTS " + trigger_ident + "bi\"; " \
+        "DROP TRIGGER IF EXISTS " + trigger_ident + "ai\"; " \
+        "DROP TRIGGER IF EXISTS " + trigger_ident + "ad\"; " \
+        "CREATE TRIGGER " + trigger_ident + "ai\" AFTER INSERT ON " + tbl_ident + " BEGIN " \
+            + count_update + "+ 1 WHERE tbl = " + tbl_value + "; END; " \
+        "CREATE TRIGGER " + trigger_ident + "ad\" AFTER DELETE ON " + tbl_ident + " BEGIN " \
+            + count_update + "- 1 WHERE tbl = " + tbl_value + "; END; " \
+        "COMMIT;"
+
+    return_code = db_execute(db, sql_concat)
+    if return_code != SQLITE_OK:
+        db_error(id_lib_sql3, p_db, return_code, "Failed to create row count triggers")  # DEBUG
+        if ozz_sql3.sqlite3_get_autocommit(id_lib_sql3, p_db) == 0:
+            db_execute(db, "ROLLBACK;")
+        db_session_close(db)
+        return 0
 
-    # We can only send one query at a time to sqlite3.
-    return_code = ozz_sql3.sqlite3_prepare_v2(id_lib_sql3, p_db, db_col_search, -1, p_stmt, pzTail)
-    # On success, sqlite3_prepare_v2 returns SQLITE_OK; otherwise an error code
-    # is returned.
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
     if return_code != SQLITE_OK:
-        # This is error handling code for the sqlite3_prepare_v2 function call.
-        print("Failed to prepare data: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        # This is error handling code. NOTE! As p_db is closed the error code may not be available!
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
         return -1
 
-    # The sqlite3_step runs the SQL statement. SQLITE_ROW return code indicates
-    # that there is another row ready. Our SQL statement returns only one row
-    # of data at a time.
-    # If we are writing or reading multiple lines of table then we will need to
-    # use sqlite3_step() in a loop until end of SQLITE_ROW or SQLITE_DONE.
-    return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)
-    if return_code != SQLITE_ROW:
-        fprintf(stderr, "Step failed: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
-        return -1
+    if db_reporting:
+        db_log.info("Successfully created row count triggers for " + db_table_name + " in " + db.file_name)  # DEBUG
 
-    col_cnt = ozz_sql3.sqlite3_column_int(id_lib_sql3, p_stmt, 0)  # Retrieve the col count as int.
-    # insert the return into element[0]
-    number_cols_ret.insert(0, col_cnt)  # Our table count by reference.
+    return 1
+## END Function
 
-    #sqlite3_bind_*()  # After sqlit3_prepare_v2()
-    #sqlite3_clear_bindings(stmt);
 
-    # The sqlite3_finalize function destroys the prepared statement object.
-    return_code = ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt )  # Commit to the database.
-    if return_code != SQLITE_OK:  # SQLITE_OK==0
-        # This is error handling code.
-        print("Failed to finalize data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+# Run ANALYZE on a table (or the whole database if db_table_name is None) to
+# save the row counts in sqlite_stat1 for db_count_rows(..., ROW_COUNT_ESTIMATE)
+# and for the query planner. Run again after large changes to the table.
+# Returns 1 on success or -1 on an error.
+def db_analyze(db_file_name, db_table_name=None):
+
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given.
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
+
+    return_code = db_session_open(db, SQLITE_OPEN_READWRITE)
+    if return_code != SQLITE_OK:
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
         return -1
 
-    # The sqlite3_close function closes the database connection.
-    return_code = ozz_sql3.sqlite3_close(id_lib_sql3, p_db)   # SQLITE_OK==0
+    if db_table_name is None:
+        return_code = db_execute(db, "ANALYZE;")
+    else:
+        return_code = db_execute(db, "ANALYZE " + db_table_name + ";")
     if return_code != SQLITE_OK:
-        # This is error handling code. NOTE! As p_db is closed the error code may not be available!
-        print("Failed to close database: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to analyze")  # DEBUG
+        db_session_close(db)
         return -1
 
-    print("Successfully retrieved table column number from " + db_file_name, file=sys.stderr)  # DEBUG
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
+    if return_code != SQLITE_OK:
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        return -1
 
     return 1
 ## END Function
 
 
-# Get the column names as 2D array from a named table.
-def db_get_table_colnames(db_file_name, db_table_name, db_tbl_col_name):
+## ====>> Backup and in-memory snapshots
+# iter_backup() and db_backup() copy a whole database from one session (or
+# database file name) to another with the SQLite online backup API
+# (ozz_sql3.sqlite3_backup_*). The copy is made pages_per_step pages at a
+# time: the source is only locked during each step, and a memory session that
+# is saved from another thread is only held for one step at a time, so
+# callers are not stalled for the whole copy. pages_per_step=-1 copies all of
+# the pages in one step, which is the fastest when nothing else is waiting.
+# NOTE! If another connection writes to the source between steps the copy
+# restarts from the first page.
+#
+# A file database can be loaded into RAM at start up with db_snapshot_load(),
+# the reads served from the ":memory:" session, and the changes saved back to
+# the file with db_snapshot_save() or every interval seconds by a
+# SnapshotCheckpoint thread:
+#
+# db_mem_ret = []
+# db_snapshot_load("Example_DB.db", db_mem_ret)
+# db_mem = db_mem_ret[0]  # An open Database(":memory:") session.
+# checkpoint = SnapshotCheckpoint(db_mem, "Example_DB.db", 60.0)
+# checkpoint.start()
+# ... db_*(db_mem, ...) ...
+# checkpoint.stop()  # Saves the last changes.
+# db_mem.close()
+#
+# A ":memory:" database belongs to its one connection, so all of the reads
+# and writes must use the db_mem session. Changes made after the last save
+# are lost if the program ends without saving.
+
+# Generator that copies the database src_name ("main", "temp" or an attached
+# name) of db_src_name to dest_name of db_dest_name, pages_per_step pages at a
+# time, yielding (remaining pages, source pages) after each step so the caller
+# can do other work between the steps. A step that finds the source or
+# destination locked (SQLITE_BUSY/SQLITE_LOCKED) is tried again after 1 ms,
+# for up to busy_timeout milliseconds, then the copy ends with that error.
+# The destination is replaced as a whole when the copy completes.
+# return_code_ret (optional list) returns byref 1 when the copy is complete
+# or -1 on an error (or if the generator is closed before the end).
+def iter_backup(db_src_name, db_dest_name, pages_per_step=100, return_code_ret=None, src_name="main", dest_name="main", busy_timeout=5000):
+
+    # Use the open Database sessions, or sessions for this call only if
+    # database file names were given. Transient sessions are closed when the
+    # copy ends (or the generator is closed).
+    db_src = db_session(db_src_name)
+    db_dest = db_session(db_dest_name)
+    id_lib_sql3 = db_dest.id_lib_sql3
+    err_ret = -1
+
+    return_code = db_session_open(db_src, SQLITE_OPEN_READONLY)
+    if return_code == SQLITE_OK:
+        return_code = db_session_open(db_dest, SQLITE_OPEN_READWRITE | SQLITE_OPEN_CREATE)
+        if return_code != SQLITE_OK:
+            db_error(id_lib_sql3, db_dest.p_db, return_code, "Can't open database")  # DEBUG
+    else:
+        db_error(id_lib_sql3, db_src.p_db, return_code, "Can't open database")  # DEBUG
+    if return_code != SQLITE_OK:
+        db_session_close(db_dest)
+        db_session_close(db_src)
+        if return_code_ret is not None:
+            return_code_ret.insert(0, err_ret)
+        return
 
-    # Get the path to the SQLite3 shared library file (dll/so).
-    f_library_sql3 = ozz_sql3.get_libsql3_path()  # Get the path for sqlite.dll/so
+    p_backup = ozz_sql3.sqlite3_backup_init(id_lib_sql3, db_dest.p_db, dest_name, db_src.p_db, src_name)
+    try:
+        if not p_backup:  # NULL pointer, the error is on the destination.
+            db_error(id_lib_sql3, db_dest.p_db, SQLITE_ERROR, "Failed to start backup")  # DEBUG
+            return
+
+        t_busy = None  # When the source or destination was first found locked.
+        return_code = ozz_sql3.sqlite3_backup_step(id_lib_sql3, p_backup, pages_per_step)
+        while return_code in (SQLITE_OK, SQLITE_BUSY, SQLITE_LOCKED):
+            if return_code == SQLITE_OK:
+                t_busy = None
+            elif t_busy is None:
+                t_busy = time.monotonic()
+            elif (time.monotonic() - t_busy) * 1000 >= busy_timeout:
+                break
+            yield (ozz_sql3.sqlite3_backup_remaining(id_lib_sql3, p_backup), ozz_sql3.sqlite3_backup_pagecount(id_lib_sql3, p_backup))
+            if return_code != SQLITE_OK:
+                ozz_sql3.sqlite3_sleep(id_lib_sql3, 1)
+            return_code = ozz_sql3.sqlite3_backup_step(id_lib_sql3, p_backup, pages_per_step)
+            ## END while
+
+        if return_code in (SQLITE_BUSY, SQLITE_LOCKED):
+            db_fail("Backup timed out after " + str(busy_timeout) + " ms, the database is locked", return_code)  # DEBUG
+            return
+        if return_code != SQLITE_DONE:
+            db_error(id_lib_sql3, db_dest.p_db, return_code, "Backup step failed")  # DEBUG
+            return
+        err_ret = 1
+    finally:
+        if p_backup:
+            # Releases the backup, a copy that did not complete is rolled back.
+            return_code = ozz_sql3.sqlite3_backup_finish(id_lib_sql3, p_backup)
+            if return_code != SQLITE_OK and err_ret == 1:
+                db_error(id_lib_sql3, db_dest.p_db, return_code, "Failed to finish backup")  # DEBUG
+                err_ret = -1
+        # Close the database connections (only if they were opened for this call).
+        for db in (db_dest, db_src):
+            return_code = db_session_close(db)  # SQLITE_OK==0
+            if return_code != SQLITE_OK:
+                db_error(id_lib_sql3, db.p_db, return_code, "Failed to close database")  # DEBUG
+                err_ret = -1
+        if return_code_ret is not None:
+            return_code_ret.insert(0, err_ret)
+    return
+## END Function
 
-    # Load the sqlite3 shared library. The returned ID from loading the sqlite
-    # shared library must be passed to other functions.
-    id_lib_sql3  = ozz_sql3.load_libsql3(f_library_sql3)
+# Copy the database db_src_name to db_dest_name with iter_backup(), sleeping
+# step_sleep_ms milliseconds between the steps (0 to only let other threads
+# run). Returns 1 on success or -1 on an error (ie. still locked after
+# busy_timeout milliseconds).
+def db_backup(db_src_name, db_dest_name, pages_per_step=-1, step_sleep_ms=0, src_name="main", dest_name="main", busy_timeout=5000):
+    return_code_ret = []
+    cnt_step = 0
+    for remaining, pagecount in iter_backup(db_src_name, db_dest_name, pages_per_step, return_code_ret, src_name, dest_name, busy_timeout):
+        cnt_step += 1
+        time.sleep(step_sleep_ms / 1000)
+    if return_code_ret[0] != 1:
+        return -1
+    if db_reporting:
+        db_log.info("Successfully copied the database in " + str(cnt_step + 1) + " steps")  # DEBUG
+    return 1
+## END Function
 
-    # sqlite3 *p_db;  # database handle (structure).
-    p_db = ozz_sql3.p_sqlite3()  # Get the sqlite3 structure.
+# Load the database file db_file_name into a new ":memory:" Database
+# session, returned byref as db_mem_ret[0] (open, close it when finished).
+# Returns 1 on success or -1 on an error.
+def db_snapshot_load(db_file_name, db_mem_ret, pages_per_step=-1):
+    db_mem = Database(":memory:")
+    return_code = db_mem.open()
+    if return_code != SQLITE_OK:
+        db_error(db_mem.id_lib_sql3, db_mem.p_db, return_code, "Can't open database")  # DEBUG
+        return -1
+    if db_backup(db_file_name, db_mem, pages_per_step) != 1:
+        db_mem.close()
+        return -1
+    db_mem_ret.insert(0, db_mem)
+    return 1
+## END Function
 
-    # sqlite3_stmt *p_stmt;  # structure represents a single SQL statement
-    p_stmt = ozz_sql3.p_sqlite3_stmt()  # Get the sqlite3_stmt structure.
+# Save the ":memory:" session db_mem to the database file db_file_name (the
+# file is replaced as a whole when the copy completes, readers of the file
+# see the old or the new database, never a part copy).
+# Returns 1 on success or -1 on an error.
+def db_snapshot_save(db_mem, db_file_name, pages_per_step=100, step_sleep_ms=0):
+    return db_backup(db_mem, db_file_name, pages_per_step, step_sleep_ms)
+## END Function
+
+# Save a ":memory:" session to its database file every interval seconds on a
+# background thread (see db_snapshot_save()), only if the memory database
+# has changed since the last save (total_changes() or the schema version).
+# stop() ends the thread and saves the last changes.
+# The sqlite3 library must be in serialized threading mode (the default) as
+# the thread steps the backup on the db_mem connection.
+class SnapshotCheckpoint:
+    def __init__(self, db_mem, db_file_name, interval=60.0, pages_per_step=100, step_sleep_ms=0):
+        self.db_mem = db_mem
+        self.db_file_name = db_file_name
+        self.interval = interval
+        self.pages_per_step = pages_per_step
+        self.step_sleep_ms = step_sleep_ms
+        self.lock = threading.Lock()  # One save at a time.
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.saved_version = None  # (total_changes, schema_version) of the last save.
+        self.saves = 0
+        self.skips = 0
+        self.return_code = 1  # Of the last save.
+
+    # (total_changes(), schema_version) of the memory connection. A separate
+    # statement is used, the session statement cache belongs to the caller's thread.
+    def version(self):
+        id_lib_sql3 = self.db_mem.id_lib_sql3
+        p_stmt = ozz_sql3.p_sqlite3_stmt()
+        version = None
+        return_code = ozz_sql3.sqlite3_prepare_v2(id_lib_sql3, self.db_mem.p_db, \
+            "SELECT total_changes(), (SELECT schema_version FROM pragma_schema_version);", -1, p_stmt, None)
+        if return_code == SQLITE_OK and ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt) == SQLITE_ROW:
+            version = (ozz_sql3.sqlite3_column_int64(id_lib_sql3, p_stmt, 0), ozz_sql3.sqlite3_column_int64(id_lib_sql3, p_stmt, 1))
+        ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt)
+        return version
+
+    # Save now if there are changes. Returns 1 on success (or nothing to save)
+    # or -1 on an error.
+    def checkpoint(self):
+        with self.lock:
+            version = self.version()
+            if version is not None and version == self.saved_version:
+                self.skips += 1
+                return 1
+            self.return_code = db_snapshot_save(self.db_mem, self.db_file_name, self.pages_per_step, self.step_sleep_ms)
+            if self.return_code == 1:
+                self.saved_version = version
+                self.saves += 1
+            return self.return_code
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.checkpoint()
+        return None
+
+    def start(self):
+        if self.thread is None:
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+        return None
+
+    # Stop the thread and (with save=True) save the last changes.
+    # Returns the return of the last save.
+    def stop(self, save=True):
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+        if save == True:
+            self.checkpoint()
+        return self.return_code
+## END Class
+
+
+## ====>> Query plan advisor
+# A search on a column with no index has to read (SCAN) every row of the
+# table. db_search_table_rowdata_byfield() and _byfield_bind() add each search
+# to the search_predicates log, and the functions below use EXPLAIN QUERY PLAN
+# to find the searches that scan the table and advise (or create) an index.
+#
+# index_sql = []
+# db_index_advice(db, "Hrs_worked_Tracker", ["Name"], index_sql)  # One search.
+# db_index_recommend(db, index_sql)  # All logged searches on the database.
+#
+# An index makes each search a B-tree lookup but uses disk space and adds work
+# to every INSERT, UPDATE and DELETE of the table, so only index the columns
+# that are searched often.
+
+# (database file name, table, (field name, ...)) : number of searches.
+# Names are logged as given (without "quotes"), so use the same letter case
+# for a name in each search.
+search_predicates = collections.Counter()
+
+# Log a search with field = value for each of field_names.
+def db_log_search_predicate(db, db_table_name, field_names):
+    search_predicates[(db.file_name, db_table_name, tuple([field_name.strip('"') for field_name in field_names]))] += 1
+    return None
+
+# Run EXPLAIN QUERY PLAN for sql_query (one SQL statement, ? parameters are
+# not bound) and return byref the plan rows (id, parent, detail) in query_plan_ret.
+# ie. (3, 0, "SCAN Hrs_worked_Tracker") or
+# (3, 0, "SEARCH Hrs_worked_Tracker USING INDEX ozz_idx_Name (Name=?)")
+# Returns 1 on success or -1 on an error.
+def db_explain_query_plan(db_file_name, sql_query, query_plan_ret):
+
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given.
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
+
+    p_stmt = ozz_sql3.p_sqlite3_stmt()
+    pzTail = None
+
+    return_code = db_session_open(db, SQLITE_OPEN_READONLY)
+    if return_code != SQLITE_OK:
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    return_code = ozz_sql3.sqlite3_prepare_v2(id_lib_sql3, p_db, "EXPLAIN QUERY PLAN " + sql_query, -1, p_stmt, pzTail)
+    if return_code != SQLITE_OK:
+        db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
+        ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt)
+        db_session_close(db)
+        return -1
+
+    # Columns: id, parent, notused, detail
+    row_decoder = ozz_sql3.RowDecoder(id_lib_sql3, p_stmt, 4)
+    return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)
+    while return_code == SQLITE_ROW:
+        plan_row = row_decoder.decode()
+        query_plan_ret.append((plan_row[0], plan_row[1], plan_row[3]))
+        return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)
+        ## END while
+
+    err_ret = 1
+    if return_code != SQLITE_DONE:
+        db_error(id_lib_sql3, p_db, return_code, "Step failed")  # DEBUG
+        err_ret = -1
+
+    ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt)
+
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
+    if return_code != SQLITE_OK:
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        return -1
+
+    return err_ret
+## END Function
+
+# True if a query plan reads every row of db_table_name ("SCAN table", or
+# "SCAN TABLE table" before SQLite 3.36). A "SCAN table USING COVERING INDEX"
+# also reads the whole index.
+def query_plan_scans_table(query_plan, db_table_name):
+    for plan_id, plan_parent, plan_detail in query_plan:
+        plan_words = plan_detail.split()
+        if len(plan_words) > 1 and plan_words[0] == "SCAN":
+            if plan_words[1] == "TABLE" and len(plan_words) > 2:
+                plan_words.pop(1)
+            if plan_words[1].strip('"').lower() == db_table_name.lower():
+                return True
+    return False
+
+# CREATE INDEX statement for the field names (in the given order) of a table.
+def index_create_sql(db_table_name, field_names):
+    index_name = "ozz_idx_" + "_".join([db_table_name] + list(field_names))
+    index_name = "".join([c if c.isalnum() else "_" for c in index_name])
+    return "CREATE INDEX IF NOT EXISTS " + index_name + " ON " + db_table_name \
+        + "(" + ", ".join(["\"" + field_name + "\"" for field_name in field_names]) + ");"
+
+# Check the query plan of the search "WHERE field1 = ? AND field2 = ? ..." as
+# used by db_search_table_rowdata_byfield(). If the search scans the table the
+# CREATE INDEX statement for an index on field_names is returned byref in
+# index_sql_ret, and with create_index=True the index is also created.
+# Nothing is returned in index_sql_ret if the search already uses an index.
+# Returns 1 on success, 0 if the index could not be created or -1 on an error.
+def db_index_advice(db_file_name, db_table_name, field_names, index_sql_ret, create_index=False):
+
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
+
+    # Read only unless the index is created, so advice also works for a read
+    # only file.
+    if create_index == True:
+        return_code = db_session_open(db, SQLITE_OPEN_READWRITE)
+    else:
+        return_code = db_session_open(db, SQLITE_OPEN_READONLY)
+    if return_code != SQLITE_OK:
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    sql_concat = "SELECT rowid, * FROM " + db_table_name + " WHERE " \
+        + " AND ".join(["\"" + field_name + "\" = ?" for field_name in field_names]) + ";"
+    query_plan = []
+    with db_session_keep(db):
+        err_ret = db_explain_query_plan(db, sql_concat, query_plan)
+
+    if err_ret == 1 and query_plan_scans_table(query_plan, db_table_name) == True:
+        index_sql = index_create_sql(db_table_name, field_names)
+        index_sql_ret.append(index_sql)
+        if create_index == True:
+            return_code = db_execute(db, index_sql)
+            if return_code != SQLITE_OK:
+                db_error(id_lib_sql3, p_db, return_code, "Failed to create index")  # DEBUG
+                err_ret = 0
+            else:
+                if db_reporting:
+                    db_log.info("Created index: " + index_sql)  # DEBUG
+
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
+    if return_code != SQLITE_OK:
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        return -1
+
+    return err_ret
+## END Function
+
+# Recommend indexes for the searches in the search_predicates log for this
+# database that were made at least min_searches times and scan their table.
+# The fields of a composite index are ordered with the most searched field
+# first, and searches on the leading fields of a longer index that is already
+# recommended are covered by it (ie. an index on (Name, Week) also serves
+# searches on Name only), so one composite index can serve several searches.
+# The CREATE INDEX statements are returned byref in index_sql_ret, and with
+# create_indexes=True the indexes are also created.
+# Returns 1 on success, 0 if an index could not be created or -1 on an error.
+def db_index_recommend(db_file_name, index_sql_ret, min_searches=1, create_indexes=False):
+
+    db = db_session(db_file_name)
+
+    # Searches and field counts for each table in this database.
+    table_searches = {}  # table : {(field, ...) : searches}
+    field_searches = collections.Counter()  # (table, field) : searches
+    for (file_name, db_table_name, field_names), cnt_search in list(search_predicates.items()):
+        if file_name != db.file_name:
+            continue
+        table_searches.setdefault(db_table_name, {})[field_names] = cnt_search
+        for field_name in field_names:
+            field_searches[(db_table_name, field_name)] += cnt_search
+
+    # Read only unless the indexes are created (see db_index_advice()).
+    if create_indexes == True:
+        return_code = db_session_open(db, SQLITE_OPEN_READWRITE)
+    else:
+        return_code = db_session_open(db, SQLITE_OPEN_READONLY)
+    if return_code != SQLITE_OK:
+        db_error(db.id_lib_sql3, db.p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    err_ret = 1
+    for db_table_name, searches in table_searches.items():
+        candidates = []
+        for field_names, cnt_search in searches.items():
+            if cnt_search >= min_searches:
+                field_names = sorted(field_names, key=lambda field_name: (-field_searches[(db_table_name, field_name)], field_name))
+                candidates.append((field_names, cnt_search))
+        # Longest first, so shorter searches can use the leading fields.
+        candidates.sort(key=lambda candidate: (-len(candidate[0]), -candidate[1]))
+
+        recommended = []
+        for field_names, cnt_search in candidates:
+            if any([index_fields[:len(field_names)] == field_names for index_fields in recommended]):
+                continue
+            index_sql = []
+            with db_session_keep(db):
+                return_code = db_index_advice(db, db_table_name, field_names, index_sql, create_indexes)
+            if return_code != 1:
+                err_ret = return_code
+                if return_code == -1:
+                    break
+            if len(index_sql) > 0:
+                recommended.append(field_names)
+                index_sql_ret.extend(index_sql)
+                if db_reporting:
+                    db_log.info(str(cnt_search) + " searches on " + db_table_name + "(" + ", ".join(field_names) + ") scan the table.")  # DEBUG
+        if err_ret == -1:
+            break
+
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
+    if return_code != SQLITE_OK:
+        db_error(db.id_lib_sql3, db.p_db, return_code, "Failed to close database")  # DEBUG
+        return -1
+
+    return err_ret
+## END Function
+
+
+# Get number of columns in a TableName.
+def db_get_table_number_cols(db_file_name, db_table_name, number_cols_ret):
+
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given. The session holds the loaded sqlite3
+    # shared library and the sqlite3 *p_db database handle (structure).
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
+
+    # sqlite3_stmt *p_stmt;  # structure represents a single SQL statement
+    p_stmt = ozz_sql3.p_sqlite3_stmt()  # Get the sqlite3_stmt structure.
 
     return_code = 0
     col_cnt = 0
 
-    p_zVfs = None  # can use NULL = None
     pzTail = None
     NULL = None
 
-    return_code = ozz_sql3.sqlite3_open_v2( id_lib_sql3, db_file_name, p_db, SQLITE_OPEN_READONLY, p_zVfs )
+    return_code = db_session_open(db, SQLITE_OPEN_READONLY)
     if return_code != SQLITE_OK:
         # Note: these print returns can be commented out if only the Bool return 0; is required.
-        print("Can't open database: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
         return -1
 
-    # There are other methods to do this, so this statement can be revised.
-    db_col_search = "PRAGMA table_info('" + db_table_name + "');"  # Don't use long table name max[128 - 22]
+    # db_col_search = "SELECT COUNT(*) FROM pragma_table_info(\"" + db_table_name + "\");"
+    # The column names are read from PRAGMA table_info once and kept in the
+    # session schema cache until the schema is changed (see ozz_sql3.SchemaCache).
+    db_tbl_col_name = db.schema_cache.column_names(db_table_name)
+    if db_tbl_col_name is None:
+        if db.schema_cache.table_exists(db_table_name) != 0:
+            db_fail("Failed to read the schema: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db))  # DEBUG
+            db_session_close(db)
+            return -1
+        db_tbl_col_name = []  # A table that does not exist has no columns.
 
-    # We can only send one query at a time to sqlite3.
-    return_code = ozz_sql3.sqlite3_prepare_v2(id_lib_sql3, p_db, db_col_search, -1, p_stmt, pzTail)
-    # On success, sqlite3_prepare_v2 returns SQLITE_OK; otherwise an error code
-    # is returned.
+    col_cnt = len(db_tbl_col_name)
+    # insert the return into element[0]
+    number_cols_ret.insert(0, col_cnt)  # Our table count by reference.
+
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
     if return_code != SQLITE_OK:
-        # This is error handling code for the sqlite3_prepare_v2 function call.
-        print("Failed to prepare data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        # This is error handling code. NOTE! As p_db is closed the error code may not be available!
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
         return -1
 
-    col_cnt = 0  # Count number of columns.
+    if db_reporting:
+        db_log.info("Successfully retrieved table column number from " + db.file_name)  # DEBUG
 
-    # The sqlite3_step runs the SQL statement. SQLITE_ROW return code indicates
-    # that there is another row ready. Our SQL statement returns only one row
-    # of data at a time.
-    # If we are writing or reading multiple lines of table then we will need to
-    # use sqlite3_step() in a loop until end of SQLITE_ROW or SQLITE_DONE.
-    while ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt) != SQLITE_DONE:
+    return 1
+## END Function
 
-        # To handle the return of NULL pointers as a string
-        # data = (const char*)sqlite3_column_text( stmt, i );
-        #        printf( "%s\n", data ? data : "[NULL]" );
-        #        sprintf(buffer[strlen(data)], "%s\n", data ? data : "[NULL]" );
 
-        # insert the return into element[col_cnt] | Our table count by reference as list.
-        db_tbl_col_name.insert(col_cnt, ozz_sql3.sqlite3_column_text(id_lib_sql3, p_stmt, 1))
-        col_cnt += 1
+# Get the column names as 2D array from a named table.
+def db_get_table_colnames(db_file_name, db_table_name, db_tbl_col_name):
 
-    #sqlite3_bind_*()  # After sqlit3_prepare_v2()
-    #sqlite3_clear_bindings(stmt);
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given. The session holds the loaded sqlite3
+    # shared library and the sqlite3 *p_db database handle (structure).
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
 
-    # The sqlite3_finalize function destroys the prepared statement object.
-    # The sqlite3_finalize function destroys the prepared statement object.
-    return_code = ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt )  # Commit to the database.
-    if return_code != SQLITE_OK:  # SQLITE_OK==0
-        # This is error handling code.
-        print("Failed to finalize data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+    # sqlite3_stmt *p_stmt;  # structure represents a single SQL statement
+    p_stmt = ozz_sql3.p_sqlite3_stmt()  # Get the sqlite3_stmt structure.
+
+    return_code = 0
+    col_cnt = 0
+
+    pzTail = None
+    NULL = None
+
+    return_code = db_session_open(db, SQLITE_OPEN_READONLY)
+    if return_code != SQLITE_OK:
+        # Note: these print returns can be commented out if only the Bool return 0; is required.
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
         return -1
 
-    # The sqlite3_close function closes the database connection.
-    return_code = ozz_sql3.sqlite3_close(id_lib_sql3, p_db)   # SQLITE_OK==0
+    # There are other methods to do this, so this statement can be revised.
+    # db_col_search = "PRAGMA table_info('" + db_table_name + "');"
+    # The column names are read with PRAGMA table_info once and kept in the
+    # session schema cache until the schema is changed (see ozz_sql3.SchemaCache).
+    db_schema_col_names = db.schema_cache.column_names(db_table_name)
+    if db_schema_col_names is None:
+        if db.schema_cache.table_exists(db_table_name) != 0:
+            db_fail("Failed to read the schema: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)))  # DEBUG
+            db_session_close(db)
+            return -1
+        db_schema_col_names = []  # A table that does not exist has no columns.
+
+    col_cnt = 0  # Count number of columns.
+    for col_name in db_schema_col_names:
+        # insert the return into element[col_cnt] | Our table count by reference as list.
+        db_tbl_col_name.insert(col_cnt, col_name)
+        col_cnt += 1
+
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
     if return_code != SQLITE_OK:
         # This is error handling code. NOTE! As p_db is closed the error code may not be available!
-        print("Failed to close database: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
         return -1
 
-    print("Successfully retrieved table column names from " + db_file_name, file=sys.stderr)  # DEBUG
+    if db_reporting:
+        db_log.info("Successfully retrieved table column names from " + db.file_name)  # DEBUG
 
     return 1
 ## END Function
@@ -1260,30 +2248,26 @@ def db_get_table_colnames(db_file_name, db_table_name, db_tbl_col_name):
 # in this table.
 def db_insert_table_rowdata(db_file_name, db_tbl_entry): # add insert at row_id
 
-    # Get the path to the SQLite3 shared library file (dll/so).
-    f_library_sql3 = ozz_sql3.get_libsql3_path()  # Get the path for sqlite.dll/so
-
-    # Load the sqlite3 shared library. The returned ID from loading the sqlite
-    # shared library must be passed to other functions.
-    id_lib_sql3  = ozz_sql3.load_libsql3(f_library_sql3)
-
-    # sqlite3 *p_db;  # database handle (structure).
-    p_db = ozz_sql3.p_sqlite3()  # Get the sqlite3 structure.
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given. The session holds the loaded sqlite3
+    # shared library and the sqlite3 *p_db database handle (structure).
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
 
     # sqlite3_stmt *p_stmt;  # structure represents a single SQL statement
     p_stmt = ozz_sql3.p_sqlite3_stmt()  # Get the sqlite3_stmt structure.
 
     return_code = 0
 
-    p_zVfs = None  # can use NULL = None
     pzTail = None
     NULL = None
 
-    return_code = ozz_sql3.sqlite3_open_v2( id_lib_sql3, db_file_name, p_db, SQLITE_OPEN_READWRITE, p_zVfs )
+    return_code = db_session_open(db, SQLITE_OPEN_READWRITE)
     if return_code != SQLITE_OK:
         # Note: these print returns can be commented out if only the Bool return 0; is required.
-        print("Can't open database: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
         return -1
 
     # In this function I am supplying to full query statement to the function.
@@ -1295,8 +2279,8 @@ def db_insert_table_rowdata(db_file_name, db_tbl_entry): # add insert at row_id
     # is returned.
     if return_code != SQLITE_OK:
         # This is error handling code for the sqlite3_prepare_v2 function call.
-        print("Failed to prepare data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
+        db_session_close(db)
         return -1
 
     # The sqlite3_step runs the SQL statement. SQLITE_ROW return code indicates
@@ -1306,9 +2290,12 @@ def db_insert_table_rowdata(db_file_name, db_tbl_entry): # add insert at row_id
     # use sqlite3_step() in a loop until end of SQLITE_ROW or SQLITE_DONE.
     return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt);  # run once for one statement
     #    while( sqlite3_step( stmt ) == SQLITE_ROW ) {;}
+    # Drop the cached results of the table (see db_result_cache_enable()).
+    db_result_cache_invalidate_sql(db, db_tbl_entry)
     if return_code != SQLITE_DONE:  # SQLITE_DONE==101, SQLITE_ROW==100
-        fprintf(stderr, "Step failed: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Step failed")  # DEBUG
+        ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt)
+        db_session_close(db)
         return 0
 
     #sqlite3_bind_*()  # After sqlit3_prepare_v2()
@@ -1318,45 +2305,164 @@ def db_insert_table_rowdata(db_file_name, db_tbl_entry): # add insert at row_id
     return_code = ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt )  # Commit to the database.
     if return_code != SQLITE_OK:  # SQLITE_OK==0
         # This is error handling code.
-        print("Failed to finalize data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to finalize data")  # DEBUG
+        db_session_close(db)
         return -1
 
-    # The sqlite3_close function closes the database connection.
-    return_code = ozz_sql3.sqlite3_close(id_lib_sql3, p_db)   # SQLITE_OK==0
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
     if return_code != SQLITE_OK:
         # This is error handling code. NOTE! As p_db is closed the error code may not be available!
-        print("Failed to close database: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
         return -1
 
-    print( "Successfully inserted rowdata into table in " + db_file_name, file=sys.stderr)  # DEBUG
+    if db_reporting:
+        db_log.info("Successfully inserted rowdata into table in " + db.file_name)  # DEBUG
 
     return 1
 ## END Function
 
 
+# Insert many rows into a named table (executemany style).
+# db_rows is a list (or any iterable) of tuples of Python values, one value for
+# each of the field names in db_field_names, ie.
+# db_field_names = "Item, Quantity"
+# db_rows = [("Apples", 3), ("Pears", 5), ...]
+# If db_field_names is "" the values must be for every column of the table.
+# One INSERT statement is prepared and each row is bound to its ? parameters.
+# The rows are written in transactions of batch_size rows, so the database
+# file is synced once per batch rather than once per row. If a row fails the
+# current batch is rolled back; batches already committed are kept.
+# If the session is already inside a transaction (BEGIN) the rows are written
+# as part of it and the caller does the COMMIT or ROLLBACK.
+# number_rows_ret (optional list) returns byref the number of rows committed.
+def db_insert_table_rows_bulk(db_file_name, db_table_name, db_field_names, db_rows, batch_size=1000, number_rows_ret=None):
+
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given.
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
+
+    return_code = 0
+    cnt_row = 0  # rows committed.
+    cnt_batch = 0  # rows in the current batch.
+    err_ret = 1
+
+    if batch_size < 1:
+        batch_size = 1
+
+    iter_rows = iter(db_rows)
+    first_row = next(iter_rows, None)
+    if first_row is None:  # Nothing to insert.
+        if number_rows_ret is not None:
+            number_rows_ret.insert(0, 0)
+        return 1
+
+    return_code = db_session_open(db, SQLITE_OPEN_READWRITE)
+    if return_code != SQLITE_OK:
+        # Note: these print returns can be commented out if only the Bool return 0; is required.
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    # "INSERT INTO Table (Item, Quantity) VALUES(?, ?);"
+    sql_concat = "INSERT INTO " + db_table_name
+    if db_field_names != "":
+        sql_concat = sql_concat + " (" + db_field_names + ")"
+    sql_concat = sql_concat + " VALUES(" + ", ".join(["?"] * len(first_row)) + ");"
+
+    return_code, p_stmt = db.stmt_cache.prepare(sql_concat)
+    if return_code != SQLITE_OK:
+        db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    # Only BEGIN/COMMIT our own transactions when not already inside one.
+    own_transaction = ozz_sql3.sqlite3_get_autocommit(id_lib_sql3, p_db) != 0
+
+    row = first_row
+    while row is not None:
+        if own_transaction == True and cnt_batch == 0:
+            # IMMEDIATE takes the write lock now rather than at the first INSERT.
+            return_code = db_execute(db, "BEGIN IMMEDIATE;")
+            if return_code != SQLITE_OK:
+                db_error(id_lib_sql3, p_db, return_code, "Failed to begin transaction")  # DEBUG
+                err_ret = -1
+                break
+
+        return_code = ozz_sql3.sqlite3_bind_params(id_lib_sql3, p_stmt, row)
+        if return_code == SQLITE_OK:
+            return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)
+        if return_code != SQLITE_DONE:  # SQLITE_DONE==101, SQLITE_ROW==100
+            db_error(id_lib_sql3, p_db, return_code, "Step failed")  # DEBUG
+            ozz_sql3.sqlite3_reset(id_lib_sql3, p_stmt)
+            if own_transaction == True:
+                db_execute(db, "ROLLBACK;")  # Discard this batch only.
+            err_ret = 0
+            break
+        ozz_sql3.sqlite3_reset(id_lib_sql3, p_stmt)  # Ready for the next row.
+        cnt_batch += 1
+
+        row = next(iter_rows, None)
+        if own_transaction == True and (cnt_batch == batch_size or row is None):
+            return_code = db_execute(db, "COMMIT;")
+            if return_code != SQLITE_OK:
+                db_error(id_lib_sql3, p_db, return_code, "Failed to commit transaction")  # DEBUG
+                db_execute(db, "ROLLBACK;")
+                err_ret = 0
+                break
+            cnt_row += cnt_batch
+            cnt_batch = 0
+        ## END while
+
+    # Drop the cached results of the table (see db_result_cache_enable()).
+    db_result_cache_invalidate(db, db_table_name)
+
+    if own_transaction == False:  # Rows are committed by the caller.
+        cnt_row = cnt_batch
+
+    # Return byref the number of rows committed.
+    if number_rows_ret is not None:
+        number_rows_ret.insert(0, cnt_row)
+
+    # Reset the statement for reuse (in place of sqlite3_finalize).
+    db.stmt_cache.release(p_stmt)
+
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
+    if return_code != SQLITE_OK:
+        # This is error handling code. NOTE! As p_db is closed the error code may not be available!
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    if err_ret == 1:
+        if db_reporting:
+            db_log.info("Successfully inserted " + str(cnt_row) + " rows into table in " + db.file_name)  # DEBUG
+
+    return err_ret
+## END Function
+
+
 # Delete the row data searched by name matching etc.
 # ## Only for tables where all field types are TEXT (String) except rowid. ##
 # This function is dangerous and needs to be revised!!!!
 def db_delete_table_rowdata(db_file_name, sql_search_entry): # add delete at row_id
 
-    # Get the path to the SQLite3 shared library file (dll/so).
-    f_library_sql3 = ozz_sql3.get_libsql3_path()  # Get the path for sqlite.dll/so
-
-    # Load the sqlite3 shared library. The returned ID from loading the sqlite
-    # shared library must be passed to other functions.
-    id_lib_sql3  = ozz_sql3.load_libsql3(f_library_sql3)
-
-    # sqlite3 *p_db;  # database handle (structure).
-    p_db = ozz_sql3.p_sqlite3()  # Get the sqlite3 structure.
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given. The session holds the loaded sqlite3
+    # shared library and the sqlite3 *p_db database handle (structure).
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
 
     # sqlite3_stmt *p_stmt;  # structure represents a single SQL statement
     p_stmt = ozz_sql3.p_sqlite3_stmt()  # Get the sqlite3_stmt structure.
 
     return_code = 0
 
-    p_zVfs = None  # can use NULL = None
     pzTail = None
     NULL = None
 
@@ -1364,14 +2470,14 @@ def db_delete_table_rowdata(db_file_name, sql_search_entry): # add delete at row
     print(db_delete_table_rowdata, end='')
     choose = input()
     if (choose != 'y') or (choose != 'Y'):
-        print("Delete operation cancelled by user.", file=sys.stderr)  # DEBUG
+        db_fail("Delete operation cancelled by user.")  # DEBUG
         return 0
 
-    return_code = ozz_sql3.sqlite3_open_v2( id_lib_sql3, db_file_name, p_db, SQLITE_OPEN_READWRITE, p_zVfs )
+    return_code = db_session_open(db, SQLITE_OPEN_READWRITE)
     if return_code != SQLITE_OK:
         # Note: these print returns can be commented out if only the Bool return 0; is required.
-        print("Can't open database: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
         return -1
 
     # We can only send one query at a time to sqlite3.
@@ -1380,8 +2486,8 @@ def db_delete_table_rowdata(db_file_name, sql_search_entry): # add delete at row
     # is returned.
     if return_code != SQLITE_OK:
         # This is error handling code for the sqlite3_prepare_v2 function call.
-        print("Failed to prepare data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
+        db_session_close(db)
         return -1
 
     # The sqlite3_step runs the SQL statement. SQLITE_ROW return code indicates
@@ -1391,9 +2497,12 @@ def db_delete_table_rowdata(db_file_name, sql_search_entry): # add delete at row
     # use sqlite3_step() in a loop until end of SQLITE_ROW or SQLITE_DONE.
     return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)  # run once for one statement
     #    while( sqlite3_step( stmt ) == SQLITE_ROW ) {;}
+    # Drop the cached results of the table (see db_result_cache_enable()).
+    db_result_cache_invalidate_sql(db, sql_search_entry)
     if return_code != SQLITE_DONE:  # SQLITE_DONE==101, SQLITE_ROW==100
-        print("Step failed: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Step failed")  # DEBUG
+        ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt)
+        db_session_close(db)
         return 0
 
     #sqlite3_bind_*()  # After sqlit3_prepare_v2()
@@ -1403,131 +2512,349 @@ def db_delete_table_rowdata(db_file_name, sql_search_entry): # add delete at row
     return_code = ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt )  # Commit to the database.
     if return_code != SQLITE_OK:  # SQLITE_OK==0
         # This is error handling code.
-        print("Failed to finalize data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to finalize data")  # DEBUG
+        db_session_close(db)
         return -1
 
-    # The sqlite3_close function closes the database connection.
-    return_code = ozz_sql3.sqlite3_close(id_lib_sql3, p_db)   # SQLITE_OK==0
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
     if return_code != SQLITE_OK:
         # This is error handling code. NOTE! As p_db is closed the error code may not be available!
-        print("Failed to close database: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
         return -1
 
-    print( "Successfully removed rowdata from table in " + db_file_name, file=sys.stderr)  # DEBUG
+    if db_reporting:
+        db_log.info("Successfully removed rowdata from table in " + db.file_name)  # DEBUG
 
     return 1
 ## END Function
 
 
 
-# List all data from a named table to a dynamic array.
-# ## Only for tables where all field types are TEXT (String) except rowid. ##
-def db_list_table_rows_data(db_file_name, db_table_name, db_tbl_rowdata, number_columns):
+# Iterate over all rows of a named table (generator).
+# Each row is yielded as a tuple (rowid, col1, col2, ...) as soon as
+# sqlite3_step() returns it, so only one row at a time is held in memory and
+# tables larger than RAM can be read in constant memory:
+# for row in example_sql3.iter_table_rows(db, "Hrs_worked_Tracker"):
+#     print(row)  # (1, '1', '34', 'Joe Blogs', ...)
+#
+# The values are Python types from the SQLite storage class (int, float,
+# str, bytes, None), or with as_text=True the sqlite3_column_text() string of
+# every column (None for NULL). See ozz_sql3.RowDecoder.
+# With named=True each row is a namedtuple of the column names, ie. row.rowid
+# Rows are read in rowid order in chunks of chunk_size rows with
+# "WHERE rowid >= last_rowid + 1 ORDER BY rowid LIMIT chunk_size" (keyset
+# pagination, rowid > last_rowid), ending after the largest possible rowid
+# (2**63 - 1, so last_rowid + 1 does not overflow). The statement is reset between chunks, which ends the read
+# transaction so that other connections can write to the database.
+# The generator uses its own prepared statement (not the statement cache), so
+# other db_* functions can be called on the same session while iterating.
+# return_code_ret (optional list) returns byref 1 when all rows have been
+# read or -1 on an error.
+def iter_table_rows(db_file_name, db_table_name, chunk_size=1000, as_text=False, return_code_ret=None, named=False):
+
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given. A transient session is closed when the
+    # iteration ends (or the generator is closed).
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
 
-    # Get the path to the SQLite3 shared library file (dll/so).
-    f_library_sql3 = ozz_sql3.get_libsql3_path()  # Get the path for sqlite.dll/so
+    p_stmt = ozz_sql3.p_sqlite3_stmt()  # Get the sqlite3_stmt structure.
+    pzTail = None
+    err_ret = -1
 
-    # Load the sqlite3 shared library. The returned ID from loading the sqlite
-    # shared library must be passed to other functions.
-    id_lib_sql3  = ozz_sql3.load_libsql3(f_library_sql3)
+    return_code = db_session_open(db, SQLITE_OPEN_READONLY)
+    if return_code != SQLITE_OK:
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
+        if return_code_ret is not None:
+            return_code_ret.insert(0, err_ret)
+        return
 
-    # sqlite3 *p_db;  # database handle (structure).
-    p_db = ozz_sql3.p_sqlite3()  # Get the sqlite3 structure.
+    # The first chunk starts from the lowest possible rowid.
+    next_rowid = -9223372036854775808
+    sql_concat = "SELECT rowid, * FROM " + db_table_name + " WHERE rowid >= ? ORDER BY rowid LIMIT ?;"
 
-    # sqlite3_stmt *p_stmt;  # structure represents a single SQL statement
-    p_stmt = ozz_sql3.p_sqlite3_stmt()  # Get the sqlite3_stmt structure.
+    try:
+        # Kept for the life of the generator, reused for every chunk.
+        return_code = ozz_sql3.sqlite3_prepare_v3(id_lib_sql3, p_db, sql_concat, -1, SQLITE_PREPARE_PERSISTENT, p_stmt, pzTail)
+        if return_code != SQLITE_OK:
+            db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
+            return
 
-    return_code = 0
+        row_decoder = ozz_sql3.RowDecoder(id_lib_sql3, p_stmt, None, named)
+        if as_text == True:
+            decode_row = row_decoder.decode_text
+        else:
+            decode_row = row_decoder.decode
+
+        while True:
+            ozz_sql3.sqlite3_reset(id_lib_sql3, p_stmt)
+            ozz_sql3.sqlite3_bind_params(id_lib_sql3, p_stmt, (next_rowid, chunk_size))
+
+            cnt_row = 0
+            return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)
+            while return_code == SQLITE_ROW:
+                row = decode_row()
+                last_rowid = ozz_sql3.sqlite3_column_int64(id_lib_sql3, p_stmt, 0)
+                cnt_row += 1
+                yield row
+                return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)
+                ## END while rows in chunk
+
+            if return_code != SQLITE_DONE:  # SQLITE_DONE==101, SQLITE_ROW==100
+                db_error(id_lib_sql3, p_db, return_code, "Step failed")  # DEBUG
+                return
+            if cnt_row < chunk_size:  # Last chunk.
+                break
+            if last_rowid == 9223372036854775807:  # No larger rowid.
+                break
+            next_rowid = last_rowid + 1
+            ## END while chunks
+        err_ret = 1
+    finally:
+        # The sqlite3_finalize function destroys the prepared statement object.
+        ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt)
+        # Close the database connection (only if it was opened for this call).
+        return_code = db_session_close(db)  # SQLITE_OK==0
+        if return_code != SQLITE_OK:
+            db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+            err_ret = -1
+        if return_code_ret is not None:
+            return_code_ret.insert(0, err_ret)
+    return
+## END Function
+
+
+# List all data from a named table to a dynamic array.
+# Each row is a comma separated string of the columns "rowid,col1,col2,..."
+# The rows are read with iter_table_rows(). Use iter_table_rows() directly for
+# large tables to process one row at a time rather than hold the whole table.
+# ## Only for tables where all field types are TEXT (String) except rowid. ##
+# (NULL fields are returned as an empty string.)
+# typed=True returns each row as a tuple of Python values (not a string).
+def db_list_table_rows_data(db_file_name, db_table_name, db_tbl_rowdata, number_columns, typed=False):
+
+    return_code_ret = []
+    cnt_row = 0  # array row.
 
     number_columns += 1  # We are also including an extra column for the row ID number.
 
-    p_zVfs = None  # can use NULL = None
-    pzTail = None
-    NULL = None
+    # Return the rows from the result cache if enabled (see db_result_cache_enable()).
+    result_cache = db_result_cache_read(db_file_name)
+    if result_cache is not None:
+        sql_concat = "SELECT rowid, * FROM " + db_table_name + ";"
+        rows = result_cache.get(sql_concat, (), (number_columns, typed))
+        if rows is not None:
+            for row in rows:
+                db_tbl_rowdata.insert(cnt_row, row)
+                cnt_row += 1
+            if db_reporting:
+                db_log.info("Successfully retrieved table data from " + db_session_file_name(db_file_name) + " (result cache)")  # DEBUG
+            return 1
+        generation = result_cache.generation
+
+    for row in iter_table_rows(db_file_name, db_table_name, 1000, not typed, return_code_ret):
+        if typed == True:
+            db_tbl_rowdata.insert(cnt_row, row[:number_columns])
+        else:
+            # Copy the full row to the list as "rowid,col1,col2,..."
+            db_tbl_rowdata.insert(cnt_row, ",".join(["" if value is None else value for value in row[:number_columns]]))
+        cnt_row += 1  # Next row...
 
-    return_code = ozz_sql3.sqlite3_open_v2( id_lib_sql3, db_file_name, p_db, SQLITE_OPEN_READONLY, p_zVfs )
-    if return_code != SQLITE_OK:
-        # Note: these print returns can be commented out if only the Bool return 0; is required.
-        print("Can't open database: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+    if return_code_ret[0] != 1:
         return -1
 
-    sql_concat = ""
+    if result_cache is not None:
+        result_cache.put(sql_concat, (), (number_columns, typed), (db_table_name,), db_tbl_rowdata[:cnt_row], generation)
 
-    # SELECT rowid, * FROM # To include table row ID number.
-    sql = "SELECT rowid, * FROM "   # Note the space after FROM
+    if isinstance(db_file_name, Database):
+        if db_reporting:
+            db_log.info("Successfully retrieved table data from " + db_file_name.file_name)  # DEBUG
+    else:
+        if db_reporting:
+            db_log.info("Successfully retrieved table data from " + db_file_name)  # DEBUG
 
-    sql_concat = sql_concat + sql  # Add SQL query statement.
-    sql_concat = sql_concat + db_table_name  # Add table name to statement.
-    # aka sql = "SELECT rowid, * FROM " + db_table_name
+    return 1
+## END Function
 
-    # char *p_db_table1 = "DROP TABLE IF EXISTS Hrs_worked_Tracker;";
-    #"create table aTable(field1 int); drop table aTable;
-    # We can only send one query at a time to sqlite3.
-    return_code = ozz_sql3.sqlite3_prepare_v2(id_lib_sql3, p_db, sql_concat, -1, p_stmt, pzTail)
-    # On success, sqlite3_prepare_v2 returns SQLITE_OK; otherwise an error code
-    # is returned.
+
+# Import a CSV file into a named table.
+# The first line of the CSV file is the field names. If the table does not
+# exist it is created with a TEXT column for each field name (create_table=True).
+# A "rowid" field name sets the rowid of each row (see export_csv()).
+# The file is read one line at a time with the csv module and passed as a
+# stream to db_insert_table_rows_bulk(), so one INSERT statement is prepared
+# and files much larger than memory can be imported. All rows (and the CREATE
+# TABLE) are written in one transaction; if any row fails nothing is imported.
+# Empty fields are imported as "" (empty TEXT); lines with fewer fields than
+# the header are padded with NULL.
+# number_rows_ret (optional list) returns byref the number of rows imported.
+# The rows per second are printed to stderr (DEBUG).
+# Returns 1 on success, 0 if the file could not be imported or -1 on an error.
+def import_csv(db_file_name, db_table_name, csv_file_name, create_table=True, number_rows_ret=None, csv_dialect="excel"):
+
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given.
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
+    err_ret = 1
+    rows_ret = []
+
+    t_start = time.perf_counter()
+    try:
+        f_csv = open(csv_file_name, "r", newline="", encoding="utf-8")
+    except OSError as err:
+        db_fail("Can't open file " + csv_file_name + ": " + str(err.strerror))  # DEBUG
+        return 0
+
+    with f_csv:
+        csv_reader = csv.reader(f_csv, csv_dialect)
+        db_field_list = next(csv_reader, None)
+        if db_field_list is None or len(db_field_list) == 0:
+            db_fail("No field names in " + csv_file_name)  # DEBUG
+            return 0
+        number_fields = len(db_field_list)
+
+        # Pad short lines and skip blank lines, one line at a time.
+        def csv_rows():
+            for row in csv_reader:
+                if len(row) == 0:
+                    continue
+                if len(row) < number_fields:
+                    row = row + [None] * (number_fields - len(row))
+                yield row
+
+        return_code = db_session_open(db, SQLITE_OPEN_READWRITE)
+        if return_code != SQLITE_OK:
+            # Note: these print returns can be commented out if only the Bool return 0; is required.
+            db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+            db_session_close(db)
+            return -1
+
+        # Only BEGIN/COMMIT our own transaction when not already inside one.
+        own_transaction = ozz_sql3.sqlite3_get_autocommit(id_lib_sql3, p_db) != 0
+        if own_transaction == True:
+            return_code = db_execute(db, "BEGIN IMMEDIATE;")
+            if return_code != SQLITE_OK:
+                db_error(id_lib_sql3, p_db, return_code, "Failed to begin transaction")  # DEBUG
+                db_session_close(db)
+                return -1
+
+        db_field_names = ", ".join(["\"" + field_name.replace('"', '""') + "\"" for field_name in db_field_list])
+        if db.schema_cache.table_exists(db_table_name) != 1:
+            if create_table == True:
+                # The rowid is not a column of the table.
+                sql_concat = "CREATE TABLE " + db_table_name + " (" + ", ".join(["\"" + field_name.replace('"', '""') + "\" TEXT" \
+                    for field_name in db_field_list if field_name.lower() != "rowid"]) + ");"
+                return_code = db_execute(db, sql_concat)
+            else:
+                return_code = SQLITE_ERROR
+            if return_code != SQLITE_OK:
+                db_fail("Table " + db_table_name + " does not exist and was not created: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code))  # DEBUG
+                err_ret = 0
+
+        if err_ret == 1:
+            with db_session_keep(db):
+                err_ret = db_insert_table_rows_bulk(db, db_table_name, db_field_names, csv_rows(), 1, rows_ret)
+            if err_ret != 1:
+                db_fail("Failed to import " + csv_file_name + " at line " + str(csv_reader.line_num))  # DEBUG
+
+        if own_transaction == True:
+            if err_ret == 1:
+                return_code = db_execute(db, "COMMIT;")
+                if return_code != SQLITE_OK:
+                    db_error(id_lib_sql3, p_db, return_code, "Failed to commit transaction")  # DEBUG
+                    err_ret = 0
+            if err_ret != 1:
+                db_execute(db, "ROLLBACK;")
+        ## END with f_csv
+
+    # Drop the cached results of the table (see db_result_cache_enable()).
+    db_result_cache_invalidate(db, db_table_name)
+
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
     if return_code != SQLITE_OK:
-        # This is error handling code for the sqlite3_prepare_v2 function call.
-        print("Failed to prepare data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        # This is error handling code. NOTE! As p_db is closed the error code may not be available!
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
         return -1
 
-    # The sqlite3_step runs the SQL statement. SQLITE_ROW return code indicates
-    # that there is another row ready. Our SQL statement returns only one row
-    # of data at a time, therefore, we call this function only once at a time.
-    # If we are writing or reading multiple lines of table then we will need to
-    # use sqlite3_step() in a loop until end of SQLITE_ROW or SQLITE_DONE.
+    if err_ret != 1:
+        return err_ret
 
-    cnt_row = 0  # array row.
-    cnt_col = 0
-    buffer1 = ""  # temp buffer [MAX 128 characters]
-    buffer2 = ""  # temp buffer [MAX 128 characters]
+    cnt_row = rows_ret[0]
+    if number_rows_ret is not None:
+        number_rows_ret.insert(0, cnt_row)
+    t_import = time.perf_counter() - t_start
+    if db_reporting:
+        db_log.info("Imported " + str(cnt_row) + " rows from " + csv_file_name + " in " + "{:.3f}".format(t_import) + " s (" \
+            + "{:.0f}".format(cnt_row / max(t_import, 1e-9)) + " rows/s)")  # DEBUG
 
-    while ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt) == SQLITE_ROW:
-        # Can use sqlite3_column_count(statement/stmt) in place of number_columns.
-        for cnt_col in range(number_columns):  # Count 0 to number_columns-1
-            # To handle the return of NULL pointers as a string.
-            # data = (const char*)sqlite3_column_text( stmt, cnt_col );
-            #        printf( "%s\n", data ? data : "[NULL]" );
-            #        sprintf(buffer[strlen(data)], "%s\n", data ? data : "[NULL]" );
-
-            # Copy each entry to a buffer. Each entry is a column.
-            buffer1 = ozz_sql3.sqlite3_column_text(id_lib_sql3, p_stmt, cnt_col)  # cnt_col == array column.
-
-            # Concatenate buffer1 to our buffer2.
-            buffer2 = buffer2 + buffer1  # buffer2 holds each row...
-            if cnt_col < number_columns -1: # Don't add ', ' after last column.
-                buffer2 = buffer2 + ","  # add separator token between each col.
-            else:  # Add line return, end of row.
-                pass  #strcat(p_db_tbl_rowdata[cnt_row], "\n");
-
-        db_tbl_rowdata.insert(cnt_row, buffer2)  # Copy the full row to the list.
-        buffer2 = ""  # Clear old row data from the buffer for next concatenate.
-        cnt_row += 1  # Next row...
+    return 1
+## END Function
 
-    #sqlite3_bind_*()  # After sqlit3_prepare_v2()
-    #sqlite3_clear_bindings(stmt);
 
-    # The sqlite3_finalize function destroys the prepared statement object.
-    return_code = ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt )  # Commit to the database.
-    if return_code != SQLITE_OK:  # SQLITE_OK==0
-        # This is error handling code.
-        print("Failed to finalize data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+# Export a named table to a CSV file.
+# The first line is the column names (with "rowid" first if include_rowid=True,
+# so that import_csv() keeps the same rowids), then one line for each row in
+# rowid order. NULL is written as an empty field.
+# The rows are read with iter_table_rows() and written in chunks of chunk_size
+# rows through a buffered file, so tables larger than memory can be exported.
+# number_rows_ret (optional list) returns byref the number of rows exported.
+# The rows per second are printed to stderr (DEBUG).
+# Returns 1 on success, 0 if the file could not be written or -1 on an error.
+def export_csv(db_file_name, db_table_name, csv_file_name, include_rowid=False, chunk_size=10000, number_rows_ret=None, csv_dialect="excel"):
+
+    db_tbl_col_name = []
+    return_code_ret = []
+    cnt_row = 0
+
+    t_start = time.perf_counter()
+    if db_get_table_colnames(db_file_name, db_table_name, db_tbl_col_name) != 1 or len(db_tbl_col_name) == 0:
+        db_fail("Table " + db_table_name + " not found.")  # DEBUG
         return -1
+    if include_rowid == True:
+        db_tbl_col_name.insert(0, "rowid")
+        first_col = 0
+    else:
+        first_col = 1  # iter_table_rows() rows start with the rowid.
 
-    # The sqlite3_close function closes the database connection.
-    return_code = ozz_sql3.sqlite3_close(id_lib_sql3, p_db)   # SQLITE_OK==0
-    if return_code != SQLITE_OK:
-        # This is error handling code. NOTE! As p_db is closed the error code may not be available!
-        print("Failed to close database: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+    try:
+        f_csv = open(csv_file_name, "w", newline="", encoding="utf-8", buffering=1048576)
+    except OSError as err:
+        db_fail("Can't open file " + csv_file_name + ": " + str(err.strerror))  # DEBUG
+        return 0
+
+    try:
+        with f_csv:
+            csv_writer = csv.writer(f_csv, csv_dialect)
+            csv_writer.writerow(db_tbl_col_name)
+            csv_chunk = []
+            for row in iter_table_rows(db_file_name, db_table_name, chunk_size, True, return_code_ret):
+                csv_chunk.append(row[first_col:])
+                if len(csv_chunk) == chunk_size:
+                    csv_writer.writerows(csv_chunk)
+                    cnt_row += len(csv_chunk)
+                    csv_chunk = []
+            csv_writer.writerows(csv_chunk)
+            cnt_row += len(csv_chunk)
+    except OSError as err:
+        db_fail("Failed to write " + csv_file_name + ": " + str(err.strerror))  # DEBUG
+        return 0
+
+    if len(return_code_ret) == 0 or return_code_ret[0] != 1:
         return -1
 
-    print("Successfully retrieved table data from " + db_file_name, file=sys.stderr)  # DEBUG
+    if number_rows_ret is not None:
+        number_rows_ret.insert(0, cnt_row)
+    t_export = time.perf_counter() - t_start
+    if db_reporting:
+        db_log.info("Exported " + str(cnt_row) + " rows to " + csv_file_name + " in " + "{:.3f}".format(t_export) + " s (" \
+            + "{:.0f}".format(cnt_row / max(t_export, 1e-9)) + " rows/s)")  # DEBUG
 
     return 1
 ## END Function
@@ -1536,15 +2863,12 @@ def db_list_table_rows_data(db_file_name, db_table_name, db_tbl_rowdata, number_
 # Test if rowid exist in a table.
 def db_table_rowid_exists(db_file_name, db_table_name, tbl_rowid):
 
-    # Get the path to the SQLite3 shared library file (dll/so).
-    f_library_sql3 = ozz_sql3.get_libsql3_path()  # Get the path for sqlite.dll/so
-
-    # Load the sqlite3 shared library. The returned ID from loading the sqlite
-    # shared library must be passed to other functions.
-    id_lib_sql3  = ozz_sql3.load_libsql3(f_library_sql3)
-
-    # sqlite3 *p_db;  # database handle (structure).
-    p_db = ozz_sql3.p_sqlite3()  # Get the sqlite3 structure.
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given. The session holds the loaded sqlite3
+    # shared library and the sqlite3 *p_db database handle (structure).
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
 
     # sqlite3_stmt *p_stmt;  # structure represents a single SQL statement
     p_stmt = ozz_sql3.p_sqlite3_stmt()  # Get the sqlite3_stmt structure.
@@ -1552,16 +2876,15 @@ def db_table_rowid_exists(db_file_name, db_table_name, tbl_rowid):
     return_code = 0
     err_ret = 0
 
-    p_zVfs = None  # can use NULL = None
     pzTail = None
     NULL = None
 
 
-    return_code = ozz_sql3.sqlite3_open_v2( id_lib_sql3, db_file_name, p_db, SQLITE_OPEN_READONLY, p_zVfs )
+    return_code = db_session_open(db, SQLITE_OPEN_READONLY)
     if return_code != SQLITE_OK:
         # Note: these print returns can be commented out if only the Bool return 0; is required.
-        print("Can't open database: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
         return -1
 
     sql_concat = ""  # temp buffer [MAX 128 characters]
@@ -1604,15 +2927,16 @@ def db_table_rowid_exists(db_file_name, db_table_name, tbl_rowid):
     # is returned.
     if return_code != SQLITE_OK:
         # This is error handling code for the sqlite3_prepare_v2 function call.
-        print("Failed to prepare data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
+        db_session_close(db)
         return -1
 
     return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)  # run once for one statement
     #    while( sqlite3_step( stmt ) == SQLITE_ROW ) {;}
     if return_code != SQLITE_ROW:  # SQLITE_DONE==101, SQLITE_ROW==100
-        print("Step failed: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Step failed")  # DEBUG
+        ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt)
+        db_session_close(db)
         return -1
 
     return_code = ozz_sql3.sqlite3_column_int(id_lib_sql3, p_stmt, 0)
@@ -1628,16 +2952,16 @@ def db_table_rowid_exists(db_file_name, db_table_name, tbl_rowid):
     return_code = ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt )  # Commit to the database.
     if return_code != SQLITE_OK:  # SQLITE_OK==0
         # This is error handling code.
-        print("Failed to finalize data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to finalize data")  # DEBUG
+        db_session_close(db)
         return -1
 
-    # The sqlite3_close function closes the database connection.
-    return_code = ozz_sql3.sqlite3_close(id_lib_sql3, p_db)   # SQLITE_OK==0
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
     if return_code != SQLITE_OK:
         # This is error handling code. NOTE! As p_db is closed the error code may not be available!
-        print("Failed to close database: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
         return -1
 
     return err_ret
@@ -1645,34 +2969,90 @@ def db_table_rowid_exists(db_file_name, db_table_name, tbl_rowid):
 ## END Function
 
 
+# Test if rowid exist in a table (bound parameter version).
+# The rowid is bound to a ? parameter rather than concatenated into the SQL
+# text, so the SQL is the same for every rowid. With a Database session the
+# statement is prepared once and reused from the statement cache by each call.
+def db_table_rowid_exists_bind(db_file_name, db_table_name, tbl_rowid):
+
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given.
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
+
+    return_code = 0
+    err_ret = 0
+
+    return_code = db_session_open(db, SQLITE_OPEN_READONLY)
+    if return_code != SQLITE_OK:
+        # Note: these print returns can be commented out if only the Bool return 0; is required.
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    sql_concat = "SELECT EXISTS(SELECT 1 FROM " + db_table_name + " WHERE rowid = ?);"
+
+    # Get the prepared statement from the cache (prepared on first use) and
+    # bind the values to the ? parameters.
+    return_code, p_stmt = db_prepare_bind(db, sql_concat, (tbl_rowid,))
+    if return_code != SQLITE_OK:
+        # This is error handling code for the prepare and bind function calls.
+        db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)  # run once for one statement
+    if return_code != SQLITE_ROW:  # SQLITE_DONE==101, SQLITE_ROW==100
+        db_error(id_lib_sql3, p_db, return_code, "Step failed")  # DEBUG
+        db.stmt_cache.release(p_stmt)
+        db_session_close(db)
+        return -1
+
+    if ozz_sql3.sqlite3_column_int(id_lib_sql3, p_stmt, 0) == 0:
+        err_ret = 0
+    else:  # ==1
+        err_ret = 1
+
+    # Reset the statement for reuse (in place of sqlite3_finalize).
+    db.stmt_cache.release(p_stmt)
+
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
+    if return_code != SQLITE_OK:
+        # This is error handling code. NOTE! As p_db is closed the error code may not be available!
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    return err_ret
+## END Function
+
+
 # delete row by "rowid"
 # Delete the row data by rowid.
 def db_delete_table_rowdata_rowid(db_file_name, db_table_name, sql_rowid):
 
-    # Get the path to the SQLite3 shared library file (dll/so).
-    f_library_sql3 = ozz_sql3.get_libsql3_path()  # Get the path for sqlite.dll/so
-
-    # Load the sqlite3 shared library. The returned ID from loading the sqlite
-    # shared library must be passed to other functions.
-    id_lib_sql3  = ozz_sql3.load_libsql3(f_library_sql3)
-
-    # sqlite3 *p_db;  # database handle (structure).
-    p_db = ozz_sql3.p_sqlite3()  # Get the sqlite3 structure.
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given. The session holds the loaded sqlite3
+    # shared library and the sqlite3 *p_db database handle (structure).
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
 
     # sqlite3_stmt *p_stmt;  # structure represents a single SQL statement
     p_stmt = ozz_sql3.p_sqlite3_stmt()  # Get the sqlite3_stmt structure.
 
     return_code = 0
 
-    p_zVfs = None  # can use NULL = None
     pzTail = None
     NULL = None
 
-    return_code = ozz_sql3.sqlite3_open_v2( id_lib_sql3, db_file_name, p_db, SQLITE_OPEN_READWRITE, p_zVfs )
+    return_code = db_session_open(db, SQLITE_OPEN_READWRITE)
     if return_code != SQLITE_OK:
         # Note: these print returns can be commented out if only the Bool return 0; is required.
-        print("Can't open database: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
         return -1
 
     #"DELETE FROM TableName WHERE rowid = n;"
@@ -1689,8 +3069,8 @@ def db_delete_table_rowdata_rowid(db_file_name, db_table_name, sql_rowid):
     # is returned.
     if return_code != SQLITE_OK:
         # This is error handling code for the sqlite3_prepare_v2 function call.
-        print("Failed to prepare data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
+        db_session_close(db)
         return -1
 
     # The sqlite3_step runs the SQL statement. SQLITE_ROW return code indicates
@@ -1700,9 +3080,12 @@ def db_delete_table_rowdata_rowid(db_file_name, db_table_name, sql_rowid):
     # use sqlite3_step() in a loop until end of SQLITE_ROW or SQLITE_DONE.
     return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt )  # run once for one statement
     #    while( sqlite3_step( stmt ) == SQLITE_ROW ) {;}
+    # Drop the cached results of the table (see db_result_cache_enable()).
+    db_result_cache_invalidate(db, db_table_name)
     if return_code != SQLITE_DONE:  # SQLITE_DONE==101, SQLITE_ROW==100
-        print("Step failed: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Step failed")  # DEBUG
+        ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt)
+        db_session_close(db)
         return 0
 
     #sqlite3_bind_*()  # After sqlit3_prepare_v2()
@@ -1712,19 +3095,20 @@ def db_delete_table_rowdata_rowid(db_file_name, db_table_name, sql_rowid):
     return_code = ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt )  # Commit to the database.
     if return_code != SQLITE_OK:  # SQLITE_OK==0
         # This is error handling code.
-        print("Failed to finalize data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to finalize data")  # DEBUG
+        db_session_close(db)
         return -1
 
-    # The sqlite3_close function closes the database connection.
-    return_code = ozz_sql3.sqlite3_close(id_lib_sql3, p_db)   # SQLITE_OK==0
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
     if return_code != SQLITE_OK:
         # This is error handling code. NOTE! As p_db is closed the error code may not be available!
-        print("Failed to close database: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
         return -1
 
-    print( "Successfully removed rowdata from table in " + db_file_name, file=sys.stderr)  # DEBUG
+    if db_reporting:
+        db_log.info("Successfully removed rowdata from table in " + db.file_name)  # DEBUG
 
     return 1
 ## END Function
@@ -1734,30 +3118,26 @@ def db_delete_table_rowdata_rowid(db_file_name, db_table_name, sql_rowid):
 # If the data already exists it will "overwrite" the row.
 def db_replace_table_rowdata_rowid(db_file_name, db_table_name, sql_rowid, db_field_names, db_field_values):
 
-    # Get the path to the SQLite3 shared library file (dll/so).
-    f_library_sql3 = ozz_sql3.get_libsql3_path()  # Get the path for sqlite.dll/so
-
-    # Load the sqlite3 shared library. The returned ID from loading the sqlite
-    # shared library must be passed to other functions.
-    id_lib_sql3  = ozz_sql3.load_libsql3(f_library_sql3)
-
-    # sqlite3 *p_db;  # database handle (structure).
-    p_db = ozz_sql3.p_sqlite3()  # Get the sqlite3 structure.
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given. The session holds the loaded sqlite3
+    # shared library and the sqlite3 *p_db database handle (structure).
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
 
     # sqlite3_stmt *p_stmt;  # structure represents a single SQL statement
     p_stmt = ozz_sql3.p_sqlite3_stmt()  # Get the sqlite3_stmt structure.
 
     return_code = 0
 
-    p_zVfs = None  # can use NULL = None
     pzTail = None
     NULL = None
 
-    return_code = ozz_sql3.sqlite3_open_v2( id_lib_sql3, db_file_name, p_db, SQLITE_OPEN_READWRITE, p_zVfs )
+    return_code = db_session_open(db, SQLITE_OPEN_READWRITE)
     if return_code != SQLITE_OK:
         # Note: these print returns can be commented out if only the Bool return 0; is required.
-        print("Can't open database: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
         return -1
 
     # "Week, Employee_ID, Name, Monday, Tuesday, Wednesday, Thursday, Friday";
@@ -1770,53 +3150,236 @@ def db_replace_table_rowdata_rowid(db_file_name, db_table_name, sql_rowid, db_fi
     sql4 = ", "
     sql5 = ");"
 
-    # Concatenate our query statement and data.
-    sql_concat = sql1 + db_table_name + sql2 + db_field_names + sql3 + str(sql_rowid) + sql4 + db_field_values + sql5
+    # Concatenate our query statement and data.
+    sql_concat = sql1 + db_table_name + sql2 + db_field_names + sql3 + str(sql_rowid) + sql4 + db_field_values + sql5
+
+    # We can only send one query at a time to sqlite3.
+    return_code = ozz_sql3.sqlite3_prepare_v2(id_lib_sql3, p_db, sql_concat, -1, p_stmt, pzTail)
+    # On success, sqlite3_prepare_v2 returns SQLITE_OK; otherwise an error code
+    # is returned.
+    if return_code != SQLITE_OK:
+        # This is error handling code for the sqlite3_prepare_v2 function call.
+        db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    # The sqlite3_step runs the SQL statement. SQLITE_ROW return code indicates
+    # that there is another row ready. Our SQL statement returns only one row
+    # of data at a time, therefore, we call this function only once at a time.
+    # If we are writing or reading multiple lines of table then we will need to
+    # use sqlite3_step() in a loop until end of SQLITE_ROW or SQLITE_DONE.
+    return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)  # run once for one statement
+    #    while( sqlite3_step( p_stmt ) == SQLITE_ROW ) {;}
+    # Drop the cached results of the table (see db_result_cache_enable()).
+    db_result_cache_invalidate(db, db_table_name)
+    if return_code != SQLITE_DONE:  # SQLITE_DONE==101, SQLITE_ROW==100
+        db_error(id_lib_sql3, p_db, return_code, "Step failed")  # DEBUG
+        ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt)
+        db_session_close(db)
+        return 0
+
+    #sqlite3_bind_*()  # After sqlit3_prepare_v2()
+    #sqlite3_clear_bindings(stmt);
+
+    # The sqlite3_finalize function destroys the prepared statement object.
+    return_code = ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt )  # Commit to the database.
+    if return_code != SQLITE_OK:  # SQLITE_OK==0
+        # This is error handling code.
+        db_error(id_lib_sql3, p_db, return_code, "Failed to finalize data")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
+    if return_code != SQLITE_OK:
+        # This is error handling code. NOTE! As p_db is closed the error code may not be available!
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    if db_reporting:
+        db_log.info("Successfully inserted rowdata into table in " + db.file_name)  # DEBUG
+
+    return 1
+## END Function
+
+
+# update/replace row data by rowid in a named table (bound parameter version).
+# db_field_values is a tuple of Python values, one for each of the field names
+# in db_field_names, ie. ("2", "36", "Bill Knight", "2", "3", "4", "5", "6")
+# The values are bound to ? parameters so no quoting is required and the
+# statement is reused from the session statement cache.
+def db_replace_table_rowdata_rowid_bind(db_file_name, db_table_name, sql_rowid, db_field_names, db_field_values):
+
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given.
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
+
+    return_code = 0
+
+    return_code = db_session_open(db, SQLITE_OPEN_READWRITE)
+    if return_code != SQLITE_OK:
+        # Note: these print returns can be commented out if only the Bool return 0; is required.
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    # "REPLACE INTO Table (rowid, Week, Employee_ID, ...) VALUES(?, ?, ?, ...);"
+    sql_concat = "REPLACE INTO " + db_table_name + " (rowid, " + db_field_names + ") VALUES(?" + ", ?" * len(db_field_values) + ");"
+
+    # Get the prepared statement from the cache (prepared on first use) and
+    # bind the values to the ? parameters.
+    return_code, p_stmt = db_prepare_bind(db, sql_concat, (sql_rowid,) + tuple(db_field_values))
+    if return_code != SQLITE_OK:
+        # This is error handling code for the prepare and bind function calls.
+        db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)  # run once for one statement
+    # Drop the cached results of the table (see db_result_cache_enable()).
+    db_result_cache_invalidate(db, db_table_name)
+    if return_code != SQLITE_DONE:  # SQLITE_DONE==101, SQLITE_ROW==100
+        db_error(id_lib_sql3, p_db, return_code, "Step failed")  # DEBUG
+        db.stmt_cache.release(p_stmt)
+        db_session_close(db)
+        return 0
+
+    # Reset the statement for reuse (in place of sqlite3_finalize).
+    db.stmt_cache.release(p_stmt)
+
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
+    if return_code != SQLITE_OK:
+        # This is error handling code. NOTE! As p_db is closed the error code may not be available!
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    if db_reporting:
+        db_log.info("Successfully inserted rowdata into table in " + db.file_name)  # DEBUG
+
+    return 1
+## END Function
+
+
+# Insert or update many rows by rowid in a named table (batched upsert).
+# db_rows is a list (or any iterable) of (rowid, values) pairs, where values is
+# a tuple of Python values, one for each of the field names in db_field_names:
+# db_field_names = "Week, Employee_ID, Name"
+# db_rows = [(2, ("2", "36", "Bill Knight")), (7, ("2", "12", "Ann Lee")), ...]
+# A row with a new rowid is inserted, an existing row has only the named fields
+# updated ("INSERT ... ON CONFLICT(rowid) DO UPDATE"), unlike REPLACE which
+# deletes the row and inserts it with NULL for the fields that are not named.
+# SQLite older than 3.24.0 has no upsert, and "INSERT OR REPLACE" is used.
+# One statement is prepared and all of the rows are written in one transaction;
+# if a row fails none of the rows are written. If the session is already inside
+# a transaction (BEGIN) the rows are written as part of it and the caller does
+# the COMMIT or ROLLBACK.
+# number_rows_ret (optional list) returns byref the number of rows written.
+def db_upsert_table_rows_rowid(db_file_name, db_table_name, db_field_names, db_rows, number_rows_ret=None):
+
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given.
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
+
+    return_code = 0
+    cnt_row = 0
+    err_ret = 1
+
+    iter_rows = iter(db_rows)
+    first_row = next(iter_rows, None)
+    if first_row is None:  # Nothing to write.
+        if number_rows_ret is not None:
+            number_rows_ret.insert(0, 0)
+        return 1
+
+    return_code = db_session_open(db, SQLITE_OPEN_READWRITE)
+    if return_code != SQLITE_OK:
+        # Note: these print returns can be commented out if only the Bool return 0; is required.
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    # "INSERT INTO Table (rowid, Week, Name) VALUES(?, ?, ?)
+    #  ON CONFLICT(rowid) DO UPDATE SET Week = excluded.Week, Name = excluded.Name;"
+    field_names = [field_name.strip() for field_name in db_field_names.split(",")]
+    sql_values = " (rowid, " + db_field_names + ") VALUES(?" + ", ?" * len(field_names) + ")"
+    if ozz_sql3.sqlite3_libversion_number(id_lib_sql3) >= 3024000:
+        sql_concat = "INSERT INTO " + db_table_name + sql_values + " ON CONFLICT(rowid) DO UPDATE SET " \
+            + ", ".join([field_name + " = excluded." + field_name for field_name in field_names]) + ";"
+    else:
+        sql_concat = "INSERT OR REPLACE INTO " + db_table_name + sql_values + ";"
 
-    # We can only send one query at a time to sqlite3.
-    return_code = ozz_sql3.sqlite3_prepare_v2(id_lib_sql3, p_db, sql_concat, -1, p_stmt, pzTail)
-    # On success, sqlite3_prepare_v2 returns SQLITE_OK; otherwise an error code
-    # is returned.
+    return_code, p_stmt = db.stmt_cache.prepare(sql_concat)
     if return_code != SQLITE_OK:
-        # This is error handling code for the sqlite3_prepare_v2 function call.
-        print("Failed to prepare data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
+        db_session_close(db)
         return -1
 
-    # The sqlite3_step runs the SQL statement. SQLITE_ROW return code indicates
-    # that there is another row ready. Our SQL statement returns only one row
-    # of data at a time, therefore, we call this function only once at a time.
-    # If we are writing or reading multiple lines of table then we will need to
-    # use sqlite3_step() in a loop until end of SQLITE_ROW or SQLITE_DONE.
-    return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)  # run once for one statement
-    #    while( sqlite3_step( p_stmt ) == SQLITE_ROW ) {;}
-    if return_code != SQLITE_DONE:  # SQLITE_DONE==101, SQLITE_ROW==100
-        fprintf(stderr, "Step failed: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
-        return 0
+    # Only BEGIN/COMMIT our own transaction when not already inside one.
+    own_transaction = ozz_sql3.sqlite3_get_autocommit(id_lib_sql3, p_db) != 0
+    if own_transaction == True:
+        # IMMEDIATE takes the write lock now rather than at the first INSERT.
+        return_code = db_execute(db, "BEGIN IMMEDIATE;")
+        if return_code != SQLITE_OK:
+            db_error(id_lib_sql3, p_db, return_code, "Failed to begin transaction")  # DEBUG
+            db.stmt_cache.release(p_stmt)
+            db_session_close(db)
+            return -1
 
-    #sqlite3_bind_*()  # After sqlit3_prepare_v2()
-    #sqlite3_clear_bindings(stmt);
+    row = first_row
+    while row is not None:
+        sql_rowid, db_field_values = row
+        return_code = ozz_sql3.sqlite3_bind_params(id_lib_sql3, p_stmt, (sql_rowid,) + tuple(db_field_values))
+        if return_code == SQLITE_OK:
+            return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)
+        ozz_sql3.sqlite3_reset(id_lib_sql3, p_stmt)  # Ready for the next row.
+        if return_code != SQLITE_DONE:  # SQLITE_DONE==101, SQLITE_ROW==100
+            db_error(id_lib_sql3, p_db, return_code, "Step failed at rowid " + str(sql_rowid))  # DEBUG
+            err_ret = 0
+            break
+        cnt_row += 1
+        row = next(iter_rows, None)
+        ## END while
 
-    # The sqlite3_finalize function destroys the prepared statement object.
-    return_code = ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt )  # Commit to the database.
-    if return_code != SQLITE_OK:  # SQLITE_OK==0
-        # This is error handling code.
-        print("Failed to finalize data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
-        return -1
+    if own_transaction == True:
+        if err_ret == 1:
+            return_code = db_execute(db, "COMMIT;")
+            if return_code != SQLITE_OK:
+                db_error(id_lib_sql3, p_db, return_code, "Failed to commit transaction")  # DEBUG
+                err_ret = 0
+        if err_ret != 1:
+            db_execute(db, "ROLLBACK;")  # Leave the table unchanged.
+            cnt_row = 0
 
-    # The sqlite3_close function closes the database connection.
-    return_code = ozz_sql3.sqlite3_close(id_lib_sql3, p_db)   # SQLITE_OK==0
+    # Drop the cached results of the table (see db_result_cache_enable()).
+    db_result_cache_invalidate(db, db_table_name)
+
+    # Return byref the number of rows written.
+    if number_rows_ret is not None:
+        number_rows_ret.insert(0, cnt_row)
+
+    # Reset the statement for reuse (in place of sqlite3_finalize).
+    db.stmt_cache.release(p_stmt)
+
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
     if return_code != SQLITE_OK:
         # This is error handling code. NOTE! As p_db is closed the error code may not be available!
-        print("Failed to close database: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
         return -1
 
-    print( "Successfully inserted rowdata into table in " + db_file_name, file=sys.stderr)  # DEBUG
+    if err_ret == 1:
+        if db_reporting:
+            db_log.info("Successfully upserted " + str(cnt_row) + " rows into table in " + db.file_name)  # DEBUG
 
-    return 1
+    return err_ret
 ## END Function
 
 
@@ -1847,22 +3410,18 @@ def db_replace_table_rowdata_rowid(db_file_name, db_table_name, sql_rowid, db_fi
 # Table unique index rowid is auto generated in this table.
 def db_insert_table_rowdata_rowid(db_file_name, db_table_name, sql_rowid, db_field_names, db_field_values, number_columns, number_rows):
 
-    # Get the path to the SQLite3 shared library file (dll/so).
-    f_library_sql3 = ozz_sql3.get_libsql3_path()  # Get the path for sqlite.dll/so
-
-    # Load the sqlite3 shared library. The returned ID from loading the sqlite
-    # shared library must be passed to other functions.
-    id_lib_sql3  = ozz_sql3.load_libsql3(f_library_sql3)
-
-    # sqlite3 *p_db;  # database handle (structure).
-    p_db = ozz_sql3.p_sqlite3()  # Get the sqlite3 structure.
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given. The session holds the loaded sqlite3
+    # shared library and the sqlite3 *p_db database handle (structure).
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
 
     # sqlite3_stmt *p_stmt;  # structure represents a single SQL statement
     p_stmt = ozz_sql3.p_sqlite3_stmt()  # Get the sqlite3_stmt structure.
 
     return_code = 0
 
-    p_zVfs = None  # can use NULL = None
     pzTail = None
     NULL = None
 
@@ -1879,49 +3438,47 @@ def db_insert_table_rowdata_rowid(db_file_name, db_table_name, sql_rowid, db_fie
     db_field_values_temp[0] = db_field_values  # Copy first (new row) to R/W buffer.
 
     sql_concat = ""  # temp buffer [MAX 512 characters]
-    rowid_buffer = 0  # convert int to char for statement concat.
 
-    return_code = ozz_sql3.sqlite3_open_v2( id_lib_sql3, db_file_name, p_db, SQLITE_OPEN_READWRITE, p_zVfs )
+    return_code = db_session_open(db, SQLITE_OPEN_READWRITE)
     if return_code != SQLITE_OK:
         # Note: these print returns can be commented out if only the Bool return 0; is required.
-        print("Can't open database: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
         return -1
 
+    # The SELECT and REPLACE statements are the same for every row with the
+    # rowid and values bound to ? parameters, so each is prepared only once
+    # and then reused from the session statement cache (db.stmt_cache).
+
     # Starts at rowid up to last row + 1. +2 alows for the '<' ie. +1
     while Count_Rows < number_rows +2:
 
 ##===================================================== Start step 1 read rowid
-        # rowid copy to string
-        rowid_buffer = str(sql_rowid) # convert int to str
 
         # The +1 at the end of the table is empty and will create a read error,
         # so we will skip this and go directly to writing the last +1 new line
         # directly from the buffer.
         if Count_Rows < number_rows +1:
-            sql_concat = ""  # Clear the buffer
             # "SELECT rowid, * FROM "  # Note that I am ignoring the rowid
             sql1 = "SELECT rowid, * FROM "  # Note the space after FROM
-            sql2 = " WHERE rowid =  "
+            sql2 = " WHERE rowid = ?"
             sql3 = ";"
 
             # Add SQL query statement, Add table name to statement, Add filter,
-            # This is the first replace rowid, Finish the sql statement.
-            sql_concat = sql1 + db_table_name + sql2 + rowid_buffer + sql3
+            # Finish the sql statement. The rowid is bound to the ? parameter.
+            sql_concat = sql1 + db_table_name + sql2 + sql3
 
-            # We can only send one query at a time to sqlite3.
-            return_code = ozz_sql3.sqlite3_prepare_v2(id_lib_sql3, p_db, sql_concat, -1, p_stmt, pzTail)
-            # On success, sqlite3_prepare_v2 returns SQLITE_OK; otherwise an error code
+            # Get the prepared statement from the cache (prepared on first use).
+            return_code, p_stmt = db.stmt_cache.prepare(sql_concat)
+            # On success, sqlite3_prepare_v3 returns SQLITE_OK; otherwise an error code
             # is returned.
             if return_code != SQLITE_OK:
-                # This is error handling code for the sqlite3_prepare_v2 function call.
-                print("Read, Failed to prepare data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-                ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+                # This is error handling code for the sqlite3_prepare_v3 function call.
+                db_error(id_lib_sql3, p_db, return_code, "Read, Failed to prepare data")  # DEBUG
+                db_session_close(db)
                 return -1
 
-            buffer = ""  # Clear the buffer for the next row.
-            # All of the data is collected in a single string with each column
-            # separated with the ',' delimiter.
+            ozz_sql3.sqlite3_bind_int64(id_lib_sql3, p_stmt, 1, sql_rowid)  # WHERE rowid = ?
 
             # ### This needs to be revised for error handling ###
             # I may need to change this to while (1) and
@@ -1935,34 +3492,15 @@ def db_insert_table_rowdata_rowid(db_file_name, db_table_name, sql_rowid, db_fie
 
                 W_Flag = 0  # Reset the wite flag if rowid has an entry.
 
-                #return_code = sqlite3_step(stmt);
-                #if (return_code == SQLITE_ROW)
-                #{
-                # Can use sqlite3_column_count(statement/stmt) in place of number_columns.
+                # The row values are kept as a list of text values to be bound
+                # to the REPLACE statement, rather than concatenated into the SQL.
                 # Changed to i = 1 to number_columns +1. The first rowid column is skipped.
+                row_values = []
                 for i in range(1, number_columns +1):  # Count 0 to number_columns-1
-
-                    # To handle the return of NULL pointers as a string
-                    # data = (const char*)sqlite3_column_text( stmt, i );
-                    #        printf( "%s\n", data ? data : "[NULL]" );
-                    #        sprintf(buffer[strlen(data)], "%s\n", data ? data : "[NULL]" );
-
-                    # copy (concat) each entry to a buffer. Each entry is a col.
-                    # This is a little different to the C and FB version. The buffer
-                    # is concatenated then copied as a row to the 2 element list.
-                    buffer = buffer + "\""
-                    buffer = buffer + ozz_sql3.sqlite3_column_text(id_lib_sql3, p_stmt, i)
-
-                    # concat buffer to our return array.
                     # Here we are reading the row into [1] of the temporary R/W buffer.
-                    buffer = buffer + "\""
-
-                    if i < number_columns +1 -1: # Don't add ', ' after last column.
-                        buffer = buffer + ","
-
+                    row_values.append(ozz_sql3.sqlite3_column_text(id_lib_sql3, p_stmt, i))
                     ## END for
-                db_field_values_temp[1] = buffer
-                #buffer = ""  # Clear the buffer for the next row.
+                db_field_values_temp[1] = row_values
 
             else:
                 # Skip read data on empty rowid.
@@ -1970,16 +3508,8 @@ def db_insert_table_rowdata_rowid(db_file_name, db_table_name, sql_rowid, db_fie
                 number_rows += 1  # Correct the total row count to match last system rowid
             ## END if test_rowid
 
-            #sqlite3_bind_*()  # After sqlit3_prepare_v2()
-            #sqlite3_clear_bindings(stmt);
-
-            # The sqlite3_finalize function destroys the prepared statement object.
-            return_code = ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt )  # Commit to the database.
-            if return_code != SQLITE_OK:  # SQLITE_OK==0
-                # This is error handling code.
-                print("Failed to finalize data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-                ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
-                return -1
+            # Reset the statement for reuse (in place of sqlite3_finalize).
+            db.stmt_cache.release(p_stmt)
 
         ## END Skip reading +1 empty line (if Count_Rows < number_rows +1:)
 ##=============================================================== end step 1
@@ -1987,10 +3517,6 @@ def db_insert_table_rowdata_rowid(db_file_name, db_table_name, sql_rowid, db_fie
 
         if (W_Flag < 1):  # Skip writting empty buffer data.
 
-            # Clear the buffer from the last statement. strcat() will concat on to
-            # the previous statement otherwise.
-            sql_concat = ""
-
             sql01a = "REPLACE INTO "
             sql01b = "INSERT INTO "
             sql02a = " (rowid, "
@@ -2001,9 +3527,9 @@ def db_insert_table_rowdata_rowid(db_file_name, db_table_name, sql_rowid, db_fie
 
             # Some logic to handle the last row inserted to a new rowid.
             if (Count_Rows < number_rows +2):
-                sql_concat = sql_concat + sql01a  # "REPLACE INTO "
+                sql_concat = sql01a  # "REPLACE INTO "
             else:  # New row (original last row +1)
-                sql_concat = sql_concat + sql01b  # "INSERT INTO "
+                sql_concat = sql01b  # "INSERT INTO "
 
             sql_concat = sql_concat + db_table_name  # Add table name to statement.
 
@@ -2015,28 +3541,41 @@ def db_insert_table_rowdata_rowid(db_file_name, db_table_name, sql_rowid, db_fie
             sql_concat = sql_concat + db_field_names  # Add field name (column name).
 
             if (Count_Rows < number_rows +2):
-                sql_concat = sql_concat + sql03   # ") VALUES(\""
-                sql_concat = sql_concat + rowid_buffer  # This is the fist rowid for new values [As SQL INTEGER]
+                sql_concat = sql_concat + sql03   # ") VALUES("
+                sql_concat = sql_concat + "?"  # The rowid for the values [As SQL INTEGER]
                 sql_concat = sql_concat + sql04  #  ", " delimit rowid, col_values, ...
             else:
                 sql_concat = sql_concat + sql03  # ") VALUES("
 
-            # Add the last row read into the same rowid
-            sql_concat = sql_concat + db_field_values_temp[0]  # Add the values.
+            # The new row is the SQL values text supplied by the caller. All
+            # following rows are read from the table and bound as ? parameters.
+            if isinstance(db_field_values_temp[0], str):
+                sql_concat = sql_concat + db_field_values_temp[0]  # Add the values.
+            else:
+                sql_concat = sql_concat + ",".join(["?"] * number_columns)
             sql_concat = sql_concat + sql05  # Finish the statement with ");"
 
             #print(sql_concat)  # DEBUG
 
-            # We can only send one query at a time to sqlite3.
-            return_code = ozz_sql3.sqlite3_prepare_v2(id_lib_sql3, p_db, sql_concat, -1, p_stmt, pzTail)
-            # On success, sqlite3_prepare_v2 returns SQLITE_OK; otherwise an error code
+            # Get the prepared statement from the cache (prepared on first use).
+            return_code, p_stmt = db.stmt_cache.prepare(sql_concat)
+            # On success, sqlite3_prepare_v3 returns SQLITE_OK; otherwise an error code
             # is returned.
             if return_code != SQLITE_OK:
-                # This is error handling code for the sqlite3_prepare_v2 function call.
-                print("Write, Failed to prepare data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-                ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+                # This is error handling code for the sqlite3_prepare_v3 function call.
+                db_error(id_lib_sql3, p_db, return_code, "Write, Failed to prepare data")  # DEBUG
+                db_session_close(db)
                 return -1
 
+            index = 1  # ? parameter index starts at 1.
+            if (Count_Rows < number_rows +2):
+                ozz_sql3.sqlite3_bind_int64(id_lib_sql3, p_stmt, index, sql_rowid)  # rowid
+                index += 1
+            if not isinstance(db_field_values_temp[0], str):
+                for value in db_field_values_temp[0]:
+                    ozz_sql3.sqlite3_bind_text(id_lib_sql3, p_stmt, index, value.encode('utf-8'), -1, SQLITE_TRANSIENT)
+                    index += 1
+
             # The sqlite3_step runs the SQL statement. SQLITE_ROW return code indicates
             # that there is another row ready. Our SQL statement returns only one row
             # of data at a time, therefore, we call this function only once at a time.
@@ -2044,21 +3583,16 @@ def db_insert_table_rowdata_rowid(db_file_name, db_table_name, sql_rowid, db_fie
             # use sqlite3_step() in a loop until end of SQLITE_ROW or SQLITE_DONE.
             return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)  # run once for one statement
             #    while( sqlite3_step( stmt ) == SQLITE_ROW ) {;}
+            # Drop the cached results of the table (see db_result_cache_enable()).
+            db_result_cache_invalidate(db, db_table_name)
             if return_code != SQLITE_DONE:  # SQLITE_DONE==101, SQLITE_ROW==100
-                print("Step failed: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-                ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+                db_error(id_lib_sql3, p_db, return_code, "Step failed")  # DEBUG
+                db.stmt_cache.release(p_stmt)
+                db_session_close(db)
                 return 0
 
-            #sqlite3_bind_*()  # After sqlit3_prepare_v2()
-            #sqlite3_clear_bindings(stmt);
-
-            # The sqlite3_finalize function destroys the prepared statement object.
-            return_code = ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt )  # Commit to the database.
-            if return_code != SQLITE_OK:  # SQLITE_OK==0
-                # This is error handling code.
-                print("Failed to finalize data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-                ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
-                return -1
+            # Reset the statement for reuse (in place of sqlite3_finalize).
+            db.stmt_cache.release(p_stmt)
 
             # Copy the last read [1] back to position [0] for next read write cycle.
             # This works a little like a last in first out buffer (LIFO).
@@ -2070,50 +3604,186 @@ def db_insert_table_rowdata_rowid(db_file_name, db_table_name, sql_rowid, db_fie
     ## End while Continue loop until last table row. (while Count_Rows < number_rows +2:)
 ##================================================================== End step 2
 
-    # The sqlite3_close function closes the database connection.
-    return_code = ozz_sql3.sqlite3_close(id_lib_sql3, p_db)   # SQLITE_OK==0
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
     if return_code != SQLITE_OK:
         # This is error handling code. NOTE! As p_db is closed the error code may not be available!
-        print("Failed to close database: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
         return -1
 
-    print( "Successfully inserted rowdata into table in " + db_file_name, file=sys.stderr)  # DEBUG
+    if db_reporting:
+        db_log.info("Successfully inserted rowdata into table in " + db.file_name)  # DEBUG
 
     return 1
 ## END Function
 
 
-# Read row from rowid in named table.
-def db_read_table_rowdata_rowid(db_file_name, db_table_name, sql_rowid, db_tbl_rowid_data, number_columns):
+# Insert row data into a named table at rowid (set based version).
+# All rows from sql_rowid to the end of the table are moved down one rowid
+# (rowid + 1) with UPDATE statements run by SQLite, in place of reading and
+# re-writing each row from Python as db_insert_table_rowdata_rowid() does.
+# The new row is then inserted at the free sql_rowid. The number of SQL
+# statements is the same for any table size.
+# Unlike db_insert_table_rowdata_rowid() every row is moved by exactly one,
+# so an empty rowid just after sql_rowid is filled rather than skipped.
+#
+# A rowid can't be moved onto another rowid that is still in use, so the rows
+# are moved in two steps inside one transaction (M = the largest rowid):
+#   UPDATE Table SET rowid = rowid + M + 1 WHERE rowid >= sql_rowid;  (out of the way)
+#   UPDATE Table SET rowid = rowid - M WHERE rowid > M;  (back to old rowid + 1)
+#
+# db_field_values is a tuple of Python values for the field names, or as for
+# db_insert_table_rowdata_rowid() the SQL values text ie. "\"Bill\", \"36\"".
+# If the session is already inside a transaction the caller does the COMMIT,
+# and a savepoint leaves the table unchanged if a statement fails.
+# Note: the same cautions about changing rowid apply, see above.
+def db_insert_table_rowdata_rowid_shift(db_file_name, db_table_name, sql_rowid, db_field_names, db_field_values):
+
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given.
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
 
-    # Get the path to the SQLite3 shared library file (dll/so).
-    f_library_sql3 = ozz_sql3.get_libsql3_path()  # Get the path for sqlite.dll/so
+    return_code = 0
+    max_rowid = 0
+    err_ret = 1
 
-    # Load the sqlite3 shared library. The returned ID from loading the sqlite
-    # shared library must be passed to other functions.
-    id_lib_sql3  = ozz_sql3.load_libsql3(f_library_sql3)
+    return_code = db_session_open(db, SQLITE_OPEN_READWRITE)
+    if return_code != SQLITE_OK:
+        # Note: these print returns can be commented out if only the Bool return 0; is required.
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    # "INSERT INTO Table (rowid, Item, Quantity) VALUES(?, ?, ?);"
+    if isinstance(db_field_values, str):
+        sql_insert = "INSERT INTO " + db_table_name + " (rowid, " + db_field_names + ") VALUES(?, " + db_field_values + ");"
+        db_field_values = ()
+    else:
+        sql_insert = "INSERT INTO " + db_table_name + " (rowid, " + db_field_names + ") VALUES(?" + ", ?" * len(db_field_values) + ");"
+
+    # Each list entry is (SQL, bound values). The max rowid is filled in below.
+    sql_list = [
+        ["SELECT MAX(rowid) FROM " + db_table_name + ";", ()],
+        ["UPDATE " + db_table_name + " SET rowid = rowid + ? WHERE rowid >= ?;", None],
+        ["UPDATE " + db_table_name + " SET rowid = rowid - ? WHERE rowid > ?;", None],
+        [sql_insert, (sql_rowid,) + tuple(db_field_values)]
+        ]
+
+    # Only BEGIN/COMMIT our own transaction when not already inside one.
+    own_transaction = ozz_sql3.sqlite3_get_autocommit(id_lib_sql3, p_db) != 0
+    if own_transaction == True:
+        return_code = db_execute(db, "BEGIN IMMEDIATE;")
+    else:
+        return_code = db_execute(db, "SAVEPOINT db_rowid_shift;")
+    if return_code != SQLITE_OK:
+        db_error(id_lib_sql3, p_db, return_code, "Failed to begin transaction")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    for i in range(len(sql_list)):
+        sql_concat, params = sql_list[i]
+        if i == 1:
+            params = (max_rowid + 1, sql_rowid)
+        elif i == 2:
+            params = (max_rowid, max_rowid)
+
+        return_code, p_stmt = db_prepare_bind(db, sql_concat, params)
+        if return_code != SQLITE_OK:
+            db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
+            err_ret = -1
+            break
+
+        return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)
+        if i == 0 and return_code == SQLITE_ROW:
+            # MAX() of an empty table is NULL, read as 0.
+            max_rowid = ozz_sql3.sqlite3_column_int64(id_lib_sql3, p_stmt, 0)
+            return_code = SQLITE_DONE
+        if return_code != SQLITE_DONE:  # SQLITE_DONE==101, SQLITE_ROW==100
+            db_error(id_lib_sql3, p_db, return_code, "Step failed")  # DEBUG
+            db.stmt_cache.release(p_stmt)
+            err_ret = 0
+            break
+
+        # Reset the statement for reuse (in place of sqlite3_finalize).
+        # If max_rowid < sql_rowid the UPDATE statements match no rows.
+        db.stmt_cache.release(p_stmt)
+        ## END for
+
+    if own_transaction == True:
+        if err_ret == 1:
+            return_code = db_execute(db, "COMMIT;")
+            if return_code != SQLITE_OK:
+                db_error(id_lib_sql3, p_db, return_code, "Failed to commit transaction")  # DEBUG
+                err_ret = 0
+        if err_ret != 1:
+            db_execute(db, "ROLLBACK;")  # Leave the table unchanged.
+    else:
+        if err_ret != 1:
+            db_execute(db, "ROLLBACK TO db_rowid_shift;")  # Leave the table unchanged.
+        db_execute(db, "RELEASE db_rowid_shift;")
+
+    # Drop the cached results of the table (see db_result_cache_enable()).
+    db_result_cache_invalidate(db, db_table_name)
+
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
+    if return_code != SQLITE_OK:
+        # This is error handling code. NOTE! As p_db is closed the error code may not be available!
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    if err_ret == 1:
+        if db_reporting:
+            db_log.info("Successfully inserted rowdata into table in " + db.file_name)  # DEBUG
+
+    return err_ret
+## END Function
 
-    # sqlite3 *p_db;  # database handle (structure).
-    p_db = ozz_sql3.p_sqlite3()  # Get the sqlite3 structure.
+
+# Read row from rowid in named table.
+# typed=True returns each row as a tuple of Python values (not a string).
+def db_read_table_rowdata_rowid(db_file_name, db_table_name, sql_rowid, db_tbl_rowid_data, number_columns, typed=False):
+
+    # Return the row from the result cache if enabled (see db_result_cache_enable()).
+    # Both db_read_table_rowdata_rowid() versions share the cached rows.
+    result_cache = db_result_cache_read(db_file_name)
+    if result_cache is not None:
+        rows = result_cache.get("SELECT * FROM " + db_table_name + " WHERE rowid = ?;", (sql_rowid,), (number_columns, typed))
+        if rows is not None:
+            for row in rows:
+                db_tbl_rowid_data.insert(0, row)
+            if db_reporting:
+                db_log.info("Successfully read rowdata from table in " + db_session_file_name(db_file_name) + " (result cache)")  # DEBUG
+            return 1
+        generation = result_cache.generation
+
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given. The session holds the loaded sqlite3
+    # shared library and the sqlite3 *p_db database handle (structure).
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
 
     # sqlite3_stmt *p_stmt;  # structure represents a single SQL statement
     p_stmt = ozz_sql3.p_sqlite3_stmt()  # Get the sqlite3_stmt structure.
 
     return_code = 0
 
-    p_zVfs = None  # can use NULL = None
     pzTail = None
     NULL = None
 
     sql_concat = ""  # temp buffer [MAX 512 characters]
     buffer = ""  # Temp column read buffer [MAX 128 characters]
 
-    return_code = ozz_sql3.sqlite3_open_v2( id_lib_sql3, db_file_name, p_db, SQLITE_OPEN_READONLY, p_zVfs )
+    return_code = db_session_open(db, SQLITE_OPEN_READONLY)
     if return_code != SQLITE_OK:
         # Note: these print returns can be commented out if only the Bool return 0; is required.
-        print("Can't open database: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
         return -1
 
     # rowid copy to string
@@ -2137,30 +3807,23 @@ def db_read_table_rowdata_rowid(db_file_name, db_table_name, sql_rowid, db_tbl_r
     # is returned.
     if return_code != SQLITE_OK:
         # This is error handling code for the sqlite3_prepare_v2 function call.
-        print("Failed to prepare data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
+        db_session_close(db)
         return -1
 
-    while ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt) == SQLITE_ROW:
-        # Can use sqlite3_column_count(statement/stmt) in place of number_columns.
-        for i in range(number_columns):  # Count 0 to number_columns-1
-            # To handle the return of NULL pointers as a string
-            # data = (const char*)sqlite3_column_text( stmt, i );
-            #        printf( "%s\n", data ? data : "[NULL]" );
-            #        sprintf(buffer[strlen(data)], "%s\n", data ? data : "[NULL]" );
-
-            # copy each entry to a buffer. Each entry is a col.
-            buffer = buffer + ozz_sql3.sqlite3_column_text(id_lib_sql3, p_stmt, i)  # i == array column.
-            #printf("DEBUG %s\n", buffer);
-            # concat buffer to our return array.
-
-            if i < number_columns -1: # Don't add ', ' after last column.
-                # Remove space after ','
-                buffer = buffer +  ","  # add separator token between each col.
-            else:  # Add line return, end of row.
-                pass  #strcat(p_db_tbl_rowdata[cnt_row], "\n");
-            ## END for
-        db_tbl_rowid_data.insert(0, buffer)
+    # Each row is decoded to a "col1,col2,..." string or with typed=True a
+    # tuple of Python values. See ozz_sql3.RowDecoder.
+    row_decoder = ozz_sql3.RowDecoder(id_lib_sql3, p_stmt, number_columns)
+    rows = []
+    step_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)
+    while step_code == SQLITE_ROW:
+        if typed == True:
+            row = row_decoder.decode()
+        else:
+            row = row_decoder.decode_csv()
+        db_tbl_rowid_data.insert(0, row)
+        rows.append(row)
+        step_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)
         ## END while
 
     #sqlite3_bind_*()  # After sqlit3_prepare_v2()
@@ -2170,19 +3833,107 @@ def db_read_table_rowdata_rowid(db_file_name, db_table_name, sql_rowid, db_tbl_r
     return_code = ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt )  # Commit to the database.
     if return_code != SQLITE_OK:  # SQLITE_OK==0
         # This is error handling code.
-        print("Failed to finalize data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to finalize data")  # DEBUG
+        db_session_close(db)
         return -1
 
-    # The sqlite3_close function closes the database connection.
-    return_code = ozz_sql3.sqlite3_close(id_lib_sql3, p_db)   # SQLITE_OK==0
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
     if return_code != SQLITE_OK:
         # This is error handling code. NOTE! As p_db is closed the error code may not be available!
-        print("Failed to close database: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    # Only a complete read is cached (not one that stopped on an error).
+    if result_cache is not None and step_code == SQLITE_DONE:
+        result_cache.put("SELECT * FROM " + db_table_name + " WHERE rowid = ?;", (sql_rowid,), (number_columns, typed), (db_table_name,), rows, generation)
+
+    if db_reporting:
+        db_log.info("Successfully read rowdata from table in " + db.file_name)  # DEBUG
+
+    return 1
+## END Function
+
+
+# Read row from rowid in named table (bound parameter version).
+# The rowid is bound to a ? parameter and the statement is reused from the
+# session statement cache.
+# typed=True returns each row as a tuple of Python values (not a string).
+def db_read_table_rowdata_rowid_bind(db_file_name, db_table_name, sql_rowid, db_tbl_rowid_data, number_columns, typed=False):
+
+    # Return the row from the result cache if enabled (see db_result_cache_enable()).
+    # Both db_read_table_rowdata_rowid() versions share the cached rows.
+    result_cache = db_result_cache_read(db_file_name)
+    if result_cache is not None:
+        rows = result_cache.get("SELECT * FROM " + db_table_name + " WHERE rowid = ?;", (sql_rowid,), (number_columns, typed))
+        if rows is not None:
+            for row in rows:
+                db_tbl_rowid_data.insert(0, row)
+            if db_reporting:
+                db_log.info("Successfully read rowdata from table in " + db_session_file_name(db_file_name) + " (result cache)")  # DEBUG
+            return 1
+        generation = result_cache.generation
+
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given.
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
+
+    return_code = 0
+    buffer = ""  # Temp column read buffer
+
+    return_code = db_session_open(db, SQLITE_OPEN_READONLY)
+    if return_code != SQLITE_OK:
+        # Note: these print returns can be commented out if only the Bool return 0; is required.
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
         return -1
 
-    print( "Successfully read rowdata from table in " + db_file_name, file=sys.stderr)  # DEBUG
+    sql_concat = "SELECT * FROM " + db_table_name + " WHERE rowid = ?;"
+
+    # Get the prepared statement from the cache (prepared on first use) and
+    # bind the values to the ? parameters.
+    return_code, p_stmt = db_prepare_bind(db, sql_concat, (sql_rowid,))
+    if return_code != SQLITE_OK:
+        # This is error handling code for the prepare and bind function calls.
+        db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    # Each row is decoded to a "col1,col2,..." string or with typed=True a
+    # tuple of Python values. See ozz_sql3.RowDecoder.
+    row_decoder = ozz_sql3.RowDecoder(id_lib_sql3, p_stmt, number_columns)
+    rows = []
+    step_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)
+    while step_code == SQLITE_ROW:
+        if typed == True:
+            row = row_decoder.decode()
+        else:
+            row = row_decoder.decode_csv()
+        db_tbl_rowid_data.insert(0, row)
+        rows.append(row)
+        step_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)
+        ## END while
+
+    # Reset the statement for reuse (in place of sqlite3_finalize).
+    db.stmt_cache.release(p_stmt)
+
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
+    if return_code != SQLITE_OK:
+        # This is error handling code. NOTE! As p_db is closed the error code may not be available!
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    # Only a complete read is cached (not one that stopped on an error).
+    if result_cache is not None and step_code == SQLITE_DONE:
+        result_cache.put("SELECT * FROM " + db_table_name + " WHERE rowid = ?;", (sql_rowid,), (number_columns, typed), (db_table_name,), rows, generation)
+
+    if db_reporting:
+        db_log.info("Successfully read rowdata from table in " + db.file_name)  # DEBUG
 
     return 1
 ## END Function
@@ -2191,49 +3942,230 @@ def db_read_table_rowdata_rowid(db_file_name, db_table_name, sql_rowid, db_tbl_r
 # Search for a string in a field name and return array of found rows.
 # As this only searches a single column we should not encounter duplicate rowid.
 # ## Only for tables where all field types are TEXT (String) except rowid. ##
-def db_search_table_rowdata_byfield(db_file_name, db_table_name, db_tbl_row_search, field_name, db_search_string, number_columns, ret_array_length):
+# typed=True returns each row as a tuple of Python values (not a string).
+def db_search_table_rowdata_byfield(db_file_name, db_table_name, db_tbl_row_search, field_name, db_search_string, number_columns, ret_array_length, typed=False):
 
     # Get column field names as array[][].
     # get number of columns.
     # return row length (number of array items).
 
-    # Get the path to the SQLite3 shared library file (dll/so).
-    f_library_sql3 = ozz_sql3.get_libsql3_path()  # Get the path for sqlite.dll/so
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given. The session holds the loaded sqlite3
+    # shared library and the sqlite3 *p_db database handle (structure).
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
 
-    # Load the sqlite3 shared library. The returned ID from loading the sqlite
-    # shared library must be passed to other functions.
-    id_lib_sql3  = ozz_sql3.load_libsql3(f_library_sql3)
+    # sqlite3_stmt *p_stmt;  # structure represents a single SQL statement
+    p_stmt = ozz_sql3.p_sqlite3_stmt()  # Get the sqlite3_stmt structure.
 
-    # sqlite3 *p_db;  # database handle (structure).
-    p_db = ozz_sql3.p_sqlite3()  # Get the sqlite3 structure.
+    return_code = 0
+
+    pzTail = None
+    NULL = None
+
+    return_code = db_session_open(db, SQLITE_OPEN_READONLY)
+    if return_code != SQLITE_OK:
+        # Note: these print returns can be commented out if only the Bool return 0; is required.
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    sql_concat = ""  # Not required.
+
+    sql1 = "SELECT rowid, * FROM "  # Note the space after FROM
+    sql2 = " WHERE "  # Note the space before and after WHERE
+    sql3 = " = "  # Note the space before and after =
+    sql4 = ";"
+
+    # Add SQL query statement, Add table name to statement, Add last part of query statement,
+    # Add field name (column name), add " = ", Add last part of query statement,
+    # Finish the statement with ";".
+    sql_concat = sql1 + db_table_name + sql2 + field_name + sql3 + db_search_string + sql4
+    db_log_search_predicate(db, db_table_name, (field_name,))
+
+    # We can only send one query at a time to sqlite3.
+    return_code = ozz_sql3.sqlite3_prepare_v2(id_lib_sql3, p_db, sql_concat, -1, p_stmt, pzTail)
+    # On success, sqlite3_prepare_v2 returns SQLITE_OK; otherwise an error code
+    # is returned.
+    if return_code != SQLITE_OK:
+        # This is error handling code for the sqlite3_prepare_v2 function call.
+        db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    # The sqlite3_step runs the SQL statement. SQLITE_ROW return code indicates
+    # that there is another row ready. Our SQL statement returns only one row
+    # of data at a time, therefore, we call this function only once at a time.
+    # If we are writing or reading multiple lines of table then we will need to
+    # use sqlite3_step() in a loop until end of SQLITE_ROW or SQLITE_DONE.
+
+    cnt_row = 0
+    #int cnt_col = 0;
+
+    # Each row is decoded to a "col1,col2,..." string or with typed=True a
+    # tuple of Python values. See ozz_sql3.RowDecoder.
+    row_decoder = ozz_sql3.RowDecoder(id_lib_sql3, p_stmt, number_columns)
+    while ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt) == SQLITE_ROW:
+        if typed == True:
+            row = row_decoder.decode()
+        else:
+            row = row_decoder.decode_csv()
+        db_tbl_row_search.insert(cnt_row, row)
+        cnt_row += 1
+        ## END while
+
+    # Return byref number of found rows as element[0] in the list.
+    ret_array_length.insert(0, cnt_row)  # return the length of array of found rows.
+
+    #sqlite3_bind_*()  # After sqlit3_prepare_v2()
+    #sqlite3_clear_bindings(stmt);
+
+    # The sqlite3_finalize function destroys the prepared statement object.
+    return_code = ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt )  # Commit to the database.
+    if return_code != SQLITE_OK:  # SQLITE_OK==0
+        # This is error handling code.
+        db_error(id_lib_sql3, p_db, return_code, "Failed to finalize data")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
+    if return_code != SQLITE_OK:
+        # This is error handling code. NOTE! As p_db is closed the error code may not be available!
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    if db_reporting:
+        db_log.info("Successfully retrieved table search data from " + db.file_name)  # DEBUG
+
+    return 1
+## END Function
+
+
+# Search for a value in a field name and return array of found rows (bound
+# parameter version). db_search_value is a Python value ie. "Joe Blogs" or 34
+# and is bound to a ? parameter, so it must not be quoted as in the SQL text
+# version above. field_name is part of the SQL and is used as given.
+# ## Only for tables where all field types are TEXT (String) except rowid. ##
+# typed=True returns each row as a tuple of Python values (not a string).
+def db_search_table_rowdata_byfield_bind(db_file_name, db_table_name, db_tbl_row_search, field_name, db_search_value, number_columns, ret_array_length, typed=False):
+
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given.
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
+
+    return_code = 0
+
+    return_code = db_session_open(db, SQLITE_OPEN_READONLY)
+    if return_code != SQLITE_OK:
+        # Note: these print returns can be commented out if only the Bool return 0; is required.
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    sql_concat = "SELECT rowid, * FROM " + db_table_name + " WHERE " + field_name + " = ?;"
+    db_log_search_predicate(db, db_table_name, (field_name,))
+
+    # Get the prepared statement from the cache (prepared on first use) and
+    # bind the values to the ? parameters.
+    return_code, p_stmt = db_prepare_bind(db, sql_concat, (db_search_value,))
+    if return_code != SQLITE_OK:
+        # This is error handling code for the prepare and bind function calls.
+        db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    cnt_row = 0
+
+    # Each row is decoded to a "col1,col2,..." string or with typed=True a
+    # tuple of Python values. See ozz_sql3.RowDecoder.
+    row_decoder = ozz_sql3.RowDecoder(id_lib_sql3, p_stmt, number_columns)
+    while ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt) == SQLITE_ROW:
+        if typed == True:
+            row = row_decoder.decode()
+        else:
+            row = row_decoder.decode_csv()
+        db_tbl_row_search.insert(cnt_row, row)
+        cnt_row += 1
+        ## END while
+
+    # Return byref number of found rows as element[0] in the list.
+    ret_array_length.insert(0, cnt_row)  # return the length of array of found rows.
+
+    # Reset the statement for reuse (in place of sqlite3_finalize).
+    db.stmt_cache.release(p_stmt)
+
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
+    if return_code != SQLITE_OK:
+        # This is error handling code. NOTE! As p_db is closed the error code may not be available!
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    if db_reporting:
+        db_log.info("Successfully retrieved table search data from " + db.file_name)  # DEBUG
+
+    return 1
+## END Function
+
+
+# Search for string in all field names of the table and return array of found rows.
+# The columns are searched with a single query, so each row is only returned
+# once and the table is scanned once (rather than once for each column):
+# SELECT rowid, * FROM Table WHERE "col1" = "9" OR "col2" = "9" OR ... ;
+# Rows are returned in rowid order.
+# ## Only for tables where all field types are TEXT (String) except rowid. ##
+# typed=True returns each row as a tuple of Python values (not a string).
+def db_search_table_rowdata_allfields(db_file_name, db_table_name, db_tbl_row_search, db_tbl_col_name, db_search_string, number_columns, ret_array_length, typed=False):
+
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given. The session holds the loaded sqlite3
+    # shared library and the sqlite3 *p_db database handle (structure).
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
 
     # sqlite3_stmt *p_stmt;  # structure represents a single SQL statement
     p_stmt = ozz_sql3.p_sqlite3_stmt()  # Get the sqlite3_stmt structure.
 
     return_code = 0
 
-    p_zVfs = None  # can use NULL = None
-    pzTail = None
-    NULL = None
+    pzTail = None
+    NULL = None
+
+    # Be careful with this when looping fields!!! <- revise!
+    # We are also including an extra column for the row ID number.
+    number_columns2 = number_columns + 1
+
+    cnt_row = 0  # Count of found rows.
+    buffer = ""  # temp buffer [MAX 128 characters]
+    sql_concat = ""  # Build sql query statement.
 
-    return_code = ozz_sql3.sqlite3_open_v2( id_lib_sql3, db_file_name, p_db, SQLITE_OPEN_READONLY, p_zVfs )
+    return_code = db_session_open(db, SQLITE_OPEN_READONLY)
     if return_code != SQLITE_OK:
         # Note: these print returns can be commented out if only the Bool return 0; is required.
-        print("Can't open database: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
         return -1
 
-    sql_concat = ""  # Not required.
+    # Build one WHERE clause testing every column (field) name.
+    # rowid column is not counted when accessing the field names in the search.
+    # The return values from the search DO include the rowid.
+    sql_where = []
+    for cnt_col in range(number_columns):
+        sql_where.append("\"" + db_tbl_col_name[cnt_col] + "\" = " + db_search_string)
+        ## END for cnt_col
 
     sql1 = "SELECT rowid, * FROM "  # Note the space after FROM
     sql2 = " WHERE "  # Note the space before and after WHERE
-    sql3 = " = "  # Note the space before and after =
-    sql4 = ";"
+    sql3 = " ORDER BY rowid;"
 
-    # Add SQL query statement, Add table name to statement, Add last part of query statement,
-    # Add field name (column name), add " = ", Add last part of query statement,
-    # Finish the statement with ";".
-    sql_concat = sql1 + db_table_name + sql2 + field_name + sql3 + db_search_string + sql4
+    sql_concat = sql1 + db_table_name + sql2 + " OR ".join(sql_where) + sql3
 
     # We can only send one query at a time to sqlite3.
     return_code = ozz_sql3.sqlite3_prepare_v2(id_lib_sql3, p_db, sql_concat, -1, p_stmt, pzTail)
@@ -2241,254 +4173,189 @@ def db_search_table_rowdata_byfield(db_file_name, db_table_name, db_tbl_row_sear
     # is returned.
     if return_code != SQLITE_OK:
         # This is error handling code for the sqlite3_prepare_v2 function call.
-        print("Failed to prepare data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
+        db_session_close(db)
         return -1
 
-    # The sqlite3_step runs the SQL statement. SQLITE_ROW return code indicates
-    # that there is another row ready. Our SQL statement returns only one row
-    # of data at a time, therefore, we call this function only once at a time.
-    # If we are writing or reading multiple lines of table then we will need to
-    # use sqlite3_step() in a loop until end of SQLITE_ROW or SQLITE_DONE.
-
-    cnt_row = 0
-    #int cnt_col = 0;
-
+    # Each row is returned once, however many of its columns match. It is
+    # decoded to a "col1,col2,..." string or with typed=True a tuple of Python
+    # values. See ozz_sql3.RowDecoder.
+    row_decoder = ozz_sql3.RowDecoder(id_lib_sql3, p_stmt, number_columns2)
     while ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt) == SQLITE_ROW:
-        #printf("DEBUGz\n");
-        #printf("Value= %s\n", sqlite3_column_text(stmt, 1));
-        buffer = ""  # Clear temp buffer.
-        # Can use sqlite3_column_count(statement/stmt) in place of number_columns.
-        for i in range(number_columns):
-            # To handle the return of NULL pointers as a string
-            # data = (const char*)sqlite3_column_text( stmt, i );
-            #        printf( "%s\n", data ? data : "[NULL]" );
-            #        sprintf(buffer[strlen(data)], "%s\n", data ? data : "[NULL]" );
-
-            # copy each entry to a buffer. Each entry is a col.
-            buffer = buffer + ozz_sql3.sqlite3_column_text(id_lib_sql3, p_stmt, i)  # i == array column.
-            #printf("Value: %s\n", buffer);  # DEBUG
-            # concat buffer to our return array.
-
-            if i < number_columns -1: # Dont add ', ' after last column.
-                buffer = buffer + ","  # add separator token between each col.
-            else:  # Add line return, end of row.
-                pass  # buffer = buffer + "\n"
-            #cnt_col++;  # Need 3D array.
-            ## END for
-        # insert the return into element[cnt_row]
-        db_tbl_row_search.insert(cnt_row, buffer)  # Our row csv string by reference.
-        #cnt_col = 0;
+        if typed == True:
+            row = row_decoder.decode()
+        else:
+            row = row_decoder.decode_csv()
+        db_tbl_row_search.insert(cnt_row, row)
         cnt_row += 1
         ## END while
 
-    # Return byref number of found rows as element[0] in the list.
-    ret_array_length.insert(0, cnt_row)  # return the length of array of found rows.
-
-    #sqlite3_bind_*()  # After sqlit3_prepare_v2()
-    #sqlite3_clear_bindings(stmt);
-
     # The sqlite3_finalize function destroys the prepared statement object.
     return_code = ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt )  # Commit to the database.
     if return_code != SQLITE_OK:  # SQLITE_OK==0
         # This is error handling code.
-        print("Failed to finalize data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to finalize data")  # DEBUG
+        db_session_close(db)
         return -1
 
-    # The sqlite3_close function closes the database connection.
-    return_code = ozz_sql3.sqlite3_close(id_lib_sql3, p_db)   # SQLITE_OK==0
+    ret_array_length.insert(0, cnt_row)  # return the length of array of found rows.
+
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
     if return_code != SQLITE_OK:
         # This is error handling code. NOTE! As p_db is closed the error code may not be available!
-        print("Failed to close database: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
         return -1
 
-    print( "Successfully retrieved table search data from " + db_file_name, file=sys.stderr)  # DEBUG
+    if db_reporting:
+        db_log.info("Successfully retrieved table search data from " + db.file_name)  # DEBUG
 
     return 1
 ## END Function
 
 
-# Search for string in all field names of the table and return array of found rows.
-# Duplicate row_id are filtered out.
-# This needs to be stepped through each column and filter for duplicate rowid.
-# ## Only for tables where all field types are TEXT (String) except rowid. ##
-def db_search_table_rowdata_allfields(db_file_name, db_table_name, db_tbl_row_search, db_tbl_col_name, db_search_string, number_columns, ret_array_length):
+# Create a full text search (FTS5) index of the table for substring searches
+# with db_search_table_rowdata_fts(). The index is a virtual table named
+# <table>_fts with the trigram tokenizer, holding a copy of the number_columns
+# columns in db_tbl_col_name, with the same rowid. Triggers keep the copy up to
+# date on INSERT, UPDATE, DELETE and REPLACE. Safe to call if the index exists.
+# Note: DROP TABLE removes the triggers but not the <table>_fts table.
+# Requires SQLite 3.34.0 or later built with FTS5 (the default amalgamation).
+def db_table_create_fts(db_file_name, db_table_name, db_tbl_col_name, number_columns):
 
-    # Get the path to the SQLite3 shared library file (dll/so).
-    f_library_sql3 = ozz_sql3.get_libsql3_path()  # Get the path for sqlite.dll/so
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given.
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
 
-    # Load the sqlite3 shared library. The returned ID from loading the sqlite
-    # shared library must be passed to other functions.
-    id_lib_sql3  = ozz_sql3.load_libsql3(f_library_sql3)
+    return_code = 0
 
-    # sqlite3 *p_db;  # database handle (structure).
-    p_db = ozz_sql3.p_sqlite3()  # Get the sqlite3 structure.
+    return_code = db_session_open(db, SQLITE_OPEN_READWRITE)
+    if return_code != SQLITE_OK:
+        # Note: these print returns can be commented out if only the Bool return 0; is required.
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
+        return -1
 
-    # sqlite3_stmt *p_stmt;  # structure represents a single SQL statement
-    p_stmt = ozz_sql3.p_sqlite3_stmt()  # Get the sqlite3_stmt structure.
+    fts_name = db_table_name + "_fts"
+    col_names = ", ".join(["\"" + db_tbl_col_name[i] + "\"" for i in range(number_columns)])
+    new_values = ", ".join(["new.\"" + db_tbl_col_name[i] + "\"" for i in range(number_columns)])
+
+    # REPLACE INTO removes the old row without running the DELETE trigger, so
+    # the INSERT trigger clears any old copy of the rowid first.
+    fts_insert = "DELETE FROM " + fts_name + " WHERE rowid = new.rowid; " \
+        "INSERT INTO " + fts_name + "(rowid, " + col_names + ") VALUES(new.rowid, " + new_values + "); "
+
+    # sqlite3_exec() runs all of the ; separated statements.
+    sql_concat = "BEGIN IMMEDIATE; " \
+        "CREATE VIRTUAL TABLE IF NOT EXISTS " + fts_name + " USING fts5(" + col_names + ", tokenize = 'trigram'); " \
+        "DELETE FROM " + fts_name + "; " \
+        "INSERT INTO " + fts_name + "(rowid, " + col_names + ") SELECT rowid, " + col_names + " FROM " + db_table_name + "; " \
+        "CREATE TRIGGER IF NOT EXISTS " + fts_name + "_ai AFTER INSERT ON " + db_table_name + " BEGIN " + fts_insert + "END; " \
+        "CREATE TRIGGER IF NOT EXISTS " + fts_name + "_ad AFTER DELETE ON " + db_table_name + " BEGIN " \
+            "DELETE FROM " + fts_name + " WHERE rowid = old.rowid; END; " \
+        "CREATE TRIGGER IF NOT EXISTS " + fts_name + "_au AFTER UPDATE ON " + db_table_name + " BEGIN " \
+            "DELETE FROM " + fts_name + " WHERE rowid = old.rowid; " + fts_insert + "END; " \
+        "COMMIT;"
+
+    return_code = db_execute(db, sql_concat)
+    if return_code != SQLITE_OK:
+        db_error(id_lib_sql3, p_db, return_code, "Failed to create search index")  # DEBUG
+        if ozz_sql3.sqlite3_get_autocommit(id_lib_sql3, p_db) == 0:
+            db_execute(db, "ROLLBACK;")
+        db_session_close(db)
+        return 0
 
-    return_code = 0
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
+    if return_code != SQLITE_OK:
+        # This is error handling code. NOTE! As p_db is closed the error code may not be available!
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
+        return -1
 
-    p_zVfs = None  # can use NULL = None
-    pzTail = None
-    NULL = None
+    if db_reporting:
+        db_log.info("Successfully created search index " + fts_name + " in " + db.file_name)  # DEBUG
 
-    # Some of these may be redundant.
-    cnt_col = 0  # Counter to step though name of each column (field)
-    i = 0  # Loop counters.
-    j = 0  # Loop counters.
+    return 1
+## END Function
 
-    # Be careful with this when looping fields!!! <- revise!
+
+# Search for a substring in all field names of the table and return array of
+# found rows, using the <table>_fts index from db_table_create_fts().
+# db_search_value is the plain text to find ie. "Blog" (not an SQL "string").
+# Matching is case insensitive. The trigram index needs at least 3 characters,
+# shorter search values are matched with a single scan of the table instead.
+# Rows are returned in rowid order.
+# typed=True returns each row as a tuple of Python values (not a string).
+def db_search_table_rowdata_fts(db_file_name, db_table_name, db_tbl_row_search, db_tbl_col_name, db_search_value, number_columns, ret_array_length, typed=False):
+
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given.
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
+
+    return_code = 0
+    cnt_row = 0
     # We are also including an extra column for the row ID number.
     number_columns2 = number_columns + 1
 
-    cnt_row = 0  # Used to count through each row of found data to test for duplicate rows.
-    buffer = ""  # temp buffer [MAX 128 characters]
-    token_buf = ""  # temp buffer [MAX 128 characters]
-    #ch = 0  # character buffer.
-    #x = 0  # while loop to retrieve row_id up to first ','
-    # Flag to skip writing duplicate row to return array. Also skips ret array increment.
-    row_id_exists = 0
-    sql_concat = ""  # Build sql query statement.
-
-    return_code = ozz_sql3.sqlite3_open_v2( id_lib_sql3, db_file_name, p_db, SQLITE_OPEN_READONLY, p_zVfs )
+    return_code = db_session_open(db, SQLITE_OPEN_READONLY)
     if return_code != SQLITE_OK:
         # Note: these print returns can be commented out if only the Bool return 0; is required.
-        print("Can't open database: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
         return -1
 
-    # I need to loop over the columns for full search...
-    # WHERE "field/column_name" = will need to be replaced in each loop.
-    # This search routine will only work for tables with type TEXT!
-
-    # Be careful of the + 1 in number_columns2 due to extra row_id column.
-    # rowid column is not counted when accessing the field names in the search.
-    # The return values from the search DO include the rowid.
-    # ====> START Loop each column name (field).
-    for cnt_col in range(number_columns2 -1):
-    #for(cnt_col = 0; cnt_col < number_columns2 -1; cnt_col++)
-
-        # Clear the buffer from the last statement. strcat() will concat on to
-        # the previous statement otherwise.
-        sql_concat = ""
-
-        # This can be replaced with sprintf()
-        # The \"name\" may not be required? !!!
-        sql1 = "SELECT rowid, * FROM "  # Note the space after FROM
-        sql2 = " WHERE \""  # Note the space before and after WHERE
-        sql3 = "\" = "  # Note the space before and after =
-        sql4 = ";"
-
-        sql_concat = sql1 + db_table_name + sql2 + db_tbl_col_name[cnt_col] + sql3 + db_search_string + sql4
-
-        #strcat(sql_concat, sql1);  # Add SQL query statement.
-        #strcat(sql_concat, db_table_name);  # Add table name to statement.
-        #strcat(sql_concat, sql2);  # Add last part of query statement.
-        #strcat(sql_concat, db_tbl_col_name[cnt_col]);  # Add feild name (column name) from p_db_tbl_col_name[][] array.
-        #strcat(sql_concat, sql3);  # add " = "
-        #strcat(sql_concat, db_search_string);  # Add last part of query statement.
-        #strcat(sql_concat, sql4);  # Finish the statement with ";"
-
-        # We can only send one query at a time to sqlite3.
-        return_code = ozz_sql3.sqlite3_prepare_v2(id_lib_sql3, p_db, sql_concat, -1, p_stmt, pzTail)
-        # On success, sqlite3_prepare_v2 returns SQLITE_OK; otherwise an error code
-        # is returned.
-        if return_code != SQLITE_OK:
-            # This is error handling code for the sqlite3_prepare_v2 function call.
-            print("Failed to prepare data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-            ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
-            return -1
-
-        # The sqlite3_step runs the SQL statement. SQLITE_ROW return code indicates
-        # that there is another row ready. Our SQL statement returns only one row
-        # of data at a time, therefore, we call this function only once at a time.
-        # If we are writing or reading multiple lines of table then we will need to
-        # use sqlite3_step() in a loop until end of SQLITE_ROW or SQLITE_DONE.
-        while ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt) == SQLITE_ROW:
-            buffer = ""  # Clear the buffer for next row
-            # Can use sqlite3_column_count(statement/stmt) in place of number_columns.
-            for i in range(number_columns2):
-                # To handle the return of NULL pointers as a string
-                # data = (const char*)sqlite3_column_text( stmt, i );
-                #        printf( "%s\n", data ? data : "[NULL]" );
-                #        sprintf(buffer[strlen(data)], "%s\n", data ? data : "[NULL]" );
-
-                # copy each entry to a buffer. Each entry is a col.
-                buffer = buffer + ozz_sql3.sqlite3_column_text(id_lib_sql3, p_stmt, i)  # i == array column.
-
-                #====> START Test for repeat row_id ====>
-                # Do string compare test to see if the first column row_id
-                # already exists in our return search array. Skip copying that
-                # row if row_id already exists.
-                # This does not order the array entries by row_id and are entered
-                # in the order they are found during the search.
-                if i == 0:
-                    for j in range(cnt_row):
-                        # extract the first col item row_id up to token ','
-                        token_buf = db_tbl_row_search[j].split(',')
-
-                        # Compare if rowid is already found in our return search array.
-                        # If rowid is already present, skip copying that row.
-                        if buffer == token_buf:
-                            # If True 0 then skip copying this row to p_db_tbl_row_search[].
-                            row_id_exists = 1
-                        ## END for j
-                    ## END if (i == 0)
-                #====> END Test for repeat row_id ====>
-
-                if row_id_exists == 0:  # if row not exist already, write search found to return buffer.
-
-                    # Concat buffer to our return array. This will copy each column of the row
-                    # separated by the ', ' comma-space character. aka CSV format.
-                    # No return character '\n' is created as we use a separate array
-                    # element for each row. To print (write to file) as CSV add
-                    # the '\n' after each array element. See the loop that prints
-                    # this in main().
-
-                    if i < number_columns2 -1: # Dont add ', ' after last column.
-                        buffer = buffer + ','
-                        #strcat(p_db_tbl_row_search[cnt_row], ",");  # add separator token between each col.
-                        ## END if
-
-                    ## END if row_id_exists
-                ## END for i
-            # insert the return into element[cnt_row]
-            db_tbl_row_search.insert(cnt_row, buffer)  # Our table count by reference.
-            if row_id_exists == 0:
-                # We wrote this row to the return array, so increment +1
-                cnt_row += 1
-                ## END if
+    if len(db_search_value) >= 3:
+        # The search value as an FTS5 "phrase" so it is not read as a query.
+        sql_concat = "SELECT rowid, * FROM " + db_table_name + " WHERE rowid IN (SELECT rowid FROM " \
+            + db_table_name + "_fts WHERE " + db_table_name + "_fts MATCH ?) ORDER BY rowid;"
+        params = ("\"" + db_search_value.replace("\"", "\"\"") + "\"",)
+    else:
+        sql_where = []
+        for i in range(number_columns):
+            sql_where.append("instr(lower(\"" + db_tbl_col_name[i] + "\"), ?1) > 0")
+        sql_concat = "SELECT rowid, * FROM " + db_table_name + " WHERE " + " OR ".join(sql_where) + " ORDER BY rowid;"
+        params = (db_search_value.lower(),)
 
-            # else Skip this row count for return array. row_id_exists == 1.
-            row_id_exists = 0;  # Reset for next search column name.
-            ## END while (sqlite3_step())
+    return_code, p_stmt = db_prepare_bind(db, sql_concat, params)
+    if return_code != SQLITE_OK:
+        db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
+        db_session_close(db)
+        return -1
 
-        #sqlite3_bind_*()  # After sqlit3_prepare_v2()
-        #sqlite3_clear_bindings(stmt);
+    # Each row is decoded to a "col1,col2,..." string or with typed=True a
+    # tuple of Python values. See ozz_sql3.RowDecoder.
+    row_decoder = ozz_sql3.RowDecoder(id_lib_sql3, p_stmt, number_columns2)
+    while ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt) == SQLITE_ROW:
+        if typed == True:
+            row = row_decoder.decode()
+        else:
+            row = row_decoder.decode_csv()
+        db_tbl_row_search.insert(cnt_row, row)
+        cnt_row += 1
+        ## END while
 
-        # The sqlite3_finalize function destroys the prepared statement object.
-        return_code = ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt )  # Commit to the database.
-        if return_code != SQLITE_OK:  # SQLITE_OK==0
-            # This is error handling code.
-            print("Failed to finalize data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-            ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
-            return -1
-        ## END for cnt_col, loop/walk each column (field) Name.
+    # Return byref number of found rows as element[0] in the list.
+    ret_array_length.insert(0, cnt_row)
 
-    ret_array_length.insert(0, cnt_row)  # return the length of array of found rows.
+    # Reset the statement for reuse (in place of sqlite3_finalize).
+    db.stmt_cache.release(p_stmt)
 
-    # The sqlite3_close function closes the database connection.
-    return_code = ozz_sql3.sqlite3_close(id_lib_sql3, p_db)   # SQLITE_OK==0
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
     if return_code != SQLITE_OK:
         # This is error handling code. NOTE! As p_db is closed the error code may not be available!
-        print("Failed to close database: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
         return -1
 
-    print( "Successfully retrieved table search data from " + db_file_name, file=sys.stderr)  # DEBUG
+    if db_reporting:
+        db_log.info("Successfully retrieved table search data from " + db.file_name)  # DEBUG
 
     return 1
 ## END Function
@@ -2502,30 +4369,26 @@ def db_search_table_rowdata_allfields(db_file_name, db_table_name, db_tbl_row_se
 def db_insert_table_rowdata_bin(db_file_name, db_tbl_entry, bin_data, bin_data_len):
 #int db_insert_table_rowdata_bin(char *db_file_name, char *db_tbl_entry, void *bin_data, int bin_data_len)
 
-    # Get the path to the SQLite3 shared library file (dll/so).
-    f_library_sql3 = ozz_sql3.get_libsql3_path()  # Get the path for sqlite.dll/so
-
-    # Load the sqlite3 shared library. The returned ID from loading the sqlite
-    # shared library must be passed to other functions.
-    id_lib_sql3  = ozz_sql3.load_libsql3(f_library_sql3)
-
-    # sqlite3 *p_db;  # database handle (structure).
-    p_db = ozz_sql3.p_sqlite3()  # Get the sqlite3 structure.
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given. The session holds the loaded sqlite3
+    # shared library and the sqlite3 *p_db database handle (structure).
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
 
     # sqlite3_stmt *p_stmt;  # structure represents a single SQL statement
     p_stmt = ozz_sql3.p_sqlite3_stmt()  # Get the sqlite3_stmt structure.
 
     return_code = 0
 
-    p_zVfs = None  # can use NULL = None
     pzTail = None
     NULL = None
 
-    return_code = ozz_sql3.sqlite3_open_v2( id_lib_sql3, db_file_name, p_db, SQLITE_OPEN_READWRITE, p_zVfs )
+    return_code = db_session_open(db, SQLITE_OPEN_READWRITE)
     if return_code != SQLITE_OK:
         # Note: these print returns can be commented out if only the Bool return 0; is required.
-        print("Can't open database: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
         return -1
 
     # We can only send one query at a time to sqlite3.
@@ -2534,8 +4397,8 @@ def db_insert_table_rowdata_bin(db_file_name, db_tbl_entry, bin_data, bin_data_l
     # is returned.
     if return_code != SQLITE_OK:
         # This is error handling code for the sqlite3_prepare_v2 function call.
-        print("Failed to prepare data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
+        db_session_close(db)
         return -1
 
     # NOTE! bin_data must be suplied as a Python 3 byte'string' aka b'\x0b\xff ...'
@@ -2547,8 +4410,9 @@ def db_insert_table_rowdata_bin(db_file_name, db_tbl_entry, bin_data, bin_data_l
     return_code = ozz_sql3.sqlite3_bind_blob(id_lib_sql3, p_stmt, 1, bin_data, bin_data_len, SQLITE_STATIC);  # SQLITE_TRANSIENT
     if return_code != SQLITE_OK:
         # This is error handling code for the sqlite3_prepare_v2 function call.
-        fprintf(stderr, "Failed to bind data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to bind data")  # DEBUG
+        ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt)
+        db_session_close(db)
         return -1
 
     # The sqlite3_step runs the SQL statement. SQLITE_ROW return code indicates
@@ -2558,10 +4422,13 @@ def db_insert_table_rowdata_bin(db_file_name, db_tbl_entry, bin_data, bin_data_l
     # use sqlite3_step() in a loop until end of SQLITE_ROW or SQLITE_DONE.
     return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)  # run once for one statement
     #    while( sqlite3_step( stmt ) == SQLITE_ROW ) {;}
+    # Drop the cached results of the table (see db_result_cache_enable()).
+    db_result_cache_invalidate_sql(db, db_tbl_entry)
     if return_code != SQLITE_DONE:  # SQLITE_DONE==101, SQLITE_ROW==100
 
-        print( "Step failed: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Step failed")  # DEBUG
+        ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt)
+        db_session_close(db)
         return 0
 
     #sqlite3_bind_*()  # After sqlit3_prepare_v2()
@@ -2571,19 +4438,212 @@ def db_insert_table_rowdata_bin(db_file_name, db_tbl_entry, bin_data, bin_data_l
     return_code = ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt )  # Commit to the database.
     if return_code != SQLITE_OK:  # SQLITE_OK==0
         # This is error handling code.
-        print("Failed to finalize data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to finalize data")  # DEBUG
+        db_session_close(db)
         return -1
 
-    # The sqlite3_close function closes the database connection.
-    return_code = ozz_sql3.sqlite3_close(id_lib_sql3, p_db)   # SQLITE_OK==0
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
     if return_code != SQLITE_OK:
         # This is error handling code. NOTE! As p_db is closed the error code may not be available!
-        print("Failed to close database: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    if db_reporting:
+        db_log.info("Successfully inserted rowdata into table in " + db.file_name)  # DEBUG
+
+    return 1
+## END Function
+
+
+# Open a BLOB field of a row for incremental reading (or writing) as a file
+# like ozz_sql3.BlobIO object, ie. for large media files:
+# blob = db_blob_open(db, "Table", "Image", rowid)
+# buffer = bytearray(1048576)
+# while blob.readinto(buffer) > 0: ...
+# blob.close()
+# With a database file name the database stays open until blob.close().
+# Returns the BlobIO or None on an error.
+def db_blob_open(db_file_name, db_table_name, db_field_name, sql_rowid, writable=False):
+
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given.
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
+
+    if writable == True:
+        return_code = db_session_open(db, SQLITE_OPEN_READWRITE)
+    else:
+        return_code = db_session_open(db, SQLITE_OPEN_READONLY)
+    if return_code != SQLITE_OK:
+        # Note: these print returns can be commented out if only the Bool return 0; is required.
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
+        return None
+
+    # A transient session is closed when the BlobIO is closed.
+    try:
+        blob = ozz_sql3.BlobIO(id_lib_sql3, p_db, db_table_name, db_field_name, sql_rowid, writable, "main", lambda: db_session_close(db))
+    except ozz_sql3.Sql3BlobError as err:
+        db_fail_raised(err)  # DEBUG
+        return None
+
+    return blob
+## END Function
+
+
+# Insert a row with a large BLOB streamed from a file object f_source
+# (ie. open("video.mp4", "rb")) of blob_size bytes, without reading the whole
+# file into memory. The row is inserted with a zeroblob(blob_size) placeholder
+# in the field blob_field_name, which is then filled chunk_size bytes at a
+# time through a writable BlobIO, all in one transaction.
+# db_field_values is a tuple of Python values for db_field_names (can be
+# "" and () for the BLOB field only).
+# rowid_ret (optional list) returns byref the rowid of the new row.
+def db_insert_table_blob_stream(db_file_name, db_table_name, db_field_names, db_field_values, blob_field_name, f_source, blob_size, rowid_ret=None, chunk_size=1048576):
+
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given.
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
+
+    return_code = 0
+    err_ret = 1
+    cnt_bytes = 0
+
+    return_code = db_session_open(db, SQLITE_OPEN_READWRITE)
+    if return_code != SQLITE_OK:
+        # Note: these print returns can be commented out if only the Bool return 0; is required.
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    # "INSERT INTO Table (Name, Image) VALUES(?, zeroblob(?));"
+    if db_field_names != "":
+        db_field_names = db_field_names + ", "
+    sql_concat = "INSERT INTO " + db_table_name + " (" + db_field_names + blob_field_name + ") VALUES(" \
+        + "?, " * len(db_field_values) + "zeroblob(?));"
+
+    # Only BEGIN/COMMIT our own transaction when not already inside one.
+    # Inside the caller's transaction a savepoint undoes a partly written row.
+    own_transaction = ozz_sql3.sqlite3_get_autocommit(id_lib_sql3, p_db) != 0
+    if own_transaction == True:
+        return_code = db_execute(db, "BEGIN IMMEDIATE;")
+    else:
+        return_code = db_execute(db, "SAVEPOINT db_blob_stream;")
+    if return_code != SQLITE_OK:
+        db_error(id_lib_sql3, p_db, return_code, "Failed to begin transaction")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    return_code, p_stmt = db_prepare_bind(db, sql_concat, tuple(db_field_values) + (blob_size,))
+    if return_code != SQLITE_OK:
+        db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
+        err_ret = -1
+    else:
+        return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)
+        if return_code != SQLITE_DONE:  # SQLITE_DONE==101, SQLITE_ROW==100
+            db_error(id_lib_sql3, p_db, return_code, "Step failed")  # DEBUG
+            err_ret = 0
+        # Reset the statement for reuse (in place of sqlite3_finalize).
+        db.stmt_cache.release(p_stmt)
+
+    if err_ret == 1:
+        sql_rowid = ozz_sql3.sqlite3_last_insert_rowid(id_lib_sql3, p_db)
+        # One chunk buffer is reused for the whole copy.
+        buffer = bytearray(chunk_size)
+        view = memoryview(buffer)
+        try:
+            blob = ozz_sql3.BlobIO(id_lib_sql3, p_db, db_table_name, blob_field_name, sql_rowid, True)
+            try:
+                while cnt_bytes < blob_size:
+                    n = f_source.readinto(view[:min(chunk_size, blob_size - cnt_bytes)])
+                    if not n:  # Source ended before blob_size bytes.
+                        break
+                    blob.write(view[:n])
+                    cnt_bytes += n
+            finally:
+                blob.close()
+        except ozz_sql3.Sql3BlobError as err:
+            db_fail_raised(err)  # DEBUG
+            err_ret = 0
+        except OSError as err:  # Reading f_source.
+            db_fail(str(err.strerror) + " | " + str(err.errno))  # DEBUG
+            err_ret = 0
+        if err_ret == 1 and cnt_bytes != blob_size:
+            db_fail("Source ended after " + str(cnt_bytes) + " of " + str(blob_size) + " bytes.")  # DEBUG
+            err_ret = 0
+
+    if own_transaction == True:
+        if err_ret == 1:
+            return_code = db_execute(db, "COMMIT;")
+            if return_code != SQLITE_OK:
+                db_error(id_lib_sql3, p_db, return_code, "Failed to commit transaction")  # DEBUG
+                err_ret = 0
+        if err_ret != 1:
+            db_execute(db, "ROLLBACK;")  # No partly written row.
+    else:
+        if err_ret != 1:
+            db_execute(db, "ROLLBACK TO db_blob_stream;")
+        db_execute(db, "RELEASE db_blob_stream;")
+
+    # Drop the cached results of the table (see db_result_cache_enable()).
+    db_result_cache_invalidate(db, db_table_name)
+
+    if err_ret == 1 and rowid_ret is not None:
+        rowid_ret.insert(0, sql_rowid)
+
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
+    if return_code != SQLITE_OK:
+        # This is error handling code. NOTE! As p_db is closed the error code may not be available!
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    if err_ret == 1:
+        if db_reporting:
+            db_log.info("Successfully inserted " + str(cnt_bytes) + " byte BLOB into table in " + db.file_name)  # DEBUG
+
+    return err_ret
+## END Function
+
+
+# Copy a BLOB field of a row to the file object f_dest (ie. open("out.mp4", "wb"))
+# chunk_size bytes at a time, reading each chunk directly into one reused
+# buffer. number_bytes_ret (optional list) returns byref the bytes copied.
+def db_read_table_blob_stream(db_file_name, db_table_name, blob_field_name, sql_rowid, f_dest, number_bytes_ret=None, chunk_size=1048576):
+
+    cnt_bytes = 0
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+
+    blob = db_blob_open(db_file_name, db_table_name, blob_field_name, sql_rowid)
+    if blob is None:
         return -1
 
-    print( "Successfully inserted rowdata into table in " + db_file_name, file=sys.stderr)  # DEBUG
+    try:
+        n = blob.readinto(view)
+        while n > 0:
+            f_dest.write(view[:n])
+            cnt_bytes += n
+            n = blob.readinto(view)
+    except ozz_sql3.Sql3BlobError as err:
+        db_fail_raised(err)  # DEBUG
+        blob.close()
+        return 0
+    except OSError as err:  # Writing f_dest.
+        db_fail(str(err.strerror) + " | " + str(err.errno))  # DEBUG
+        blob.close()
+        return 0
+
+    blob.close()
+
+    if number_bytes_ret is not None:
+        number_bytes_ret.insert(0, cnt_bytes)
 
     return 1
 ## END Function
@@ -2606,27 +4666,26 @@ def db_insert_table_rowdata_bin(db_file_name, db_tbl_entry, bin_data, bin_data_l
 # data = (const char*)sqlite3_column_text( stmt, 0 );
 #        printf( "%s\n", data ? data : "[NULL]" );
 # Note that number_elements should generally return number_rows.
+# The caller must create variant_structure with a dict for every cell of the
+# table beforehand. See db_list_table_variant() for a compact container that
+# grows as rows are read.
 def db_list_table_all_types(db_file_name, db_table_name, variant_structure, number_columns, number_rows, ret_number_fields, ret_number_elements):
 
     number_columns = number_columns  # not used at this time
     number_rows = number_rows  # not used at this time
 
-    # Get the path to the SQLite3 shared library file (dll/so).
-    f_library_sql3 = ozz_sql3.get_libsql3_path()  # Get the path for sqlite.dll/so
-
-    # Load the sqlite3 shared library. The returned ID from loading the sqlite
-    # shared library must be passed to other functions.
-    id_lib_sql3  = ozz_sql3.load_libsql3(f_library_sql3)
-
-    # sqlite3 *p_db;  # database handle (structure).
-    p_db = ozz_sql3.p_sqlite3()  # Get the sqlite3 structure.
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given. The session holds the loaded sqlite3
+    # shared library and the sqlite3 *p_db database handle (structure).
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
 
     # sqlite3_stmt *p_stmt;  # structure represents a single SQL statement
     p_stmt = ozz_sql3.p_sqlite3_stmt()  # Get the sqlite3_stmt structure.
 
     return_code = 0
 
-    p_zVfs = None  # can use NULL = None
     pzTail = None
     NULL = None
 
@@ -2645,11 +4704,11 @@ def db_list_table_all_types(db_file_name, db_table_name, variant_structure, numb
     max_cols = 0
     num_rows = 0
 
-    return_code = ozz_sql3.sqlite3_open_v2( id_lib_sql3, db_file_name, p_db, SQLITE_OPEN_READONLY, p_zVfs )
+    return_code = db_session_open(db, SQLITE_OPEN_READONLY)
     if return_code != SQLITE_OK:
         # Note: these print returns can be commented out if only the Bool return 0; is required.
-        print("Can't open database: " + ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
         return -1
 
     # "select * from TableName"
@@ -2661,8 +4720,8 @@ def db_list_table_all_types(db_file_name, db_table_name, variant_structure, numb
     return_code = ozz_sql3.sqlite3_prepare_v2(id_lib_sql3, p_db, sql_concat, -1, p_stmt, pzTail)
     if return_code != SQLITE_OK:
         # This is error handling code for the sqlite3_prepare_v2 function call.
-        print("Failed to prepare data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
+        db_session_close(db)
         return -1
 
     while ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt) != SQLITE_DONE:  # or == SQLITE_OK
@@ -2678,7 +4737,6 @@ def db_list_table_all_types(db_file_name, db_table_name, variant_structure, numb
                 # use this data structure were we test for null as an empty element
                 # or as and empty type
                 variant_structure[num_rows][i]['typeof'] = IS_NULL
-                ozz_sql3.sqlite3_column_text(id_lib_sql3, p_stmt, i)
                 variant_structure[num_rows][i]['data'] = None
 
             elif caseis == SQLITE_INTEGER:
@@ -2729,21 +4787,402 @@ def db_list_table_all_types(db_file_name, db_table_name, variant_structure, numb
     return_code = ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt )  # Commit to the database.
     if return_code != SQLITE_OK:  # SQLITE_OK==0
         # This is error handling code.
-        print("Failed to finalize data: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to finalize data")  # DEBUG
+        db_session_close(db)
         return -1
 
-    # The sqlite3_close function closes the database connection.
-    return_code = ozz_sql3.sqlite3_close(id_lib_sql3, p_db)   # SQLITE_OK==0
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
     if return_code != SQLITE_OK:
         # This is error handling code. NOTE! As p_db is closed the error code may not be available!
-        print("Failed to close database: " + str(ozz_sql3.sqlite3_errmsg(id_lib_sql3, p_db)) + " | " + str(return_code), file=sys.stderr)  # DEBUG
-        ozz_sql3.sqlite3_close(id_lib_sql3, p_db)
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        db_session_close(db)
         return -1
 
     return 1
     ## END Function
 
 
+# List all rows of mixed data types into an ozz_sql3.VariantTable.
+# The same as db_list_table_all_types() (column 0 is the rowid) but the values
+# are kept in per column typed arrays with a type tag byte for each cell,
+# rather than a dict for each cell, and the table grows as rows are read so
+# the number of rows is not needed beforehand.
+# variant_table_ret (list) returns byref the VariantTable:
+# variant_table_ret = []
+# example_sql3.db_list_table_variant("Example_DB.db", "Table", variant_table_ret)
+# variant_table = variant_table_ret[0]
+# for j in range(len(variant_table)):
+#     for i in range(variant_table.number_columns):
+#         if variant_table.typeof(j, i) == IS_TEXT: print(variant_table[j, i])
+# Returns 1 on success or -1 on an error.
+def db_list_table_variant(db_file_name, db_table_name, variant_table_ret):
+
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given.
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
+    err_ret = 1
+
+    return_code = db_session_open(db, SQLITE_OPEN_READONLY)
+    if return_code != SQLITE_OK:
+        # Note: these print returns can be commented out if only the Bool return 0; is required.
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    sql_concat = "SELECT rowid, * FROM " + db_table_name + ";"
+    return_code, p_stmt = db_prepare_bind(db, sql_concat, ())
+    if return_code != SQLITE_OK:
+        db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
+        db_session_close(db)
+        return -1
+
+    variant_table = ozz_sql3.VariantTable(ozz_sql3.sqlite3_column_count(id_lib_sql3, p_stmt))
+    return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)
+    while return_code == SQLITE_ROW:
+        variant_table.append_stmt_row(id_lib_sql3, p_stmt)
+        return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)
+        ## END while
+
+    if return_code != SQLITE_DONE:  # SQLITE_DONE==101, SQLITE_ROW==100
+        db_error(id_lib_sql3, p_db, return_code, "Step failed")  # DEBUG
+        err_ret = -1
+
+    # Reset the statement for reuse (in place of sqlite3_finalize).
+    db.stmt_cache.release(p_stmt)
+
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
+    if return_code != SQLITE_OK:
+        # This is error handling code. NOTE! As p_db is closed the error code may not be available!
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        return -1
+
+    if err_ret == 1:
+        variant_table_ret.insert(0, variant_table)
+    return err_ret
+## END Function
+
+
+# Columnar fetch of numeric query results.
+# Where db_list_table_all_types() switches on sqlite3_column_type() for every
+# cell and stores each value separately, this reads whole numeric columns into
+# array.array buffers. dtypes has a type code for each result column:
+# 'q' = 64-bit integer (sqlite3_column_int64), 'd' = double (sqlite3_column_double)
+# columns = example_sql3.fetch_columns(db, "SELECT Week, Hours FROM Tracker;", "qd")
+# columns[0] -> array('q', [1, 1, 2, ...]), columns[1] -> array('d', [7.5, ...])
+#
+# Each column is read straight into a preallocated chunk_size buffer, with
+# no type test or Python object per row, and the chunk is then appended to
+# the result in one block copy. array.array supports the buffer protocol, so
+# memoryview(columns[0]) or numpy.frombuffer(columns[0]) use the data without
+# a copy. With as_numpy=True NumPy arrays are returned (as zero copy views of
+# the array.array buffers) if NumPy is installed.
+# NULL values are read as 0 / 0.0 (the sqlite3_column_*() conversion).
+# params is a tuple of values for any ? parameters in sql_query.
+# Returns the list of columns, or None on an error.
+def fetch_columns(db_file_name, sql_query, dtypes, chunk_size=65536, params=(), as_numpy=False):
+
+    # Use the open Database session, or a session for this call only if a
+    # database file name was given.
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
+
+    return_code = 0
+    err_ret = 1
+
+    for dtype in dtypes:
+        if dtype not in ("q", "d"):
+            db_fail("Column type code must be 'q' or 'd': " + str(dtype))  # DEBUG
+            return None
+
+    return_code = db_session_open(db, SQLITE_OPEN_READONLY)
+    if return_code != SQLITE_OK:
+        # Note: these print returns can be commented out if only the Bool return 0; is required.
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
+        return None
+
+    return_code, p_stmt = db_prepare_bind(db, sql_query, params)
+    if return_code != SQLITE_OK:
+        db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
+        db_session_close(db)
+        return None
+
+    if ozz_sql3.sqlite3_column_count(id_lib_sql3, p_stmt) < len(dtypes):
+        db_fail("Query returns fewer columns than dtypes: " + sql_query)  # DEBUG
+        db.stmt_cache.release(p_stmt)
+        db_session_close(db)
+        return None
+
+    # Result columns, and a preallocated chunk buffer and C read function for each.
+    columns = []
+    fetch_list = []  # (column index, chunk buffer, sqlite3_column_*)
+    for i in range(len(dtypes)):
+        columns.append(array.array(dtypes[i]))
+        chunk_buffer = array.array(dtypes[i], bytes(columns[i].itemsize * chunk_size))
+        if dtypes[i] == "q":
+            fetch_list.append((i, chunk_buffer, id_lib_sql3.sqlite3_column_int64))
+        else:
+            fetch_list.append((i, chunk_buffer, id_lib_sql3.sqlite3_column_double))
+
+    sqlite3_step = id_lib_sql3.sqlite3_step
+    cnt_row = 0  # Rows in the current chunk.
+    return_code = sqlite3_step(p_stmt)
+    while return_code == SQLITE_ROW:
+        for i, chunk_buffer, column_value in fetch_list:
+            chunk_buffer[cnt_row] = column_value(p_stmt, i)
+        cnt_row += 1
+        if cnt_row == chunk_size:
+            for i, chunk_buffer, column_value in fetch_list:
+                columns[i].frombytes(memoryview(chunk_buffer).cast("B"))
+            cnt_row = 0
+        return_code = sqlite3_step(p_stmt)
+        ## END while
+
+    # Copy the last (part) chunk.
+    for i, chunk_buffer, column_value in fetch_list:
+        columns[i].frombytes(memoryview(chunk_buffer).cast("B")[:cnt_row * chunk_buffer.itemsize])
+
+    if return_code != SQLITE_DONE:  # SQLITE_DONE==101, SQLITE_ROW==100
+        db_error(id_lib_sql3, p_db, return_code, "Step failed")  # DEBUG
+        err_ret = 0
+
+    # Reset the statement for reuse (in place of sqlite3_finalize).
+    db.stmt_cache.release(p_stmt)
+
+    # Close the database connection (only if it was opened for this call).
+    return_code = db_session_close(db)  # SQLITE_OK==0
+    if return_code != SQLITE_OK:
+        # This is error handling code. NOTE! As p_db is closed the error code may not be available!
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        return None
+
+    if err_ret != 1:
+        return None
+
+    if as_numpy == True:
+        try:
+            import numpy
+        except ImportError:
+            if db_reporting:
+                db_log.warning("NumPy is not installed, returning array.array columns.")  # DEBUG
+            return columns
+        # frombuffer() shares the array.array memory (no copy).
+        return [numpy.frombuffer(column, dtype=(numpy.int64 if column.typecode == "q" else numpy.float64)) for column in columns]
+
+    return columns
+## END Function
+
+
+# The loaded sqlite3 library of a parallel scan worker process, loaded once per
+# process by parallel_scan_init() (the ProcessPoolExecutor initializer).
+parallel_scan_lib = None
+
+def parallel_scan_init():
+    global parallel_scan_lib
+    parallel_scan_lib = ozz_sql3.load_libsql3(ozz_sql3.get_libsql3_path())
+    return None
+
+# Read the rows of one rowid range, rowid_start <= rowid < rowid_end (or
+# rowid_start <= rowid with rowid_end None), on a read only connection of its own. This is run in the worker processes of
+# db_parallel_scan() and must be a module level function so that it can be
+# sent to the process.
+# Returns (return_code, rows). return_code is 1 on success or -1 on an error.
+def parallel_scan_range(db_file_name, db_table_name, rowid_start, rowid_end, db_where, params, as_text):
+    if parallel_scan_lib is None:
+        parallel_scan_init()
+    db = Database(db_file_name, SQLITE_OPEN_READONLY, parallel_scan_lib)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
+    rows = []
+    err_ret = 1
+
+    return_code = db.open()
+    if return_code != SQLITE_OK:
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db.close()
+        return -1, rows
+
+    sql_concat = "SELECT rowid, * FROM " + db_table_name + " WHERE rowid >= ?"
+    range_params = (rowid_start,)
+    if rowid_end is not None:
+        sql_concat = sql_concat + " AND rowid < ?"
+        range_params = (rowid_start, rowid_end)
+    if db_where is not None:
+        sql_concat = sql_concat + " AND (" + db_where + ")"
+    sql_concat = sql_concat + " ORDER BY rowid;"
+
+    return_code, p_stmt = db_prepare_bind(db, sql_concat, range_params + tuple(params))
+    if return_code != SQLITE_OK:
+        db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
+        db.close()
+        return -1, rows
+
+    row_decoder = ozz_sql3.RowDecoder(id_lib_sql3, p_stmt)
+    if as_text == True:
+        decode_row = row_decoder.decode_text
+    else:
+        decode_row = row_decoder.decode
+    return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)
+    while return_code == SQLITE_ROW:
+        rows.append(decode_row())
+        return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)
+        ## END while (sqlite3_step())
+
+    if return_code != SQLITE_DONE:  # SQLITE_DONE==101, SQLITE_ROW==100
+        db_error(id_lib_sql3, p_db, return_code, "Step failed")  # DEBUG
+        err_ret = -1
+    db.stmt_cache.release(p_stmt)
+
+    return_code = db.close()
+    if return_code != SQLITE_OK:
+        db_error(id_lib_sql3, p_db, return_code, "Failed to close database")  # DEBUG
+        err_ret = -1
+    return err_ret, rows
+## END Function
+
+
+# Scan a named table in parallel (generator), for reporting over large
+# database files where a single scan is limited to one CPU core.
+# The table is split into rowid ranges of chunk_size rows, found as they are
+# needed with "SELECT rowid ... WHERE rowid >= start ORDER BY rowid LIMIT 1
+# OFFSET chunk_size" (the rowid at which the next range starts), so a table
+# with sparse rowids has no empty ranges. The last range has no upper bound.
+# Each range is read by one of workers processes (default
+# os.cpu_count()) on its own read only connection, see parallel_scan_range().
+# Rows are yielded as tuples (rowid, col1, col2, ...) of Python values, or
+# with as_text=True the text of every column (None for NULL).
+#
+# db_where is an optional SQL condition with ? parameters bound from params:
+# for row in example_sql3.db_parallel_scan("Example_DB.db", "Hrs_worked_Tracker", "Name LIKE ?", ("%Joe%",), 4):
+#     print(row)
+#
+# With ordered=True the rows are yielded in rowid order. With ordered=False
+# each range is yielded as soon as it is read (ranges are not in order but the
+# rows within a range are). At most 2 ranges per worker are read ahead, so
+# memory is bounded by the chunk size rather than the table size.
+# workers=1 reads the ranges in this process without a process pool.
+# Rows inserted or deleted during the scan can change the size of the ranges.
+# return_code_ret (optional list) returns byref 1 when all ranges have been
+# read or -1 on an error.
+#
+# NOTE! On Windows (spawn) the calling script must use the
+# if __name__ == '__main__': guard, as the worker processes import it.
+def db_parallel_scan(db_file_name, db_table_name, db_where=None, params=(), workers=None, chunk_size=100000, ordered=True, as_text=False, return_code_ret=None):
+
+    # The worker processes open the database file by name, so a Database
+    # session is only used here to find the rowid ranges.
+    db = db_session(db_file_name)
+    id_lib_sql3 = db.id_lib_sql3
+    p_db = db.p_db
+    err_ret = -1
+
+    if chunk_size < 1:
+        chunk_size = 1
+
+    return_code = db_session_open(db, SQLITE_OPEN_READONLY)
+    if return_code != SQLITE_OK:
+        db_error(id_lib_sql3, p_db, return_code, "Can't open database")  # DEBUG
+        db_session_close(db)
+        if return_code_ret is not None:
+            return_code_ret.insert(0, err_ret)
+        return
+
+    # Generator of the (rowid_start, rowid_end) ranges, rowid_end None for
+    # the last range. Sets range_error[0] = 1 if a range could not be found.
+    range_error = [0]
+    def scan_ranges():
+        sql_concat = "SELECT rowid FROM " + db_table_name + " WHERE rowid >= ? ORDER BY rowid LIMIT 1 OFFSET ?;"
+        rowid_start = -9223372036854775808
+        offset = 0  # The first range starts at the first rowid.
+        while True:
+            return_code, p_stmt = db_prepare_bind(db, sql_concat, (rowid_start, offset))
+            if return_code != SQLITE_OK:
+                db_error(id_lib_sql3, p_db, return_code, "Failed to prepare data")  # DEBUG
+                range_error[0] = 1
+                return
+            return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)
+            rowid_next = None
+            if return_code == SQLITE_ROW:
+                rowid_next = ozz_sql3.sqlite3_column_int64(id_lib_sql3, p_stmt, 0)
+            db.stmt_cache.release(p_stmt)
+            if return_code != SQLITE_ROW and return_code != SQLITE_DONE:
+                db_error(id_lib_sql3, p_db, return_code, "Step failed")  # DEBUG
+                range_error[0] = 1
+                return
+            if offset == 0:
+                if rowid_next is None:  # Empty table.
+                    return
+            else:
+                yield (rowid_start, rowid_next)
+                if rowid_next is None:
+                    return
+            rowid_start = rowid_next
+            offset = chunk_size
+            ## END while ranges
+        return
+
+    ranges = scan_ranges()
+    scan_args = (db.file_name, db_table_name)
+    scan_where = (db_where, tuple(params), as_text)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        try:
+            for rowid_start, rowid_end in ranges:
+                return_code, rows = parallel_scan_range(*scan_args, rowid_start, rowid_end, *scan_where)
+                if return_code != 1:
+                    return
+                for row in rows:
+                    yield row
+            if range_error[0] == 0:
+                err_ret = 1
+        finally:
+            ranges.close()
+            db_session_close(db)
+            if return_code_ret is not None:
+                return_code_ret.insert(0, err_ret)
+        return
+
+    executor = concurrent.futures.ProcessPoolExecutor(workers, initializer=parallel_scan_init)
+    try:
+        pending = collections.deque()  # Futures in rowid order.
+        scan_range = next(ranges, None)
+        while scan_range is not None or len(pending) > 0:
+            # Keep up to 2 ranges per worker queued or running.
+            while scan_range is not None and len(pending) < workers * 2:
+                pending.append(executor.submit(parallel_scan_range, *scan_args, scan_range[0], scan_range[1], *scan_where))
+                scan_range = next(ranges, None)
+            if len(pending) == 0:
+                break
+            if ordered == True:
+                future = pending.popleft()
+            else:
+                done, not_done = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                future = done.pop()
+                pending.remove(future)
+            return_code, rows = future.result()
+            if return_code != 1:
+                return
+            for row in rows:
+                yield row
+            ## END while ranges
+        if range_error[0] == 0:
+            err_ret = 1
+    finally:
+        # Also stops the workers if the generator is closed before the end.
+        executor.shutdown(wait=True, cancel_futures=True)
+        ranges.close()
+        db_session_close(db)
+        if return_code_ret is not None:
+            return_code_ret.insert(0, err_ret)
+    return
+## END Function
+
 
 # ====> Convenience helper functions
@@ -50,7 +50,8 @@
 # https://gist.github.com/michalc/a3147997e21665896836e0f4157975cb
 #-------------------------------------------------------------------------------
 
-import ctypes, sys, os
+import ctypes, sys, os, time
+import array, collections, io, threading
 
 ## ====>> Error Constants
 # Beware of name conflicts!
@@ -79,29 +80,189 @@ def p_sqlite3_stmt():  # p_stmt
     return ctypes.POINTER(sqlite3_stmt)()  # Create a C pointer to the class (struct)
 
 
+# Create an sqlite3_blob class (struct)
+## CAPI3REF: A Handle To An Open BLOB
+# typedef struct sqlite3_blob sqlite3_blob;
+class sqlite3_blob(ctypes.Structure):
+    _fields_ = ()  # opaque structure
+def p_sqlite3_blob():  # p_blob
+    return ctypes.POINTER(sqlite3_blob)()  # Create a C pointer to the class (struct)
+
+
+# Create an sqlite3_backup class (struct)
+## CAPI3REF: Online Backup Object
+# typedef struct sqlite3_backup sqlite3_backup;
+class sqlite3_backup(ctypes.Structure):
+    _fields_ = ()  # opaque structure
+def p_sqlite3_backup():  # p_backup
+    return ctypes.POINTER(sqlite3_backup)()  # Create a C pointer to the class (struct)
+
+
+## CAPI3REF: SQL Trace Hook callback
+# int(*xCallback)(unsigned,void*,void*,void*) for sqlite3_trace_v2().
+# A Python function is converted with SQLITE_TRACE_CALLBACK(py_function) and
+# the returned object must be kept (referenced) for as long as it is registered.
+SQLITE_TRACE_CALLBACK = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_uint, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p)
+
+
 ## ====>> Load SQLite 3 library
 
 # The correct library path must be provided here.
 # For a more generalised application you can provide the paths in main() and
 # pass as arguments.
+# The library is searched for once and the path is kept in libsql3_path.
+# ctypes.util.find_library() finds the installed library by its versioned
+# name (ie. "libsqlite3.so.0"), so the unversioned "libsqlite3.so" link from
+# the -dev package is not required. It is only imported when first needed as
+# importing it (and searching) takes milliseconds.
+libsql3_path = None
+
 def get_libsql3_path():
+    global libsql3_path
+    if libsql3_path is not None:
+        return libsql3_path
     #print(sys.path)
     #print(sys.path[0])
     # for windows
     if os.name == 'nt':
         f_library_sql3 = os.path.join(sys.path[0], "sqlite3.dll")
         #f_library_sql3 = "D:\\SQLite3Tests\\Py\\sqlite3.dll"
+        if not os.path.isfile(f_library_sql3):  # Not in the project directory.
+            import ctypes.util
+            f_library_sql3 = ctypes.util.find_library("sqlite3") or f_library_sql3
     # for mac and linux
     elif os.name == 'posix':
         #f_library_sql3 = os.path.join(sys.path[0], "libsqlite3.so.0.8.6")  # Not recommended
-        f_library_sql3 = "libsqlite3.so"
+        import ctypes.util
+        f_library_sql3 = ctypes.util.find_library("sqlite3") or "libsqlite3.so"
     else:  # Other OS
         return -1  # OS not defined
+    libsql3_path = f_library_sql3
     return f_library_sql3
 
+
+## ====>> SQLite3 C function prototypes
+# The argtypes/restype for each C function we call from the shared library.
+# Previously every wrapper function below re-assigned .argtypes and .restype
+# on each call, which is repeated work inside tight sqlite3_step() loops.
+# The prototypes are now applied a single time, when each function is first
+# used (see SQLite3Library), and the wrappers only make the call.
+# Format: "function_name" : ([argtypes], restype)
+# An argtypes of None means the C function takes no arguments (aka function(void);)
+SQL3_PROTOTYPES = {
+    # Library version, errors
+    "sqlite3_libversion_number" : (None, ctypes.c_int),
+    "sqlite3_libversion" : (None, ctypes.c_char_p),
+    "sqlite3_errmsg" : ([ctypes.c_void_p], ctypes.c_char_p),
+    # Open, close
+    "sqlite3_open" : ([ctypes.c_char_p, ctypes.POINTER(ctypes.POINTER(sqlite3))], ctypes.c_int),
+    "sqlite3_open_v2" : ([ctypes.c_char_p, ctypes.POINTER(ctypes.POINTER(sqlite3)), ctypes.c_int, ctypes.c_void_p], ctypes.c_int),
+    "sqlite3_close" : ([ctypes.c_void_p], ctypes.c_int),
+    "sqlite3_close_v2" : ([ctypes.c_void_p], ctypes.c_int),
+    # Prepare, step, reset, finalize
+    ## Check pzTail ctypes.POINTER(ctypes.c_char_p), ctypes.byref(pzTail) ?
+    "sqlite3_prepare_v2" : ([ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int, ctypes.POINTER(ctypes.POINTER(sqlite3_stmt)), ctypes.c_void_p], ctypes.c_int),
+    "sqlite3_prepare_v3" : ([ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int, ctypes.c_int, ctypes.POINTER(ctypes.POINTER(sqlite3_stmt)), ctypes.c_void_p], ctypes.c_int),
+    "sqlite3_step" : ([ctypes.c_void_p], ctypes.c_int),
+    "sqlite3_reset" : ([ctypes.c_void_p], ctypes.c_int),
+    "sqlite3_clear_bindings" : ([ctypes.c_void_p], ctypes.c_int),
+    "sqlite3_finalize" : ([ctypes.c_void_p], ctypes.c_int),
+    # Bind values
+    # Destructor flag [SQLITE_STATIC | SQLITE_TRANSIENT] is passed as a void* value.
+    "sqlite3_bind_blob" : ([ctypes.POINTER(sqlite3_stmt), ctypes.c_int, ctypes.c_void_p, ctypes.c_int, ctypes.c_void_p], ctypes.c_int),
+    "sqlite3_bind_double" : ([ctypes.POINTER(sqlite3_stmt), ctypes.c_int, ctypes.c_double], ctypes.c_int),
+    "sqlite3_bind_int" : ([ctypes.POINTER(sqlite3_stmt), ctypes.c_int, ctypes.c_int], ctypes.c_int),
+    "sqlite3_bind_int64" : ([ctypes.POINTER(sqlite3_stmt), ctypes.c_int, ctypes.c_longlong], ctypes.c_int),
+    "sqlite3_bind_null" : ([ctypes.POINTER(sqlite3_stmt), ctypes.c_int], ctypes.c_int),
+    "sqlite3_bind_text" : ([ctypes.POINTER(sqlite3_stmt), ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_void_p], ctypes.c_int),
+    "sqlite3_bind_zeroblob" : ([ctypes.POINTER(sqlite3_stmt), ctypes.c_int, ctypes.c_int], ctypes.c_int),
+    "sqlite3_bind_zeroblob64" : ([ctypes.POINTER(sqlite3_stmt), ctypes.c_int, ctypes.c_uint64], ctypes.c_int),
+    # Result set columns
+    "sqlite3_column_count" : ([ctypes.POINTER(sqlite3_stmt)], ctypes.c_int),
+    "sqlite3_column_name" : ([ctypes.POINTER(sqlite3_stmt), ctypes.c_int], ctypes.c_char_p),
+    "sqlite3_column_database_name" : ([ctypes.POINTER(sqlite3_stmt), ctypes.c_int], ctypes.c_char_p),
+    "sqlite3_column_table_name" : ([ctypes.POINTER(sqlite3_stmt), ctypes.c_int], ctypes.c_char_p),
+    "sqlite3_column_origin_name" : ([ctypes.POINTER(sqlite3_stmt), ctypes.c_int], ctypes.c_char_p),
+    "sqlite3_column_decltype" : ([ctypes.POINTER(sqlite3_stmt), ctypes.c_int], ctypes.c_char_p),
+    # Result values
+    "sqlite3_column_blob" : ([ctypes.c_void_p, ctypes.c_int], ctypes.c_void_p),  # c_ubyte ctypes.c_char_p
+    "sqlite3_column_double" : ([ctypes.c_void_p, ctypes.c_int], ctypes.c_double),
+    "sqlite3_column_int" : ([ctypes.c_void_p, ctypes.c_int], ctypes.c_int),
+    "sqlite3_column_int64" : ([ctypes.c_void_p, ctypes.c_int], ctypes.c_longlong),
+    "sqlite3_column_text" : ([ctypes.c_void_p, ctypes.c_int], ctypes.c_char_p),  # ctypes.POINTER(c_ubyte)?
+    "sqlite3_column_bytes" : ([ctypes.c_void_p, ctypes.c_int], ctypes.c_int),
+    "sqlite3_column_type" : ([ctypes.c_void_p, ctypes.c_int], ctypes.c_int),
+    # Incremental BLOB I/O
+    "sqlite3_blob_open" : ([ctypes.c_void_p, ctypes.c_char_p, ctypes.c_char_p, ctypes.c_char_p, ctypes.c_longlong, ctypes.c_int, ctypes.POINTER(ctypes.POINTER(sqlite3_blob))], ctypes.c_int),
+    "sqlite3_blob_reopen" : ([ctypes.POINTER(sqlite3_blob), ctypes.c_longlong], ctypes.c_int),
+    "sqlite3_blob_close" : ([ctypes.POINTER(sqlite3_blob)], ctypes.c_int),
+    "sqlite3_blob_bytes" : ([ctypes.POINTER(sqlite3_blob)], ctypes.c_int),
+    "sqlite3_blob_read" : ([ctypes.POINTER(sqlite3_blob), ctypes.c_void_p, ctypes.c_int, ctypes.c_int], ctypes.c_int),
+    "sqlite3_blob_write" : ([ctypes.POINTER(sqlite3_blob), ctypes.c_void_p, ctypes.c_int, ctypes.c_int], ctypes.c_int),
+    # Online backup
+    "sqlite3_backup_init" : ([ctypes.c_void_p, ctypes.c_char_p, ctypes.c_void_p, ctypes.c_char_p], ctypes.POINTER(sqlite3_backup)),
+    "sqlite3_backup_step" : ([ctypes.POINTER(sqlite3_backup), ctypes.c_int], ctypes.c_int),
+    "sqlite3_backup_finish" : ([ctypes.POINTER(sqlite3_backup)], ctypes.c_int),
+    "sqlite3_backup_remaining" : ([ctypes.POINTER(sqlite3_backup)], ctypes.c_int),
+    "sqlite3_backup_pagecount" : ([ctypes.POINTER(sqlite3_backup)], ctypes.c_int),
+    # Misc
+    "sqlite3_sleep" : ([ctypes.c_int], ctypes.c_int),
+    "sqlite3_db_handle" : ([ctypes.c_void_p], ctypes.c_void_p),
+    "sqlite3_next_stmt" : ([ctypes.c_void_p, ctypes.c_void_p], ctypes.c_void_p),
+    "sqlite3_last_insert_rowid" : ([ctypes.c_void_p], ctypes.c_longlong),
+    "sqlite3_get_autocommit" : ([ctypes.c_void_p], ctypes.c_int),
+    "sqlite3_changes" : ([ctypes.c_void_p], ctypes.c_int),
+    "sqlite3_interrupt" : ([ctypes.c_void_p], None),
+    "sqlite3_sql" : ([ctypes.c_void_p], ctypes.c_char_p),
+    "sqlite3_trace_v2" : ([ctypes.c_void_p, ctypes.c_uint, SQLITE_TRACE_CALLBACK, ctypes.c_void_p], ctypes.c_int),
+    # The callback and errmsg arguments are only passed as NULL (None).
+    "sqlite3_exec" : ([ctypes.c_void_p, ctypes.c_char_p, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p], ctypes.c_int),
+    ## ctypes.c_char_p will accept string or ctypes but wont accept None
+    ## None (or Null.pointer) requires ctypes.c_void_p
+    "sqlite3_table_column_metadata" : ([ctypes.c_void_p, \
+        ctypes.c_void_p, \
+        ctypes.c_void_p, \
+        ctypes.c_void_p, \
+        ctypes.POINTER(ctypes.c_char_p), \
+        ctypes.POINTER(ctypes.c_char_p), \
+        ctypes.POINTER(ctypes.c_int), \
+        ctypes.POINTER(ctypes.c_int), \
+        ctypes.POINTER(ctypes.c_int)], ctypes.c_int),
+    }
+
+
+# The loaded shared library (CDLL) with the SQL3_PROTOTYPES applied.
+# Each C function is looked up in the library the first time it is used, its
+# prototype (if any) is applied and the typed function is kept as an
+# attribute, so later id_lib_sql3.sqlite3_step(...) etc. are plain calls with
+# no per call setup and functions that are never used cost nothing.
+# The function is only made an attribute once it is typed, so another thread
+# can't get it untyped. Functions not exported by an older library version
+# raise AttributeError when used.
+class SQLite3Library(ctypes.CDLL):
+    def __getattr__(self, func_name):
+        if func_name.startswith('__') and func_name.endswith('__'):
+            raise AttributeError(func_name)
+        c_function = self[func_name]  # AttributeError if not exported.
+        prototype = SQL3_PROTOTYPES.get(func_name)
+        if prototype is not None:
+            c_function.argtypes, c_function.restype = prototype
+        setattr(self, func_name, c_function)
+        return c_function
+
+
+# The loaded libraries, one for each library path.
+libsql3_loaded = {}
+
 # Load the shared library with the file location from above.
+# The library is only loaded once, later calls with the same file location
+# return the same SQLite3Library (ctypes.CDLL).
 def load_libsql3(f_library_sql3):
-    return ctypes.cdll.LoadLibrary(f_library_sql3)
+    id_lib_sql3 = libsql3_loaded.get(f_library_sql3)
+    if id_lib_sql3 is None:
+        # setdefault() keeps the first if two threads load at the same time.
+        id_lib_sql3 = libsql3_loaded.setdefault(f_library_sql3, SQLite3Library(f_library_sql3))
+    return id_lib_sql3
 
 # Not tested!
 # hlib_sql3. Only used for direct OS operations.
@@ -128,8 +289,6 @@ def load_libsql3(f_library_sql3):
 
 # SQLITE_API const char *sqlite3_errmsg(sqlite3*);
 def sqlite3_errmsg(id_lib_sql3, p_db):
-    id_lib_sql3.sqlite3_errmsg.argtypes = [ctypes.c_void_p]
-    id_lib_sql3.sqlite3_errmsg.restype = ctypes.c_char_p
 
     return id_lib_sql3.sqlite3_errmsg(p_db).decode('utf-8')
 
@@ -137,17 +296,11 @@ def sqlite3_errmsg(id_lib_sql3, p_db):
 # int sqlite3_libversion_number(void);
 def sqlite3_libversion_number(id_lib_sql3):
 
-    id_lib_sql3.sqlite3_libversion_number.argtypes = None  # No arguments are sent to the C function (aka function(void);)
-    id_lib_sql3.sqlite3_libversion_number.restype = ctypes.c_int  # returns int = ctypes.ctypes.c_int
-
     return id_lib_sql3.sqlite3_libversion_number()
 
 # const char *sqlite3_libversion(void);
 def sqlite3_libversion(id_lib_sql3):
 
-    id_lib_sql3.sqlite3_libversion.argtypes = None  # No arguments are sent to the C function (aka function(void);)
-    id_lib_sql3.sqlite3_libversion.restype = ctypes.c_char_p  # returns char* = ctypes.c_char_p
-
     return id_lib_sql3.sqlite3_libversion().decode('utf-8')  # Convert b'' to utf-8 str
 
 
@@ -167,9 +320,6 @@ def sqlite3_libversion(id_lib_sql3):
 #       );
 def sqlite3_open(id_lib_sql3, db_filename, pp_db):
 
-    id_lib_sql3.sqlite3_open.argtypes = [ctypes.c_char_p, ctypes.POINTER(ctypes.POINTER(sqlite3))]
-    id_lib_sql3.sqlite3_open.restype = ctypes.c_int
-
     # Returns sqlite3 result codes or error code.
     return id_lib_sql3.sqlite3_open(db_filename.encode('utf-8'), ctypes.byref(pp_db))
 
@@ -183,9 +333,6 @@ def sqlite3_open(id_lib_sql3, db_filename, pp_db):
 # flags [SQLITE_OPEN_READONLY [SQLITE_OPEN_READWRITE | SQLITE_OPEN_CREATE]]
 def sqlite3_open_v2(id_lib_sql3, db_filename, pp_db, flags, p_zVfs):
 
-    id_lib_sql3.sqlite3_open_v2.argtypes = [ctypes.c_char_p, ctypes.POINTER(ctypes.POINTER(sqlite3)), ctypes.c_int, ctypes.c_void_p]
-    id_lib_sql3.sqlite3_open_v2.restype = ctypes.c_int
-
     # Returns sqlite3 result codes or error code.
     return id_lib_sql3.sqlite3_open_v2(db_filename.encode('utf-8'), ctypes.byref(pp_db), flags, p_zVfs)
 
@@ -217,10 +364,6 @@ def sqlite3_open_v2(id_lib_sql3, db_filename, pp_db, flags, p_zVfs):
 def sqlite3_prepare_v2(id_lib_sql3, p_db, sql_query, nByte, pp_stmt, pzTail):
     b_sql1 = sql_query.encode('utf-8')
 
-    ## Check pzTail ctypes.POINTER(ctypes.c_char_p), ctypes.byref(pzTail) ?
-    id_lib_sql3.sqlite3_prepare_v2.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int, ctypes.POINTER(ctypes.POINTER(sqlite3_stmt)), ctypes.c_void_p]
-    id_lib_sql3.sqlite3_prepare_v2.restype = ctypes.c_int
-
     # Returns sqlite3 result codes or error code.
     return id_lib_sql3.sqlite3_prepare_v2(p_db, b_sql1, nByte, ctypes.byref(pp_stmt), pzTail)
 
@@ -235,10 +378,6 @@ def sqlite3_prepare_v2(id_lib_sql3, p_db, sql_query, nByte, pp_stmt, pzTail):
 def sqlite3_prepare_v3(id_lib_sql3, p_db, sql_query, nByte, prepFlags, pp_stmt, pzTail):
     b_sql1 = sql_query.encode('utf-8')
 
-    ## Check p_db ctypes.POINTER(sqlite3)
-    id_lib_sql3.sqlite3_prepare_v3.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int, ctypes.c_int, ctypes.POINTER(ctypes.POINTER(sqlite3_stmt)), ctypes.c_void_p]
-    id_lib_sql3.sqlite3_prepare_v3.restype = ctypes.c_int
-
     # Returns sqlite3 result codes or error code.
     return id_lib_sql3.sqlite3_prepare_v3(p_db, b_sql1, nByte, prepFlags, ctypes.byref(pp_stmt), pzTail)
 
@@ -256,9 +395,6 @@ def sqlite3_prepare_v3(id_lib_sql3, p_db, sql_query, nByte, prepFlags, pp_stmt,
 #    True/False
 def sqlite3_bind_blob(id_lib_sql3, p_stmt, index, bvalue, nByte, dest_flag):
 
-    id_lib_sql3.sqlite3_bind_blob.argtypes = [ctypes.POINTER(sqlite3_stmt), ctypes.c_int, ctypes.c_void_p, ctypes.c_int, ctypes.c_void_p]  # ctypes.POINTER(ctypes.c_void_p)
-    id_lib_sql3.sqlite3_bind_blob.restype = ctypes.c_int
-
     return id_lib_sql3.sqlite3_bind_blob(p_stmt, index, bvalue, nByte, dest_flag)
 
 
@@ -268,35 +404,23 @@ def sqlite3_bind_blob(id_lib_sql3, p_stmt, index, bvalue, nByte, dest_flag):
 # SQLITE_API int sqlite3_bind_double(sqlite3_stmt*, int, double);
 def sqlite3_bind_double(id_lib_sql3, p_stmt, index, value):
 
-    id_lib_sql3.sqlite3_bind_double.argtypes = [ctypes.POINTER(sqlite3_stmt), ctypes.c_int, ctypes.c_longdouble]
-    id_lib_sql3.sqlite3_bind_double.restype = ctypes.c_int
-
     return id_lib_sql3.sqlite3_bind_double(p_stmt, index, value)
 
 
 # SQLITE_API int sqlite3_bind_int(sqlite3_stmt*, int, int);
 def sqlite3_bind_int(id_lib_sql3, p_stmt, index, value):
 
-    id_lib_sql3.sqlite3_bind_int.argtypes = [ctypes.POINTER(sqlite3_stmt), ctypes.c_int, ctypes.c_int]
-    id_lib_sql3.sqlite3_bind_int.restype = ctypes.c_int
-
     return id_lib_sql3.sqlite3_bind_int(p_stmt, index, value)
 
 
 # #SQLITE_API int sqlite3_bind_int64(sqlite3_stmt*, int, sqlite3_int64);
 def sqlite3_bind_int64(id_lib_sql3, p_stmt, index, value):
 
-    id_lib_sql3.sqlite3_bind_int64.argtypes = [ctypes.POINTER(sqlite3_stmt), ctypes.c_int, c_longlong]
-    id_lib_sql3.sqlite3_bind_int64.restype = ctypes.c_int
-
     return id_lib_sql3.sqlite3_bind_int64(p_stmt, index, value)
 
 ##SQLITE_API int sqlite3_bind_null(sqlite3_stmt*, int);
 def sqlite3_bind_null(id_lib_sql3, p_stmt, index):
 
-    id_lib_sql3.sqlite3_bind_null.argtypes = [ctypes.POINTER(sqlite3_stmt), ctypes.c_int]
-    id_lib_sql3.sqlite3_bind_null.restype = ctypes.c_int
-
     return id_lib_sql3.sqlite3_bind_null(p_stmt, index)
 
 
@@ -304,12 +428,42 @@ def sqlite3_bind_null(id_lib_sql3, p_stmt, index):
 # Destructor flag [SQLITE_STATIC | SQLITE_TRANSIENT] (* (void*))
 def sqlite3_bind_text(id_lib_sql3, p_stmt, index, value, nByte, dest_flag):
 
-    id_lib_sql3.sqlite3_bind_text.argtypes = [ctypes.POINTER(sqlite3_stmt), ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.POINTER(ctypes.c_void_p)]
-    id_lib_sql3.sqlite3_bind_text.restype = ctypes.c_int
-
     return id_lib_sql3.sqlite3_bind_text(p_stmt, index, value, nByte, dest_flag)
 
 
+# Bind a tuple (or list) of Python values to the ? parameters of a prepared
+# statement, the first value to ?1 and so on. The sqlite3_bind_*() function is
+# chosen from the Python type of each value:
+# None -> sqlite3_bind_null, int (and bool) -> sqlite3_bind_int64,
+# float -> sqlite3_bind_double, str -> sqlite3_bind_text (UTF-8),
+# bytes, bytearray, memoryview -> sqlite3_bind_blob
+# TEXT and BLOB values are bound SQLITE_TRANSIENT so SQLite takes its own copy.
+# The same statement can be bound with a new tuple after sqlite3_reset().
+# Returns SQLITE_OK or the first error code (SQLITE_MISMATCH for a Python type
+# with no SQLite equivalent).
+def sqlite3_bind_params(id_lib_sql3, p_stmt, params):
+    index = 1  # ? parameter index starts at 1.
+    for value in params:
+        if value is None:
+            return_code = id_lib_sql3.sqlite3_bind_null(p_stmt, index)
+        elif isinstance(value, int):
+            return_code = id_lib_sql3.sqlite3_bind_int64(p_stmt, index, value)
+        elif isinstance(value, float):
+            return_code = id_lib_sql3.sqlite3_bind_double(p_stmt, index, value)
+        elif isinstance(value, str):
+            b_value = value.encode('utf-8')
+            return_code = id_lib_sql3.sqlite3_bind_text(p_stmt, index, b_value, len(b_value), SQLITE_TRANSIENT)
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            b_value = bytes(value)
+            return_code = id_lib_sql3.sqlite3_bind_blob(p_stmt, index, b_value, len(b_value), SQLITE_TRANSIENT)
+        else:
+            return SQLITE_MISMATCH
+        if return_code != SQLITE_OK:
+            return return_code
+        index += 1
+    return SQLITE_OK
+
+
 #SQLITE_API int sqlite3_bind_text16(sqlite3_stmt*, int, const void*, int, void(*)(void*));
 #SQLITE_API int sqlite3_bind_text64(sqlite3_stmt*, int, const char*, sqlite3_uint64,
 #                         void(*)(void*), unsigned char encoding);
@@ -327,8 +481,17 @@ def sqlite3_bind_pointer(id_lib_sql3, p_stmt, index, p_void_unknown, p_char_unkn
     return sqlite3_bind_pointer(p_stmt, index, value, p_void_unknown, p_char_unknown, dest_flag)
 """
 
-#SQLITE_API int sqlite3_bind_zeroblob(sqlite3_stmt*, int, int n);
-#SQLITE_API int sqlite3_bind_zeroblob64(sqlite3_stmt*, int, sqlite3_uint64);
+# Bind a BLOB of n zero bytes, a placeholder to be filled in later with
+# sqlite3_blob_write() without holding the data in memory.
+# SQLITE_API int sqlite3_bind_zeroblob(sqlite3_stmt*, int, int n);
+def sqlite3_bind_zeroblob(id_lib_sql3, p_stmt, index, n):
+
+    return id_lib_sql3.sqlite3_bind_zeroblob(p_stmt, index, n)
+
+# SQLITE_API int sqlite3_bind_zeroblob64(sqlite3_stmt*, int, sqlite3_uint64);
+def sqlite3_bind_zeroblob64(id_lib_sql3, p_stmt, index, n):
+
+    return id_lib_sql3.sqlite3_bind_zeroblob64(p_stmt, index, n)
 
 # CAPI3REF: Number Of SQL Parameters
 #SQLITE_API int sqlite3_bind_parameter_count(sqlite3_stmt*);
@@ -339,9 +502,6 @@ def sqlite3_bind_pointer(id_lib_sql3, p_stmt, index, p_void_unknown, p_char_unkn
 #SQLITE_API int sqlite3_column_count(sqlite3_stmt *pStmt);
 def sqlite3_column_count(id_lib_sql3, p_stmt):
 
-    id_lib_sql3.sqlite3_column_count.argtypes = [ctypes.POINTER(sqlite3_stmt)]
-    id_lib_sql3.sqlite3_column_count.restype = ctypes.c_int
-
     return id_lib_sql3.sqlite3_column_count(p_stmt)
 
 
@@ -350,9 +510,6 @@ def sqlite3_column_count(id_lib_sql3, p_stmt):
 # N = column count starting at 0
 def sqlite3_column_name(id_lib_sql3, p_stmt, N):
 
-    id_lib_sql3.sqlite3_column_name.argtypes = [ctypes.POINTER(sqlite3_stmt), ctypes.c_int]
-    id_lib_sql3.sqlite3_column_name.restype = ctypes.c_char_p
-
     return id_lib_sql3.sqlite3_column_name(p_stmt, N).decode('utf-8')  # Convert b'' to utf-8 str
 
 
@@ -361,9 +518,6 @@ def sqlite3_column_name(id_lib_sql3, p_stmt, N):
 # SQLITE_API const char *sqlite3_column_database_name(sqlite3_stmt*,int);
 def sqlite3_column_database_name(id_lib_sql3, p_stmt, N):
 
-    id_lib_sql3.sqlite3_column_database_name.argtypes = [ctypes.POINTER(sqlite3_stmt), ctypes.c_int]
-    id_lib_sql3.sqlite3_column_database_name.restype = ctypes.c_char_p
-
     return id_lib_sql3.sqlite3_column_database_name(p_stmt, N).decode('utf-8')  # Convert b'' to utf-8 str
 
 #SQLITE_API const void *sqlite3_column_database_name16(sqlite3_stmt*,int);
@@ -371,9 +525,6 @@ def sqlite3_column_database_name(id_lib_sql3, p_stmt, N):
 # SQLITE_API const char *sqlite3_column_table_name(sqlite3_stmt*,int);
 def sqlite3_column_table_name(id_lib_sql3, p_stmt, N):
 
-    id_lib_sql3.sqlite3_column_table_name.argtypes = [ctypes.POINTER(sqlite3_stmt), ctypes.c_int]
-    id_lib_sql3.sqlite3_column_table_name.restype = ctypes.c_char_p
-
     return id_lib_sql3.sqlite3_column_table_name(p_stmt, N).decode('utf-8')  # Convert b'' to utf-8 str
 
 #SQLITE_API const void *sqlite3_column_table_name16(sqlite3_stmt*,int);
@@ -381,9 +532,6 @@ def sqlite3_column_table_name(id_lib_sql3, p_stmt, N):
 # SQLITE_API const char *sqlite3_column_origin_name(sqlite3_stmt*,int);
 def sqlite3_column_origin_name(id_lib_sql3, p_stmt, N):
 
-    id_lib_sql3.sqlite3_column_origin_name.argtypes = [ctypes.POINTER(sqlite3_stmt), ctypes.c_int]
-    id_lib_sql3.sqlite3_column_origin_name.restype = ctypes.c_char_p
-
     return id_lib_sql3.sqlite3_column_origin_name(p_stmt, N).decode('utf-8')  # Convert b'' to utf-8 str
 
 #SQLITE_API const void *sqlite3_column_origin_name16(sqlite3_stmt*,int);
@@ -394,9 +542,6 @@ def sqlite3_column_origin_name(id_lib_sql3, p_stmt, N):
 # const char *sqlite3_column_decltype(sqlite3_stmt*,int);
 def sqlite3_column_decltype(id_lib_sql3, p_stmt, N):
 
-    id_lib_sql3.sqlite3_column_decltype.argtypes = [ctypes.POINTER(sqlite3_stmt), ctypes.c_int]
-    id_lib_sql3.sqlite3_column_decltype.restype = ctypes.c_char_p
-
     return id_lib_sql3.sqlite3_column_decltype(p_stmt, N).decode('utf-8')  # Convert b'' to utf-8 str
 
 #const void *sqlite3_column_decltype16(sqlite3_stmt*,int);
@@ -408,9 +553,6 @@ def sqlite3_column_decltype(id_lib_sql3, p_stmt, N):
 
 def sqlite3_step(id_lib_sql3, p_stmt):
     # int sqlite3_step(sqlite3_stmt*);
-    id_lib_sql3.sqlite3_step.argtypes = [ctypes.c_void_p]
-    id_lib_sql3.sqlite3_step.restype = ctypes.c_int
-
     # Returns sqlite3 result codes or error code.
     return id_lib_sql3.sqlite3_step(p_stmt)
 
@@ -441,8 +583,6 @@ def sqlite3_step(id_lib_sql3, p_stmt):
 
 # SQLITE_API const void *sqlite3_column_blob(sqlite3_stmt*, int iCol);
 def sqlite3_column_blob(id_lib_sql3, p_stmt, iCol):
-    id_lib_sql3.sqlite3_column_blob.argtypes = [ctypes.c_void_p, ctypes.c_int]
-    id_lib_sql3.sqlite3_column_blob.restype = ctypes.c_void_p  # c_ubyte ctypes.c_char_p
     # iCol refers to the current column in the return data. Use a loop with
     # iCol enumerated for each col/row of data. sqlite3_column_* returns one
     # column at a time.
@@ -454,8 +594,6 @@ def sqlite3_column_blob(id_lib_sql3, p_stmt, iCol):
 # SQLITE_API double sqlite3_column_double(sqlite3_stmt*, int iCol);
 def sqlite3_column_double(id_lib_sql3, p_stmt, iCol):
     # const unsigned char *sqlite3_column_text(sqlite3_stmt*, int iCol);
-    id_lib_sql3.sqlite3_column_double.argtypes = [ctypes.c_void_p, ctypes.c_int]
-    id_lib_sql3.sqlite3_column_double.restype = ctypes.c_longdouble  ## ctypes.c_double
 
     # iCol refers to the current column in the return data. Use a loop with
     # iCol enumerated for each col/row of data. sqlite3_column_* returns one
@@ -466,9 +604,6 @@ def sqlite3_column_double(id_lib_sql3, p_stmt, iCol):
 # SQLITE_API int sqlite3_column_int(sqlite3_stmt*, int iCol);
 # preferable to use sqlite3_column_int64
 def sqlite3_column_int(id_lib_sql3, p_stmt, iCol):
-    id_lib_sql3.sqlite3_column_int.argtypes = [ctypes.c_void_p, ctypes.c_int]
-    id_lib_sql3.sqlite3_column_int.restype = ctypes.c_int  # c_ubyte
-
     # iCol refers to the current column in the return data. Use a loop with
     # iCol enumerated for each col/row of data. sqlite3_column_* returns one
     # column at a time.
@@ -477,9 +612,6 @@ def sqlite3_column_int(id_lib_sql3, p_stmt, iCol):
 
 # SQLITE_API sqlite3_int64 sqlite3_column_int64(sqlite3_stmt*, int iCol);
 def sqlite3_column_int64(id_lib_sql3, p_stmt, iCol):
-    id_lib_sql3.sqlite3_column_int64.argtypes = [ctypes.c_void_p, ctypes.c_int]
-    id_lib_sql3.sqlite3_column_int64.restype = ctypes.c_longlong
-
     # iCol refers to the current column in the return data. Use a loop with
     # iCol enumerated for each col/row of data. sqlite3_column_* returns one
     # column at a time.
@@ -488,9 +620,6 @@ def sqlite3_column_int64(id_lib_sql3, p_stmt, iCol):
 
 # SQLITE_API const unsigned char *sqlite3_column_text(sqlite3_stmt*, int iCol);
 def sqlite3_column_text(id_lib_sql3, p_stmt, iCol):
-    id_lib_sql3.sqlite3_column_text.argtypes = [ctypes.c_void_p, ctypes.c_int]
-    id_lib_sql3.sqlite3_column_text.restype = ctypes.c_char_p  # ctypes.POINTER(c_ubyte)?
-
     # iCol refers to the current column in the return data. Use a loop with
     # iCol enumerated for each col/row of data. sqlite3_column_* returns one
     # column at a time.
@@ -525,9 +654,6 @@ def sqlite3_column_value(id_lib_sql3, p_stmt, iCol):
 
 # SQLITE_API int sqlite3_column_bytes(sqlite3_stmt*, int iCol);
 def sqlite3_column_bytes(id_lib_sql3, p_stmt, iCol):
-    id_lib_sql3.sqlite3_column_bytes.argtypes = [ctypes.c_void_p, ctypes.c_int]
-    id_lib_sql3.sqlite3_column_bytes.restype = ctypes.c_int
-
     # iCol refers to the current column in the return data. Use a loop with
     # iCol enumerated for each col/row of data. sqlite3_column_* returns one
     # column at a time.
@@ -543,9 +669,6 @@ def sqlite3_column_bytes(id_lib_sql3, p_stmt, iCol):
 # SQLITE_NULL     =   5
 # SQLITE_TEXT = 3
 def sqlite3_column_type(id_lib_sql3, p_stmt, iCol):
-    id_lib_sql3.sqlite3_column_type.argtypes = [ctypes.c_void_p, ctypes.c_int]
-    id_lib_sql3.sqlite3_column_type.restype = ctypes.c_int
-
     # iCol refers to the current column in the return data. Use a loop with
     # iCol enumerated for each col/row of data. sqlite3_column_* returns one
     # column at a time.
@@ -553,23 +676,247 @@ def sqlite3_column_type(id_lib_sql3, p_stmt, iCol):
     return id_lib_sql3.sqlite3_column_type(p_stmt, iCol)
 
 
+# Return the value of column iCol as the Python type matching its SQLite
+# storage class (sqlite3_column_type):
+# SQLITE_INTEGER -> int, SQLITE_FLOAT -> float, SQLITE_TEXT -> str,
+# SQLITE_BLOB -> bytes, SQLITE_NULL -> None
+def sqlite3_column_py(id_lib_sql3, p_stmt, iCol):
+    col_type = id_lib_sql3.sqlite3_column_type(p_stmt, iCol)
+    if col_type == SQLITE_INTEGER:
+        return id_lib_sql3.sqlite3_column_int64(p_stmt, iCol)
+    elif col_type == SQLITE_FLOAT:
+        return id_lib_sql3.sqlite3_column_double(p_stmt, iCol)
+    elif col_type == SQLITE_TEXT:
+        return id_lib_sql3.sqlite3_column_text(p_stmt, iCol).decode('utf-8')
+    elif col_type == SQLITE_BLOB:
+        # sqlite3_column_blob() must be called before sqlite3_column_bytes().
+        p_blob = id_lib_sql3.sqlite3_column_blob(p_stmt, iCol)
+        return ctypes.string_at(p_blob, id_lib_sql3.sqlite3_column_bytes(p_stmt, iCol))
+    return None  # SQLITE_NULL
+
+
+# Decode the current row of a prepared statement to Python values.
+# The number of columns (and names) are read once for the statement, then
+# decode() calls sqlite3_column_type() once for each column and the matching
+# sqlite3_column_*() function, giving a tuple of native Python values:
+# SQLITE_INTEGER -> int, SQLITE_FLOAT -> float, SQLITE_TEXT -> str,
+# SQLITE_BLOB -> bytes, SQLITE_NULL -> None
+# With named=True the rows are namedtuples with a field for each column name,
+# ie. row.rowid, row.Employee_ID (names that are not valid Python identifiers
+# are renamed _0, _1, ...).
+# decode_text() returns the sqlite3_column_text() string of each column (None
+# for NULL) and decode_csv() joins them with ',' as the original string rows
+# of the examples, with "" for NULL.
+#
+# row_decoder = RowDecoder(id_lib_sql3, p_stmt)
+# while sqlite3_step(id_lib_sql3, p_stmt) == SQLITE_ROW:
+#     row = row_decoder.decode()
+class RowDecoder:
+    def __init__(self, id_lib_sql3, p_stmt, number_columns=None, named=False):
+        self.id_lib_sql3 = id_lib_sql3
+        self.p_stmt = p_stmt
+        if number_columns is None:
+            number_columns = id_lib_sql3.sqlite3_column_count(p_stmt)
+        self.number_columns = number_columns
+        self.column_names = None
+        self.row_class = None
+        if named == True:
+            self.column_names = [id_lib_sql3.sqlite3_column_name(p_stmt, i).decode('utf-8') for i in range(number_columns)]
+            self.row_class = collections.namedtuple("Row", self.column_names, rename=True)
+
+    def decode(self):
+        # The C functions as local names for the per column loop.
+        p_stmt = self.p_stmt
+        column_type = self.id_lib_sql3.sqlite3_column_type
+        column_int64 = self.id_lib_sql3.sqlite3_column_int64
+        column_double = self.id_lib_sql3.sqlite3_column_double
+        column_text = self.id_lib_sql3.sqlite3_column_text
+        column_blob = self.id_lib_sql3.sqlite3_column_blob
+        column_bytes = self.id_lib_sql3.sqlite3_column_bytes
+
+        row = []
+        for i in range(self.number_columns):
+            col_type = column_type(p_stmt, i)
+            if col_type == SQLITE_INTEGER:
+                row.append(column_int64(p_stmt, i))
+            elif col_type == SQLITE_TEXT:
+                row.append(column_text(p_stmt, i).decode('utf-8'))
+            elif col_type == SQLITE_FLOAT:
+                row.append(column_double(p_stmt, i))
+            elif col_type == SQLITE_BLOB:
+                p_blob = column_blob(p_stmt, i)  # Before sqlite3_column_bytes().
+                row.append(ctypes.string_at(p_blob, column_bytes(p_stmt, i)))
+            else:  # SQLITE_NULL
+                row.append(None)
+        if self.row_class is not None:
+            return self.row_class._make(row)
+        return tuple(row)
+
+    def decode_text(self):
+        p_stmt = self.p_stmt
+        column_text = self.id_lib_sql3.sqlite3_column_text
+        row = []
+        for i in range(self.number_columns):
+            b_text = column_text(p_stmt, i)  # None for NULL.
+            row.append(None if b_text is None else b_text.decode('utf-8'))
+        return tuple(row)
+
+    def decode_csv(self):
+        return ",".join(["" if text is None else text for text in self.decode_text()])
+## END Class
+
+
+# A compact table of mixed type values (a VARIANT table), ie. the rows of a
+# table with INTEGER, REAL, TEXT, BLOB and NULL columns.
+# In place of a Python object (or dict) for each cell, each column is held in
+# two typed arrays:
+#   tags[col]   array('B') the sqlite3_column_type() of each row, 1 byte.
+#   slots[col]  array('q') 8 bytes per row, the INTEGER value itself, or the
+#               index of the value in reals (REAL) or in the arena (TEXT, BLOB).
+# REAL values are in one array('d'). TEXT (UTF-8) and BLOB bytes are copied
+# end to end into one bytearray arena, value k is arena[offsets[k]:offsets[k + 1]].
+# The arrays grow as rows are added, so the number of rows is not needed
+# in advance.
+#
+# The type tags are the SQLite type codes, the same values as the IS_* flags
+# of the examples: SQLITE_INTEGER (1), SQLITE_FLOAT (2), SQLITE_TEXT (3),
+# SQLITE_BLOB (4), SQLITE_NULL (5).
+#
+# variant_table = VariantTable(number_columns)
+# while sqlite3_step(id_lib_sql3, p_stmt) == SQLITE_ROW:
+#     variant_table.append_stmt_row(id_lib_sql3, p_stmt)
+# variant_table.typeof(row, col)  # SQLITE_TEXT
+# variant_table[row, col]  # "Joe Blogs", a Python value made on access.
+# variant_table.length(row, col)  # TEXT/BLOB length in bytes.
+class VariantTable:
+    def __init__(self, number_columns):
+        self.number_columns = number_columns
+        self.number_rows = 0
+        self.tags = [array.array("B") for i in range(number_columns)]
+        self.slots = [array.array("q") for i in range(number_columns)]
+        self.reals = array.array("d")
+        self.offsets = array.array("q", [0])
+        self.arena = bytearray()
+
+    def __len__(self):
+        return self.number_rows
+
+    # Add a row from a sequence of Python values (int, float, str, bytes, None).
+    def append_row(self, values):
+        for i in range(self.number_columns):
+            value = values[i]
+            if value is None:
+                self.tags[i].append(SQLITE_NULL)
+                self.slots[i].append(0)
+            elif isinstance(value, int):
+                self.tags[i].append(SQLITE_INTEGER)
+                self.slots[i].append(value)
+            elif isinstance(value, float):
+                self.tags[i].append(SQLITE_FLOAT)
+                self.slots[i].append(len(self.reals))
+                self.reals.append(value)
+            else:
+                if isinstance(value, str):
+                    self.tags[i].append(SQLITE_TEXT)
+                    value = value.encode('utf-8')
+                else:
+                    self.tags[i].append(SQLITE_BLOB)
+                self.slots[i].append(len(self.offsets) - 1)
+                self.arena += value
+                self.offsets.append(len(self.arena))
+        self.number_rows += 1
+        return None
+
+    # Add the current row of a stepped statement (columns 0 to number_columns - 1).
+    def append_stmt_row(self, id_lib_sql3, p_stmt):
+        # The C functions and arrays as local names for the per column loop.
+        column_type = id_lib_sql3.sqlite3_column_type
+        column_int64 = id_lib_sql3.sqlite3_column_int64
+        column_double = id_lib_sql3.sqlite3_column_double
+        column_blob = id_lib_sql3.sqlite3_column_blob
+        column_bytes = id_lib_sql3.sqlite3_column_bytes
+        reals = self.reals
+        arena = self.arena
+        offsets = self.offsets
+        for i, tags, slots in zip(range(self.number_columns), self.tags, self.slots):
+            col_type = column_type(p_stmt, i)
+            tags.append(col_type)
+            if col_type == SQLITE_INTEGER:
+                slots.append(column_int64(p_stmt, i))
+            elif col_type == SQLITE_FLOAT:
+                slots.append(len(reals))
+                reals.append(column_double(p_stmt, i))
+            elif col_type == SQLITE_TEXT or col_type == SQLITE_BLOB:
+                # sqlite3_column_blob() returns the UTF-8 text of a TEXT value,
+                # it must be called before sqlite3_column_bytes().
+                p_data = column_blob(p_stmt, i)
+                number_bytes = column_bytes(p_stmt, i)
+                slots.append(len(offsets) - 1)
+                if number_bytes > 0:  # p_data is None (NULL) for an empty value.
+                    arena += ctypes.string_at(p_data, number_bytes)
+                offsets.append(len(arena))
+            else:  # SQLITE_NULL
+                slots.append(0)
+        self.number_rows += 1
+        return None
+
+    def typeof(self, row, col):
+        return self.tags[col][row]
+
+    # Byte length of a TEXT or BLOB value (0 for other types).
+    def length(self, row, col):
+        if self.tags[col][row] in (SQLITE_TEXT, SQLITE_BLOB):
+            slot = self.slots[col][row]
+            return self.offsets[slot + 1] - self.offsets[slot]
+        return 0
+
+    # variant_table[row, col] returns the value as a Python type.
+    def __getitem__(self, row_col):
+        row, col = row_col
+        col_type = self.tags[col][row]
+        slot = self.slots[col][row]
+        if col_type == SQLITE_INTEGER:
+            return slot
+        elif col_type == SQLITE_FLOAT:
+            return self.reals[slot]
+        elif col_type == SQLITE_TEXT:
+            return self.arena[self.offsets[slot]:self.offsets[slot + 1]].decode('utf-8')
+        elif col_type == SQLITE_BLOB:
+            return bytes(self.arena[self.offsets[slot]:self.offsets[slot + 1]])
+        return None  # SQLITE_NULL
+
+    # Returns a row as a tuple of Python values.
+    def row(self, row):
+        return tuple([self[row, col] for col in range(self.number_columns)])
+
+    # Bytes used by the arrays and arena (the allocated size can be larger).
+    def nbytes(self):
+        cnt_bytes = len(self.arena) + self.reals.itemsize * len(self.reals) + self.offsets.itemsize * len(self.offsets)
+        for i in range(self.number_columns):
+            cnt_bytes += len(self.tags[i]) + self.slots[i].itemsize * len(self.slots[i])
+        return cnt_bytes
+## END Class
+
+
 ## CAPI3REF: Reset A Prepared Statement Object
 
 # SQLITE_API int sqlite3_reset(sqlite3_stmt *pStmt);
 def sqlite3_reset(id_lib_sql3, p_stmt):
-    id_lib_sql3.sqlite3_reset.argtypes = [ctypes.c_void_p]
-    id_lib_sql3.sqlite3_reset.restype = ctypes.c_int
-
     # Returns int (32-bit).
-    return id_lib_sql3.sqlite3_reset(p_stmt, iCol)
+    return id_lib_sql3.sqlite3_reset(p_stmt)
+
+
+## CAPI3REF: Reset All Bindings On A Prepared Statement
+# Sets all the ? parameters back to NULL. sqlite3_reset() does not do this.
+# SQLITE_API int sqlite3_clear_bindings(sqlite3_stmt*);
+def sqlite3_clear_bindings(id_lib_sql3, p_stmt):
+    # Returns sqlite3 result codes or error code.
+    return id_lib_sql3.sqlite3_clear_bindings(p_stmt)
 
 
 ## CAPI3REF: Destroy A Prepared Statement Object
 def sqlite3_finalize(id_lib_sql3, p_stmt):
     # int sqlite3_finalize(sqlite3_stmt *pStmt);
-    id_lib_sql3.sqlite3_finalize.argtypes = [ctypes.c_void_p]
-    id_lib_sql3.sqlite3_finalize.restype = ctypes.c_int
-
     # The sqlite3_finalize function destroys the prepared statement object and
     # commits the changes to the database file.
     # Returns sqlite3 result codes or error code.
@@ -585,9 +932,6 @@ def sqlite3_finalize(id_lib_sql3, p_stmt):
 #SQLITE_API int sqlite3_close(sqlite3*);
 def sqlite3_close(id_lib_sql3, p_db):
 
-    id_lib_sql3.sqlite3_close.argtypes = [ctypes.c_void_p]
-    id_lib_sql3.sqlite3_close.restype = ctypes.c_int
-
     # The sqlite3_close function closes the database connection.
     # Returns sqlite3 result codes or error code.
     return id_lib_sql3.sqlite3_close(p_db)
@@ -595,9 +939,6 @@ def sqlite3_close(id_lib_sql3, p_db):
 # SQLITE_API int sqlite3_close_v2(sqlite3*);
 def sqlite3_close_v2(id_lib_sql3, p_db):
 
-    id_lib_sql3.sqlite3_close_v2.argtypes = [ctypes.c_void_p]
-    id_lib_sql3.sqlite3_close_v2.restype = ctypes.c_int
-
     # The sqlite3_close_v2 function closes the database connection.
     # Returns sqlite3 result codes or error code.
     return id_lib_sql3.sqlite3_close_v2(p_db)
@@ -607,9 +948,6 @@ def sqlite3_close_v2(id_lib_sql3, p_db):
 # SQLITE_API int sqlite3_sleep(int); (milliseconds)
 def sqlite3_sleep(id_lib_sql3, tsleep):
 
-    id_lib_sql3.sqlite3_sleep.argtypes = [ctypes.c_int]
-    id_lib_sql3.sqlite3_sleep.restype = ctypes.c_int
-
     # Returns sqlite3 result codes or error code.
     return id_lib_sql3.sqlite3_sleep(tsleep)
 
@@ -617,13 +955,193 @@ def sqlite3_sleep(id_lib_sql3, tsleep):
 # SQLITE_API sqlite3 *sqlite3_db_handle(sqlite3_stmt*);
 def sqlite3_db_handle(id_lib_sql3, p_stmt):
 
-    id_lib_sql3.sqlite3_db_handle.argtypes = [ctypes.c_void_p]
-    id_lib_sql3.sqlite3_db_handle.restype = ctypes.c_int
-
-    # Returns hlib_sql3 (Used for OS ops)
-    # Same as handle_libsql3()
+    # Returns the sqlite3* database handle that owns the statement.
     return id_lib_sql3.sqlite3_db_handle(p_stmt)
 
+## CAPI3REF: Find the next prepared statement
+# SQLITE_API sqlite3_stmt *sqlite3_next_stmt(sqlite3 *pDb, sqlite3_stmt *pStmt);
+# p_stmt = None returns the first prepared statement of the connection.
+def sqlite3_next_stmt(id_lib_sql3, p_db, p_stmt):
+
+    # Returns the next sqlite3_stmt* (as an int address) or None if there
+    # are no more prepared statements on the connection.
+    return id_lib_sql3.sqlite3_next_stmt(p_db, p_stmt)
+
+## CAPI3REF: One-Step Query Execution Interface
+# SQLITE_API int sqlite3_exec(sqlite3*, const char *sql,
+#       int (*callback)(void*,int,char**,char**), void *, char **errmsg);
+# Runs one or more ; separated SQL statements that return no rows, ie.
+# "BEGIN;" "COMMIT;" "ROLLBACK;". No callback or errmsg is used, see
+# sqlite3_errmsg() for the error message.
+def sqlite3_exec(id_lib_sql3, p_db, sql_query):
+    b_sql1 = sql_query.encode('utf-8')
+
+    # Returns sqlite3 result codes or error code.
+    return id_lib_sql3.sqlite3_exec(p_db, b_sql1, None, None, None)
+
+## CAPI3REF: Test For Auto-Commit Mode
+# SQLITE_API int sqlite3_get_autocommit(sqlite3*);
+def sqlite3_get_autocommit(id_lib_sql3, p_db):
+
+    # Returns 0 inside a BEGIN ... COMMIT transaction, else non-zero.
+    return id_lib_sql3.sqlite3_get_autocommit(p_db)
+
+## CAPI3REF: Count The Number Of Rows Modified
+# SQLITE_API int sqlite3_changes(sqlite3*);
+def sqlite3_changes(id_lib_sql3, p_db):
+
+    # Returns the rows changed by the last INSERT, UPDATE or DELETE.
+    return id_lib_sql3.sqlite3_changes(p_db)
+
+## CAPI3REF: Interrupt A Long-Running Query
+# SQLITE_API void sqlite3_interrupt(sqlite3*);
+# Can be called from any thread. Statements running on the connection stop at
+# the next opportunity and sqlite3_step() returns SQLITE_INTERRUPT. An
+# interrupted INSERT, UPDATE or DELETE rolls back its whole transaction.
+# A connection with no running statement is not affected.
+def sqlite3_interrupt(id_lib_sql3, p_db):
+    id_lib_sql3.sqlite3_interrupt(p_db)
+    return None
+
+## CAPI3REF: Retrieving Statement SQL
+# SQLITE_API const char *sqlite3_sql(sqlite3_stmt *pStmt);
+def sqlite3_sql(id_lib_sql3, p_stmt):
+
+    # Returns the SQL text used to prepare the statement, or None.
+    b_sql = id_lib_sql3.sqlite3_sql(p_stmt)
+    if b_sql is None:
+        return None
+    return b_sql.decode('utf-8')
+
+## CAPI3REF: SQL Trace Hook
+# SQLITE_API int sqlite3_trace_v2(
+#       sqlite3*,
+#       unsigned uMask,         # Zero or more SQLITE_TRACE_* constants.
+#       int(*xCallback)(unsigned,void*,void*,void*),
+#       void *pCtx
+#       );
+# xCallback is an SQLITE_TRACE_CALLBACK object (or None). A uMask of 0
+# removes the callback. This replaces the deprecated sqlite3_trace() and
+# sqlite3_profile(), see SQLITE_TRACE_PROFILE.
+def sqlite3_trace_v2(id_lib_sql3, p_db, uMask, xCallback, pCtx):
+    if xCallback is None:
+        xCallback = SQLITE_TRACE_CALLBACK()  # NULL function pointer.
+
+    # Returns sqlite3 result codes or error code.
+    return id_lib_sql3.sqlite3_trace_v2(p_db, uMask, xCallback, pCtx)
+
+## CAPI3REF: Open A BLOB For Incremental I/O
+# SQLITE_API int sqlite3_blob_open(
+#       sqlite3*,
+#       const char *zDb,        # "main", "temp" or an attached database name.
+#       const char *zTable,
+#       const char *zColumn,
+#       sqlite3_int64 iRow,     # rowid
+#       int flags,              # 0 read only, 1 read and write.
+#       sqlite3_blob **ppBlob   # OUT: BLOB handle
+#       );
+# pp_blob is from p_sqlite3_blob(). The BLOB size can't be changed through
+# the handle, use sqlite3_bind_zeroblob() to create a BLOB of the final size.
+def sqlite3_blob_open(id_lib_sql3, p_db, zDb, zTable, zColumn, iRow, flags, pp_blob):
+
+    # Returns sqlite3 result codes or error code.
+    return id_lib_sql3.sqlite3_blob_open(p_db, zDb.encode('utf-8'), zTable.encode('utf-8'), zColumn.encode('utf-8'), iRow, flags, ctypes.byref(pp_blob))
+
+## CAPI3REF: Move a BLOB Handle to a New Row
+# SQLITE_API int sqlite3_blob_reopen(sqlite3_blob *, sqlite3_int64);
+def sqlite3_blob_reopen(id_lib_sql3, p_blob, iRow):
+
+    # Returns sqlite3 result codes or error code.
+    return id_lib_sql3.sqlite3_blob_reopen(p_blob, iRow)
+
+## CAPI3REF: Close A BLOB Handle
+# SQLITE_API int sqlite3_blob_close(sqlite3_blob *);
+def sqlite3_blob_close(id_lib_sql3, p_blob):
+
+    # Returns sqlite3 result codes or error code.
+    return id_lib_sql3.sqlite3_blob_close(p_blob)
+
+## CAPI3REF: Return The Size Of An Open BLOB
+# SQLITE_API int sqlite3_blob_bytes(sqlite3_blob *);
+def sqlite3_blob_bytes(id_lib_sql3, p_blob):
+
+    # Returns the BLOB size in bytes.
+    return id_lib_sql3.sqlite3_blob_bytes(p_blob)
+
+# Return a ctypes object that points at the memory of a Python buffer
+# (bytearray, memoryview, array.array, mmap ...) without copying it.
+# Read only buffers can't be used by ctypes this way, bytes are passed to
+# ctypes as they are and any other read only buffer is copied to bytes.
+def c_buffer_from(buffer_obj, nByte):
+    if isinstance(buffer_obj, bytes):
+        return buffer_obj
+    try:
+        return (ctypes.c_char * nByte).from_buffer(buffer_obj)
+    except TypeError:  # Read only buffer.
+        return bytes(buffer_obj)
+
+## CAPI3REF: Read Data From A BLOB Incrementally
+# SQLITE_API int sqlite3_blob_read(sqlite3_blob *, void *Z, int N, int iOffset);
+# Reads nByte bytes from iOffset in the BLOB directly into buffer_obj, a
+# writable Python buffer (bytearray, memoryview, array.array) of at least
+# nByte bytes. No intermediate bytes object is created.
+def sqlite3_blob_read(id_lib_sql3, p_blob, buffer_obj, nByte, iOffset):
+
+    # Returns sqlite3 result codes or error code.
+    return id_lib_sql3.sqlite3_blob_read(p_blob, c_buffer_from(buffer_obj, nByte), nByte, iOffset)
+
+## CAPI3REF: Write Data Into A BLOB Incrementally
+# SQLITE_API int sqlite3_blob_write(sqlite3_blob *, const void *z, int n, int iOffset);
+# Writes nByte bytes of buffer_obj (bytes or any Python buffer) at iOffset.
+def sqlite3_blob_write(id_lib_sql3, p_blob, buffer_obj, nByte, iOffset):
+
+    # Returns sqlite3 result codes or error code.
+    return id_lib_sql3.sqlite3_blob_write(p_blob, c_buffer_from(buffer_obj, nByte), nByte, iOffset)
+
+## CAPI3REF: Online Backup API.
+# Copies the pages of a database (zSrcName "main", "temp" or an attached
+# name) on one connection to a database on another connection, ie. a file
+# database into ":memory:" and back. The copy can be made a few pages at a
+# time with sqlite3_backup_step(), so the source is only read locked during
+# each step and other connections can write between the steps.
+#
+# SQLITE_API sqlite3_backup *sqlite3_backup_init(
+#       sqlite3 *pDest,         # Destination database handle
+#       const char *zDestName,  # Destination database name
+#       sqlite3 *pSource,       # Source database handle
+#       const char *zSourceName # Source database name
+#       );
+# Returns the sqlite3_backup* handle, or a NULL pointer (False) on an error.
+# The error is in sqlite3_errmsg() of the destination connection.
+def sqlite3_backup_init(id_lib_sql3, p_dest_db, zDestName, p_src_db, zSrcName):
+
+    return id_lib_sql3.sqlite3_backup_init(p_dest_db, zDestName.encode('utf-8'), p_src_db, zSrcName.encode('utf-8'))
+
+# SQLITE_API int sqlite3_backup_step(sqlite3_backup *p, int nPage);
+# Copies up to nPage pages (-1 for all). Returns SQLITE_OK (more pages
+# remain), SQLITE_DONE (finished), SQLITE_BUSY or SQLITE_LOCKED (try the step
+# again later) or an error code.
+def sqlite3_backup_step(id_lib_sql3, p_backup, nPage):
+
+    return id_lib_sql3.sqlite3_backup_step(p_backup, nPage)
+
+# SQLITE_API int sqlite3_backup_finish(sqlite3_backup *p);
+# Releases the backup handle. Returns SQLITE_OK or the error of the backup.
+def sqlite3_backup_finish(id_lib_sql3, p_backup):
+
+    return id_lib_sql3.sqlite3_backup_finish(p_backup)
+
+# SQLITE_API int sqlite3_backup_remaining(sqlite3_backup *p);
+# SQLITE_API int sqlite3_backup_pagecount(sqlite3_backup *p);
+# The pages still to copy and the source pages, as of the last step.
+def sqlite3_backup_remaining(id_lib_sql3, p_backup):
+
+    return id_lib_sql3.sqlite3_backup_remaining(p_backup)
+
+def sqlite3_backup_pagecount(id_lib_sql3, p_backup):
+
+    return id_lib_sql3.sqlite3_backup_pagecount(p_backup)
+
 # CAPI3REF: Return The Filename For A Database Connection (sqlite3)
 #SQLITE_API const char *sqlite3_db_filename(sqlite3 *db, const char *zDbName);
 
@@ -634,16 +1152,885 @@ def sqlite3_db_handle(id_lib_sql3, p_stmt):
 
 
 
+## ====>> Prepared statement cache
+# Compiling (preparing) an SQL statement is often more work than running it.
+# When the same SQL statement is run many times on a connection, ie. for
+# every row in a loop, we can prepare it once and reuse the sqlite3_stmt.
+# The SQL should use ? parameters with sqlite3_bind_*() for the values that
+# change, otherwise each value creates a different statement.
+#
+# StmtCache keeps up to capacity prepared statements per database connection
+# in least recently used (LRU) order keyed by the normalised SQL text. The
+# least recently used statement is finalized when the cache is full.
+#
+# return_code, p_stmt = stmt_cache.prepare(sql_query)
+# ... sqlite3_bind_*(), sqlite3_step() ...
+# stmt_cache.release(p_stmt)  # In place of sqlite3_finalize()
+#
+# NOTE! Do not sqlite3_finalize() a cached statement. The same SQL can only be
+# used by one caller at a time as prepare() resets the shared statement.
+# stmt_cache.clear() must be called before sqlite3_close().
+
+# Normalise SQL text for the cache key. Runs of white space outside of quoted
+# strings and identifiers are collapsed to one space and a trailing ';' is
+# removed, so "SELECT  *\nFROM t;" and "SELECT * FROM t" share one statement.
+# The expressions are compiled on first use, as importing re is slow.
+sql_quoted_split = None
+sql_white_space = None
+
+def sql_normalize(sql_query):
+    global sql_quoted_split, sql_white_space
+    if sql_quoted_split is None:
+        import re
+        sql_white_space = re.compile(r"\s+")
+        sql_quoted_split = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")""")
+    sql_parts = sql_quoted_split.split(sql_query)
+    for i in range(0, len(sql_parts), 2):  # Even parts are outside of quotes.
+        sql_parts[i] = sql_white_space.sub(" ", sql_parts[i])
+    return "".join(sql_parts).strip().rstrip(";").rstrip()
+
+
+class StmtCache:
+    def __init__(self, id_lib_sql3, p_db, capacity=32):
+        self.id_lib_sql3 = id_lib_sql3
+        self.p_db = p_db
+        self.capacity = capacity
+        self.statements = collections.OrderedDict()  # normalised SQL : p_stmt
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Return (return_code, p_stmt) for sql_query. A cached statement is reset
+    # with all bindings cleared, otherwise the statement is prepared and added
+    # to the cache. return_code is SQLITE_OK or the sqlite3_prepare_v3 error.
+    def prepare(self, sql_query):
+        sql_key = sql_normalize(sql_query)
+        p_stmt = self.statements.get(sql_key)
+        if p_stmt is not None:
+            self.hits += 1
+            self.statements.move_to_end(sql_key)
+            sqlite3_reset(self.id_lib_sql3, p_stmt)
+            sqlite3_clear_bindings(self.id_lib_sql3, p_stmt)
+            return SQLITE_OK, p_stmt
+
+        self.misses += 1
+        p_stmt = p_sqlite3_stmt()
+        pzTail = None
+        # SQLITE_PREPARE_PERSISTENT hints that the statement will be kept and reused.
+        return_code = sqlite3_prepare_v3(self.id_lib_sql3, self.p_db, sql_query, -1, SQLITE_PREPARE_PERSISTENT, p_stmt, pzTail)
+        if return_code != SQLITE_OK:
+            sqlite3_finalize(self.id_lib_sql3, p_stmt)
+            return return_code, None
+
+        if self.capacity > 0:
+            if len(self.statements) >= self.capacity:
+                sql_key_old, p_stmt_old = self.statements.popitem(last=False)
+                sqlite3_finalize(self.id_lib_sql3, p_stmt_old)
+                self.evictions += 1
+            self.statements[sql_key] = p_stmt
+        return return_code, p_stmt
+
+    # Finished with the statement for now. Resetting it releases any read or
+    # write locks held by a statement that did not step to SQLITE_DONE.
+    # A statement that is not in the cache (capacity 0) is finalized.
+    def release(self, p_stmt):
+        for p_stmt_cached in reversed(self.statements.values()):
+            if p_stmt_cached is p_stmt:
+                return sqlite3_reset(self.id_lib_sql3, p_stmt)
+        return sqlite3_finalize(self.id_lib_sql3, p_stmt)
+
+    # Finalize all cached statements.
+    def clear(self):
+        for p_stmt in self.statements.values():
+            sqlite3_finalize(self.id_lib_sql3, p_stmt)
+        self.statements.clear()
+        return None
+
+    # Returns a dictionary of the cache counters.
+    def stats(self):
+        return {"size" : len(self.statements), "capacity" : self.capacity, \
+            "hits" : self.hits, "misses" : self.misses, "evictions" : self.evictions}
+## END Class
+
+
+## ====>> Schema metadata cache
+# Table and column names change rarely, but finding them is a query on
+# sqlite_schema or PRAGMA table_info each time. SchemaCache keeps the table
+# names, column names, declared types (decltype) and a row count estimate of
+# each table for a connection, so they are dictionary look-ups.
+#
+# SQLite adds 1 to the schema version (PRAGMA schema_version) in the database
+# file each time the schema is changed by any connection (CREATE, DROP, ALTER).
+# Each look-up reads the schema version, a single step of a cached statement
+# with no file open or table scan, and empties the cache if it has changed.
+# Tables are listed on the first look-up after that, and the columns and row
+# estimate of a table on the first look-up of that table.
+#
+# schema_cache = SchemaCache(id_lib_sql3, p_db, stmt_cache)
+# schema_cache.table_names()  # ['Hrs_worked_Tracker', ...]
+# schema_cache.column_names("Hrs_worked_Tracker")  # ['Week', 'Employee_ID', ...]
+#
+# Table names are not case sensitive, as in SQL. Look-ups return None for a
+# table that does not exist or on an error (see sqlite3_errmsg()).
+# The row estimate is not updated by INSERT or DELETE (the schema is not
+# changed), use SELECT COUNT(*) for an exact count.
+class SchemaCache:
+    def __init__(self, id_lib_sql3, p_db, stmt_cache):
+        self.id_lib_sql3 = id_lib_sql3
+        self.p_db = p_db
+        self.stmt_cache = stmt_cache
+        self.schema_version = None
+        self.tables = None  # table name.lower() : table name, in sqlite_schema order.
+        self.columns = {}  # table name.lower() : (column names, decltypes)
+        self.row_estimates = {}  # table name.lower() : rows
+        self.loads = 0
+        self.invalidations = 0
+
+    # Run a query that returns rows with the params tuple bound.
+    # Returns a list of row tuples or None on an error.
+    def query(self, sql_query, params=()):
+        return_code, p_stmt = self.stmt_cache.prepare(sql_query)
+        if return_code != SQLITE_OK:
+            return None
+        rows = []
+        if sqlite3_bind_params(self.id_lib_sql3, p_stmt, params) == SQLITE_OK:
+            row_decoder = RowDecoder(self.id_lib_sql3, p_stmt)
+            return_code = sqlite3_step(self.id_lib_sql3, p_stmt)
+            while return_code == SQLITE_ROW:
+                rows.append(row_decoder.decode())
+                return_code = sqlite3_step(self.id_lib_sql3, p_stmt)
+        if return_code != SQLITE_DONE:
+            rows = None
+        self.stmt_cache.release(p_stmt)
+        return rows
+
+    # Empty the cache if the schema has changed since it was filled.
+    # Returns SQLITE_OK, or SQLITE_ERROR if the schema version can't be read.
+    def validate(self):
+        rows = self.query("PRAGMA schema_version;")
+        if rows is None:
+            return SQLITE_ERROR
+        if rows[0][0] != self.schema_version:
+            if self.schema_version is not None:
+                self.invalidations += 1
+            self.schema_version = rows[0][0]
+            self.tables = None
+            self.columns = {}
+            self.row_estimates = {}
+        if self.tables is None:
+            rows = self.query("SELECT name FROM sqlite_schema WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY type;")
+            if rows is None:
+                return SQLITE_ERROR
+            self.tables = {}
+            for row in rows:
+                self.tables[row[0].lower()] = row[0]
+            self.loads += 1
+        return SQLITE_OK
+
+    # Returns a list of the table names (not the sqlite_ internal tables).
+    def table_names(self):
+        if self.validate() != SQLITE_OK:
+            return None
+        return list(self.tables.values())
+
+    # Returns 1 if the table exists, 0 if not, or -1 on an error.
+    def table_exists(self, db_table_name):
+        if self.validate() != SQLITE_OK:
+            return -1
+        if db_table_name.lower() in self.tables:
+            return 1
+        return 0
+
+    # Returns (column names, decltypes) lists of a table.
+    def table_columns(self, db_table_name):
+        if self.validate() != SQLITE_OK:
+            return None
+        table_key = db_table_name.lower()
+        if table_key not in self.tables:
+            return None
+        table_columns = self.columns.get(table_key)
+        if table_columns is None:
+            rows = self.query("SELECT name, type FROM pragma_table_info(?);", (self.tables[table_key],))
+            if rows is None:
+                return None
+            table_columns = ([row[0] for row in rows], [row[1] for row in rows])
+            self.columns[table_key] = table_columns
+        return table_columns
+
+    def column_names(self, db_table_name):
+        table_columns = self.table_columns(db_table_name)
+        if table_columns is None:
+            return None
+        return list(table_columns[0])
+
+    def decltypes(self, db_table_name):
+        table_columns = self.table_columns(db_table_name)
+        if table_columns is None:
+            return None
+        return list(table_columns[1])
+
+    # Returns an estimate of the number of rows in a table. This is the row
+    # count of ANALYZE (sqlite_stat1) if the table has been analysed, else the
+    # largest rowid (a binary search of the rowid b-tree, not a table scan),
+    # which is exact until rows are deleted. WITHOUT ROWID tables return None
+    # until analysed.
+    def row_estimate(self, db_table_name):
+        if self.validate() != SQLITE_OK:
+            return None
+        table_key = db_table_name.lower()
+        if table_key not in self.tables:
+            return None
+        if table_key not in self.row_estimates:
+            row_estimate = None
+            # Fails to prepare (None) if ANALYZE has never been run. The table
+            # row (idx NULL) is used if there is one, otherwise the most rows
+            # of an index that is not partial (a partial index has fewer).
+            rows = self.query("SELECT stat FROM sqlite_stat1 WHERE tbl = ?1 AND (idx IS NULL OR idx NOT IN " \
+                "(SELECT name FROM pragma_index_list(?1) WHERE partial = 1)) ORDER BY idx IS NOT NULL, CAST(stat AS INTEGER) DESC LIMIT 1;", \
+                (self.tables[table_key],))
+            if rows is not None and len(rows) > 0:
+                row_estimate = int(str(rows[0][0]).split(" ")[0])
+            if row_estimate is None:
+                rows = self.query("SELECT MAX(rowid) FROM \"" + self.tables[table_key].replace('"', '""') + "\";")
+                if rows is not None:
+                    row_estimate = rows[0][0] or 0
+            self.row_estimates[table_key] = row_estimate
+        return self.row_estimates[table_key]
+
+    # Empty the cache. Statements are held by the StmtCache.
+    def clear(self):
+        self.schema_version = None
+        self.tables = None
+        self.columns = {}
+        self.row_estimates = {}
+        return None
+
+    # Returns a dictionary of the cache counters.
+    def stats(self):
+        return {"schema_version" : self.schema_version, "loads" : self.loads, "invalidations" : self.invalidations}
+## END Class
+
+
+## ====>> Query result cache
+# A read only query on a table that changes rarely returns the same rows each
+# time it is run. ResultCache keeps the rows of up to capacity queries, and
+# up to max_bytes of rows in total, in least recently used (LRU) order keyed
+# by the normalised SQL text, the bound params tuple and a shape (ie. the
+# number of columns and the row format the rows were decoded to).
+#
+# Each result records the tables it was read from. invalidate(table) drops
+# the results of a table when it is written to, so the cache is only correct
+# if every write to the tables goes through code that calls invalidate().
+# A result read while a table was invalidated (a write in another thread) is
+# not cached, see generation.
+#
+# generation = result_cache.generation  # Before the query.
+# rows = result_cache.get(sql_query, params, shape)
+# if rows is None:
+#     rows = ... run the query ...
+#     result_cache.put(sql_query, params, shape, (db_table_name,), rows, generation)
+#
+# The rows are kept as a tuple and returned as is, so the rows must be
+# immutable (strings or tuples of values). Sizes are estimated with
+# sys.getsizeof() and include the row strings and values but not shared
+# objects (ie. small ints). All methods are thread safe.
+
+# Estimated bytes used by the rows, or max_bytes + 1 as soon as it is over
+# max_bytes (so a large result is not measured in full).
+def result_nbytes(rows, max_bytes):
+    nbytes = sys.getsizeof(rows)
+    for row in rows:
+        nbytes += sys.getsizeof(row)
+        if isinstance(row, tuple):
+            for value in row:
+                nbytes += sys.getsizeof(value)
+        if nbytes > max_bytes:
+            return max_bytes + 1
+    return nbytes
+
+
+class ResultCache:
+    def __init__(self, capacity=256, max_bytes=16777216):
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.results = collections.OrderedDict()  # (SQL, params, shape) : (rows, tables, nbytes)
+        self.table_keys = {}  # table name.lower() : set of result keys
+        self.nbytes = 0
+        self.generation = 0  # Incremented by each invalidate() and clear().
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.rejects = 0  # Results larger than max_bytes or read during an invalidation.
+
+    # Returns the cached tuple of rows or None.
+    def get(self, sql_query, params=(), shape=None):
+        result_key = (sql_normalize(sql_query), params, shape)
+        with self.lock:
+            result = self.results.get(result_key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.results.move_to_end(result_key)
+            return result[0]
+
+    # Cache the rows read from the tables. generation is the value of
+    # self.generation before the query was run; the rows are not cached if a
+    # table was invalidated since. Returns 1 if cached, 0 if not.
+    def put(self, sql_query, params, shape, tables, rows, generation):
+        rows = tuple(rows)
+        nbytes = result_nbytes(rows, self.max_bytes)
+        result_key = (sql_normalize(sql_query), params, shape)
+        table_keys = [db_table_name.lower() for db_table_name in tables]
+        with self.lock:
+            if generation != self.generation or nbytes > self.max_bytes or self.capacity <= 0:
+                self.rejects += 1
+                return 0
+            if result_key in self.results:
+                self.remove(result_key)
+            while len(self.results) >= self.capacity or self.nbytes + nbytes > self.max_bytes:
+                self.remove(next(iter(self.results)))
+                self.evictions += 1
+            self.results[result_key] = (rows, table_keys, nbytes)
+            self.nbytes += nbytes
+            for table_key in table_keys:
+                self.table_keys.setdefault(table_key, set()).add(result_key)
+        return 1
+
+    # Remove one result (the caller holds the lock).
+    def remove(self, result_key):
+        rows, table_keys, nbytes = self.results.pop(result_key)
+        self.nbytes -= nbytes
+        for table_key in table_keys:
+            result_keys = self.table_keys.get(table_key)
+            if result_keys is not None:
+                result_keys.discard(result_key)
+                if len(result_keys) == 0:
+                    del self.table_keys[table_key]
+        return None
+
+    # Drop the results read from a table. Returns the number dropped.
+    def invalidate(self, db_table_name):
+        with self.lock:
+            self.generation += 1
+            result_keys = self.table_keys.pop(db_table_name.lower(), ())
+            for result_key in list(result_keys):
+                if result_key in self.results:
+                    self.remove(result_key)
+            self.invalidations += 1
+            return len(result_keys)
+
+    # Drop all results.
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.results.clear()
+            self.table_keys = {}
+            self.nbytes = 0
+        return None
+
+    # Returns a dictionary of the cache counters. hit_rate is hits / look-ups.
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {"size" : len(self.results), "capacity" : self.capacity, \
+                "bytes" : self.nbytes, "max_bytes" : self.max_bytes, \
+                "hits" : self.hits, "misses" : self.misses, \
+                "hit_rate" : self.hits / lookups if lookups > 0 else 0.0, \
+                "evictions" : self.evictions, "invalidations" : self.invalidations, "rejects" : self.rejects}
+## END Class
+
+
+## ====>> Incremental BLOB I/O
+# BlobIO is a file like object (io.RawIOBase) for one BLOB value, so a large
+# BLOB can be read or written in pieces with bounded memory rather than as
+# one bytes object. readinto() reads straight into the caller's buffer.
+#
+# blob = BlobIO(id_lib_sql3, p_db, "Table", "Image", rowid)
+# buffer = bytearray(65536)
+# n = blob.readinto(buffer)  # or blob.read(n), shutil.copyfileobj(blob, f)
+# blob.close()
+#
+# A BLOB can't change size through the handle. To store a large BLOB insert a
+# zeroblob(size) placeholder (sqlite3_bind_zeroblob) then write to it with a
+# writable BlobIO. The handle becomes invalid (SQLITE_ABORT) if the row is
+# changed by another statement. Close the BlobIO before closing p_db.
+# Errors raise Sql3BlobError, an Sql3Error that is also an OSError (errno is
+# None, the sqlite3 result code is in .result_code), and a closed BlobIO raises
+# ValueError as for other file objects.
+# on_close (optional) is called after the BLOB handle is closed.
+class BlobIO(io.RawIOBase):
+    def __init__(self, id_lib_sql3, p_db, db_table_name, db_column_name, sql_rowid, writable=False, db_name="main", on_close=None):
+        io.RawIOBase.__init__(self)
+        self.id_lib_sql3 = id_lib_sql3
+        self.p_db = p_db
+        self.p_blob = p_sqlite3_blob()
+        self.is_writable = writable
+        self.on_close = on_close
+        self.offset = 0
+        self.size = 0
+        return_code = sqlite3_blob_open(id_lib_sql3, p_db, db_name, db_table_name, db_column_name, sql_rowid, 1 if writable else 0, self.p_blob)
+        if return_code != SQLITE_OK:
+            # Read the error before close(), on_close may close p_db.
+            errmsg = sqlite3_errmsg(id_lib_sql3, p_db)
+            self.p_blob = None
+            self.close()
+            raise Sql3BlobError(return_code, errmsg, "Failed to open BLOB")
+        self.size = sqlite3_blob_bytes(id_lib_sql3, self.p_blob)
+
+    def readable(self):
+        return True
+
+    def writable(self):
+        return self.is_writable
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer_obj):
+        self._checkClosed()
+        view = memoryview(buffer_obj).cast("B")
+        nByte = min(len(view), self.size - self.offset)
+        if nByte <= 0:
+            return 0  # End of BLOB.
+        return_code = sqlite3_blob_read(self.id_lib_sql3, self.p_blob, view, nByte, self.offset)
+        if return_code != SQLITE_OK:
+            raise Sql3BlobError(return_code, sqlite3_errmsg(self.id_lib_sql3, self.p_db), "Failed to read BLOB")
+        self.offset += nByte
+        return nByte
+
+    def write(self, buffer_obj):
+        self._checkClosed()
+        if self.is_writable == False:
+            raise io.UnsupportedOperation("BLOB not opened writable")
+        view = memoryview(buffer_obj).cast("B")
+        nByte = len(view)
+        if self.offset + nByte > self.size:
+            raise Sql3BlobError(SQLITE_ERROR, "", "Write past the end of the BLOB (" + str(self.size) + " bytes)")
+        return_code = sqlite3_blob_write(self.id_lib_sql3, self.p_blob, view, nByte, self.offset)
+        if return_code != SQLITE_OK:
+            raise Sql3BlobError(return_code, sqlite3_errmsg(self.id_lib_sql3, self.p_db), "Failed to write BLOB")
+        self.offset += nByte
+        return nByte
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        self._checkClosed()
+        if whence == io.SEEK_CUR:
+            offset += self.offset
+        elif whence == io.SEEK_END:
+            offset += self.size
+        self.offset = max(0, min(offset, self.size))
+        return self.offset
+
+    def tell(self):
+        self._checkClosed()
+        return self.offset
+
+    # Move the open handle to the same column of another row. This is faster
+    # than closing and opening a new BlobIO.
+    def reopen(self, sql_rowid):
+        self._checkClosed()
+        return_code = sqlite3_blob_reopen(self.id_lib_sql3, self.p_blob, sql_rowid)
+        if return_code != SQLITE_OK:
+            raise Sql3BlobError(return_code, sqlite3_errmsg(self.id_lib_sql3, self.p_db), "Failed to reopen BLOB")
+        self.offset = 0
+        self.size = sqlite3_blob_bytes(self.id_lib_sql3, self.p_blob)
+        return None
+
+    def close(self):
+        if self.closed == False:
+            if self.p_blob:  # Not a NULL pointer.
+                sqlite3_blob_close(self.id_lib_sql3, self.p_blob)
+                self.p_blob = None
+            io.RawIOBase.close(self)
+            if self.on_close is not None:
+                self.on_close()
+        return None
+## END Class
+
+
+## ====>> Query profiling
+# Optional instrumentation to show where the time goes inside the wrapper and
+# convenience functions. Profiling is off by default and costs nothing when off.
+#
+# profiling_enable() replaces the module functions sqlite3_prepare_v2/v3,
+# sqlite3_step, sqlite3_reset, sqlite3_finalize, sqlite3_open_v2 and
+# sqlite3_close(_v2) with timed versions (QueryProfiler methods), and
+# profiling_disable() puts the original functions back. Callers that look the
+# function up as ozz_sql3.sqlite3_step() etc. on each call are profiled; code
+# that keeps id_lib_sql3.sqlite3_step for a tight loop is not.
+#
+# Each run of a statement (prepare or reset, the sqlite3_step() calls, until
+# SQLITE_DONE, an error, a reset or sqlite3_finalize) adds to the statistics
+# for its normalised SQL text: runs, rows, total and max step time and a
+# histogram of run times in power of 2 microsecond buckets, plus the prepare
+# count and time.
+#
+# With engine=True an sqlite3_trace_v2() SQLITE_TRACE_PROFILE callback is also
+# registered on each connection opened while profiling (or with
+# profiling_attach()), which records the time SQLite itself reports for every
+# statement, including those stepped directly through id_lib_sql3. The engine
+# time is the wall clock time from the first step until the statement is
+# reset or finalized (so it includes the caller's time between steps) with a
+# resolution of about a millisecond on most builds.
+#
+# ozz_sql3.profiling_enable()
+# ... database work ...
+# ozz_sql3.profiling_disable()
+# stats = ozz_sql3.get_query_stats()  # {SQL text : {...}}
+# ozz_sql3.query_stats_report(10)  # The 10 slowest statements by total time.
+#
+# NOTE! Only one profiler is active for the whole module (all connections).
+# The counters are not locked and may be slightly off with several threads.
+
+QUERY_HIST_BUCKETS = 24  # <1us, <2us, <4us ... >=4s
+
+class QueryProfiler:
+    PROFILED_FUNCTIONS = ("sqlite3_prepare_v2", "sqlite3_prepare_v3", "sqlite3_step", "sqlite3_reset", \
+        "sqlite3_finalize", "sqlite3_open_v2", "sqlite3_close", "sqlite3_close_v2")
+
+    def __init__(self, engine=True):
+        self.engine = engine
+        self.originals = {}  # function name : original module function
+        self.stats = {}  # normalised SQL : statistics dictionary
+        self.runs = {}  # p_stmt address : [normalised SQL, step time, rows, steps, p_db address]
+        self.sql_keys = {}  # SQL text (bytes) : normalised SQL
+        self.attached = {}  # p_db address : (id_lib_sql3, p_db)
+        self.trace_callback = SQLITE_TRACE_CALLBACK(self.trace)
+
+    def sql_key(self, b_sql):
+        sql_key = self.sql_keys.get(b_sql)
+        if sql_key is None:
+            sql_key = sql_normalize(b_sql.decode('utf-8')) if b_sql is not None else "?"
+            self.sql_keys[b_sql] = sql_key
+        return sql_key
+
+    def query_stats(self, sql_key):
+        stats = self.stats.get(sql_key)
+        if stats is None:
+            stats = {"runs" : 0, "rows" : 0, "steps" : 0, "total_s" : 0.0, "max_s" : 0.0, \
+                "prepares" : 0, "prepare_s" : 0.0, "engine_runs" : 0, "engine_s" : 0.0, \
+                "hist" : [0] * QUERY_HIST_BUCKETS}
+            self.stats[sql_key] = stats
+        return stats
+
+    # Start a run for p_stmt (on prepare, or the first step of a statement
+    # that was prepared before profiling was enabled). The runs are kept by
+    # statement address, as a new p_stmt object can have the id() of one
+    # that is gone.
+    def run_start(self, id_lib_sql3, p_stmt):
+        run = [self.sql_key(id_lib_sql3.sqlite3_sql(p_stmt)), 0.0, 0, 0, id_lib_sql3.sqlite3_db_handle(p_stmt)]
+        self.runs[ctypes.cast(p_stmt, ctypes.c_void_p).value] = run
+        return run
+
+    # End and drop the runs of the statements of a connection that is closed,
+    # including statements that were not finalized through this profiler.
+    def runs_close(self, p_db):
+        db_address = ctypes.cast(p_db, ctypes.c_void_p).value
+        for stmt_address, run in list(self.runs.items()):
+            if run[4] == db_address:
+                self.run_end(run)
+                del self.runs[stmt_address]
+        return None
+
+    # Add a run that has stepped to the statistics and clear it for the next run.
+    def run_end(self, run):
+        if run[3] == 0:
+            return None
+        stats = self.query_stats(run[0])
+        stats["runs"] += 1
+        stats["rows"] += run[2]
+        stats["steps"] += run[3]
+        stats["total_s"] += run[1]
+        if run[1] > stats["max_s"]:
+            stats["max_s"] = run[1]
+        stats["hist"][min(int(run[1] * 1000000).bit_length(), QUERY_HIST_BUCKETS - 1)] += 1
+        run[1] = 0.0
+        run[2] = 0
+        run[3] = 0
+        return None
+
+    def prepare_end(self, id_lib_sql3, pp_stmt, return_code, t_prepare):
+        if return_code == SQLITE_OK and pp_stmt:
+            run = self.run_start(id_lib_sql3, pp_stmt)
+            stats = self.query_stats(run[0])
+            stats["prepares"] += 1
+            stats["prepare_s"] += t_prepare
+        return return_code
+
+    ## Timed replacements for the module functions (same arguments).
+
+    def sqlite3_prepare_v2(self, id_lib_sql3, p_db, sql_query, nByte, pp_stmt, pzTail):
+        t_start = time.perf_counter()
+        return_code = self.originals["sqlite3_prepare_v2"](id_lib_sql3, p_db, sql_query, nByte, pp_stmt, pzTail)
+        return self.prepare_end(id_lib_sql3, pp_stmt, return_code, time.perf_counter() - t_start)
+
+    def sqlite3_prepare_v3(self, id_lib_sql3, p_db, sql_query, nByte, prepFlags, pp_stmt, pzTail):
+        t_start = time.perf_counter()
+        return_code = self.originals["sqlite3_prepare_v3"](id_lib_sql3, p_db, sql_query, nByte, prepFlags, pp_stmt, pzTail)
+        return self.prepare_end(id_lib_sql3, pp_stmt, return_code, time.perf_counter() - t_start)
+
+    def sqlite3_step(self, id_lib_sql3, p_stmt):
+        t_start = time.perf_counter()
+        return_code = id_lib_sql3.sqlite3_step(p_stmt)
+        t_step = time.perf_counter() - t_start
+        run = self.runs.get(ctypes.cast(p_stmt, ctypes.c_void_p).value)
+        if run is None:
+            run = self.run_start(id_lib_sql3, p_stmt)
+        run[1] += t_step
+        run[3] += 1
+        if return_code == SQLITE_ROW:
+            run[2] += 1
+        else:
+            self.run_end(run)
+        return return_code
+
+    def sqlite3_reset(self, id_lib_sql3, p_stmt):
+        run = self.runs.get(ctypes.cast(p_stmt, ctypes.c_void_p).value)
+        if run is not None:
+            self.run_end(run)
+        return self.originals["sqlite3_reset"](id_lib_sql3, p_stmt)
+
+    def sqlite3_finalize(self, id_lib_sql3, p_stmt):
+        run = self.runs.pop(ctypes.cast(p_stmt, ctypes.c_void_p).value, None)
+        if run is not None:
+            self.run_end(run)
+        return self.originals["sqlite3_finalize"](id_lib_sql3, p_stmt)
+
+    def sqlite3_open_v2(self, id_lib_sql3, db_filename, pp_db, flags, p_zVfs):
+        return_code = self.originals["sqlite3_open_v2"](id_lib_sql3, db_filename, pp_db, flags, p_zVfs)
+        if return_code == SQLITE_OK:
+            self.attach(id_lib_sql3, pp_db)
+        return return_code
+
+    def sqlite3_close(self, id_lib_sql3, p_db):
+        return_code = self.originals["sqlite3_close"](id_lib_sql3, p_db)
+        if return_code == SQLITE_OK:
+            self.attached.pop(ctypes.cast(p_db, ctypes.c_void_p).value, None)
+            self.runs_close(p_db)
+        return return_code
+
+    def sqlite3_close_v2(self, id_lib_sql3, p_db):
+        self.attached.pop(ctypes.cast(p_db, ctypes.c_void_p).value, None)
+        self.runs_close(p_db)
+        return self.originals["sqlite3_close_v2"](id_lib_sql3, p_db)
+
+    ## Engine side timings.
+
+    # SQLITE_TRACE_CALLBACK, called by SQLite as each statement finishes.
+    def trace(self, trace_type, p_ctx, p_stmt, p_x):
+        if trace_type == SQLITE_TRACE_PROFILE and self.attached:
+            id_lib_sql3 = next(iter(self.attached.values()))[0]
+            stats = self.query_stats(self.sql_key(id_lib_sql3.sqlite3_sql(p_stmt)))
+            stats["engine_runs"] += 1
+            stats["engine_s"] += ctypes.cast(p_x, ctypes.POINTER(ctypes.c_int64))[0] / 1000000000
+        return 0
+
+    # Register the SQLITE_TRACE_PROFILE callback on an open connection.
+    # Returns the sqlite3_trace_v2() result code.
+    def attach(self, id_lib_sql3, p_db):
+        if self.engine != True:
+            return SQLITE_OK
+        return_code = sqlite3_trace_v2(id_lib_sql3, p_db, SQLITE_TRACE_PROFILE, self.trace_callback, None)
+        if return_code == SQLITE_OK:
+            self.attached[ctypes.cast(p_db, ctypes.c_void_p).value] = (id_lib_sql3, p_db)
+        return return_code
+
+    # Remove the callback from all connections that are still open.
+    def detach_all(self):
+        for id_lib_sql3, p_db in self.attached.values():
+            sqlite3_trace_v2(id_lib_sql3, p_db, 0, None, None)
+        self.attached.clear()
+        return None
+
+    def enable(self):
+        module_globals = globals()
+        for func_name in self.PROFILED_FUNCTIONS:
+            self.originals[func_name] = module_globals[func_name]
+            module_globals[func_name] = getattr(self, func_name)
+        return None
+
+    def disable(self):
+        module_globals = globals()
+        for func_name, function in self.originals.items():
+            module_globals[func_name] = function
+        self.originals.clear()
+        self.detach_all()
+        self.runs.clear()
+        return None
+
+    # Upper bound (seconds) of the histogram bucket holding the fraction
+    # (ie. 0.95) of the runs, but not more than the slowest run, or 0.0 if
+    # there are no runs.
+    @staticmethod
+    def percentile(stats, fraction):
+        cnt_runs = 0
+        for i in range(QUERY_HIST_BUCKETS):
+            cnt_runs += stats["hist"][i]
+            if cnt_runs >= stats["runs"] * fraction and cnt_runs > 0:
+                return min((1 << i) / 1000000, stats["max_s"])
+        return 0.0
+## END Class
+
+query_profiler = None  # The QueryProfiler, None until profiling is first enabled.
+query_profiling = False
+
+
+# Start profiling (keeping any statistics from an earlier profile).
+# engine=True also records the SQLite engine timings with sqlite3_trace_v2().
+# Returns the QueryProfiler.
+def profiling_enable(engine=True):
+    global query_profiler, query_profiling
+    if query_profiler is None:
+        query_profiler = QueryProfiler(engine)
+    query_profiler.engine = engine
+    if query_profiling == False:
+        query_profiler.enable()
+        query_profiling = True
+    return query_profiler
+
+# Stop profiling. The module functions are restored and the trace callbacks
+# removed. The statistics are kept for get_query_stats().
+def profiling_disable():
+    global query_profiling
+    if query_profiling == True:
+        query_profiler.disable()
+        query_profiling = False
+    return None
+
+# Register the engine timing callback on a connection that was opened before
+# profiling_enable(). Returns SQLITE_OK, or SQLITE_MISUSE if not profiling.
+def profiling_attach(id_lib_sql3, p_db):
+    if query_profiling == False:
+        return SQLITE_MISUSE
+    return query_profiler.attach(id_lib_sql3, p_db)
+
+# Returns a dictionary {normalised SQL text : statistics dictionary} with the
+# keys runs, rows, steps, total_s, mean_s, max_s, p95_s, prepares, prepare_s,
+# engine_runs, engine_s and hist (run counts per power of 2 microseconds).
+# Returns an empty dictionary if profiling was never enabled.
+def get_query_stats():
+    query_stats = {}
+    if query_profiler is None:
+        return query_stats
+    for sql_key, stats in list(query_profiler.stats.items()):
+        stats = dict(stats, hist=list(stats["hist"]))
+        stats["mean_s"] = stats["total_s"] / stats["runs"] if stats["runs"] > 0 else 0.0
+        stats["p95_s"] = QueryProfiler.percentile(stats, 0.95)
+        query_stats[sql_key] = stats
+    return query_stats
+
+# Clear the statistics.
+def query_stats_reset():
+    if query_profiler is not None:
+        query_profiler.stats.clear()
+        for run in query_profiler.runs.values():
+            run[1] = 0.0
+            run[2] = 0
+            run[3] = 0
+    return None
+
+# Print the top slowest statements ranked by total time (the step time, or
+# the engine time for statements that were only seen by the engine callback).
+# Times are in milliseconds, p95 is the histogram bucket upper bound.
+def query_stats_report(top=10, file=None):
+    if file is None:
+        file = sys.stdout
+    query_stats = get_query_stats()
+    ranked = sorted(query_stats.items(), key=lambda item: max(item[1]["total_s"], item[1]["engine_s"]), reverse=True)
+    print("{:>10} {:>8} {:>9} {:>9} {:>9} {:>9} {:>10} {:>10}  {}".format("total ms", "runs", "rows", \
+        "mean ms", "p95 ms", "max ms", "prep ms", "engine ms", "SQL"), file=file)
+    for sql_key, stats in ranked[:top]:
+        print("{:>10.2f} {:>8} {:>9} {:>9.3f} {:>9.3f} {:>9.3f} {:>10.2f} {:>10.2f}  {}".format(stats["total_s"] * 1000, \
+            stats["runs"], stats["rows"], stats["mean_s"] * 1000, stats["p95_s"] * 1000, stats["max_s"] * 1000, \
+            stats["prepare_s"] * 1000, stats["engine_s"] * 1000, sql_key[:60]), file=file)
+    return None
+
+
+## ====>> Errors
+# The functions above return the sqlite3 result codes. Sql3Error carries a
+# result code and its sqlite3_errmsg() text as a Python exception, with a
+# subclass for the result codes that a program usually handles differently
+# (ie. retry on Sql3BusyError). sql3_error() returns the matching class.
+#
+# try:
+#     ...
+# except ozz_sql3.Sql3BusyError:  # Before Sql3Error, it is a subclass.
+#     ...
+# except ozz_sql3.Sql3Error as err:
+#     print(err.result_code, err.errmsg)
+
+class Sql3Error(Exception):
+    def __init__(self, result_code, errmsg="", message=""):
+        Exception.__init__(self, result_code, errmsg, message)
+        self.result_code = result_code  # The (extended) sqlite3 result code.
+        self.errmsg = errmsg  # sqlite3_errmsg() text.
+        self.message = message  # What was being done, ie. "Failed to prepare data".
+
+    # The primary result code (the low 8 bits of an extended result code).
+    @property
+    def primary_code(self):
+        return self.result_code & 0xff
+
+    def __str__(self):
+        if self.errmsg == "":
+            return self.message + " | " + str(self.result_code)
+        return self.message + ": " + self.errmsg + " | " + str(self.result_code)
+
+class Sql3BusyError(Sql3Error):  # SQLITE_BUSY, SQLITE_LOCKED
+    pass
+
+class Sql3ConstraintError(Sql3Error):  # SQLITE_CONSTRAINT
+    pass
+
+class Sql3CantOpenError(Sql3Error):  # SQLITE_CANTOPEN, SQLITE_NOTADB, SQLITE_PERM
+    pass
+
+class Sql3ReadOnlyError(Sql3Error):  # SQLITE_READONLY
+    pass
+
+class Sql3InterruptError(Sql3Error):  # SQLITE_INTERRUPT
+    pass
+
+class Sql3MisuseError(Sql3Error):  # SQLITE_MISUSE, SQLITE_RANGE
+    pass
+
+# Raised by BlobIO. It is also an OSError, as file objects raise, but with
+# errno None: OSError(result_code, ...) would pick a subclass by errno, ie.
+# SQLITE_ABORT (4, an expired handle) as InterruptedError, which
+# io.BufferedReader retries forever.
+class Sql3BlobError(Sql3Error, OSError):
+    def __new__(cls, *args):
+        return OSError.__new__(cls)
+
+# Primary result code : exception class. Other codes use Sql3Error.
+SQL3_ERRORS = {
+    SQLITE_BUSY : Sql3BusyError,
+    SQLITE_LOCKED : Sql3BusyError,
+    SQLITE_CONSTRAINT : Sql3ConstraintError,
+    SQLITE_CANTOPEN : Sql3CantOpenError,
+    SQLITE_NOTADB : Sql3CantOpenError,
+    SQLITE_PERM : Sql3CantOpenError,
+    SQLITE_READONLY : Sql3ReadOnlyError,
+    SQLITE_INTERRUPT : Sql3InterruptError,
+    SQLITE_MISUSE : Sql3MisuseError,
+    SQLITE_RANGE : Sql3MisuseError,
+    }
+
+# Returns a new Sql3Error (or subclass) for the result code.
+def sql3_error(result_code, errmsg="", message=""):
+    return SQL3_ERRORS.get(result_code & 0xff, Sql3Error)(result_code, errmsg, message)
+
+
 ## ====>> Future
 
 # CAPI3REF: Last Insert Rowid
 # SQLITE_API sqlite3_int64 sqlite3_last_insert_rowid(sqlite3*);
 def sqlite3_last_insert_rowid(id_lib_sql3, p_db):
 
-    id_lib_sql3.sqlite3_last_insert_rowid.argtypes = [ctypes.c_void_p]  # ctypes.CDLL
-    id_lib_sql3.sqlite3_last_insert_rowid.restype = ctypes.c_longlong
-
-    return id_lib_sql3.sqlite3_db_handle(p_db)
+    return id_lib_sql3.sqlite3_last_insert_rowid(p_db)
 
 
 ## CAPI3REF: Extract Metadata About A Column Of A Table
@@ -706,19 +2093,6 @@ def sqlite3_table_column_metadata(id_lib_sql3, p_db, zDbName, zTableName, zColum
 
     # Other arguments not implimented !
 
-    #[ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int, ctypes.c_int, ctypes.POINTER(ctypes.POINTER(sqlite3_stmt)), ctypes.c_void_p]
-    id_lib_sql3.sqlite3_table_column_metadata.argtypes = \
-    [ctypes.c_void_p, \
-    ctypes.c_void_p, \
-    ctypes.c_void_p, \
-    ctypes.c_void_p, \
-    ctypes.POINTER(ctypes.c_char_p), \
-    ctypes.POINTER(ctypes.c_char_p), \
-    ctypes.POINTER(ctypes.c_int), \
-    ctypes.POINTER(ctypes.c_int), \
-    ctypes.POINTER(ctypes.c_int)]
-    id_lib_sql3.sqlite3_table_column_metadata.restype = ctypes.c_int
-
     return id_lib_sql3.sqlite3_table_column_metadata(\
     p_db, \
     zDbName, \
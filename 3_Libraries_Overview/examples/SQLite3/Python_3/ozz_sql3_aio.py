@@ -0,0 +1,374 @@
+#-------------------------------------------------------------------------------
+# Name:         ozz_sql3_aio.py
+# Purpose:      asyncio front-end for the ozz_sql3 / example_sql3 wrappers.
+#               Awaitable queries for SQLite version 3.
+#
+# Platform:     Win64, Ubuntu64
+# Depends:      Python 3.9 plus, SQLite v3.34.1 plus (dll/so), ctypes, asyncio,
+#               ozz_sql3.py, example_sql3.py
+#
+# Author:       Axle
+#
+# Created:      15/05/2023
+# Updated:      23/05/2023
+# Copyright:    (c) Axle 2023
+# Licence:      MIT-0 No Attribution
+#-------------------------------------------------------------------------------
+# Notes:
+# The SQLite C API is blocking. Calling it from a coroutine stops the asyncio
+# event loop (and every other coroutine) until the query returns, so a long
+# table scan will stall timers, sockets etc. for the whole scan.
+#
+# AsyncConnection gives each database connection its own worker thread. The
+# connection (an example_sql3.Database session) is only ever used by that
+# thread, and coroutines send it requests through a queue and await the
+# result. ctypes releases the GIL while in the C library, so the event loop
+# keeps running while sqlite3_step() works.
+#
+# async with ozz_sql3_aio.AsyncConnection("Example_DB.db") as conn:
+#     return_code, rows = await conn.execute("SELECT * FROM Table WHERE Name = ?;", ("Joe Blogs",))
+#     return_code, number_rows = await conn.executemany("INSERT INTO Table VALUES (?, ?);", db_rows)
+#     async for row in conn.fetch_iter("SELECT rowid, * FROM Table;"):
+#         print(row)
+#     return_code = await conn.run(example_sql3.db_table_create, "CREATE TABLE ...")
+#
+# The request queue is bounded (queue_size). When it is full a coroutine waits
+# (without blocking the event loop) for a free place before its request is
+# queued. Requests are run one at a time in the order they were queued.
+#
+# Cancelling a coroutine (task.cancel(), asyncio.wait_for() timeout ...) that
+# is waiting on a request removes the request if it has not started, or calls
+# sqlite3_interrupt() if it is running. sqlite3_interrupt() stops every
+# statement running on the connection, including any open fetch_iter().
+#-------------------------------------------------------------------------------
+
+import queue, threading
+import asyncio
+
+import ozz_sql3  # Import our SQLite 3 Ctypes binder.
+import example_sql3  # Database session and db_* convenience functions.
+
+## ====>> Error Constants
+# Beware of name conflicts!
+from ozz_sql3_constants import *
+
+
+## ====>> Worker thread requests
+# These are run by the worker thread with the open Database session as the
+# first argument.
+
+# Run one SQL statement with the params tuple bound to its ? parameters.
+# Returns (return_code, rows) where rows is a list of the row tuples (empty
+# for statements that return no rows, see ozz_sql3.RowDecoder).
+# return_code is SQLITE_OK or the sqlite3 error code.
+def aio_execute(db, sql_query, params, named):
+    id_lib_sql3 = db.id_lib_sql3
+    rows = []
+
+    return_code, p_stmt = example_sql3.db_prepare_bind(db, sql_query, params)
+    if return_code != SQLITE_OK:
+        example_sql3.db_error(id_lib_sql3, db.p_db, return_code, "Failed to prepare data")  # DEBUG
+        return return_code, rows
+
+    row_decoder = ozz_sql3.RowDecoder(id_lib_sql3, p_stmt, None, named)
+    return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)
+    while return_code == SQLITE_ROW:
+        rows.append(row_decoder.decode())
+        return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)
+        ## END while (sqlite3_step())
+
+    if return_code != SQLITE_DONE:  # SQLITE_DONE==101, SQLITE_ROW==100
+        example_sql3.db_error(id_lib_sql3, db.p_db, return_code, "Step failed")  # DEBUG
+    else:
+        return_code = SQLITE_OK
+    db.stmt_cache.release(p_stmt)
+    return return_code, rows
+## END Function
+
+
+# Run one SQL statement for each params tuple in seq_params, in a single
+# transaction (or in the transaction that is already open on the session).
+# Returns (return_code, number_rows) with the number of params tuples run.
+# On an error the transaction started here is rolled back and number_rows
+# is 0.
+def aio_executemany(db, sql_query, seq_params):
+    id_lib_sql3 = db.id_lib_sql3
+    number_rows = 0
+
+    return_code, p_stmt = db.stmt_cache.prepare(sql_query)
+    if return_code != SQLITE_OK:
+        example_sql3.db_error(id_lib_sql3, db.p_db, return_code, "Failed to prepare data")  # DEBUG
+        return return_code, number_rows
+
+    # Only start (and end) a transaction if one is not already open.
+    own_transaction = ozz_sql3.sqlite3_get_autocommit(id_lib_sql3, db.p_db) != 0
+    if own_transaction == True:
+        return_code = example_sql3.db_execute(db, "BEGIN IMMEDIATE;")
+    if return_code == SQLITE_OK:
+        for params in seq_params:
+            return_code = ozz_sql3.sqlite3_bind_params(id_lib_sql3, p_stmt, params)
+            if return_code != SQLITE_OK:
+                break
+            return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)
+            ozz_sql3.sqlite3_reset(id_lib_sql3, p_stmt)
+            if return_code != SQLITE_DONE and return_code != SQLITE_ROW:
+                break
+            return_code = SQLITE_OK
+            number_rows += 1
+            ## END for params
+
+    if return_code != SQLITE_OK:
+        example_sql3.db_error(id_lib_sql3, db.p_db, return_code, "Execute many failed")  # DEBUG
+        # An interrupted statement has already rolled back the transaction.
+        if own_transaction == True and ozz_sql3.sqlite3_get_autocommit(id_lib_sql3, db.p_db) == 0:
+            example_sql3.db_execute(db, "ROLLBACK;")
+        number_rows = 0
+    elif own_transaction == True:
+        return_code = example_sql3.db_execute(db, "COMMIT;")
+        if return_code != SQLITE_OK:
+            example_sql3.db_error(id_lib_sql3, db.p_db, return_code, "Commit failed")  # DEBUG
+            example_sql3.db_execute(db, "ROLLBACK;")
+            number_rows = 0
+    db.stmt_cache.release(p_stmt)
+    return return_code, number_rows
+## END Function
+
+
+# fetch_iter() cursor: [p_stmt, row_decoder] for the life of the iteration.
+# The statement is prepared outside of the statement cache so that other
+# requests can use the cache between chunks. Open cursors are kept in the
+# cursors list of the connection so that aio_close() can finalize them.
+def aio_fetch_open(db, cursors, cursor, sql_query, params, named):
+    id_lib_sql3 = db.id_lib_sql3
+    p_stmt = ozz_sql3.p_sqlite3_stmt()
+    pzTail = None
+
+    return_code = ozz_sql3.sqlite3_prepare_v3(id_lib_sql3, db.p_db, sql_query, -1, 0, p_stmt, pzTail)
+    if return_code == SQLITE_OK:
+        return_code = ozz_sql3.sqlite3_bind_params(id_lib_sql3, p_stmt, params)
+    if return_code != SQLITE_OK:
+        example_sql3.db_error(id_lib_sql3, db.p_db, return_code, "Failed to prepare data")  # DEBUG
+        ozz_sql3.sqlite3_finalize(id_lib_sql3, p_stmt)
+        return return_code
+    cursor.insert(0, p_stmt)
+    cursor.insert(1, ozz_sql3.RowDecoder(id_lib_sql3, p_stmt, None, named))
+    cursors.append(cursor)
+    return return_code
+
+# Step up to chunk_size rows of the cursor statement.
+# Returns (return_code, rows). return_code is SQLITE_ROW if there may be more
+# rows, SQLITE_DONE after the last row, or the sqlite3 error code.
+def aio_fetch_chunk(db, cursor, chunk_size):
+    id_lib_sql3 = db.id_lib_sql3
+    p_stmt = cursor[0]
+    decode_row = cursor[1].decode
+    rows = []
+
+    return_code = SQLITE_ROW
+    while len(rows) < chunk_size:
+        return_code = ozz_sql3.sqlite3_step(id_lib_sql3, p_stmt)
+        if return_code != SQLITE_ROW:
+            break
+        rows.append(decode_row())
+        ## END while (sqlite3_step())
+
+    if return_code != SQLITE_ROW and return_code != SQLITE_DONE:
+        example_sql3.db_error(id_lib_sql3, db.p_db, return_code, "Step failed")  # DEBUG
+        # Reset now so that an interrupted statement does not stay active.
+        ozz_sql3.sqlite3_reset(id_lib_sql3, p_stmt)
+    return return_code, rows
+
+# Finalize the cursor statement. A cursor that was already finalized (ie. by
+# aio_close() before the generator was closed) is left as it is.
+def aio_fetch_close(db, cursors, cursor):
+    if len(cursor) > 0:
+        ozz_sql3.sqlite3_finalize(db.id_lib_sql3, cursor[0])
+        cursor.clear()
+    for i in range(len(cursors)):
+        if cursors[i] is cursor:
+            del cursors[i]
+            break
+    return None
+
+def aio_open(db):
+    return_code = db.open()
+    if return_code != SQLITE_OK:
+        example_sql3.db_error(db.id_lib_sql3, db.p_db, return_code, "Can't open database")  # DEBUG
+    return return_code
+
+# Finalize the cursors of fetch_iter() generators that are still open, then
+# close the database.
+def aio_close(db, cursors):
+    for cursor in cursors:
+        if len(cursor) > 0:
+            ozz_sql3.sqlite3_finalize(db.id_lib_sql3, cursor[0])
+            cursor.clear()
+    cursors.clear()
+    return_code = db.close()
+    if return_code != SQLITE_OK:
+        example_sql3.db_error(db.id_lib_sql3, db.p_db, return_code, "Failed to close database")  # DEBUG
+    return return_code
+
+
+## ====>> Async connection
+
+# A queued call to func(db, *args) on the worker thread.
+# future is None for requests that are not awaited (ie. finalize on close).
+class AioRequest:
+    def __init__(self, func, args, future):
+        self.func = func
+        self.args = args
+        self.future = future
+        self.cancelled = 0  # 1 == skip the request if it has not started.
+## END Class
+
+
+# One database connection served by one worker thread, see Notes above.
+# flags, id_lib_sql3 and stmt_cache_size are passed to example_sql3.Database.
+# conn.db is the session; only use it in functions passed to conn.run().
+class AsyncConnection:
+    def __init__(self, db_file_name, flags=SQLITE_OPEN_READWRITE | SQLITE_OPEN_CREATE, queue_size=64, id_lib_sql3=None, stmt_cache_size=32):
+        self.db = example_sql3.Database(db_file_name, flags, id_lib_sql3, 0, stmt_cache_size)
+        self.id_lib_sql3 = self.db.id_lib_sql3
+        self.queue_size = queue_size
+        self.requests = queue.SimpleQueue()  # AioRequest, None stops the worker.
+        self.slots = None  # asyncio.Semaphore(queue_size), the queue bound.
+        self.loop = None
+        self.worker = None
+        self.running = None  # The AioRequest being run by the worker.
+        self.running_lock = threading.Lock()
+        self.cursors = []  # Open fetch_iter() cursors, only used by the worker.
+
+    # Start the worker thread and open the database on it.
+    # Returns the sqlite3 result code.
+    async def open(self):
+        if self.worker is None:
+            self.loop = asyncio.get_running_loop()
+            self.slots = asyncio.Semaphore(self.queue_size)
+            self.worker = threading.Thread(target=self.run_worker, name="ozz_sql3_aio " + str(self.db.file_name), daemon=True)
+            self.worker.start()
+        return await self.run(aio_open)
+
+    # Close the database and stop the worker thread after all queued requests.
+    # Returns the sqlite3 result code.
+    async def close(self):
+        if self.worker is None:
+            return SQLITE_OK
+        return_code = await self.run(aio_close, self.cursors)
+        self.requests.put(None)
+        await asyncio.to_thread(self.worker.join)
+        self.worker = None
+        return return_code
+
+    # Raises an ozz_sql3.Sql3Error (after stopping the worker) if the
+    # database can't be opened.
+    async def __aenter__(self):
+        return_code = await self.open()
+        if return_code != SQLITE_OK:
+            await self.close()
+            raise example_sql3.db_fail("Can't open database: " + str(self.db.file_name), return_code)
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+        return False
+
+    # Run func(db, *args) on the worker thread and return its result, ie.
+    # await conn.run(example_sql3.db_table_create, "CREATE TABLE ...")
+    # Any exception raised by func is raised here. Raises Sql3MisuseError if
+    # the connection is not open (no worker thread).
+    async def run(self, func, *args):
+        if self.worker is None:
+            raise ozz_sql3.Sql3MisuseError(SQLITE_MISUSE, "", "AsyncConnection is not open: " + str(self.db.file_name))
+        await self.slots.acquire()
+        request = AioRequest(func, args, self.loop.create_future())
+        self.requests.put(request)
+        try:
+            return await request.future
+        except asyncio.CancelledError:
+            with self.running_lock:
+                request.cancelled = 1
+                if self.running is request:
+                    ozz_sql3.sqlite3_interrupt(self.id_lib_sql3, self.db.p_db)
+            raise
+
+    # Queue func(db, *args) without waiting for it (and without using a
+    # place in the bounded queue).
+    def post(self, func, *args):
+        self.requests.put(AioRequest(func, args, None))
+        return None
+
+    # Awaitable. Returns (return_code, rows), see aio_execute().
+    def execute(self, sql_query, params=(), named=False):
+        return self.run(aio_execute, sql_query, params, named)
+
+    # Awaitable. Returns (return_code, number_rows), see aio_executemany().
+    def executemany(self, sql_query, seq_params):
+        return self.run(aio_executemany, sql_query, seq_params)
+
+    # Async generator of the result rows of sql_query, fetched chunk_size rows
+    # at a time so that other requests on the connection can run between
+    # chunks. Rows are tuples (or namedtuples with named=True) of Python values.
+    # return_code_ret (optional list) returns byref 1 when all rows have been
+    # read or -1 on an error.
+    async def fetch_iter(self, sql_query, params=(), chunk_size=256, named=False, return_code_ret=None):
+        err_ret = -1
+        cursor = []
+        return_code = SQLITE_ERROR
+        try:
+            return_code = await self.run(aio_fetch_open, self.cursors, cursor, sql_query, params, named)
+            if return_code != SQLITE_OK:
+                return
+            return_code = SQLITE_ROW
+            while return_code == SQLITE_ROW:
+                return_code, rows = await self.run(aio_fetch_chunk, cursor, chunk_size)
+                for row in rows:
+                    yield row
+                ## END while chunks
+            if return_code == SQLITE_DONE:
+                err_ret = 1
+        finally:
+            # Not awaited, so it is also queued when the generator is closed
+            # by a cancelled or finished task. After close() the cursor has
+            # already been finalized by aio_close() and there is no worker.
+            if self.worker is not None:
+                self.post(aio_fetch_close, self.cursors, cursor)
+            if return_code_ret is not None:
+                return_code_ret.insert(0, err_ret)
+        return
+
+    # The worker thread. The Database session is only used here.
+    def run_worker(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                break
+            with self.running_lock:
+                if request.cancelled == 1:
+                    self.loop.call_soon_threadsafe(self.request_done, request, None, None)
+                    continue
+                self.running = request
+            result = None
+            exception = None
+            try:
+                result = request.func(self.db, *request.args)
+            except BaseException as err:
+                exception = err
+            with self.running_lock:
+                self.running = None
+            if request.future is not None:
+                self.loop.call_soon_threadsafe(self.request_done, request, result, exception)
+            ## END while requests
+        return None
+
+    # Called on the event loop when the worker has finished a request.
+    def request_done(self, request, result, exception):
+        self.slots.release()
+        if request.future.cancelled():
+            return None
+        if exception is not None:
+            request.future.set_exception(exception)
+        else:
+            request.future.set_result(result)
+        return None
+## END Class
@@ -323,6 +323,29 @@ SQLITE_PREPARE_PERSISTENT   =   0x01
 SQLITE_PREPARE_NORMALIZE    =   0x02
 SQLITE_PREPARE_NO_VTAB      =   0x04
 
+##
+## CAPI3REF: SQL Trace Event Codes
+## KEYWORDS: SQLITE_TRACE
+##
+## These constants identify classes of events that can be monitored
+## using the [sqlite3_trace_v2()] tracing logic.  The M argument
+## to [sqlite3_trace_v2(D,M,X,P)] is an OR-ed combination of one or more of
+## the following constants.  ^The first argument to the trace callback
+## is one of the following constants.
+##
+## [[SQLITE_TRACE_PROFILE]] <dt>SQLITE_TRACE_PROFILE</dt>
+## <dd>^An SQLITE_TRACE_PROFILE callback provides approximately the same
+## information as is provided by the [sqlite3_profile()] callback.
+## ^The P argument is a pointer to the [prepared statement] and the
+## X argument points to a 64-bit integer which is approximately
+## the number of nanoseconds that the prepared statement took to run.
+## ^The SQLITE_TRACE_PROFILE callback is invoked when the statement finishes.
+##
+SQLITE_TRACE_STMT       =   0x01
+SQLITE_TRACE_PROFILE    =   0x02
+SQLITE_TRACE_ROW        =   0x04
+SQLITE_TRACE_CLOSE      =   0x08
+
 """
 Global Const $SQLITE_ENCODING_UTF8      = 0 ; /* Database will be created if not exists with UTF8 encoding (default) */
 Global Const $SQLITE_ENCODING_UTF16     = 1 ; /* Database will be created if not exists with UTF16le encoding */